@@ -0,0 +1,230 @@
+"""
+Lookups/lookup_store.py
+
+Compiled lookup tables.
+
+The lookup modules (data_materials_residential.py, hvac_lookup.py, ...) are
+large dict literals; importing them compiles/unmarshals the whole literal in
+every process. `python -m Lookups.lookup_store` compiles the registered
+tables into SQLite files under Lookups/compiled/, one row per dict node:
+
+    nodes(parent, key, value)   parent/key: repr of the key path / key,
+                                value: pickled leaf, NULL for a nested level
+
+load_lookup() returns a read-only, dict-like LookupTable over such a file
+(nested levels come back as LookupTable views, leaves as plain Python
+objects, decoded on first access). The file is opened read-only and
+memory-mapped, so forked workers share its pages through the page cache.
+If the compiled file is missing or older than its source module, the
+module's dict is imported as before.
+"""
+
+import os
+import ast
+import pickle
+import sqlite3
+import logging
+import importlib
+import importlib.util
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMPILED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compiled")
+
+# name -> (module, attribute, key levels stored as separate rows)
+REGISTERED_LOOKUPS = {
+    "residential_materials_data": ("Lookups.data_materials_residential", "residential_materials_data", 1),
+    "non_residential_materials_data": ("Lookups.data_materials_non_residential", "non_residential_materials_data", 1),
+    # calibration_stage -> scenario -> building_function -> subtype -> age_range
+    "hvac_lookup": ("idf_objects.HVAC.hvac_lookup", "hvac_lookup", 5),
+}
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def _source_path(module_name: str) -> Optional[str]:
+    spec = importlib.util.find_spec(module_name)
+    return spec.origin if spec else None
+
+
+def _source_stamp(module_name: str) -> str:
+    path = _source_path(module_name)
+    if not path or not os.path.exists(path):
+        return ""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def compiled_path(name: str, compiled_dir: str = COMPILED_DIR) -> str:
+    return os.path.join(compiled_dir, f"{name}.sqlite")
+
+
+def compile_lookup(name: str, compiled_dir: str = COMPILED_DIR) -> str:
+    """
+    Import a registered lookup module and write its table to <compiled_dir>/<name>.sqlite.
+
+    Returns:
+        Path of the compiled file
+    """
+    module_name, attr, depth = REGISTERED_LOOKUPS[name]
+    data = getattr(importlib.import_module(module_name), attr)
+
+    os.makedirs(compiled_dir, exist_ok=True)
+    path = compiled_path(name, compiled_dir)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    rows = []
+
+    def walk(prefix: Tuple, node: Any, level: int):
+        for key, value in node.items():
+            if level < depth and isinstance(value, dict):
+                rows.append((repr(prefix), repr(key), None))
+                walk(prefix + (key,), value, level + 1)
+            else:
+                rows.append((repr(prefix), repr(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    walk((), data, 1)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+        # WITHOUT ROWID keeps the rows clustered by (parent, key), so a level reads contiguously
+        conn.execute("CREATE TABLE nodes (parent TEXT, key TEXT, pos INTEGER, value BLOB, "
+                     "PRIMARY KEY (parent, key)) WITHOUT ROWID")
+        conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                         [(parent, key, pos, value) for pos, (parent, key, value) in enumerate(rows)])
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("module", module_name),
+            ("attribute", attr),
+            ("source_stamp", _source_stamp(module_name)),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    logger.info(f"[INFO] Compiled lookup {name}: {len(rows)} nodes -> {path}")
+    return path
+
+
+class LookupTable(Mapping):
+    """
+    Read-only dict-like view of one level of a compiled lookup.
+
+    Keys iterate in the source dict's order. Leaf values are unpickled on
+    first access and kept for the life of the process.
+    """
+
+    def __init__(self, path: str, prefix: Tuple = (), _root: Optional["LookupTable"] = None):
+        self._path = path
+        self._prefix = prefix
+        self._prefix_repr = repr(prefix)
+        self._root = _root or self
+        self._cache: Dict[Any, Any] = {}
+        self._keys: Optional[list] = None
+        if _root is None:
+            self._conn: Optional[sqlite3.Connection] = None
+            self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        root = self._root
+        # connections are not carried across fork; each worker opens its own
+        if root._conn is None or root._pid != os.getpid():
+            root._conn = sqlite3.connect(f"file:{root._path}?mode=ro", uri=True, check_same_thread=False)
+            root._conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            root._pid = os.getpid()
+        return root._conn
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self._cache:
+            return self._cache[key]
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM nodes WHERE parent = ? AND key = ?", (self._prefix_repr, repr(key))
+            ).fetchone()
+        except TypeError:
+            row = None
+        if row is None:
+            raise KeyError(key)
+        value = LookupTable(self._path, self._prefix + (key,), self._root) if row[0] is None else pickle.loads(row[0])
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._cache:
+            return True
+        try:
+            return self._connection().execute(
+                "SELECT 1 FROM nodes WHERE parent = ? AND key = ?", (self._prefix_repr, repr(key))
+            ).fetchone() is not None
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._keys is None:
+            rows = self._connection().execute(
+                "SELECT key FROM nodes WHERE parent = ? ORDER BY pos", (self._prefix_repr,)
+            ).fetchall()
+            self._keys = [ast.literal_eval(k) for (k,) in rows]
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        """Plain nested dict copy (loads the whole level)"""
+        return {k: (v.to_dict() if isinstance(v, LookupTable) else v) for k, v in self.items()}
+
+    def __repr__(self) -> str:
+        return f"LookupTable({os.path.basename(self._path)!r}, prefix={self._prefix!r})"
+
+
+_LOADED: Dict[str, Any] = {}
+
+
+def load_lookup(name: str, compiled_dir: str = COMPILED_DIR) -> Any:
+    """
+    Registered lookup by name: a LookupTable over the compiled file if it is
+    current, otherwise the dict from the source module.
+    """
+    if name in _LOADED:
+        return _LOADED[name]
+    module_name, attr, _ = REGISTERED_LOOKUPS[name]
+    path = compiled_path(name, compiled_dir)
+    table = None
+    if os.path.exists(path):
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                stamp = conn.execute("SELECT value FROM meta WHERE name = 'source_stamp'").fetchone()
+            finally:
+                conn.close()
+            if stamp and stamp[0] == _source_stamp(module_name):
+                table = LookupTable(path)
+            else:
+                logger.warning(f"[WARN] Compiled lookup {path} is older than {module_name}; "
+                               f"using the module (rebuild with python -m Lookups.lookup_store)")
+        except sqlite3.Error as e:
+            logger.warning(f"[WARN] Could not open compiled lookup {path}: {e}")
+    if table is None:
+        table = getattr(importlib.import_module(module_name), attr)
+    _LOADED[name] = table
+    return table
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile lookup tables to SQLite")
+    parser.add_argument("names", nargs="*", help=f"Lookups to compile (default: all of {sorted(REGISTERED_LOOKUPS)})")
+    parser.add_argument("--out", default=COMPILED_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in args.names or REGISTERED_LOOKUPS:
+        compile_lookup(name, args.out)
+
+
+if __name__ == "__main__":
+    main()
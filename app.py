@@ -13,7 +13,8 @@ Endpoints:
        Stores these paths in the job config.
 
   2) POST /jobs/<job_id>/start
-     - Enqueues the job for execution (runs orchestrate_workflow in a background thread).
+     - Enqueues the job for execution (runs orchestrate_workflow in its own subprocess
+       once enough CPU slots and memory are free). Optional body: {"priority": <int>}.
 
   3) GET /jobs/<job_id>/logs
      - Streams the logs in real time from the job_manager's log queue.
@@ -27,6 +28,11 @@ Endpoints:
   6) GET /jobs/<job_id>/results
      - Example endpoint to list or fetch final simulation results in output/<job_id>,
        or you can adapt to zip & return them. 
+
+  7) POST /jobs/<job_id>/rerun
+     - Re-runs a finished (or failed/canceled) job with a new combined JSON.
+       Output stays in output/<job_id>; stages whose config and upstream
+       artifacts are unchanged are skipped (see orchestrator/checkpoints.py).
 """
 
 import logging
@@ -40,6 +46,9 @@ from flask import Flask, request, Response, jsonify
 from job_manager import (
     create_job,
     enqueue_job,
+    update_job_config,
+    reset_job,
+    recover_jobs,
     get_job,
     get_job_logs_queue,
     get_job_status,
@@ -56,6 +65,9 @@ from splitter import split_combined_json
 ###############################################################################
 app = Flask(__name__)
 
+# Re-queue jobs that were queued or running when the service last stopped
+recover_jobs()
+
 ###############################################################################
 # 1) CREATE JOB - POST /jobs
 ###############################################################################
@@ -107,9 +119,7 @@ def create_job_endpoint():
         "posted_data": posted_data
     }
 
-    job = get_job(job_id)
-    if job:
-        job["config"] = new_config
+    update_job_config(job_id, new_config)
 
     # 7) Return the job_id so the user can call /jobs/<job_id>/start
     return jsonify({"job_id": job_id}), 200
@@ -121,8 +131,8 @@ def create_job_endpoint():
 @app.route("/jobs/<job_id>/start", methods=["POST"])
 def start_job(job_id):
     """
-    Moves the job from CREATED => RUNNING (or QUEUED if concurrency is max).
-    The job_manager enqueue_job() will handle concurrency checks.
+    Moves the job from CREATED => QUEUED; the job_manager scheduler starts it
+    (=> RUNNING) as soon as its declared num_workers and memory fit.
 
     Response:
       {
@@ -134,8 +144,12 @@ def start_job(job_id):
     if not job:
         return jsonify({"error": "No such job_id"}), 404
 
+    # Optional {"priority": <int>} body; higher priority jobs are admitted first
+    body = request.get_json(silent=True) or {}
+    priority = body.get("priority")
+
     # Enqueue or start the job
-    enqueue_job(job_id)
+    enqueue_job(job_id, priority=priority)
 
     return jsonify({"message": "Job enqueued or running", "job_id": job_id}), 200
 
@@ -243,6 +257,43 @@ def get_job_results(job_id):
     }), 200
 
 
+###############################################################################
+# 7) RERUN JOB - POST /jobs/<job_id>/rerun
+###############################################################################
+@app.route("/jobs/<job_id>/rerun", methods=["POST"])
+def rerun_job(job_id):
+    """
+    Re-run a completed job with an edited combined JSON (same shape as POST /jobs).
+
+    The job keeps its job_id and output folder, so only the stages whose config
+    sections or upstream artifacts changed are executed again. The job is
+    enqueued immediately.
+
+    Response:
+      { "message": "Job re-enqueued", "job_id": "<the job_id>" }
+    """
+    if not request.is_json:
+        return jsonify({"error": "Expected JSON payload"}), 400
+
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "No such job_id"}), 404
+
+    posted_data = request.get_json()
+    cfg = job["config"]
+    job_subfolder = cfg.get("job_subfolder") or os.path.join(os.getcwd(), "user_configs", job_id)
+    new_config = dict(cfg, job_subfolder=job_subfolder, posted_data=posted_data)
+    if not reset_job(job_id, new_config):
+        return jsonify({"error": f"Job {job_id} is still {get_job_status(job_id)}"}), 409
+
+    # Only once the job is no longer queued or running may its config files change
+    os.makedirs(job_subfolder, exist_ok=True)
+    split_combined_json(posted_data, job_subfolder)
+
+    enqueue_job(job_id)
+    return jsonify({"message": "Job re-enqueued", "job_id": job_id}), 200
+
+
 ###############################################################################
 # MAIN - For local dev
 ###############################################################################
@@ -0,0 +1,202 @@
+"""
+batch_assignment.py
+
+Batch parameter draws for a whole building set.
+
+With strategy "B" the assign_* modules (geometry, lighting, equipment,
+DHW, HVAC, ventilation) pick every parameter with random.uniform from the
+global RNG, so a building's values depend on everything drawn before it and
+the picks end up in nested assigned_*_log dicts.
+
+A BatchAssignment draws the unit random numbers of all known parameters of
+all buildings up front as NumPy arrays, with a counter-based generator keyed
+on (building seed, category, parameter, draw number). Each value therefore
+depends only on its building's seed, not on the order or subset of
+buildings. While a batch is active, the assign_* modules call
+draw_uniform(), which maps the building's pre-drawn number onto the range
+they resolved (lookup + overrides):
+
+    value = min_val + u * (max_val - min_val)
+
+and records the pick in one tidy table per category (building_index,
+building_id, param_name, draw, min_val, max_val, unit_draw, assigned_value),
+written as assigned_params_<category>.csv. Without an active batch,
+draw_uniform() is random.uniform as before.
+"""
+
+import os
+import zlib
+import random
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Parameters each category draws with strategy "B"
+DRAWN_PARAMETERS = {
+    "geometry": ("perimeter_depth",),
+    "lighting": (
+        "lights_wm2", "parasitic_wm2", "tD", "tN",
+        "lights_fraction_radiant", "lights_fraction_visible",
+        "lights_fraction_replaceable", "lights_fraction_return_air",
+        "equip_fraction_radiant", "equip_fraction_lost",
+    ),
+    "equipment": (
+        "equip_wm2", "tD", "tN",
+        "equip_fraction_latent", "equip_fraction_radiant", "equip_fraction_lost",
+    ),
+    "dhw": (
+        "occupant_density_m2_per_person", "liters_per_person_per_day",
+        "default_tank_volume_liters", "default_heater_capacity_w", "setpoint_c",
+        "usage_split_factor", "peak_hours",
+        "sched_morning", "sched_peak", "sched_afternoon", "sched_evening",
+    ),
+    "hvac": (
+        "heating_day_setpoint", "heating_night_setpoint",
+        "cooling_day_setpoint", "cooling_night_setpoint",
+        "max_heating_supply_air_temp", "min_cooling_supply_air_temp",
+    ),
+    "ventilation": (
+        "infiltration_base_L_s_m2_10Pa", "year_factor", "fan_pressure",
+        "fan_total_efficiency", "f_ctrl", "hrv_eff", "hrv_lat_eff",
+    ),
+}
+
+TABLE_COLUMNS = [
+    "building_index", "building_id", "param_name", "draw",
+    "min_val", "max_val", "unit_draw", "assigned_value",
+]
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer on a uint64 array (wrapping arithmetic)"""
+    with np.errstate(over="ignore"):
+        z = x + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _parameter_key(category: str, param_name: str, draw: int) -> int:
+    return zlib.crc32(f"{category}:{param_name}:{draw}".encode())
+
+
+def unit_draws(seeds: Sequence[int], keys: Sequence[int]) -> np.ndarray:
+    """
+    Uniform [0, 1) numbers for every (seed, key) pair.
+
+    Returns:
+        Array of shape (len(seeds), len(keys))
+    """
+    seed_arr = np.asarray(seeds, dtype=np.int64).astype(np.uint64)[:, None]
+    key_arr = np.asarray(keys, dtype=np.uint64)[None, :]
+    z = _splitmix64(_splitmix64(seed_arr) ^ key_arr)
+    return (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+class BatchAssignment:
+    """
+    Pre-drawn unit numbers and the resulting parameter tables of a building set.
+
+    Args:
+        building_index: Index labels of the buildings (as used by idf_creation)
+        building_ids: Building IDs (ogc_fid) in the same order
+        seeds: Per-building seeds in the same order
+        parameters: Category -> parameter names to pre-draw
+    """
+
+    def __init__(
+        self,
+        building_index: Sequence[Any],
+        building_ids: Sequence[Any],
+        seeds: Sequence[int],
+        parameters: Optional[Dict[str, Iterable[str]]] = None
+    ):
+        self.building_index = list(building_index)
+        self.building_ids = list(building_ids)
+        self.seeds = np.asarray(seeds, dtype=np.int64)
+        self._position = {idx: pos for pos, idx in enumerate(self.building_index)}
+        self._columns: Dict[str, Dict[str, int]] = {}
+        self._unit: Dict[str, np.ndarray] = {}
+        for category, names in (parameters or DRAWN_PARAMETERS).items():
+            names = list(names)
+            self._columns[category] = {name: j for j, name in enumerate(names)}
+            self._unit[category] = unit_draws(self.seeds, [_parameter_key(category, n, 0) for n in names])
+        self._records: Dict[str, Dict[str, List[Any]]] = {}
+        self._current: Optional[int] = None
+        self._counts: Dict[tuple, int] = {}
+
+    @classmethod
+    def for_buildings(cls, df_buildings: pd.DataFrame, random_seed: int = 42) -> "BatchAssignment":
+        """Per-building seeds as in create_idfs_for_all_buildings (random_seed + index)"""
+        index = list(df_buildings.index)
+        if pd.api.types.is_integer_dtype(df_buildings.index):
+            seeds = [random_seed + int(idx) for idx in index]
+        else:
+            seeds = [random_seed + pos for pos in range(len(index))]
+        ids = df_buildings["ogc_fid"].tolist() if "ogc_fid" in df_buildings.columns else index
+        return cls(index, ids, seeds)
+
+    def set_building(self, building_index: Any):
+        """Select the building the following draws belong to"""
+        self._current = self._position[building_index]
+        self._counts = {}
+
+    def unit_draw(self, category: str, param_name: str) -> float:
+        pos = self._current
+        draw = self._counts.get((category, param_name), 0)
+        self._counts[(category, param_name)] = draw + 1
+        column = self._columns.get(category, {}).get(param_name)
+        if draw == 0 and column is not None:
+            return float(self._unit[category][pos, column])
+        # repeated or undeclared parameter: same generator, computed on demand
+        return float(unit_draws([self.seeds[pos]], [_parameter_key(category, param_name, draw)])[0, 0])
+
+    def draw(self, category: str, param_name: str, min_val: float, max_val: float) -> float:
+        u = self.unit_draw(category, param_name)
+        value = min_val + u * (max_val - min_val)
+        records = self._records.setdefault(category, {col: [] for col in TABLE_COLUMNS})
+        pos = self._current
+        for col, val in zip(TABLE_COLUMNS, (
+            self.building_index[pos], self.building_ids[pos], param_name,
+            self._counts[(category, param_name)] - 1, min_val, max_val, u, value,
+        )):
+            records[col].append(val)
+        return value
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        """One tidy table per category with the values drawn so far"""
+        return {category: pd.DataFrame(cols, columns=TABLE_COLUMNS) for category, cols in self._records.items()}
+
+    def write_tables(self, logs_base_dir: Optional[str]) -> List[str]:
+        out_dir = logs_base_dir or "output/assigned"
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for category, table in self.tables().items():
+            path = os.path.join(out_dir, f"assigned_params_{category}.csv")
+            table.to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+
+_ACTIVE: Optional[BatchAssignment] = None
+
+
+def activate(batch: Optional[BatchAssignment]):
+    """Route draw_uniform() through `batch` (None restores random.uniform)"""
+    global _ACTIVE
+    _ACTIVE = batch
+
+
+def active_batch() -> Optional[BatchAssignment]:
+    return _ACTIVE
+
+
+def draw_uniform(category: str, param_name: Optional[str], min_val: float, max_val: float) -> float:
+    """random.uniform(min_val, max_val), or the active batch's draw for the current building"""
+    if _ACTIVE is not None and _ACTIVE._current is not None and param_name:
+        return _ACTIVE.draw(category, param_name, min_val, max_val)
+    return random.uniform(min_val, max_val)
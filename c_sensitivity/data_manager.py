@@ -14,6 +14,8 @@ import json
 from datetime import datetime
 import warnings
 
+from parserr.comparison_index import ComparisonIndex, read_comparison_file
+
 warnings.filterwarnings('ignore', category=pd.errors.PerformanceWarning)
 
 
@@ -38,10 +40,37 @@ class SensitivityDataManager:
         self.modification_data = None
         self.building_metadata = pd.DataFrame()
         self.time_slice_config = None
+        self._comparison_index = None
         
         # Load building metadata if available
         self._load_building_metadata()
     
+    def get_comparison_index(self, refresh: bool = False) -> ComparisonIndex:
+        """
+        Get the manifest of comparison files.
+        
+        The manifest is checked against the directory on every call; when it is
+        missing or out of date (directories written before the manifest existed,
+        an interrupted transform, files added outside the writer) the changed
+        files are indexed from parquet footers.
+        """
+        if self._comparison_index is None:
+            self._comparison_index = ComparisonIndex(self.modified_parsed_path / "comparisons")
+        index = self._comparison_index
+        if index.comparison_dir.exists() and (refresh or index.is_stale()):
+            self.logger.info("Indexing comparison files (manifest missing or out of date)")
+            index.rebuild()
+        return index
+    
+    @staticmethod
+    def _time_bounds(time_slice_config: Optional[Dict[str, Any]]) -> Tuple[Any, Any]:
+        """Date range that can be pushed down to file/row-group selection"""
+        if not time_slice_config or not time_slice_config.get('enabled', False):
+            return None, None
+        if time_slice_config.get('slice_type') != 'custom':
+            return None, None
+        return time_slice_config.get('start_date'), time_slice_config.get('end_date')
+    
     def _load_building_metadata(self):
         """Load building metadata from registry"""
         registry_path = self.parsed_data_path / "metadata" / "building_registry.parquet"
@@ -493,16 +522,12 @@ class SensitivityDataManager:
         """Get list of available output variables"""
         outputs = set()
         
-        # Check comparison files first
+        # Check comparison manifest first
         comparison_path = self.modified_parsed_path / "comparisons"
         if comparison_path.exists():
-            for file_path in comparison_path.glob("var_*.parquet"):
-                # Extract variable name from filename
-                parts = file_path.stem.split('_')
-                building_part = next((i for i, p in enumerate(parts) if p.startswith('b')), -1)
-                if building_part > 0:
-                    variable_name = '_'.join(parts[1:building_part-2])
-                    outputs.add(variable_name)
+            entries = self.get_comparison_index().load()
+            if not entries.empty:
+                outputs.update(entries['variable_slug'].unique())
         
         # Also check base data
         if not outputs:
@@ -584,8 +609,7 @@ class SensitivityDataManager:
         # Check comparison files
         comparison_path = self.modified_parsed_path / "comparisons"
         if comparison_path.exists():
-            comparison_files = list(comparison_path.glob("var_*.parquet"))
-            status['has_comparison_files'] = len(comparison_files) > 0
+            status['has_comparison_files'] = not self.get_comparison_index().load().empty
             status['has_modified_results'] = status['has_comparison_files']
         
         # Check modifications
@@ -632,52 +656,25 @@ class SensitivityDataManager:
             'comparison_data': {}
         }
         
-        # Find all comparison files
-        pattern = f"var_*_{result_type}_*.parquet"
-        comparison_files = list(comparison_path.glob(pattern))
+        # Select files from the manifest instead of globbing and parsing names
+        start_time, end_time = self._time_bounds(time_slice_config)
+        selected = self.get_comparison_index().query(
+            frequency=result_type, variables=variables, start=start_time, end=end_time
+        )
         
-        if not comparison_files:
+        if selected.empty:
             self.logger.warning(f"No comparison files found for frequency: {result_type}")
             return {}
         
-        self.logger.info(f"Found {len(comparison_files)} comparison files")
+        self.logger.info(f"Found {len(selected)} comparison files")
         
-        # Group files by variable and building
         file_groups = {}
-        for file_path in comparison_files:
-            # Parse filename: var_{variable_name}_{unit}_{frequency}_b{building_id}.parquet
-            parts = file_path.stem.split('_')
-            if len(parts) >= 5 and parts[0] == 'var':
-                # Extract variable name (may contain underscores)
-                building_part = next((i for i, p in enumerate(parts) if p.startswith('b')), -1)
-                if building_part > 0:
-                    variable_name = '_'.join(parts[1:building_part-2])
-                    unit = parts[building_part-2]
-                    frequency = parts[building_part-1]
-                    building_id = parts[building_part][1:]  # Remove 'b' prefix
-                    
-                    if frequency == result_type:
-                        if variable_name not in file_groups:
-                            file_groups[variable_name] = []
-                        file_groups[variable_name].append({
-                            'path': file_path,
-                            'building_id': building_id,
-                            'unit': unit
-                        })
-        
-        # Filter by requested variables if specified
-        if variables:
-            filtered_groups = {}
-            for var in variables:
-                # Clean variable name more thoroughly - remove colons and brackets
-                var_clean = var.split('[')[0].strip().lower()
-                var_clean = var_clean.replace(':', '').replace('_', '')  # Remove colons and underscores
-                
-                for var_name, files in file_groups.items():
-                    var_name_clean = var_name.lower().replace('_', '')
-                    if var_clean in var_name_clean or var_name_clean in var_clean:
-                        filtered_groups[var_name] = files
-            file_groups = filtered_groups
+        for row in selected.itertuples(index=False):
+            file_groups.setdefault(row.variable_slug, []).append({
+                'path': row.path,
+                'building_id': row.building_id,
+                'unit': row.unit
+            })
         
         # Load data from comparison files
         all_base_data = []
@@ -690,7 +687,7 @@ class SensitivityDataManager:
             
             for file_info in file_list:
                 try:
-                    df = pd.read_parquet(file_info['path'])
+                    df = read_comparison_file(file_info['path'], start=start_time, end=end_time)
                     
                     # Apply time slicing if configured
                     if time_slice_config and time_slice_config.get('enabled', False) and 'timestamp' in df.columns:
@@ -847,15 +844,13 @@ class SensitivityDataManager:
                                    building_id: Optional[str] = None,
                                    frequency: str = 'daily') -> pd.DataFrame:
         """Load comparison data for a specific variable across all variants"""
-        comparison_path = self.modified_parsed_path / "comparisons"
-        
-        # Build file pattern
-        if building_id:
-            pattern = f"var_{variable_name}_*_{frequency}_b{building_id}.parquet"
-        else:
-            pattern = f"var_{variable_name}_*_{frequency}_*.parquet"
-        
-        files = list(comparison_path.glob(pattern))
+        selected = self.get_comparison_index().query(
+            frequency=frequency,
+            variables=[variable_name],
+            building_ids=[building_id] if building_id else None,
+            exact=True
+        )
+        files = list(selected['path'])
         
         if not files:
             self.logger.warning(f"No comparison files found for variable: {variable_name}")
@@ -864,7 +859,7 @@ class SensitivityDataManager:
         dfs = []
         for file_path in files:
             try:
-                df = pd.read_parquet(file_path)
+                df = read_comparison_file(file_path)
                 dfs.append(df)
             except Exception as e:
                 self.logger.warning(f"Failed to load {file_path}: {e}")
@@ -878,34 +873,28 @@ class SensitivityDataManager:
     
     def get_variant_sensitivity_data(self, frequency: str = 'daily') -> pd.DataFrame:
         """Get data formatted for variant-based sensitivity analysis"""
-        comparison_path = self.modified_parsed_path / "comparisons"
-        
         # Load modification tracking
         if self.modification_data is None:
             self.load_modification_tracking()
         
         # Find all comparison files
-        pattern = f"var_*_{frequency}_*.parquet"
-        comparison_files = list(comparison_path.glob(pattern))
+        selected = self.get_comparison_index().query(frequency=frequency)
         
-        if not comparison_files:
+        if selected.empty:
             self.logger.warning("No comparison files found")
             return pd.DataFrame()
         
         sensitivity_data = []
         
-        for file_path in comparison_files:
+        for entry in selected.itertuples(index=False):
+            file_path = entry.path
             try:
-                # Parse filename
-                parts = file_path.stem.split('_')
-                building_part = next((i for i, p in enumerate(parts) if p.startswith('b')), -1)
-                
-                if building_part > 0:
-                    variable_name = '_'.join(parts[1:building_part-2])
-                    building_id = parts[building_part][1:]
+                if entry.n_variants > 0:
+                    variable_name = entry.variable_slug
+                    building_id = entry.building_id
                     
                     # Load comparison data
-                    df = pd.read_parquet(file_path)
+                    df = read_comparison_file(file_path)
                     
                     # Get variant columns
                     variant_cols = [col for col in df.columns if col.startswith('variant_') and col.endswith('_value')]
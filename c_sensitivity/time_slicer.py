@@ -11,6 +11,8 @@ from typing import Dict, List, Optional, Union, Tuple
 from datetime import datetime
 import logging
 
+from calendar_index import row_mask
+
 
 class TimeSlicer:
     """Handles time-based filtering of simulation data for sensitivity analysis"""
@@ -41,139 +43,28 @@ class TimeSlicer:
         if not time_config.get('enabled', False):
             return df
         
-        # Ensure datetime column is datetime type
-        if datetime_col in df.columns:
-            df = df.copy()
-            df[datetime_col] = pd.to_datetime(df[datetime_col])
-        else:
+        if datetime_col not in df.columns:
             self.logger.warning(f"DateTime column '{datetime_col}' not found. Returning unfiltered data.")
             return df
         
         slice_type = time_config.get('slice_type', 'none')
-        
-        if slice_type == 'peak_months':
-            return self._filter_peak_months(df, time_config, datetime_col)
-        elif slice_type == 'time_of_day':
-            return self._filter_time_of_day(df, time_config, datetime_col)
-        elif slice_type == 'day_of_week':
-            return self._filter_day_of_week(df, time_config, datetime_col)
-        elif slice_type == 'custom':
-            return self._filter_custom(df, time_config, datetime_col)
-        elif slice_type == 'combined':
-            return self._filter_combined(df, time_config, datetime_col)
-        else:
+        if slice_type not in ('peak_months', 'time_of_day', 'day_of_week', 'custom', 'combined'):
             return df
-    
-    def _filter_peak_months(self, 
-                           df: pd.DataFrame,
-                           config: Dict,
-                           datetime_col: str) -> pd.DataFrame:
-        """Filter data for peak cooling or heating months"""
-        season = config.get('season', 'cooling')
-        
-        if season == 'cooling':
-            months = config.get('peak_cooling_months', self.default_peak_cooling_months)
-        elif season == 'heating':
-            months = config.get('peak_heating_months', self.default_peak_heating_months)
-        else:
-            # Both seasons
-            cooling_months = config.get('peak_cooling_months', self.default_peak_cooling_months)
-            heating_months = config.get('peak_heating_months', self.default_peak_heating_months)
-            months = cooling_months + heating_months
-        
-        mask = df[datetime_col].dt.month.isin(months)
-        filtered_df = df[mask].copy()
-        
-        self.logger.info(f"Filtered to {len(filtered_df)} records for months: {months}")
-        return filtered_df
-    
-    def _filter_time_of_day(self,
-                           df: pd.DataFrame,
-                           config: Dict,
-                           datetime_col: str) -> pd.DataFrame:
-        """Filter data for specific hours of the day"""
-        peak_hours = config.get('peak_hours', self.default_peak_hours)
-        
-        # Handle different hour specifications
-        if isinstance(peak_hours, dict):
-            # e.g., {"start": 14, "end": 17}
-            start_hour = peak_hours.get('start', 14)
-            end_hour = peak_hours.get('end', 17)
-            mask = (df[datetime_col].dt.hour >= start_hour) & (df[datetime_col].dt.hour <= end_hour)
-        else:
-            # List of specific hours
-            mask = df[datetime_col].dt.hour.isin(peak_hours)
-        
-        filtered_df = df[mask].copy()
-        
-        self.logger.info(f"Filtered to {len(filtered_df)} records for peak hours")
-        return filtered_df
-    
-    def _filter_day_of_week(self,
-                           df: pd.DataFrame,
-                           config: Dict,
-                           datetime_col: str) -> pd.DataFrame:
-        """Filter for weekends or weekdays"""
-        analyze_weekends = config.get('analyze_weekends', True)
-        
-        # Monday=0, Sunday=6
-        if analyze_weekends:
-            mask = df[datetime_col].dt.dayofweek.isin([5, 6])  # Saturday, Sunday
-            day_type = "weekends"
-        else:
-            mask = df[datetime_col].dt.dayofweek.isin([0, 1, 2, 3, 4])  # Monday-Friday
-            day_type = "weekdays"
-        
-        filtered_df = df[mask].copy()
-        
-        self.logger.info(f"Filtered to {len(filtered_df)} records for {day_type}")
-        return filtered_df
-    
-    def _filter_custom(self,
-                      df: pd.DataFrame,
-                      config: Dict,
-                      datetime_col: str) -> pd.DataFrame:
-        """Apply custom date range filtering"""
-        start_date = config.get('start_date')
-        end_date = config.get('end_date')
-        
-        if start_date:
-            start_date = pd.to_datetime(start_date)
-            df = df[df[datetime_col] >= start_date]
-        
-        if end_date:
-            end_date = pd.to_datetime(end_date)
-            df = df[df[datetime_col] <= end_date]
         
-        self.logger.info(f"Filtered to custom date range: {len(df)} records")
-        return df
-    
-    def _filter_combined(self,
-                        df: pd.DataFrame,
-                        config: Dict,
-                        datetime_col: str) -> pd.DataFrame:
-        """Apply multiple filters combined"""
-        # Start with full dataframe
-        filtered_df = df.copy()
-        
-        # Apply month filter if specified
-        if 'months' in config:
-            months = config['months']
-            filtered_df = filtered_df[filtered_df[datetime_col].dt.month.isin(months)]
-        
-        # Apply hour filter if specified
-        if 'hours' in config:
-            hours = config['hours']
-            filtered_df = filtered_df[filtered_df[datetime_col].dt.hour.isin(hours)]
-        
-        # Apply day of week filter if specified
-        if 'day_of_week' in config:
-            if config['day_of_week'] == 'weekends':
-                filtered_df = filtered_df[filtered_df[datetime_col].dt.dayofweek.isin([5, 6])]
-            elif config['day_of_week'] == 'weekdays':
-                filtered_df = filtered_df[filtered_df[datetime_col].dt.dayofweek.isin([0, 1, 2, 3, 4])]
+        # Masks come from the shared calendar index, so frames sharing a time
+        # axis (variables, variants) parse their timestamps only once
+        config = {
+            'peak_cooling_months': self.default_peak_cooling_months,
+            'peak_heating_months': self.default_peak_heating_months,
+            'peak_hours': self.default_peak_hours,
+            **time_config
+        }
+        df = df.copy()
+        df[datetime_col] = pd.to_datetime(df[datetime_col])
+        mask = row_mask(df[datetime_col], config, default_season='cooling')
+        filtered_df = df[mask]
         
-        self.logger.info(f"Combined filtering resulted in {len(filtered_df)} records")
+        self.logger.info(f"Filtered to {len(filtered_df)} records for {slice_type} slice")
         return filtered_df
     
     def get_time_slice_summary(self,
@@ -0,0 +1,248 @@
+"""
+c_surrogate/active_learning.py
+
+Uncertainty-aware active learning: choose which variants to simulate.
+
+Instead of sampling all variants up front, a large candidate pool is
+sampled once (ScenarioGenerator design matrix) and only the most
+informative candidates are simulated:
+
+  1. simulate a small initial batch,
+  2. fit a random-forest surrogate on everything simulated so far and
+     measure its accuracy from out-of-bag predictions,
+  3. stop if every target reaches `target_r2` (or the round / simulation
+     budget is used up),
+  4. score the remaining pool through
+     SurrogateOutputManager.generate_uncertainty_estimates (per-tree spread)
+     by 'uncertainty' or 'expected_improvement', simulate the top
+     `batch_size` candidates, and go back to 2.
+
+The loop does not know how variants are simulated: `simulate_fn` receives
+pool row indices and returns one row of targets per simulated
+(pool_index, building_id). See orchestrator/active_learning_step.py for the
+modification -> simulation -> parsing implementation.
+"""
+
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+
+from c_surrogate.surrogate_output_manager import SurrogateOutputManager
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ACTIVE_LEARNING_CONFIG = {
+    'pool_size': 2000,                  # candidate variants sampled once
+    'sampling_method': 'latin_hypercube',
+    'initial_samples': 20,              # variants simulated before the first fit
+    'batch_size': 10,                   # top-k variants simulated per round
+    'max_rounds': 10,
+    'max_simulations': None,            # cap on simulated variants (None = pool size)
+    'target_r2': 0.9,                   # stop when every target reaches this OOB R²
+    'acquisition': 'uncertainty',       # 'uncertainty' or 'expected_improvement'
+    'objective_target': None,           # target minimized by expected_improvement (default: first)
+    'xi': 0.01,                         # expected-improvement exploration margin
+    'n_estimators': 200,
+    'seed': 42,
+}
+
+
+class ActiveLearningLoop:
+    """
+    Active learning over a fixed candidate pool.
+
+    Args:
+        pool: Candidate features, one row per variant (e.g. DesignMatrix values
+              with discrete parameters as level codes)
+        simulate_fn: indices -> DataFrame with 'pool_index', optional
+                     'building_id', and one column per target
+        config: Overrides for DEFAULT_ACTIVE_LEARNING_CONFIG
+    """
+
+    def __init__(self, pool: pd.DataFrame,
+                 simulate_fn: Callable[[List[int]], pd.DataFrame],
+                 config: Optional[Dict[str, Any]] = None):
+        self.pool = pool.reset_index(drop=True)
+        self.simulate_fn = simulate_fn
+        self.config = {**DEFAULT_ACTIVE_LEARNING_CONFIG, **(config or {})}
+        self.rng = np.random.default_rng(self.config['seed'])
+
+        self.results = pd.DataFrame()       # simulated rows (pool_index, building_id, targets)
+        self.tried: set = set()             # pool indices sent to simulate_fn
+        self.target_columns: List[str] = []
+        self.building_ids: List[str] = []
+        self.history: List[Dict[str, Any]] = []
+        self.model = None
+
+    # -------------------------------------------------------------------------
+    # Features
+    # -------------------------------------------------------------------------
+    def _features(self, pool_index: np.ndarray, building_ids: Optional[np.ndarray]) -> pd.DataFrame:
+        """Pool parameters for the given rows, plus a one-hot building indicator."""
+        X = self.pool.iloc[pool_index].reset_index(drop=True)
+        if len(self.building_ids) > 1:
+            for b in self.building_ids:
+                X[f'building_{b}'] = (building_ids == b).astype(float)
+        return X
+
+    def _training_data(self):
+        building_ids = (self.results['building_id'].astype(str).to_numpy()
+                        if 'building_id' in self.results.columns else None)
+        X = self._features(self.results['pool_index'].to_numpy(), building_ids)
+        Y = self.results[self.target_columns].to_numpy(dtype=float)
+        return X, Y
+
+    # -------------------------------------------------------------------------
+    # Surrogate
+    # -------------------------------------------------------------------------
+    def fit_surrogate(self) -> Dict[str, float]:
+        """Fit the surrogate on all simulated rows; returns OOB R² per target."""
+        X, Y = self._training_data()
+        self.model = RandomForestRegressor(
+            n_estimators=int(self.config['n_estimators']), oob_score=True,
+            random_state=int(self.config['seed']), n_jobs=-1
+        )
+        self.model.fit(X, Y[:, 0] if Y.shape[1] == 1 else Y)
+
+        oob = np.asarray(self.model.oob_prediction_).reshape(len(Y), -1)
+        valid = np.all(np.isfinite(oob), axis=1)
+        if valid.sum() < 2:
+            return {t: float('nan') for t in self.target_columns}
+        return {
+            target: float(r2_score(Y[valid, i], oob[valid, i]))
+            for i, target in enumerate(self.target_columns)
+        }
+
+    def score_candidates(self, candidates: np.ndarray) -> np.ndarray:
+        """
+        Acquisition score per candidate pool index (higher = simulate first).
+
+        Predictions and per-tree spread come from
+        SurrogateOutputManager.generate_uncertainty_estimates; with several
+        buildings each candidate is scored for every building and averaged.
+        """
+        X, _ = self._training_data()
+        n_buildings = max(1, len(self.building_ids))
+        pool_index = np.repeat(candidates, n_buildings)
+        building_ids = (np.tile(np.array(self.building_ids), len(candidates))
+                        if self.building_ids else None)
+        features = self._features(pool_index, building_ids)
+
+        manager = SurrogateOutputManager({
+            'model': self.model,
+            'feature_columns': list(X.columns),
+            'target_columns': self.target_columns,
+        })
+        estimates = manager.generate_uncertainty_estimates(
+            features, method='bootstrap', n_iterations=len(self.model.estimators_)
+        )
+
+        if self.config['acquisition'] == 'expected_improvement':
+            target = self.config['objective_target'] or self.target_columns[0]
+            mu = estimates[f'{target}_prediction'].to_numpy()
+            sigma = estimates[f'{target}_std'].to_numpy()
+            best = self.results.groupby('pool_index')[target].mean().min()
+            improvement = best - mu - float(self.config['xi'])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = np.where(sigma > 0, improvement / sigma, 0.0)
+            score = np.where(sigma > 0, improvement * norm.cdf(z) + sigma * norm.pdf(z),
+                             np.maximum(improvement, 0.0))
+        else:
+            # Spread relative to each target's observed variability, summed over targets
+            scale = self.results[self.target_columns].std().replace(0, 1.0).fillna(1.0).to_numpy()
+            stds = estimates[[f'{t}_std' for t in self.target_columns]].to_numpy()
+            score = (stds / scale).sum(axis=1)
+
+        return score.reshape(len(candidates), n_buildings).mean(axis=1)
+
+    # -------------------------------------------------------------------------
+    # Loop
+    # -------------------------------------------------------------------------
+    def _simulate(self, indices: List[int]) -> int:
+        self.tried.update(int(i) for i in indices)
+        new_rows = self.simulate_fn([int(i) for i in indices])
+        if new_rows is None or new_rows.empty:
+            return 0
+        if not self.target_columns:
+            self.target_columns = [c for c in new_rows.columns if c not in ('pool_index', 'building_id')]
+        if 'building_id' in new_rows.columns:
+            for b in new_rows['building_id'].astype(str).unique():
+                if b not in self.building_ids:
+                    self.building_ids.append(b)
+        self.results = pd.concat([self.results, new_rows], ignore_index=True)
+        return new_rows['pool_index'].nunique()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the loop until the target accuracy or a budget is reached.
+
+        Returns:
+            Dictionary with history (one row per round), the final model,
+            simulated results, simulated pool indices and the stop reason
+        """
+        cfg = self.config
+        max_simulations = int(cfg['max_simulations'] or len(self.pool))
+        n_initial = min(int(cfg['initial_samples']), len(self.pool), max_simulations)
+        batch = self.rng.choice(len(self.pool), size=n_initial, replace=False).tolist()
+        stop_reason = 'max_rounds'
+
+        logger.info(f"[ActiveLearning] Pool of {len(self.pool)} candidates; "
+                    f"{n_initial} initial, {cfg['batch_size']} per round, "
+                    f"target R²={cfg['target_r2']}, acquisition={cfg['acquisition']}")
+
+        for round_idx in range(int(cfg['max_rounds'])):
+            start = time.perf_counter()
+            n_new = self._simulate(batch)
+            if self.results.empty or not self.target_columns:
+                stop_reason = 'no_simulation_results'
+                break
+
+            r2 = self.fit_surrogate()
+            min_r2 = min(r2.values()) if r2 else float('nan')
+            n_simulated = self.results['pool_index'].nunique()
+            self.history.append({
+                'round': round_idx,
+                'n_new': n_new,
+                'n_simulated': n_simulated,
+                'min_r2': min_r2,
+                **{f'r2_{t}': v for t, v in r2.items()},
+                'seconds': time.perf_counter() - start,
+            })
+            logger.info(f"[ActiveLearning] Round {round_idx}: {n_simulated} variants simulated, "
+                        f"OOB R² min={min_r2:.3f}")
+
+            if np.isfinite(min_r2) and min_r2 >= cfg['target_r2']:
+                stop_reason = 'target_accuracy_reached'
+                break
+            remaining_budget = max_simulations - len(self.tried)
+            candidates = np.setdiff1d(np.arange(len(self.pool)), np.fromiter(self.tried, dtype=int))
+            if remaining_budget <= 0:
+                stop_reason = 'simulation_budget_used'
+                break
+            if len(candidates) == 0:
+                stop_reason = 'pool_exhausted'
+                break
+            if round_idx == int(cfg['max_rounds']) - 1:
+                break
+
+            k = min(int(cfg['batch_size']), remaining_budget, len(candidates))
+            scores = self.score_candidates(candidates)
+            batch = candidates[np.argsort(-scores, kind='stable')[:k]].tolist()
+
+        logger.info(f"[ActiveLearning] Stopped ({stop_reason}) after {len(self.tried)} "
+                    f"of {len(self.pool)} candidates")
+        return {
+            'history': pd.DataFrame(self.history),
+            'model': self.model,
+            'results': self.results,
+            'simulated_indices': sorted(self.tried),
+            'target_columns': self.target_columns,
+            'stop_reason': stop_reason,
+        }
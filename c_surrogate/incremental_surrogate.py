@@ -0,0 +1,501 @@
+"""
+c_surrogate/incremental_surrogate.py
+
+Incremental surrogate updates from new simulation batches.
+
+build_surrogate_from_job rebuilds the surrogate from scratch on every call.
+With `incremental.enabled` in the surrogate config it delegates here instead:
+
+  - the preprocessed (unnormalized) features and targets are persisted in a
+    FeatureTargetStore next to the model versions,
+  - when the job outputs and the extraction/preprocessing config are
+    unchanged, the active model version is returned without any work,
+  - otherwise only rows whose ids are not in the store are appended, and the
+    active model is warm-started on the grown store: tree ensembles and
+    boosted models get additional trees/rounds, MLPs a few partial_fit
+    epochs, and per-output models (MultiOutputRegressor) are refit only for
+    the outputs whose accuracy on the new rows has degraded,
+  - every update is saved as a new model version and activated through
+    SurrogateOutputManager.manage_model_versions.
+
+A full rebuild is done when there is no store or active version yet, when
+the feature/target columns change, or when the new batch is large compared
+to the store.
+
+Usage:
+    sur_cfg['incremental'] = {'enabled': True}
+    result = build_surrogate_from_job(job_output_dir, sur_cfg, output_dir)
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.base import clone
+from sklearn.metrics import r2_score, mean_absolute_error
+from sklearn.multioutput import MultiOutputRegressor
+
+from c_surrogate.surrogate_data_extractor import SurrogateDataExtractor
+from c_surrogate.surrogate_data_preprocessor import SurrogateDataPreprocessor
+from c_surrogate.surrogate_output_manager import SurrogateOutputManager
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_INCREMENTAL_CONFIG = {
+    'enabled': False,
+    'store_dir': None,              # default: <output_dir>/feature_store
+    'min_new_estimators': 10,       # trees / boosting rounds added per update
+    'refit_r2_threshold': 0.9,      # refit an output if its R² on the new rows is below this
+    'mlp_epochs': 5,                # partial_fit passes over the store for MLPs
+    'full_rebuild_fraction': 0.5,   # rebuild if the batch exceeds this fraction of the store
+}
+
+# Files the extractor reads; anything else in the job folders does not matter
+_SOURCE_SUFFIXES = ('.parquet', '.csv')
+
+
+###############################################################################
+# Feature/target store
+###############################################################################
+
+class FeatureTargetStore:
+    """
+    Persisted preprocessed features and targets (one row per id combination).
+
+    Layout:
+        <store_dir>/features.parquet
+        <store_dir>/targets.parquet
+        <store_dir>/store_meta.json   (columns, source fingerprint, model version)
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = Path(store_dir)
+        self.features_path = self.store_dir / 'features.parquet'
+        self.targets_path = self.store_dir / 'targets.parquet'
+        self.meta_path = self.store_dir / 'store_meta.json'
+
+    def exists(self) -> bool:
+        return self.features_path.exists() and self.targets_path.exists() and self.meta_path.exists()
+
+    def load_meta(self) -> Dict[str, Any]:
+        if not self.meta_path.exists():
+            return {}
+        with open(self.meta_path, 'r') as f:
+            return json.load(f)
+
+    def load(self) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        return (pd.read_parquet(self.features_path),
+                pd.read_parquet(self.targets_path),
+                self.load_meta())
+
+    def save(self, features: pd.DataFrame, targets: pd.DataFrame, meta: Dict[str, Any]):
+        """Write the store; each file is replaced atomically."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        for df, path in ((features, self.features_path), (targets, self.targets_path)):
+            tmp_path = path.with_suffix('.tmp')
+            df.reset_index(drop=True).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        self.save_meta(meta)
+
+    def save_meta(self, meta: Dict[str, Any]):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({**meta, 'updated_at': datetime.now().isoformat()}, f, indent=2, default=str)
+        os.replace(tmp_path, self.meta_path)
+
+    @staticmethod
+    def split_new_rows(stored: pd.DataFrame, features: pd.DataFrame, targets: pd.DataFrame,
+                       id_cols: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Rows of features/targets whose id combination is not in the store."""
+        keys = stored[id_cols].drop_duplicates().astype(str)
+        candidate = features[id_cols].astype(str)
+        flags = candidate.merge(keys, on=id_cols, how='left', indicator=True)['_merge']
+        is_new = (flags == 'left_only').to_numpy()
+        return features[is_new], targets[is_new]
+
+
+def fingerprint_sources(paths: Dict[str, Path], config: Any) -> str:
+    """Hash of the extractor's input files (path, size, mtime) and config."""
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode())
+    for name, root in sorted(paths.items()):
+        if not root.exists():
+            continue
+        for dirpath, _, names in sorted(os.walk(root)):
+            for file_name in sorted(names):
+                if not file_name.endswith(_SOURCE_SUFFIXES):
+                    continue
+                stat = os.stat(os.path.join(dirpath, file_name))
+                rel = os.path.relpath(os.path.join(dirpath, file_name), root)
+                digest.update(f"{name}/{rel}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+###############################################################################
+# Warm-start
+###############################################################################
+
+def _estimator_family(estimator) -> str:
+    """Rough family of a fitted estimator, used to pick the update strategy."""
+    module = type(estimator).__module__
+    if module.startswith('xgboost'):
+        return 'xgboost'
+    if module.startswith('lightgbm'):
+        return 'lightgbm'
+    if module.startswith('catboost'):
+        return 'catboost'
+    if hasattr(estimator, 'partial_fit') and hasattr(estimator, 'hidden_layer_sizes'):
+        return 'neural_network'
+    if hasattr(estimator, 'warm_start') and hasattr(estimator, 'n_estimators'):
+        return 'tree_ensemble'
+    return 'other'
+
+
+def _update_estimator(estimator, X_all: np.ndarray, y_all: np.ndarray,
+                      n_new_rows: int, cfg: Dict[str, Any]) -> Tuple[Any, str]:
+    """
+    Update one fitted estimator with the grown training set.
+
+    Returns:
+        (updated estimator, method used)
+    """
+    family = _estimator_family(estimator)
+    n_total = len(X_all)
+
+    if family in ('tree_ensemble', 'xgboost', 'lightgbm', 'catboost'):
+        n_current = int(getattr(estimator, 'n_estimators', None) or 100)
+        n_add = max(int(cfg['min_new_estimators']), int(np.ceil(n_current * n_new_rows / n_total)))
+
+        if family == 'tree_ensemble':
+            estimator.set_params(warm_start=True, n_estimators=n_current + n_add)
+            estimator.fit(X_all, y_all)
+        elif family == 'xgboost':
+            booster = estimator.get_booster()
+            estimator.set_params(n_estimators=n_add)
+            estimator.fit(X_all, y_all, xgb_model=booster)
+        elif family == 'lightgbm':
+            booster = estimator.booster_
+            estimator.set_params(n_estimators=n_add)
+            estimator.fit(X_all, y_all, init_model=booster)
+        else:
+            estimator.fit(X_all, y_all, init_model=estimator.copy())
+        return estimator, f'warm_start(+{n_add})'
+
+    if family == 'neural_network':
+        # partial_fit has no validation split, so early stopping is turned off
+        # (a model trained with it has no best_loss_ to continue from)
+        if getattr(estimator, 'early_stopping', False):
+            estimator.set_params(early_stopping=False)
+            estimator.best_loss_ = min(estimator.loss_curve_)
+        for _ in range(int(cfg['mlp_epochs'])):
+            estimator.partial_fit(X_all, y_all)
+        return estimator, f"partial_fit(x{int(cfg['mlp_epochs'])})"
+
+    # Linear models and anything unknown are cheap enough to refit
+    refit = clone(estimator)
+    refit.fit(X_all, y_all)
+    return refit, 'refit'
+
+
+def warm_start_model(model, X_all: np.ndarray, Y_all: np.ndarray,
+                     X_new: np.ndarray, Y_new: np.ndarray,
+                     target_cols: List[str], cfg: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Warm-start a fitted surrogate on the grown training set.
+
+    For MultiOutputRegressor models each output is handled separately and is
+    only updated when its R² on the new rows is below refit_r2_threshold, so
+    outputs the new batch does not affect keep their estimator unchanged.
+
+    Args:
+        model: Fitted surrogate (active version)
+        X_all, Y_all: Store including the new rows (already scaled)
+        X_new, Y_new: New rows only (already scaled)
+        target_cols: Target names (columns of Y)
+        cfg: Incremental configuration
+
+    Returns:
+        (updated model, info with the method per output and R² on the new rows)
+    """
+    single_target = Y_all.shape[1] == 1
+    fit_target = Y_all.ravel() if single_target else Y_all
+    n_new = len(X_new)
+
+    if isinstance(model, MultiOutputRegressor):
+        methods = {}
+        for i, target in enumerate(target_cols):
+            estimator = model.estimators_[i]
+            r2_before = r2_score(Y_new[:, i], estimator.predict(X_new)) if n_new > 1 else np.nan
+            if np.isfinite(r2_before) and r2_before >= cfg['refit_r2_threshold']:
+                methods[target] = 'unchanged'
+                continue
+            model.estimators_[i], methods[target] = _update_estimator(
+                estimator, X_all, Y_all[:, i], n_new, cfg
+            )
+    else:
+        model, method = _update_estimator(model, X_all, fit_target, n_new, cfg)
+        methods = {target: method for target in target_cols}
+
+    return model, {'methods': methods}
+
+
+def _new_batch_metrics(model, X_new: np.ndarray, Y_new: np.ndarray,
+                       target_cols: List[str]) -> Dict[str, Dict[str, float]]:
+    """R² and MAE per target on the new rows."""
+    if len(X_new) < 2:
+        return {}
+    pred = np.asarray(model.predict(X_new)).reshape(len(X_new), -1)
+    return {
+        target: {
+            'r2': float(r2_score(Y_new[:, i], pred[:, i])),
+            'mae': float(mean_absolute_error(Y_new[:, i], pred[:, i]))
+        }
+        for i, target in enumerate(target_cols)
+    }
+
+
+###############################################################################
+# Entry point
+###############################################################################
+
+def _result_from_version(active: Dict[str, Any], output_config: Dict[str, Any], tracker,
+                         n_samples: int, extraction_summary: Dict[str, Any]) -> Dict[str, Any]:
+    """build_surrogate_from_job-style result for a saved model version."""
+    metadata = active['metadata']
+    model_artifacts = {
+        'model': active['model'],
+        'feature_columns': metadata.get('feature_columns', []),
+        'target_columns': metadata.get('target_columns', []),
+        'metadata': metadata,
+        'scaler': active.get('scaler'),
+        'model_path': metadata.get('model_path')
+    }
+    output_manager = SurrogateOutputManager(
+        model_artifacts, {**output_config, 'version': active['version'].lstrip('v')}, tracker
+    )
+    return {
+        'model': active['model'],
+        'output_manager': output_manager,
+        'predict_function': output_manager.generate_prediction_interface('function'),
+        'metadata': metadata,
+        'validation_results': None,
+        'extraction_summary': extraction_summary,
+        'preprocessing_summary': {
+            'n_features': len(model_artifacts['feature_columns']),
+            'n_targets': len(model_artifacts['target_columns']),
+            'n_samples': n_samples
+        }
+    }
+
+
+def _full_rebuild(job_output_dir: str, sur_cfg: Dict[str, Any], output_dir: str,
+                  tracker, store: FeatureTargetStore, manager: SurrogateOutputManager,
+                  source_fingerprint: str, reason: str) -> Dict[str, Any]:
+    """Build from scratch, save it as a new active version and seed the store."""
+    from c_surrogate.unified_surrogate import build_surrogate_from_job
+
+    logger.info(f"[Surrogate] Full rebuild ({reason})")
+    version = manager.manage_model_versions(output_dir, 'next')
+
+    rebuild_cfg = {
+        **sur_cfg,
+        'incremental': {**sur_cfg.get('incremental', {}), 'enabled': False},
+        'output_management': {**sur_cfg.get('output_management', {}), 'version': version},
+    }
+    result = build_surrogate_from_job(job_output_dir, rebuild_cfg, output_dir, tracker)
+    result['output_manager'].manage_model_versions(output_dir, 'activate', version)
+
+    metadata = result['metadata']
+    id_cols = list(dict.fromkeys(
+        c for c in result['features'].columns if c not in metadata['feature_columns']
+    ))
+    store.save(result['features'], result['targets'], {
+        'id_columns': id_cols,
+        'feature_columns': metadata['feature_columns'],
+        'target_columns': metadata['target_columns'],
+        'source_fingerprint': source_fingerprint,
+        'model_version': f"v{version}",
+        'n_rows': len(result['features'])
+    })
+    return result
+
+
+def update_surrogate_incremental(
+    job_output_dir: str,
+    sur_cfg: Dict[str, Any],
+    output_dir: str = None,
+    tracker: Optional['SurrogatePipelineTracker'] = None
+) -> Dict[str, Any]:
+    """
+    Refresh the surrogate from new simulation batches instead of rebuilding it.
+
+    Args:
+        job_output_dir: Job output directory containing all parquet files
+        sur_cfg: Surrogate configuration; sur_cfg['incremental'] overrides
+                 DEFAULT_INCREMENTAL_CONFIG
+        output_dir: Directory holding the model versions (and the store)
+        tracker: Optional pipeline tracker for monitoring
+
+    Returns:
+        Same structure as build_surrogate_from_job; metadata['incremental_update']
+        describes the update when one was applied.
+    """
+    inc_cfg = {**DEFAULT_INCREMENTAL_CONFIG, **sur_cfg.get('incremental', {})}
+    output_dir = output_dir or os.path.dirname(sur_cfg.get('model_out', '')) or '.'
+    store = FeatureTargetStore(inc_cfg['store_dir'] or os.path.join(output_dir, 'feature_store'))
+    output_config = sur_cfg.get('output_management', {})
+    manager = SurrogateOutputManager({}, output_config, tracker)
+
+    # Features are stored unnormalized: the model's own scaler is persisted
+    # with each version and reused, so old and new rows are scaled alike.
+    preprocessing_config = {'training_store_dir': job_output_dir,
+                            **sur_cfg.get('preprocessing', {}), 'normalize_features': False}
+    if 'target_variable' in sur_cfg:
+        target_vars = sur_cfg['target_variable']
+        preprocessing_config['target_variables'] = [target_vars] if isinstance(target_vars, str) else target_vars
+    sur_cfg = {**sur_cfg, 'preprocessing': preprocessing_config}
+    extraction_config = sur_cfg.get('data_extraction', {})
+
+    extractor = SurrogateDataExtractor(job_output_dir, extraction_config, tracker)
+    source_fingerprint = fingerprint_sources(
+        extractor.paths, {'extraction': extraction_config, 'preprocessing': preprocessing_config}
+    )
+
+    active = manager.manage_model_versions(output_dir, 'active') if Path(output_dir).exists() else None
+    if not store.exists() or active is None:
+        return _full_rebuild(job_output_dir, sur_cfg, output_dir, tracker, store, manager,
+                             source_fingerprint, "no stored features or active model version")
+
+    store_meta = store.load_meta()
+    if store_meta.get('source_fingerprint') == source_fingerprint:
+        logger.info(f"[Surrogate] Job outputs unchanged since {active['version']}; reusing it")
+        return _result_from_version(active, output_config, tracker, store_meta.get('n_rows', 0), {})
+
+    # Extract and preprocess the current job outputs
+    logger.info("[Surrogate] Incremental update: extracting and preprocessing job outputs")
+    extracted_data = extractor.extract_all()
+    summary = extractor.get_summary_statistics()
+    preprocessor = SurrogateDataPreprocessor(extracted_data, preprocessing_config, tracker)
+    processed_data = preprocessor.preprocess_all()
+    features = processed_data['features']
+    targets = processed_data['targets']
+    feature_cols = processed_data['metadata']['feature_columns']
+    target_cols = processed_data['metadata']['target_columns']
+
+    if (feature_cols != store_meta['feature_columns'] or target_cols != store_meta['target_columns']
+            or feature_cols != active['metadata'].get('feature_columns')):
+        return _full_rebuild(job_output_dir, sur_cfg, output_dir, tracker, store, manager,
+                             source_fingerprint, "feature or target columns changed")
+
+    stored_features, stored_targets, _ = store.load()
+    id_cols = store_meta['id_columns']
+    new_features, new_targets = store.split_new_rows(stored_features, features, targets, id_cols)
+
+    if new_features.empty:
+        logger.info(f"[Surrogate] No new rows in the job outputs; keeping {active['version']}")
+        store.save_meta({**store_meta, 'source_fingerprint': source_fingerprint})
+        return _result_from_version(active, output_config, tracker, len(stored_features), summary)
+
+    if len(new_features) > inc_cfg['full_rebuild_fraction'] * len(stored_features):
+        return _full_rebuild(job_output_dir, sur_cfg, output_dir, tracker, store, manager,
+                             source_fingerprint,
+                             f"{len(new_features)} new rows vs {len(stored_features)} stored")
+
+    logger.info(f"[Surrogate] Incremental update of {active['version']}: "
+                f"{len(new_features)} new rows, {len(stored_features)} stored")
+
+    all_features = pd.concat([stored_features, new_features], ignore_index=True)
+    all_targets = pd.concat([stored_targets, new_targets], ignore_index=True)
+
+    scaler = active.get('scaler')
+    def _prepare_X(df: pd.DataFrame) -> np.ndarray:
+        X = df[feature_cols].to_numpy(dtype=float)
+        return scaler.transform(X) if scaler is not None else X
+
+    X_all, X_new = _prepare_X(all_features), _prepare_X(new_features)
+    Y_all = all_targets[target_cols].to_numpy(dtype=float)
+    Y_new = new_targets[target_cols].to_numpy(dtype=float)
+
+    model = active['model']
+    metrics_before = _new_batch_metrics(model, X_new, Y_new, target_cols)
+    try:
+        model, update_info = warm_start_model(model, X_all, Y_all, X_new, Y_new, target_cols, inc_cfg)
+    except Exception as e:
+        return _full_rebuild(job_output_dir, sur_cfg, output_dir, tracker, store, manager,
+                             source_fingerprint, f"warm start failed: {e}")
+    metrics_after = _new_batch_metrics(model, X_new, Y_new, target_cols)
+
+    for target, method in update_info['methods'].items():
+        before = metrics_before.get(target, {}).get('r2', np.nan)
+        after = metrics_after.get(target, {}).get('r2', np.nan)
+        logger.info(f"[Surrogate]   {target}: {method} (new-batch R² {before:.3f} -> {after:.3f})")
+
+    # Save as a new version and activate it
+    version = manager.manage_model_versions(output_dir, 'next')
+    metadata = {
+        **{k: v for k, v in active['metadata'].items()
+           if k not in ('version_info', 'model_path', 'scaler_path')},
+        'n_samples': len(all_features),
+        'incremental_update': {
+            'parent_version': active['version'],
+            'n_new_rows': len(new_features),
+            'n_total_rows': len(all_features),
+            'methods': update_info['methods'],
+            'new_batch_metrics_before': metrics_before,
+            'new_batch_metrics_after': metrics_after,
+        }
+    }
+    model_artifacts = {
+        'model': model,
+        'feature_columns': feature_cols,
+        'target_columns': target_cols,
+        'metadata': metadata,
+        'scaler': scaler,
+        'model_path': sur_cfg.get('model_out')
+    }
+    output_manager = SurrogateOutputManager(model_artifacts, {**output_config, 'version': version}, tracker)
+    output_manager.save_surrogate_artifacts(output_dir)
+    output_manager.manage_model_versions(output_dir, 'activate', version)
+
+    # Keep the flat model file consumers load (calibration etc.) in sync
+    model_out = sur_cfg.get('model_out')
+    if model_out:
+        os.makedirs(os.path.dirname(model_out) or '.', exist_ok=True)
+        joblib.dump({
+            'model': model,
+            'scaler': scaler,
+            'feature_columns': feature_cols,
+            'target_columns': target_cols,
+            'model_info': {**metadata.get('model_info', {}), 'version': f"v{version}"}
+        }, model_out)
+
+    store.save(all_features, all_targets, {
+        **store_meta,
+        'source_fingerprint': source_fingerprint,
+        'model_version': f"v{version}",
+        'n_rows': len(all_features)
+    })
+
+    return {
+        'model': model,
+        'output_manager': output_manager,
+        'predict_function': output_manager.generate_prediction_interface('function'),
+        'metadata': metadata,
+        'validation_results': None,
+        'extraction_summary': summary,
+        'preprocessing_summary': {
+            'n_features': len(feature_cols),
+            'n_targets': len(target_cols),
+            'n_samples': len(all_features)
+        },
+        'features': all_features,
+        'targets': all_targets
+    }
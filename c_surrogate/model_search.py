@@ -0,0 +1,323 @@
+"""
+c_surrogate/model_search.py
+
+Budgeted successive-halving model search across all candidate model families.
+
+Instead of one RandomizedSearchCV per model family (each with its own
+n_jobs=-1, on top of estimators that also use n_jobs=-1), every sampled
+configuration of every family enters a single pool of candidates:
+
+  - rung 0 evaluates all candidates by cross-validation on a small subset of
+    the training rows,
+  - each following rung keeps the best 1/eta candidates (plus the best
+    candidate for each target) and gives them eta times more rows, until the
+    survivors use the full training set,
+  - families with no surviving candidate are dropped early,
+  - the search stops when the time budget is used up, also in the middle of
+    a rung (checked after each wave of n_jobs candidates), keeping the best
+    candidate of the last completed rung.
+
+Parallelism is controlled at one level only: candidates of a rung run in a
+joblib pool of `n_jobs` workers, and every estimator is forced to n_jobs=1.
+Scores are per target (multi-output problems are searched on all targets),
+and the result includes a leaderboard and the wall time spent per candidate.
+
+Usage (see build_automated_ml_model(search_mode='halving')):
+    result = successive_halving_search(X_train, Y_train, model_types, cv,
+                                       search_config={"time_budget_s": 600})
+"""
+
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from sklearn.multioutput import MultiOutputRegressor
+
+from c_surrogate.ml_pipeline_utils import get_available_models, create_model_instance
+
+logger = logging.getLogger(__name__)
+
+
+# Families whose estimators fit a 2-D target directly; the others are wrapped
+# in MultiOutputRegressor for multi-output problems.
+NATIVE_MULTI_OUTPUT = {
+    'random_forest', 'extra_trees', 'neural_network',
+    'elastic_net', 'lasso', 'ridge'
+}
+
+DEFAULT_SEARCH_CONFIG = {
+    'n_candidates_per_family': 8,  # sampled configurations per family (incl. defaults)
+    'eta': 3,                      # keep 1/eta of the candidates per rung
+    'min_resources': None,         # rows in rung 0 (default: enough for the CV folds)
+    'time_budget_s': None,         # stop after this many seconds (None = no limit)
+    'n_jobs': None,                # workers for the whole search (None = all cores)
+}
+
+
+def _make_estimator(model_type: str, params: Dict[str, Any], multi_output: bool):
+    """Estimator with single-threaded internals (parallelism lives in the search)."""
+    params = dict(params)
+    if 'n_jobs' in params:
+        params['n_jobs'] = 1
+    estimator = create_model_instance(model_type, params)
+    if multi_output and model_type not in NATIVE_MULTI_OUTPUT:
+        estimator = MultiOutputRegressor(estimator)
+    return estimator
+
+
+def _sample_candidates(model_types: List[str], n_per_family: int,
+                       random_state: int) -> List[Dict[str, Any]]:
+    """Default configuration plus n_per_family - 1 random ones for each family."""
+    available_models = get_available_models()
+    candidates = []
+    for model_type in model_types:
+        model_config = available_models[model_type]
+        sampled = [{}]
+        if n_per_family > 1 and model_config.param_grid:
+            n_iter = min(n_per_family - 1, len(ParameterGrid(model_config.param_grid)))
+            sampled += list(ParameterSampler(model_config.param_grid, n_iter=n_iter,
+                                             random_state=random_state))
+        for overrides in sampled:
+            candidates.append({
+                'candidate_id': len(candidates),
+                'model_type': model_type,
+                'params': {**model_config.default_params, **overrides},
+                'overrides': overrides,
+            })
+    return candidates
+
+
+def _cv_target_scores(candidate: Dict[str, Any], X: np.ndarray, Y: np.ndarray,
+                      cv, multi_output: bool) -> Dict[str, Any]:
+    """Cross-validated R² per target for one candidate on one rung's rows."""
+    start = time.perf_counter()
+    try:
+        estimator = _make_estimator(candidate['model_type'], candidate['params'], multi_output)
+        fold_scores = []
+        for train_idx, val_idx in cv.split(X):
+            model = clone(estimator)
+            model.fit(X[train_idx], Y[train_idx] if multi_output else Y[train_idx].ravel())
+            pred = np.asarray(model.predict(X[val_idx])).reshape(len(val_idx), -1)
+            fold_scores.append(r2_score(Y[val_idx], pred, multioutput='raw_values'))
+        scores = np.mean(fold_scores, axis=0)
+        error = None
+    except Exception as e:
+        scores = np.full(Y.shape[1], -np.inf)
+        error = str(e)
+    return {
+        'candidate_id': candidate['candidate_id'],
+        'target_scores': scores,
+        'elapsed_s': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def successive_halving_search(
+    X_train: pd.DataFrame,
+    Y_train: pd.DataFrame,
+    model_types: List[str],
+    cv,
+    search_config: Optional[Dict[str, Any]] = None,
+    random_state: int = 42
+) -> Dict[str, Any]:
+    """
+    Run a budgeted successive-halving search over all model families at once.
+
+    Args:
+        X_train, Y_train: Training data (Y_train may have several targets)
+        model_types: Candidate model families (keys of get_available_models())
+        cv: Cross-validation splitter (see get_cv_strategy)
+        search_config: Overrides for DEFAULT_SEARCH_CONFIG
+        random_state: Seed for candidate sampling and row subsets
+
+    Returns:
+        Dictionary with:
+          - best: winning candidate (model_type, params, overrides, score)
+          - leaderboard: DataFrame, one row per candidate (last rung reached,
+            mean and per-target CV R², cumulative wall time)
+          - per_target_best: target -> best candidate for that target alone,
+            among all candidates scored in the last completed rung
+          - rungs: per-rung summary (rows used, candidates, seconds)
+          - discarded_families: family -> rung in which it was dropped
+          - budget_exhausted: True if the time budget stopped the search
+    """
+    cfg = {**DEFAULT_SEARCH_CONFIG, **(search_config or {})}
+    eta = max(2, int(cfg['eta']))
+    n_jobs = cfg['n_jobs'] or os.cpu_count() or 1
+    time_budget = cfg['time_budget_s']
+
+    target_names = [str(c) for c in Y_train.columns]
+    multi_output = len(target_names) > 1
+    X = np.asarray(X_train, dtype=float)
+    Y = np.asarray(Y_train, dtype=float).reshape(len(Y_train), -1)
+
+    n_splits = getattr(cv, 'n_splits', 3)
+    n_rows = len(X)
+    min_resources = int(cfg['min_resources'] or max(n_splits * 10, 30))
+    min_resources = min(n_rows, min_resources)
+
+    candidates = _sample_candidates(model_types, int(cfg['n_candidates_per_family']), random_state)
+    by_id = {c['candidate_id']: c for c in candidates}
+    for c in candidates:
+        c.update({'rung': -1, 'n_rows': 0, 'score': -np.inf,
+                  'target_scores': np.full(len(target_names), -np.inf),
+                  'rung_scores': {}, 'wall_time_s': 0.0, 'error': None})
+
+    # Rung sizes: grow rows by eta until the full training set is reached
+    n_rungs = 1
+    while min_resources * eta ** (n_rungs - 1) < n_rows and len(candidates) // eta ** n_rungs >= 1:
+        n_rungs += 1
+
+    row_order = np.random.default_rng(random_state).permutation(n_rows)
+    survivors = [c['candidate_id'] for c in candidates]
+    alive_families = set(model_types)
+    discarded_families: Dict[str, int] = {}
+    rungs = []
+    budget_exhausted = False
+    last_complete_rung = -1
+    search_start = time.perf_counter()
+
+    def out_of_time() -> bool:
+        return time_budget is not None and time.perf_counter() - search_start >= time_budget
+
+    logger.info(f"[AutoML] Successive halving: {len(candidates)} candidates from "
+                f"{len(model_types)} families, {n_rungs} rungs, eta={eta}, n_jobs={n_jobs}")
+
+    for rung in range(n_rungs):
+        if rung > 0 and out_of_time():
+            budget_exhausted = True
+            logger.info(f"[AutoML] Time budget of {time_budget}s used up before rung {rung}")
+            break
+
+        n_used = n_rows if rung == n_rungs - 1 else min(n_rows, min_resources * eta ** rung)
+        rows = np.sort(row_order[:n_used])
+        rung_start = time.perf_counter()
+        n_workers = min(n_jobs, len(survivors))
+
+        # One wave of n_workers candidates at a time, so the budget is also checked within a rung
+        # (rung 0 always completes: it is the fallback for best and per_target_best)
+        with Parallel(n_jobs=n_workers) as parallel:
+            for start in range(0, len(survivors), n_workers):
+                if rung > 0 and start > 0 and out_of_time():
+                    budget_exhausted = True
+                    break
+                results = parallel(
+                    delayed(_cv_target_scores)(by_id[cid], X[rows], Y[rows], cv, multi_output)
+                    for cid in survivors[start:start + n_workers]
+                )
+                for res in results:
+                    c = by_id[res['candidate_id']]
+                    c['rung'] = rung
+                    c['n_rows'] = n_used
+                    c['target_scores'] = res['target_scores']
+                    c['rung_scores'][rung] = res['target_scores']
+                    c['score'] = float(np.mean(res['target_scores']))
+                    c['wall_time_s'] += res['elapsed_s']
+                    c['error'] = res['error']
+                    if res['error']:
+                        logger.debug(f"[AutoML] Candidate {c['candidate_id']} ({c['model_type']}) "
+                                     f"failed: {res['error']}")
+        if budget_exhausted:
+            logger.info(f"[AutoML] Time budget of {time_budget}s used up during rung {rung}; "
+                        f"keeping the results of rung {last_complete_rung}")
+            break
+        last_complete_rung = rung
+
+        ranked = sorted(survivors, key=lambda cid: by_id[cid]['score'], reverse=True)
+        rung_seconds = time.perf_counter() - rung_start
+        rungs.append({'rung': rung, 'n_rows': n_used, 'n_candidates': len(survivors),
+                      'best_score': by_id[ranked[0]]['score'], 'seconds': rung_seconds})
+        logger.info(f"[AutoML] Rung {rung}: {len(survivors)} candidates on {n_used} rows, "
+                    f"best {by_id[ranked[0]]['model_type']} R²={by_id[ranked[0]]['score']:.4f} "
+                    f"({rung_seconds:.1f}s)")
+
+        if rung < n_rungs - 1:
+            keep = max(1, len(survivors) // eta)
+            survivors = [cid for cid in ranked[:keep] if np.isfinite(by_id[cid]['score'])] or ranked[:1]
+            # the best candidate of every target goes on too, so per_target_best is not limited to the overall winners
+            for i in range(len(target_names)):
+                top = max(ranked, key=lambda cid: by_id[cid]['target_scores'][i])
+                if np.isfinite(by_id[top]['target_scores'][i]) and top not in survivors:
+                    survivors.append(top)
+            still_alive = {by_id[cid]['model_type'] for cid in survivors}
+            for family in sorted(alive_families - still_alive):
+                discarded_families[family] = rung
+                logger.info(f"[AutoML] Discarding family '{family}' after rung {rung}")
+            alive_families = still_alive
+
+    # Best candidates are taken from the last rung that every survivor completed
+    finalists = [c for c in candidates if last_complete_rung in c['rung_scores']]
+
+    def rung_score(c, i=None):
+        scores = c['rung_scores'][last_complete_rung]
+        return float(np.mean(scores)) if i is None else scores[i]
+
+    best = max(finalists, key=rung_score)
+    if not np.isfinite(rung_score(best)):
+        raise ValueError("No candidate model could be trained successfully")
+
+    leaderboard = pd.DataFrame([
+        {
+            'candidate_id': c['candidate_id'],
+            'model_type': c['model_type'],
+            'params': c['overrides'],
+            'rung': c['rung'],
+            'n_rows': c['n_rows'],
+            'mean_r2': c['score'],
+            **{f'r2_{name}': float(s) for name, s in zip(target_names, c['target_scores'])},
+            'wall_time_s': round(c['wall_time_s'], 3),
+            'error': c['error'],
+        }
+        for c in candidates
+    ]).sort_values(['rung', 'mean_r2'], ascending=[False, False]).reset_index(drop=True)
+
+    per_target_best = {}
+    for i, name in enumerate(target_names):
+        top = max(finalists, key=lambda c: rung_score(c, i))
+        per_target_best[name] = {
+            'candidate_id': top['candidate_id'],
+            'model_type': top['model_type'],
+            'params': top['overrides'],
+            'r2': float(rung_score(top, i)),
+        }
+
+    total_seconds = time.perf_counter() - search_start
+    logger.info(f"[AutoML] Search finished in {total_seconds:.1f}s; best: {best['model_type']} "
+                f"(CV R²={rung_score(best):.4f})")
+
+    return {
+        'best': {
+            'candidate_id': best['candidate_id'],
+            'model_type': best['model_type'],
+            'params': best['params'],
+            'overrides': best['overrides'],
+            'score': rung_score(best),
+        },
+        'leaderboard': leaderboard,
+        'per_target_best': per_target_best,
+        'rungs': rungs,
+        'discarded_families': discarded_families,
+        'budget_exhausted': budget_exhausted,
+        'total_seconds': total_seconds,
+        'n_jobs': n_jobs,
+        'multi_output': multi_output,
+    }
+
+
+def fit_best_candidate(search_result: Dict[str, Any], X_train: pd.DataFrame, Y_train: pd.DataFrame):
+    """Refit the winning candidate on the full training set."""
+    best = search_result['best']
+    multi_output = search_result['multi_output']
+    estimator = _make_estimator(best['model_type'], best['params'], multi_output)
+    if multi_output:
+        estimator.fit(X_train, Y_train)
+    else:
+        estimator.fit(X_train, np.asarray(Y_train).ravel())
+    return estimator
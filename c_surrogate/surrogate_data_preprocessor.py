@@ -15,6 +15,8 @@ from pathlib import Path
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 import json
 
+from c_surrogate.training_store import TrainingStore, parameter_ids
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +56,7 @@ class SurrogateDataPreprocessor:
             'normalize_features': True,
             'handle_categorical': True,
             'create_interactions': False,
+            'training_store_dir': None,  # job dir with a training_store/ (skips steps 1-4)
             'target_variables': [
                 'Heating:EnergyTransfer [J](Hourly)',
                 'Cooling:EnergyTransfer [J](Hourly)',
@@ -124,26 +127,35 @@ class SurrogateDataPreprocessor:
         """
         logger.info("[Preprocessor] Starting data preprocessing")
         
-        # Step 1: Align parameters with outputs
-        aligned_data = self.align_parameters_with_outputs()
-        
-        # Step 2: Filter by sensitivity if requested
-        if self.config['use_sensitivity_filter']:
-            aligned_data = self.filter_by_sensitivity(aligned_data)
-        
-        # Step 3: Create parameter matrix
-        # Step 3: Create parameter matrix
-        param_matrix = self.create_parameter_matrix(aligned_data)
-        
-        # Track intermediate data
-        if self.tracker:
-            self.tracker.export_input_data({
-                "aligned_data": aligned_data,
-                "parameter_matrix": param_matrix
-            }, "preprocessing")
-        
-        # Step 4: Aggregate outputs
-        output_matrix = self.aggregate_outputs(aligned_data)
+        store = self._training_store()
+        if store is not None:
+            # Steps 1-4 from the memory-mapped training store matrices
+            param_matrix, output_matrix = self.matrices_from_store(store)
+            
+            if self.tracker:
+                self.tracker.export_input_data({
+                    "parameter_matrix": param_matrix
+                }, "preprocessing")
+        else:
+            # Step 1: Align parameters with outputs
+            aligned_data = self.align_parameters_with_outputs()
+            
+            # Step 2: Filter by sensitivity if requested
+            if self.config['use_sensitivity_filter']:
+                aligned_data = self.filter_by_sensitivity(aligned_data)
+            
+            # Step 3: Create parameter matrix
+            param_matrix = self.create_parameter_matrix(aligned_data)
+            
+            # Track intermediate data
+            if self.tracker:
+                self.tracker.export_input_data({
+                    "aligned_data": aligned_data,
+                    "parameter_matrix": param_matrix
+                }, "preprocessing")
+            
+            # Step 4: Aggregate outputs
+            output_matrix = self.aggregate_outputs(aligned_data)
         
         # Step 5: Handle multi-level data if needed
         if self.config['aggregation_level'] == 'zone':
@@ -168,11 +180,16 @@ class SurrogateDataPreprocessor:
         
         # Track preprocessing results
         if self.tracker:
-            processing_steps = [
-                "align_parameters_with_outputs",
-                "filter_by_sensitivity" if self.config['use_sensitivity_filter'] else None,
-                "create_parameter_matrix",
-                "aggregate_outputs",
+            if store is not None:
+                initial_steps = ["matrices_from_store"]
+            else:
+                initial_steps = [
+                    "align_parameters_with_outputs",
+                    "filter_by_sensitivity" if self.config['use_sensitivity_filter'] else None,
+                    "create_parameter_matrix",
+                    "aggregate_outputs"
+                ]
+            processing_steps = initial_steps + [
                 "handle_multi_level_data" if self.config['aggregation_level'] == 'zone' else None,
                 "engineer_features",
                 "prepare_final_datasets"
@@ -188,8 +205,38 @@ class SurrogateDataPreprocessor:
         
         return self.processed
     
-    # In surrogate_data_preprocessor.py, around line 150-170
-
+    def _training_store(self) -> Optional[TrainingStore]:
+        """
+        Training store to read the parameter and output matrices from, or None
+        to build them from the extracted data.
+        """
+        store_dir = self.config.get('training_store_dir')
+        if not store_dir or self.config['aggregation_level'] == 'zone' or 'consolidated_features' in self.data:
+            return None
+        
+        store = TrainingStore(store_dir)
+        if not (store.has('parameters') and store.has('targets')):
+            logger.info("[Preprocessor] Training store incomplete, building matrices from extracted data")
+            return None
+        return store
+    
+    def matrices_from_store(self, store: TrainingStore) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Parameter and output matrices from the training store (same layout as
+        create_parameter_matrix and aggregate_outputs), sensitivity-filtered
+        on the parameter columns.
+        """
+        logger.info(f"[Preprocessor] Using training store: {store.root}")
+        
+        parameters = self._sensitivity_parameters() if self.config['use_sensitivity_filter'] else None
+        param_matrix = store.parameter_matrix(parameters)
+        output_matrix = store.target_matrix(self.config.get('target_variables'))
+        
+        logger.info(f"[Preprocessor] Created parameter matrix: {param_matrix.shape}")
+        logger.info(f"[Preprocessor] Created output matrix: {output_matrix.shape}")
+        
+        return param_matrix, output_matrix
+    
     def align_parameters_with_outputs(self) -> pd.DataFrame:
         """
         Align modification parameters with simulation outputs.
@@ -376,16 +423,15 @@ class SurrogateDataPreprocessor:
         
         return aligned_df
     
-    def filter_by_sensitivity(self, aligned_data: pd.DataFrame) -> pd.DataFrame:
+    def _sensitivity_parameters(self) -> Optional[List[str]]:
         """
-        Filter parameters based on sensitivity analysis results.
+        Parameters selected by the sensitivity results (surrogate_include flag
+        or sensitivity threshold), or None if no sensitivity data is available.
         """
-        logger.info("[Preprocessor] Filtering by sensitivity")
-        
         sensitivity = self.data.get('sensitivity', pd.DataFrame())
         if sensitivity.empty:
             logger.warning("[Preprocessor] No sensitivity data available, skipping filter")
-            return aligned_data
+            return None
         
         # Check for surrogate_include flag in new structure
         if 'surrogate_include' in sensitivity.columns:
@@ -407,6 +453,18 @@ class SurrogateDataPreprocessor:
                     abs(sensitivity['elasticity']) >= threshold
                 ]['parameter'].tolist()
         
+        return important_params
+    
+    def filter_by_sensitivity(self, aligned_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filter parameters based on sensitivity analysis results.
+        """
+        logger.info("[Preprocessor] Filtering by sensitivity")
+        
+        important_params = self._sensitivity_parameters()
+        if important_params is None:
+            return aligned_data
+        
         # Handle both parameter column names
         param_col = 'parameter' if 'parameter' in aligned_data.columns else 'param_id'
         
@@ -423,10 +481,7 @@ class SurrogateDataPreprocessor:
             # The parameters are in the 'field' or 'parameter' column
             if 'field' in aligned_data.columns:
                 # Create a parameter identifier from the field components
-                aligned_data['param_id'] = aligned_data.apply(
-                    lambda row: f"{row['category']}*{row['object_type']}*{row['object_name']}*{row['field']}", 
-                    axis=1
-                )
+                aligned_data['param_id'] = parameter_ids(aligned_data)
                 filtered = aligned_data[aligned_data['param_id'].isin(important_params)]
             else:
                 # Keep all data if we can't identify parameters
@@ -450,49 +505,35 @@ class SurrogateDataPreprocessor:
             # Data is already in wide format - need to reshape it
             logger.info("[Preprocessor] Data is in wide format, reshaping...")
             
-            # Melt the variant columns to create long format
+            # Melt the variant columns to create long format in one pass:
+            # row r, variant v -> position r * n_variants + v
             id_vars = [col for col in aligned_data.columns if not col.startswith('variant_')]
+            n_rows, n_variants = len(aligned_data), len(variant_cols)
             
-            melted_data = []
-            for variant_col in variant_cols:
-                variant_id = variant_col  # Keep as variant_0, variant_1, etc.
-                
-                # Create records for each variant
-                variant_data = aligned_data[id_vars + [variant_col]].copy()
-                variant_data['variant_id'] = variant_id
-                variant_data['value'] = variant_data[variant_col]
-                variant_data = variant_data.drop(columns=[variant_col])
-                
-                # Convert to numeric values
-                variant_data['value'] = pd.to_numeric(variant_data['value'], errors='coerce')
-                if 'original' in variant_data.columns:
-                    variant_data['original'] = pd.to_numeric(variant_data['original'], errors='coerce')
-                
-                # Calculate relative change if we have original values
-                if 'original' in variant_data.columns:
-                    # Handle cases where original is 0 or NaN
-                    variant_data['relative_change'] = 0.0
-                    mask = (variant_data['original'].notna()) & (variant_data['value'].notna()) & (variant_data['original'] != 0)
-                    variant_data.loc[mask, 'relative_change'] = (
-                        (variant_data.loc[mask, 'value'] - variant_data.loc[mask, 'original']) / 
-                        variant_data.loc[mask, 'original']
-                    )
-                else:
-                    variant_data['relative_change'] = variant_data['value']
-                
-                melted_data.append(variant_data)
-            
-            # Combine all variants
-            long_data = pd.concat(melted_data, ignore_index=True)
+            values = pd.to_numeric(
+                pd.Series(aligned_data[variant_cols].to_numpy().ravel()), errors='coerce'
+            ).to_numpy(dtype=float)
             
-            # Create parameter identifier
-            if 'param_id' not in long_data.columns:
-                long_data['parameter'] = long_data.apply(
-                    lambda row: f"{row['category']}*{row['object_type']}*{row['object_name']}*{row['field']}", 
-                    axis=1
+            if 'original' in aligned_data.columns:
+                # Relative change; 0 where original is 0 or either value is NaN
+                original = np.repeat(
+                    pd.to_numeric(aligned_data['original'], errors='coerce').to_numpy(dtype=float), n_variants
                 )
+                mask = ~np.isnan(original) & ~np.isnan(values) & (original != 0)
+                relative_change = np.zeros(len(values))
+                relative_change[mask] = (values[mask] - original[mask]) / original[mask]
             else:
-                long_data['parameter'] = long_data['param_id']
+                relative_change = values
+            
+            long_data = pd.DataFrame({
+                col: np.repeat(aligned_data[col].to_numpy(), n_variants) for col in id_vars
+            })
+            long_data['variant_id'] = np.tile(np.asarray(variant_cols, dtype=object), n_rows)
+            long_data['value'] = values
+            long_data['relative_change'] = relative_change
+            
+            # Create parameter identifier
+            long_data['parameter'] = np.repeat(parameter_ids(aligned_data).to_numpy(), n_variants)
             
             # Now pivot to final format
             param_matrix = long_data.pivot_table(
@@ -428,11 +428,14 @@ class SurrogateOutputManager:
         
         Args:
             base_dir: Base directory containing model versions
-            action: 'list', 'load', 'compare', 'activate'
+            action: 'list', 'load', 'compare', 'next', 'activate', 'active'
             version: Specific version for actions
             
         Returns:
-            Version information or loaded model
+            Version information or loaded model. 'next' returns the version
+            string to use for the next saved model, 'activate' records
+            `version` as the active one, and 'active' loads the active
+            version (None if no version has been activated).
         """
         logger.info(f"[OutputManager] Managing model versions - action: {action}")
         
@@ -455,7 +458,7 @@ class SurrogateOutputManager:
                             'path': str(item)
                         })
             
-            return sorted(versions, key=lambda x: x['version'], reverse=True)
+            return sorted(versions, key=lambda x: _version_key(x['version']), reverse=True)
         
         elif action == 'load' and version:
             # Load specific version
@@ -505,6 +508,32 @@ class SurrogateOutputManager:
             
             return pd.DataFrame(comparison)
         
+        elif action == 'next':
+            # Next minor version after the highest saved one
+            versions = self.manage_model_versions(base_dir, 'list') if base_path.exists() else []
+            if not versions:
+                return self.config.get('version', '1.0')
+            major, minor = (_version_key(versions[0]['version']) + (0, 0))[:2]
+            return f"{major}.{minor + 1}"
+        
+        elif action == 'activate' and version:
+            # Point downstream consumers at a saved version
+            version = version if version.startswith('v') else f"v{version}"
+            if not (base_path / version / 'surrogate_metadata.json').exists():
+                raise ValueError(f"Version {version} not found")
+            with open(base_path / 'active_version.json', 'w') as f:
+                json.dump({'version': version, 'activated_at': datetime.now().isoformat()}, f, indent=2)
+            logger.info(f"[OutputManager] Active model version: {version}")
+            return {'version': version, 'path': str(base_path / version)}
+        
+        elif action == 'active':
+            active_path = base_path / 'active_version.json'
+            if not active_path.exists():
+                return None
+            with open(active_path, 'r') as f:
+                active = json.load(f)
+            return self.manage_model_versions(base_dir, 'load', active['version'])
+        
         return []
     
     def generate_uncertainty_estimates(self, 
@@ -595,37 +624,42 @@ if metadata.get('scaler_path'):
     except:
         print("Warning: Could not load scaler")
 
+feature_index = {{col: i for i, col in enumerate(feature_columns)}}
+
 def predict(parameters):
     """
     Make predictions using the surrogate model.
     
     Args:
-        parameters: Dictionary of parameter values
+        parameters: Dictionary of parameter values, or a list of them
+                    (predicted in one batch)
         
     Returns:
-        Dictionary of predictions
+        Dictionary of predictions (a list of them for a list input)
     """
-    # Create feature vector
-    features = np.zeros(len(feature_columns))
-    for i, col in enumerate(feature_columns):
-        if col in parameters:
-            features[i] = parameters[col]
+    rows = parameters if isinstance(parameters, list) else [parameters]
+    
+    # Create feature matrix
+    features = np.zeros((len(rows), len(feature_columns)))
+    for r, row in enumerate(rows):
+        for col, value in row.items():
+            i = feature_index.get(col)
+            if i is not None:
+                features[r, i] = value
     
     # Scale if needed
     if scaler is not None:
-        features = scaler.transform(features.reshape(1, -1))
-    else:
-        features = features.reshape(1, -1)
+        features = scaler.transform(features)
     
     # Predict
-    predictions = model.predict(features)
+    predictions = np.asarray(model.predict(features)).reshape(len(rows), -1)
     
     # Format output
-    results = {{}}
-    for i, target in enumerate(target_columns):
-        results[target] = float(predictions[0][i] if len(predictions.shape) > 1 else predictions[0])
-    
-    return results
+    results = [
+        {{target: float(pred[i]) for i, target in enumerate(target_columns)}}
+        for pred in predictions
+    ]
+    return results if isinstance(parameters, list) else results[0]
 
 # Example usage
 if __name__ == "__main__":
@@ -799,6 +833,17 @@ m.display()
 
 
 # Utility functions
+def _version_key(version: str) -> Tuple[int, ...]:
+    """Numeric sort key for version names like 'v1.10' (sorts after 'v1.9')."""
+    parts = []
+    for part in version.lstrip('v').split('.'):
+        try:
+            parts.append(int(part))
+        except ValueError:
+            parts.append(0)
+    return tuple(parts)
+
+
 def create_surrogate_outputs(model_artifacts: Dict[str, Any],
                            test_data: Dict[str, pd.DataFrame] = None,
                            output_dir: str = None,
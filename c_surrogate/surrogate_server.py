@@ -0,0 +1,582 @@
+"""
+c_surrogate/surrogate_server.py
+
+Low-latency surrogate inference.
+
+  - CompiledSurrogate loads a model once and precompiles everything that
+    does not depend on the request: the mapping from caller columns to the
+    model's feature order (cached per column tuple) and the feature scaler
+    as a plain affine transform. Prediction works on float arrays, no
+    pandas round trip.
+  - get_compiled_surrogate() caches compiled models per file (and mtime),
+    so in-process callers load each model version once.
+  - MicroBatcher merges concurrent requests into one model.predict call
+    (up to max_batch_rows rows or max_wait_ms of waiting) and keeps p50/p99
+    latency statistics.
+  - SurrogateInferenceServer serves the model versions of a surrogate
+    output directory (see SurrogateOutputManager.save_surrogate_artifacts)
+    over local HTTP; SurrogateClient is the matching client with a
+    keep-alive connection and binary .npy payloads.
+
+Endpoints:
+    POST /predict    JSON {"version": "v1.2", "columns": [...], "X": [[...]]}
+                     or {"rows": [{col: value}, ...]}; or an .npy body
+                     (Content-Type application/x-npy) with the version and
+                     columns in the X-Surrogate-Version / X-Surrogate-Columns
+                     headers. Omitting the version uses the active one.
+    GET  /models     Loaded and available versions
+    GET  /stats      Latency and batching statistics per version
+    GET  /health
+
+Usage:
+    python -m c_surrogate.surrogate_server --base-dir output/<job_id>/surrogate_models --port 8765
+
+    client = SurrogateClient("http://127.0.0.1:8765")
+    Y = client.predict(X, columns=feature_names)
+"""
+
+import io
+import os
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import warnings
+import http.client
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BATCHING_CONFIG = {
+    'max_batch_rows': 4096,   # rows per merged model.predict call
+    'max_wait_ms': 2.0,       # how long the first request waits for company
+    'stats_window': 10000,    # requests kept for latency percentiles
+}
+
+
+###############################################################################
+# Compiled model
+###############################################################################
+
+class CompiledSurrogate:
+    """
+    A loaded surrogate with request-independent work done up front.
+    """
+
+    def __init__(self, model, feature_columns: List[str], target_columns: List[str],
+                 scaler=None, version: Optional[str] = None, source: Optional[str] = None):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.target_columns = list(target_columns)
+        self.version = version
+        self.source = source
+        self.n_features = len(self.feature_columns)
+        self._feature_index = {col: i for i, col in enumerate(self.feature_columns)}
+        self._column_maps: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        # Scaler as X * scale + offset where possible (StandardScaler, MinMaxScaler)
+        self._scaler = scaler
+        self._scale = self._offset = None
+        if scaler is not None:
+            if hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_'):
+                scale = np.where(scaler.scale_ == 0, 1.0, scaler.scale_) if scaler.with_std else np.ones(self.n_features)
+                mean = scaler.mean_ if scaler.with_mean else np.zeros(self.n_features)
+                self._scale = 1.0 / scale
+                self._offset = -mean / scale
+            elif hasattr(scaler, 'min_') and hasattr(scaler, 'scale_'):
+                self._scale = np.asarray(scaler.scale_, dtype=float)
+                self._offset = np.asarray(scaler.min_, dtype=float)
+
+    @classmethod
+    def from_model_file(cls, model_path: str, columns_path: Optional[str] = None) -> 'CompiledSurrogate':
+        """Load the flat model file written by build_and_save_surrogate*."""
+        model_data = joblib.load(model_path)
+        if isinstance(model_data, dict):
+            model = model_data['model']
+            scaler = model_data.get('scaler')
+            feature_cols = model_data.get('feature_columns') or joblib.load(columns_path)
+            target_cols = model_data.get('target_columns') or []
+            version = model_data.get('model_info', {}).get('version')
+        else:
+            model, scaler, version = model_data, None, None
+            feature_cols = joblib.load(columns_path)
+            target_cols = []
+        return cls(model, feature_cols, target_cols, scaler, version, str(model_path))
+
+    @classmethod
+    def from_version_dir(cls, version_dir: str) -> 'CompiledSurrogate':
+        """Load a version saved by SurrogateOutputManager.save_surrogate_artifacts."""
+        version_path = Path(version_dir)
+        with open(version_path / 'surrogate_metadata.json', 'r') as f:
+            metadata = json.load(f)
+        model = joblib.load(version_path / 'surrogate_model.joblib')
+        scaler_path = version_path / 'feature_scaler.joblib'
+        scaler = joblib.load(scaler_path) if metadata.get('scaler_path') and scaler_path.exists() else None
+        return cls(model, metadata['feature_columns'], metadata.get('target_columns', []),
+                   scaler, version_path.name, str(version_path))
+
+    def column_map(self, columns: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (model positions, caller positions) for the caller columns the model
+        knows; compiled once per column tuple. Unknown columns are ignored
+        and model features the caller does not send stay 0.
+        """
+        key = tuple(columns)
+        mapping = self._column_maps.get(key)
+        if mapping is None:
+            pairs = [(self._feature_index[c], j) for j, c in enumerate(key) if c in self._feature_index]
+            mapping = (np.array([p[0] for p in pairs], dtype=np.intp),
+                       np.array([p[1] for p in pairs], dtype=np.intp))
+            with self._lock:
+                self._column_maps[key] = mapping
+        return mapping
+
+    def prepare(self, X, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Reorder (if columns are given) and scale a 2-D float array."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if columns is not None and list(columns) != self.feature_columns:
+            dst, src = self.column_map(columns)
+            ordered = np.zeros((len(X), self.n_features))
+            ordered[:, dst] = X[:, src]
+            X = ordered
+        elif X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        X = np.nan_to_num(X, nan=0.0)
+        if self._scale is not None:
+            return X * self._scale + self._offset
+        if self._scaler is not None:
+            return self._scaler.transform(X)
+        return X
+
+    def predict_prepared(self, X: np.ndarray) -> np.ndarray:
+        """Predict from an already prepared array; always returns 2-D."""
+        with warnings.catch_warnings():
+            # Models fitted on DataFrames warn about missing feature names
+            warnings.simplefilter('ignore', UserWarning)
+            return np.asarray(self.model.predict(X)).reshape(len(X), -1)
+
+    def predict(self, X, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        return self.predict_prepared(self.prepare(X, columns))
+
+    def rows_to_array(self, rows: List[Dict[str, float]]) -> np.ndarray:
+        """Feature-ordered array from a list of {column: value} dicts."""
+        X = np.zeros((len(rows), self.n_features))
+        for i, row in enumerate(rows):
+            for col, value in row.items():
+                j = self._feature_index.get(col)
+                if j is not None and value is not None:
+                    X[i, j] = value
+        return X
+
+
+_COMPILED_CACHE: Dict[str, Tuple[int, CompiledSurrogate]] = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def get_compiled_surrogate(model_path: str, columns_path: Optional[str] = None) -> CompiledSurrogate:
+    """
+    Compiled surrogate for a flat model file or a version directory, loaded
+    once per process and reloaded only when the file changes.
+    """
+    path = os.path.abspath(model_path)
+    is_version_dir = os.path.isdir(path)
+    stamp_path = os.path.join(path, 'surrogate_model.joblib') if is_version_dir else path
+    mtime = os.stat(stamp_path).st_mtime_ns
+
+    cached = _COMPILED_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _COMPILED_LOCK:
+        cached = _COMPILED_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        logger.info(f"[Surrogate] Loading surrogate => {path}")
+        if is_version_dir:
+            compiled = CompiledSurrogate.from_version_dir(path)
+        else:
+            compiled = CompiledSurrogate.from_model_file(path, columns_path)
+        _COMPILED_CACHE[path] = (mtime, compiled)
+        return compiled
+
+
+###############################################################################
+# Micro-batching
+###############################################################################
+
+class MicroBatcher:
+    """
+    Merges concurrent predict requests into single model calls.
+
+    A worker thread takes the first waiting request, collects more for up to
+    max_wait_ms (or until max_batch_rows rows), predicts them in one call and
+    hands every caller its slice of the result.
+    """
+
+    def __init__(self, surrogate: CompiledSurrogate, config: Optional[Dict[str, Any]] = None):
+        cfg = {**DEFAULT_BATCHING_CONFIG, **(config or {})}
+        self.surrogate = surrogate
+        self.max_batch_rows = int(cfg['max_batch_rows'])
+        self.max_wait_s = float(cfg['max_wait_ms']) / 1000.0
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._latencies = deque(maxlen=int(cfg['stats_window']))
+        self._batch_rows = deque(maxlen=int(cfg['stats_window']))
+        self._n_requests = 0
+        self._n_batches = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"surrogate-batcher-{surrogate.version}",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """Queue a prepared (ordered and scaled) array; the future gets its predictions."""
+        future = Future()
+        self._queue.put((np.asarray(X, dtype=float), future, time.perf_counter()))
+        return future
+
+    def predict(self, X, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        return self.submit(self.surrogate.prepare(X, columns)).result()
+
+    def _run(self):
+        while not self._closed:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            n_rows = len(first[0])
+            deadline = time.perf_counter() + self.max_wait_s
+            while n_rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._closed = True
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            try:
+                X = batch[0][0] if len(batch) == 1 else np.vstack([item[0] for item in batch])
+                Y = self.surrogate.predict_prepared(X)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            done = time.perf_counter()
+            for X_part, future, submitted in batch:
+                future.set_result(Y[offset:offset + len(X_part)])
+                offset += len(X_part)
+                self._latencies.append(done - submitted)
+            self._batch_rows.append(n_rows)
+            self._n_requests += len(batch)
+            self._n_batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles (ms) over the last stats_window requests."""
+        latencies = np.array(self._latencies) * 1000.0
+        batch_rows = np.array(self._batch_rows)
+        return {
+            'n_requests': self._n_requests,
+            'n_batches': self._n_batches,
+            'mean_requests_per_batch': self._n_requests / self._n_batches if self._n_batches else 0.0,
+            'mean_batch_rows': float(batch_rows.mean()) if len(batch_rows) else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'max_ms': float(latencies.max()) if len(latencies) else None,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+
+
+###############################################################################
+# HTTP server
+###############################################################################
+
+def _to_npy(array: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(array), allow_pickle=False)
+    return buf.getvalue()
+
+
+def _from_npy(payload: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(payload), allow_pickle=False)
+
+
+class SurrogateInferenceServer:
+    """
+    Serves the model versions of a surrogate output directory over local HTTP.
+
+    Versions are loaded (and get their own MicroBatcher) on first use; the
+    active version is re-read from active_version.json on every request that
+    does not name a version, so a refreshed surrogate is picked up without a
+    restart.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, model_path: Optional[str] = None,
+                 host: str = '127.0.0.1', port: int = 8765,
+                 batching_config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            base_dir: Directory with v*/ version folders (SurrogateOutputManager layout)
+            model_path: Alternatively a single flat model file (served as 'default')
+            host, port: Bind address (keep it on localhost)
+            batching_config: Overrides for DEFAULT_BATCHING_CONFIG
+        """
+        if base_dir is None and model_path is None:
+            raise ValueError("Either base_dir or model_path is required")
+        self.base_dir = Path(base_dir) if base_dir else None
+        self.model_path = model_path
+        self.host = host
+        self.port = port
+        self.batching_config = batching_config or {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------------------
+    # Model versions
+    # -------------------------------------------------------------------------
+    def _active_version(self) -> str:
+        if self.base_dir is None:
+            return 'default'
+        active_path = self.base_dir / 'active_version.json'
+        if active_path.exists():
+            with open(active_path, 'r') as f:
+                return json.load(f)['version']
+        versions = self.available_versions()
+        if not versions:
+            raise ValueError(f"No model versions in {self.base_dir}")
+        return versions[-1]
+
+    def available_versions(self) -> List[str]:
+        if self.base_dir is None:
+            return ['default']
+        from c_surrogate.surrogate_output_manager import _version_key
+        return sorted((p.name for p in self.base_dir.iterdir()
+                       if p.is_dir() and p.name.startswith('v')
+                       and (p / 'surrogate_metadata.json').exists()), key=_version_key)
+
+    def get_batcher(self, version: Optional[str] = None) -> MicroBatcher:
+        version = version or self._active_version()
+        if self.base_dir is not None and not version.startswith('v'):
+            version = f"v{version}"
+        batcher = self._batchers.get(version)
+        if batcher is not None:
+            return batcher
+        with self._lock:
+            batcher = self._batchers.get(version)
+            if batcher is None:
+                if self.base_dir is None:
+                    surrogate = get_compiled_surrogate(self.model_path)
+                else:
+                    version_dir = self.base_dir / version
+                    if not (version_dir / 'surrogate_metadata.json').exists():
+                        raise ValueError(f"Version {version} not found")
+                    surrogate = get_compiled_surrogate(str(version_dir))
+                batcher = MicroBatcher(surrogate, self.batching_config)
+                self._batchers[version] = batcher
+                logger.info(f"[Surrogate] Serving version {version} "
+                            f"({surrogate.n_features} features, {len(surrogate.target_columns)} targets)")
+        return batcher
+
+    def stats(self) -> Dict[str, Any]:
+        return {version: batcher.stats() for version, batcher in self._batchers.items()}
+
+    # -------------------------------------------------------------------------
+    # HTTP
+    # -------------------------------------------------------------------------
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive for repeated calls
+
+            def log_message(self, fmt, *args):
+                logger.debug("[Surrogate] " + fmt % args)
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload: Any):
+                self._send(status, json.dumps(payload, default=str).encode(), 'application/json')
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self._send_json(200, {'status': 'ok'})
+                elif self.path == '/stats':
+                    self._send_json(200, server.stats())
+                elif self.path == '/models':
+                    self._send_json(200, {'available': server.available_versions(),
+                                          'loaded': sorted(server._batchers),
+                                          'active': server._active_version()})
+                else:
+                    self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path != '/predict':
+                    self._send_json(404, {'error': f"Unknown path {self.path}"})
+                    return
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    if self.headers.get('Content-Type') == 'application/x-npy':
+                        columns = self.headers.get('X-Surrogate-Columns')
+                        batcher = server.get_batcher(self.headers.get('X-Surrogate-Version'))
+                        Y = batcher.predict(_from_npy(body), json.loads(columns) if columns else None)
+                        self._send(200, _to_npy(Y), 'application/x-npy',
+                                   {'X-Surrogate-Version': str(batcher.surrogate.version)})
+                        return
+
+                    request = json.loads(body or b'{}')
+                    batcher = server.get_batcher(request.get('version'))
+                    if 'rows' in request:
+                        X = batcher.surrogate.rows_to_array(request['rows'])
+                        Y = batcher.predict(X)
+                    else:
+                        Y = batcher.predict(request['X'], request.get('columns'))
+                    self._send_json(200, {'version': batcher.surrogate.version,
+                                          'target_columns': batcher.surrogate.target_columns,
+                                          'predictions': Y.tolist()})
+                except (ValueError, KeyError, TypeError) as e:
+                    self._send_json(400, {'error': str(e)})
+                except Exception as e:
+                    logger.error(f"[ERROR] Surrogate prediction failed: {e}")
+                    self._send_json(500, {'error': str(e)})
+
+        return Handler
+
+    def start(self) -> 'SurrogateInferenceServer':
+        """Start serving in a background thread."""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='surrogate-server', daemon=True)
+        self._thread.start()
+        logger.info(f"[Surrogate] Inference server listening on http://{self.host}:{self.port}")
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        for batcher in self._batchers.values():
+            batcher.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+
+###############################################################################
+# Client
+###############################################################################
+
+class SurrogateClient:
+    """
+    Client for SurrogateInferenceServer; one keep-alive connection per thread.
+    """
+
+    def __init__(self, url: str, version: Optional[str] = None, timeout: float = 30.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 80
+        self.version = version
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method: str, path: str, body: bytes = None, headers: Dict[str, str] = None):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                return response.status, response.getheader('Content-Type'), response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the kept-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def predict(self, X, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Predict a 2-D float array (rows x columns); returns rows x targets."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        headers = {'Content-Type': 'application/x-npy'}
+        if self.version:
+            headers['X-Surrogate-Version'] = self.version
+        if columns is not None:
+            headers['X-Surrogate-Columns'] = json.dumps(list(columns))
+        status, _, payload = self._request('POST', '/predict', _to_npy(X), headers)
+        if status != 200:
+            raise RuntimeError(f"Surrogate server error {status}: {payload.decode(errors='replace')}")
+        return _from_npy(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        status, _, payload = self._request('GET', '/stats')
+        return json.loads(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve surrogate model versions over local HTTP")
+    parser.add_argument('--base-dir', help="Directory with v*/ surrogate versions")
+    parser.add_argument('--model-path', help="Single flat surrogate model file")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-rows', type=int, default=DEFAULT_BATCHING_CONFIG['max_batch_rows'])
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_BATCHING_CONFIG['max_wait_ms'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    SurrogateInferenceServer(
+        base_dir=args.base_dir, model_path=args.model_path, host=args.host, port=args.port,
+        batching_config={'max_batch_rows': args.max_batch_rows, 'max_wait_ms': args.max_wait_ms}
+    ).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,8 @@ from datetime import datetime
 import logging
 from pathlib import Path
 
+from calendar_index import calendar_for_columns, row_mask, slice_columns
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +33,6 @@ class TimeSliceManager:
             time_slice_config: Configuration for time slicing
         """
         self.config = time_slice_config or {}
-        self.time_info_cache = {}
         
     def apply_time_slice_to_dataframe(self, 
                                     df: pd.DataFrame, 
@@ -67,70 +68,8 @@ class TimeSliceManager:
                                  df: pd.DataFrame, 
                                  config: Dict[str, Any]) -> pd.DataFrame:
         """Filter DataFrame with DateTime column."""
-        # Ensure DateTime is datetime type
-        if not pd.api.types.is_datetime64_any_dtype(df['DateTime']):
-            df['DateTime'] = pd.to_datetime(df['DateTime'])
-        
-        # Create time features
-        df['Month'] = df['DateTime'].dt.month
-        df['Hour'] = df['DateTime'].dt.hour
-        df['DayOfWeek'] = df['DateTime'].dt.dayofweek
-        df['IsWeekend'] = df['DayOfWeek'] >= 5
-        
-        # Apply filters
-        mask = pd.Series(True, index=df.index)
-        
-        slice_type = config.get('slice_type', 'none')
-        
-        if slice_type == 'peak_months':
-            season = config.get('season', 'both')
-            if season == 'cooling':
-                months = config.get('peak_cooling_months', [6, 7, 8])
-                mask &= df['Month'].isin(months)
-            elif season == 'heating':
-                months = config.get('peak_heating_months', [12, 1, 2])
-                mask &= df['Month'].isin(months)
-            elif season == 'both':
-                cooling_months = config.get('peak_cooling_months', [6, 7, 8])
-                heating_months = config.get('peak_heating_months', [12, 1, 2])
-                mask &= df['Month'].isin(cooling_months + heating_months)
-        
-        elif slice_type == 'time_of_day':
-            hours = config.get('peak_hours', [14, 15, 16, 17])
-            if isinstance(config.get('peak_hours_range'), dict):
-                start = config['peak_hours_range']['start']
-                end = config['peak_hours_range']['end']
-                hours = list(range(start, end + 1))
-            mask &= df['Hour'].isin(hours)
-        
-        elif slice_type == 'day_of_week':
-            if config.get('analyze_weekends', True):
-                mask &= df['IsWeekend']
-            else:
-                mask &= ~df['IsWeekend']
-        
-        elif slice_type == 'combined':
-            filters = config.get('combined_filters', {})
-            if 'months' in filters:
-                mask &= df['Month'].isin(filters['months'])
-            if 'hours' in filters:
-                mask &= df['Hour'].isin(filters['hours'])
-            if 'day_of_week' in filters:
-                if filters['day_of_week'] == 'weekdays':
-                    mask &= ~df['IsWeekend']
-                elif filters['day_of_week'] == 'weekends':
-                    mask &= df['IsWeekend']
-        
-        elif slice_type == 'custom':
-            if 'start_date' in config and 'end_date' in config:
-                start = pd.to_datetime(config['start_date'])
-                end = pd.to_datetime(config['end_date'])
-                mask &= (df['DateTime'] >= start) & (df['DateTime'] <= end)
-        
-        # Clean up temporary columns
-        temp_cols = ['Month', 'Hour', 'DayOfWeek', 'IsWeekend']
+        mask = row_mask(df['DateTime'], config)
         df_filtered = df[mask].copy()
-        df_filtered = df_filtered.drop(columns=[col for col in temp_cols if col in df_filtered.columns])
         
         logger.info(f"Time slice filtering: {len(df)} -> {len(df_filtered)} rows")
         
@@ -145,19 +84,11 @@ class TimeSliceManager:
                               config: Dict[str, Any],
                               time_cols: List[str]) -> pd.DataFrame:
         """Filter by E+ style time columns."""
-        # Parse time information if not cached
-        cache_key = f"{id(df)}_{len(time_cols)}"
-        if cache_key not in self.time_info_cache:
-            self.time_info_cache[cache_key] = parse_time_columns_enhanced(df, time_cols)
-        
-        time_info = self.time_info_cache[cache_key]
-        
-        if time_info.empty:
+        # Column calendars and compiled masks are cached in calendar_index
+        selected_cols = slice_columns(time_cols, config)
+        if not selected_cols and not calendar_for_columns(time_cols)[1]:
             return df
         
-        # Filter based on configuration
-        selected_cols = filter_columns_by_config(time_info, config)
-        
         # Keep non-time columns
         non_time_cols = [col for col in df.columns if col not in time_cols]
         final_cols = non_time_cols + selected_cols
@@ -183,65 +114,14 @@ def parse_time_columns_enhanced(df: pd.DataFrame, time_cols: List[str] = None) -
         logger.warning("No time columns found in DataFrame")
         return pd.DataFrame()
     
-    time_info = []
-    
-    for col in time_cols:
-        try:
-            # Handle different E+ output formats
-            # Format 1: "MM/DD  HH:MM:SS"
-            # Format 2: "MM/DD HH:MM:SS"
-            # Format 3: "MM/DD  HH:MM"
-            
-            col_str = str(col).strip()
-            
-            # Split by multiple spaces first, then single space
-            parts = col_str.split('  ')
-            if len(parts) == 1:
-                parts = col_str.split(' ')
-            
-            if len(parts) >= 2:
-                date_part = parts[0].strip()
-                time_part = parts[1].strip()
-                
-                # Parse date
-                if '/' in date_part:
-                    month, day = date_part.split('/')
-                    month = int(month)
-                    day = int(day)
-                else:
-                    continue
-                
-                # Parse time
-                if ':' in time_part:
-                    time_components = time_part.split(':')
-                    hour = int(time_components[0])
-                    minute = int(time_components[1]) if len(time_components) > 1 else 0
-                else:
-                    continue
-                
-                # Create datetime for day of week calculation
-                # Use a leap year to handle Feb 29
-                dt = datetime(2024, month, day, hour, minute)
-                
-                time_info.append({
-                    'column': col,
-                    'month': month,
-                    'day': day,
-                    'hour': hour,
-                    'minute': minute,
-                    'day_of_week': dt.weekday(),
-                    'is_weekend': dt.weekday() >= 5,
-                    'is_peak_cooling': month in [6, 7, 8],
-                    'is_peak_heating': month in [12, 1, 2],
-                    'is_peak_hour': hour in [14, 15, 16, 17],
-                    'is_business_hour': 8 <= hour <= 17 and dt.weekday() < 5
-                })
-                
-        except Exception as e:
-            logger.debug(f"Could not parse time column {col}: {e}")
-            continue
+    # One vectorized parse per distinct set of columns (cached)
+    index, parsed_cols = calendar_for_columns(time_cols)
+    if not parsed_cols:
+        return pd.DataFrame()
     
-    return pd.DataFrame(time_info)
+    time_info = index.to_frame()
+    time_info.insert(0, 'column', parsed_cols)
+    return time_info
 
 
 def filter_columns_by_config(time_df: pd.DataFrame, config: Dict[str, Any]) -> List[str]:
@@ -258,63 +138,9 @@ def filter_columns_by_config(time_df: pd.DataFrame, config: Dict[str, Any]) -> L
     if time_df.empty:
         return []
     
-    # Start with all columns
-    mask = pd.Series(True, index=time_df.index)
-    
-    slice_type = config.get('slice_type', 'none')
-    
-    if slice_type == 'peak_months':
-        season = config.get('season', 'both')
-        if season == 'cooling':
-            mask &= time_df['is_peak_cooling']
-        elif season == 'heating':
-            mask &= time_df['is_peak_heating']
-        elif season == 'both':
-            mask &= time_df['is_peak_cooling'] | time_df['is_peak_heating']
-    
-    elif slice_type == 'time_of_day':
-        hours = config.get('peak_hours', [14, 15, 16, 17])
-        if isinstance(config.get('peak_hours_range'), dict):
-            start = config['peak_hours_range']['start']
-            end = config['peak_hours_range']['end']
-            hours = list(range(start, end + 1))
-        mask &= time_df['hour'].isin(hours)
-    
-    elif slice_type == 'day_of_week':
-        if config.get('analyze_weekends', True):
-            mask &= time_df['is_weekend']
-        else:
-            mask &= ~time_df['is_weekend']
-    
-    elif slice_type == 'combined':
-        filters = config.get('combined_filters', {})
-        if 'months' in filters:
-            mask &= time_df['month'].isin(filters['months'])
-        if 'hours' in filters:
-            mask &= time_df['hour'].isin(filters['hours'])
-        if 'day_of_week' in filters:
-            if filters['day_of_week'] == 'weekdays':
-                mask &= ~time_df['is_weekend']
-            elif filters['day_of_week'] == 'weekends':
-                mask &= time_df['is_weekend']
-    
-    elif slice_type == 'custom':
-        # Custom filters
-        if 'months' in config:
-            mask &= time_df['month'].isin(config['months'])
-        if 'hours' in config:
-            mask &= time_df['hour'].isin(config['hours'])
-        if 'weekdays_only' in config and config['weekdays_only']:
-            mask &= ~time_df['is_weekend']
-        if 'weekends_only' in config and config['weekends_only']:
-            mask &= time_df['is_weekend']
-        if 'specific_days' in config:
-            day_mask = pd.Series(False, index=time_df.index)
-            for month, day in config['specific_days']:
-                day_mask |= (time_df['month'] == month) & (time_df['day'] == day)
-            mask &= day_mask
-    
-    return time_df[mask]['column'].tolist()
+    # Columns parse the same way as in parse_time_columns_enhanced, so the
+    # cached calendar and compiled mask are reused
+    return slice_columns(time_df['column'].tolist(), config)
 
 
 def aggregate_time_sliced_data(
@@ -0,0 +1,345 @@
+"""
+c_surrogate/training_store.py
+
+Typed feature/target store for surrogate training and calibration.
+
+The modification step writes every applied parameter change once, and the
+modified-results parsing writes per-variant target aggregates once, into
+<job_output_dir>/training_store/:
+
+    parameters/part-*.parquet   building_id, variant_id, parameter, category
+                                (dictionary-encoded), original, value,
+                                relative_change (float64)
+    targets/part-*.parquet      building_id, variant_id, target
+                                (dictionary-encoded), value (float64)
+
+Dense matrices (one row per building/variant, one column per parameter or
+target) are built from the dictionary codes with a single NumPy scatter and
+cached as .npy files next to the parts, keyed on the part files. Later
+reads memory-map them (np.load(mmap_mode='r')), so training and calibration
+no longer melt, pivot and join per variant and parameter with pandas.
+
+Usage:
+    store = TrainingStore(job_output_dir)
+    store.append_parameters(all_modifications)          # modification step
+    store.replace_targets(comparison_targets(...))     # parsing step
+    store.append_targets(comparison_targets(..., ids))  # parsing step, one batch of variants
+    features = store.matrix('parameters', 'relative_change')
+    X = features.values                                 # memory-mapped (rows x parameters)
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = 'training_store'
+KEY_COLUMNS = ['building_id', 'variant_id']
+TARGET_STATS = ('sum', 'mean', 'max', 'min', 'percent_change')
+
+# Column of each part table that indexes the matrix columns
+_MATRIX_COLUMN = {'parameters': 'parameter', 'targets': 'target'}
+
+
+class StoreMatrix(NamedTuple):
+    """Dense view of one store table."""
+    values: np.ndarray          # (rows x columns), memory-mapped, NaN where absent
+    keys: pd.DataFrame          # building_id, variant_id per row
+    columns: List[str]          # parameter or target names
+
+
+def _dictionary(values) -> pa.DictionaryArray:
+    return pa.array(pd.Series(values, dtype='object').astype(str).to_numpy(), type=pa.string()).dictionary_encode()
+
+
+def parameter_ids(df: pd.DataFrame) -> pd.Series:
+    """'category*object_type*object_name*field' identifiers, as used by the preprocessor."""
+    if 'param_id' in df.columns:
+        return df['param_id'].astype(str)
+    field = df['field'] if 'field' in df.columns else df.get('parameter', df.get('field_name'))
+    parts = [df.get('category'), df.get('object_type'), df.get('object_name'), field]
+    ids = parts[0].astype(str)
+    for part in parts[1:]:
+        ids = ids + '*' + part.astype(str)
+    return ids
+
+
+class TrainingStore:
+    """
+    Persistent parameter/target store of one job (see module docstring).
+    """
+
+    def __init__(self, job_output_dir: Union[str, Path]):
+        self.root = Path(job_output_dir) / STORE_DIRNAME
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+    def _parts(self, kind: str) -> List[Path]:
+        part_dir = self.root / kind
+        return sorted(part_dir.glob('part-*.parquet')) if part_dir.exists() else []
+
+    def has(self, kind: str) -> bool:
+        return bool(self._parts(kind))
+
+    def reset(self, kind: str):
+        """Drop a table (its parts and cached matrices)."""
+        for path in self._parts(kind):
+            path.unlink()
+        for path in self.root.glob(f'{kind}__*'):
+            path.unlink()
+
+    def _write_part(self, kind: str, table: pa.Table) -> Path:
+        part_dir = self.root / kind
+        part_dir.mkdir(parents=True, exist_ok=True)
+        path = part_dir / f'part-{time.time_ns()}.parquet'
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def append_parameters(self, modifications: Union[pd.DataFrame, List[Dict[str, Any]]]) -> int:
+        """
+        Append applied modifications (modify_building's 'modifications' records).
+
+        Returns:
+            Number of rows written
+        """
+        df = modifications if isinstance(modifications, pd.DataFrame) else pd.DataFrame(modifications)
+        if df.empty:
+            return 0
+        if 'new_value' not in df.columns and 'value' in df.columns:
+            df = df.rename(columns={'value': 'new_value'})
+
+        original = pd.to_numeric(df.get('original_value'), errors='coerce').to_numpy(dtype=float)
+        value = pd.to_numeric(df['new_value'], errors='coerce').to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_change = np.where(np.isfinite(original) & np.isfinite(value) & (original != 0),
+                                       (value - original) / original, 0.0)
+
+        table = pa.table({
+            'building_id': _dictionary(df['building_id']),
+            'variant_id': _dictionary(df['variant_id']),
+            'parameter': _dictionary(parameter_ids(df)),
+            'category': _dictionary(df.get('category', pd.Series('', index=df.index))),
+            'original': original,
+            'value': value,
+            'relative_change': relative_change,
+        })
+        self._write_part('parameters', table)
+        return table.num_rows
+
+    def replace_targets(self, targets: pd.DataFrame) -> int:
+        """
+        Replace the target table with long-format targets
+        (building_id, variant_id, target, value).
+        """
+        self.reset('targets')
+        return self.append_targets(targets)
+
+    def append_targets(self, targets: pd.DataFrame) -> int:
+        """Append long-format targets of variants not stored yet."""
+        if targets.empty:
+            return 0
+        table = pa.table({
+            'building_id': _dictionary(targets['building_id']),
+            'variant_id': _dictionary(targets['variant_id']),
+            'target': _dictionary(targets['target']),
+            'value': targets['value'].to_numpy(dtype=float),
+        })
+        self._write_part('targets', table)
+        return table.num_rows
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+    def _fingerprint(self, kind: str) -> str:
+        digest = hashlib.sha256()
+        for path in self._parts(kind):
+            stat = path.stat()
+            digest.update(f"{path.name}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()[:16]
+
+    def _read(self, kind: str, columns: Sequence[str]) -> pd.DataFrame:
+        """Concatenated parts; dictionary columns come back as Categoricals."""
+        tables = [pq.read_table(path, columns=list(columns)) for path in self._parts(kind)]
+        table = pa.concat_tables(tables, promote_options='default').unify_dictionaries()
+        return table.to_pandas()
+
+    def matrix(self, kind: str, field: str = 'value') -> StoreMatrix:
+        """
+        Dense (building/variant x parameter|target) matrix of one field,
+        memory-mapped from the cache (built first if the parts changed).
+
+        Args:
+            kind: 'parameters' or 'targets'
+            field: Value column ('value', 'original' or 'relative_change' for parameters)
+        """
+        fingerprint = self._fingerprint(kind)
+        prefix = self.root / f'{kind}__{field}'
+        values_path = prefix.with_name(prefix.name + '.npy')
+        keys_path = prefix.with_name(prefix.name + '.keys.parquet')
+        meta_path = prefix.with_name(prefix.name + '.json')
+
+        if meta_path.exists():
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get('fingerprint') == fingerprint and values_path.exists() and keys_path.exists():
+                return StoreMatrix(np.load(values_path, mmap_mode='r'),
+                                   pd.read_parquet(keys_path), meta['columns'])
+
+        column = _MATRIX_COLUMN[kind]
+        df = self._read(kind, KEY_COLUMNS + [column, field])
+        building = df['building_id'].astype('category')
+        variant = df['variant_id'].astype('category')
+        names = df[column].astype('category')
+
+        # Row = (building, variant) pair; column = dictionary code; last write wins
+        pair = building.cat.codes.to_numpy(np.int64) * len(variant.cat.categories) + variant.cat.codes.to_numpy(np.int64)
+        row_pairs, row_index = np.unique(pair, return_inverse=True)
+        values = np.full((len(row_pairs), len(names.cat.categories)), np.nan)
+        values[row_index, names.cat.codes.to_numpy()] = df[field].to_numpy(dtype=float)
+
+        keys = pd.DataFrame({
+            'building_id': np.asarray(building.cat.categories)[row_pairs // len(variant.cat.categories)],
+            'variant_id': np.asarray(variant.cat.categories)[row_pairs % len(variant.cat.categories)],
+        })
+        columns = [str(c) for c in names.cat.categories]
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_values = values_path.with_name(values_path.stem + '.tmp.npy')
+        np.save(tmp_values, values)
+        os.replace(tmp_values, values_path)
+        keys.to_parquet(keys_path, index=False)
+        with open(meta_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'columns': columns, 'shape': list(values.shape)}, f)
+
+        logger.info(f"[TrainingStore] Built {kind}/{field} matrix {values.shape}")
+        return StoreMatrix(np.load(values_path, mmap_mode='r'), keys, columns)
+
+    def parameter_info(self) -> pd.DataFrame:
+        """One row per parameter: category and baseline (original) value."""
+        df = self._read('parameters', ['parameter', 'category', 'original'])
+        return (df.drop_duplicates('parameter', keep='last')
+                  .astype({'parameter': str, 'category': str})
+                  .reset_index(drop=True))
+
+    def parameter_matrix(self, parameters: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Preprocessor-style parameter matrix: building_id, variant_id, one
+        relative-change column per parameter (0 = unchanged), and
+        category_<category>_mean_change columns.
+
+        Args:
+            parameters: Keep only these parameters (e.g. sensitivity-selected)
+        """
+        m = self.matrix('parameters', 'relative_change')
+        values = np.asarray(m.values)
+        columns = np.array(m.columns)
+        if parameters is not None:
+            keep = np.isin(columns, list(parameters))
+            values, columns = values[:, keep], columns[keep]
+
+        # Category means over each building's parameters (unchanged = 0), as
+        # create_parameter_matrix computes them from the wide modifications
+        info = self.parameter_info().set_index('parameter')['category']
+        categories = info.reindex(columns).fillna('').to_numpy()
+        present = ~np.isnan(values)
+        building_codes, _ = pd.factorize(m.keys['building_id'])
+        building_columns = np.zeros((building_codes.max() + 1 if len(building_codes) else 0, len(columns)), dtype=bool)
+        np.logical_or.at(building_columns, building_codes, present)
+        own_columns = building_columns[building_codes]
+        filled = np.where(present, values, 0.0)
+        category_means = {}
+        for category in pd.unique(categories):
+            in_category = own_columns & (categories == category)
+            counts = in_category.sum(axis=1)
+            sums = (filled * in_category).sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                category_means[f'category_{category}_mean_change'] = np.where(counts > 0, sums / counts, np.nan)
+
+        frame = pd.DataFrame(filled, columns=columns)
+        return pd.concat([m.keys, frame, pd.DataFrame(category_means)], axis=1)
+
+    def target_matrix(self, target_variables: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        building_id, variant_id and one column per stored target; with
+        target_variables only the statistics of those comparison keys
+        (<variable>_<aggregation>_<period>) are kept.
+        """
+        m = self.matrix('targets', 'value')
+        columns = m.columns
+        if target_variables:
+            wanted = {f'{var}_{stat}' for var in target_variables for stat in TARGET_STATS}
+            columns = [c for c in columns if c in wanted]
+        index = [m.columns.index(c) for c in columns]
+        frame = pd.DataFrame(np.asarray(m.values)[:, index], columns=columns)
+        return pd.concat([m.keys, frame], axis=1)
+
+
+def comparison_targets(comparisons_dir: Union[str, Path],
+                       variant_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Per-variant target aggregates of the parsed comparison files
+    (var_<variable>_<aggregation>_<period>[_b<building>].parquet with
+    variant_<n>_value columns), in long format for replace_targets.
+    With variant_ids only those variants' columns are read.
+
+    Target names follow SurrogateDataPreprocessor._aggregate_comparison_outputs:
+    <variable>_<aggregation>_<period>_{sum,mean,max,min,percent_change}.
+    """
+    wanted = None if variant_ids is None else {f'{v}_value' for v in variant_ids}
+    frames = []
+    for path in sorted(Path(comparisons_dir).glob('var_*.parquet')):
+        parts = path.stem.split('_')
+        if len(parts) < 4:
+            continue
+        key = '_'.join(parts[1:4])
+        building_id = next((p[1:] for p in parts[4:] if p.startswith('b') and p[1:].isdigit()), None)
+
+        schema_names = pq.ParquetFile(path).schema_arrow.names
+        variant_cols = [c for c in schema_names if c.startswith('variant_') and c.endswith('_value')]
+        if wanted is not None:
+            variant_cols = [c for c in variant_cols if c in wanted]
+        if not variant_cols:
+            continue
+        df = pd.read_parquet(path, columns=[c for c in ['building_id', 'base_value'] if c in schema_names] + variant_cols)
+        if building_id is None and 'building_id' in df.columns:
+            groups = df.groupby(df['building_id'].astype(str))
+        else:
+            groups = [(building_id or '', df)]
+
+        for bid, group in groups:
+            values = group[variant_cols].to_numpy(dtype=float)
+            sums = values.sum(axis=0)
+            stats = {
+                'sum': sums,
+                'mean': values.mean(axis=0),
+                'max': values.max(axis=0),
+                'min': values.min(axis=0),
+            }
+            if 'base_value' in group.columns:
+                base_sum = group['base_value'].to_numpy(dtype=float).sum()
+                if base_sum != 0:
+                    stats['percent_change'] = (sums - base_sum) / base_sum * 100
+            col_variants = [c[:-len('_value')] for c in variant_cols]
+            for stat, arr in stats.items():
+                frames.append(pd.DataFrame({
+                    'building_id': str(bid),
+                    'variant_id': col_variants,
+                    'target': f'{key}_{stat}',
+                    'value': arr,
+                }))
+    if not frames:
+        return pd.DataFrame(columns=['building_id', 'variant_id', 'target', 'value'])
+    return pd.concat(frames, ignore_index=True)
@@ -81,6 +81,10 @@ def build_surrogate_from_job(
     Returns:
         Dictionary containing model, output manager, and results
     """
+    if sur_cfg.get('incremental', {}).get('enabled', False):
+        from c_surrogate.incremental_surrogate import update_surrogate_incremental
+        return update_surrogate_incremental(job_output_dir, sur_cfg, output_dir, tracker)
+    
     logger.info("[Surrogate] Starting integrated surrogate modeling pipeline")
     
     # Step 1: Extract data
@@ -98,7 +102,8 @@ def build_surrogate_from_job(
     
     # Step 2: Preprocess data
     logger.info("[Surrogate] Step 2: Preprocessing data")
-    preprocessing_config = sur_cfg.get('preprocessing', {})
+    preprocessing_config = dict(sur_cfg.get('preprocessing', {}))
+    preprocessing_config.setdefault('training_store_dir', job_output_dir)
     
     # Override target variables from main config
     if 'target_variable' in sur_cfg:
@@ -143,6 +148,8 @@ def build_surrogate_from_job(
         automated_ml=sur_cfg.get('automated_ml', True),
         scale_features=sur_cfg.get('scale_features', True),
         cv_strategy=sur_cfg.get('cv_strategy', 'kfold'),
+        search_mode=sur_cfg.get('search_mode', 'randomized'),
+        search_config=sur_cfg.get('search_config', {}),
         save_metadata=sur_cfg.get('save_metadata', True),
         # AutoML parameters
         use_automl=sur_cfg.get('use_automl', False),
@@ -203,7 +210,9 @@ def build_surrogate_from_job(
             'n_features': len(feature_cols),
             'n_targets': len(target_cols),
             'n_samples': len(features)
-        }
+        },
+        'features': features,
+        'targets': targets
     }
 
 
@@ -296,7 +305,9 @@ def build_and_save_surrogate_from_preprocessed(
                 model_types=kwargs.get('model_types'),
                 cv_strategy=kwargs.get('cv_strategy', 'kfold'),
                 n_jobs=-1,
-                random_state=random_state
+                random_state=random_state,
+                search_mode=kwargs.get('search_mode', 'randomized'),
+                search_config=kwargs.get('search_config')
             )
         else:
             # Original RandomForest approach
@@ -386,6 +397,7 @@ def build_and_save_surrogate_from_preprocessed(
                 'scale_features': scale_features,
                 'scaler_type': kwargs.get('scaler_type') if scale_features else None,
                 'cv_strategy': kwargs.get('cv_strategy'),
+                'search_mode': kwargs.get('search_mode', 'randomized'),
                 'automated_ml': kwargs.get('automated_ml')
             },
             'training_date': datetime.now().isoformat()
@@ -924,44 +936,25 @@ def load_surrogate_and_predict(
     return_uncertainty: bool = False
 ):
     """Load and predict - original function with enhancements"""
-    # Load model data
-    model_data = joblib.load(model_path)
-    
-    # Handle both old and new formats
-    if isinstance(model_data, dict):
-        model = model_data['model']
-        scaler = model_data.get('scaler')
-        feature_cols = model_data['feature_columns']
-    else:
-        # Old format - just the model
-        model = model_data
-        scaler = None
-        feature_cols = joblib.load(columns_path)
+    # Loaded and compiled once per model file (see c_surrogate/surrogate_server.py)
+    from c_surrogate.surrogate_server import get_compiled_surrogate
+    surrogate = get_compiled_surrogate(model_path, columns_path)
+    model = surrogate.model
 
-    # Construct DF
-    df_sample = pd.DataFrame([sample_features])
-    
-    # Insert missing columns
-    for col in feature_cols:
-        if col not in df_sample.columns:
-            df_sample[col] = 0.0
-
-    df_sample = df_sample[feature_cols].fillna(0.0)
-    
-    # Scale if needed
-    if scaler is not None:
-        df_sample_scaled = scaler.transform(df_sample)
-        df_sample = pd.DataFrame(df_sample_scaled, columns=feature_cols)
+    # Feature row in model order; missing columns stay 0
+    X = surrogate.prepare(surrogate.rows_to_array([sample_features]))
 
     # Predict
-    y_pred = model.predict(df_sample)
+    y_pred = surrogate.predict_prepared(X)
+    if y_pred.shape[1] == 1:
+        y_pred = y_pred[:, 0]
     
     # Get uncertainty if requested and model supports it
     if return_uncertainty:
         try:
             # For RandomForest, we can get predictions from individual trees
             if hasattr(model, 'estimators_'):
-                predictions = np.array([tree.predict(df_sample) for tree in model.estimators_])
+                predictions = np.array([tree.predict(X) for tree in model.estimators_])
                 y_std = np.std(predictions, axis=0)
                 return y_pred, y_std
         except:
@@ -1004,7 +997,9 @@ def build_automated_ml_model(
     model_types: List[str] = None,
     cv_strategy: str = 'kfold',
     n_jobs: int = -1,
-    random_state: int = 42
+    random_state: int = 42,
+    search_mode: str = 'randomized',
+    search_config: Optional[Dict[str, Any]] = None
 ) -> Tuple[Any, Dict[str, Any], Dict[str, float]]:
     """
     Build model using automated ML pipeline with multiple model types.
@@ -1016,6 +1011,11 @@ def build_automated_ml_model(
         cv_strategy: Cross-validation strategy
         n_jobs: Number of parallel jobs
         random_state: Random seed
+        search_mode: 'randomized' (one RandomizedSearchCV per model type) or
+            'halving' (budgeted successive halving across all model types,
+            see c_surrogate/model_search.py)
+        search_config: Options for the halving search (time_budget_s, n_jobs,
+            eta, n_candidates_per_family, min_resources)
         
     Returns:
         (model, model_info, metrics)
@@ -1042,6 +1042,12 @@ def build_automated_ml_model(
     
     logger.info(f"[AutoML] Testing models: {models_to_test}")
     
+    if search_mode == 'halving':
+        return _build_with_halving_search(
+            X_train, Y_train, X_test, Y_test, models_to_test,
+            cv_strategy, search_config or {}, random_state
+        )
+    
     # Check if multi-output
     multi_output = Y_train.shape[1] > 1 if len(Y_train.shape) > 1 else False
     
@@ -1161,4 +1167,74 @@ def build_automated_ml_model(
         'n_models_tested': len(all_results)
     }
     
-    return best_model, model_info, final_metrics
\ No newline at end of file
+    return best_model, model_info, final_metrics
+
+
+def _build_with_halving_search(
+    X_train: pd.DataFrame,
+    Y_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    Y_test: pd.DataFrame,
+    models_to_test: List[str],
+    cv_strategy: str,
+    search_config: Dict[str, Any],
+    random_state: int
+) -> Tuple[Any, Dict[str, Any], Dict[str, float]]:
+    """
+    Successive-halving variant of build_automated_ml_model.
+    
+    The search runs with a single level of parallelism within the job's core
+    budget: the CPU slots the job reserved, capped by search_config['n_jobs']
+    if set. Outside the job service it uses search_config['n_jobs'] or all cores.
+    """
+    from c_surrogate.model_search import successive_halving_search, fit_best_candidate
+    from resource_slots import reserved_slots
+    
+    if isinstance(Y_train, pd.Series):
+        Y_train = Y_train.to_frame()
+    
+    cv = get_cv_strategy(cv_strategy, n_splits=3, random_state=random_state)
+    reserved = reserved_slots()
+    requested = search_config.get('n_jobs') or reserved or os.cpu_count() or 1
+    if reserved:
+        requested = min(requested, reserved)
+    
+    search = successive_halving_search(
+        X_train, Y_train, models_to_test, cv,
+        search_config={**search_config, 'n_jobs': requested},
+        random_state=random_state
+    )
+    
+    best = search['best']
+    final_model = fit_best_candidate(search, X_train, Y_train)
+    metrics = evaluate_model(final_model, X_test, Y_test)
+    
+    leaderboard = search['leaderboard']
+    family_best = leaderboard.sort_values(['rung', 'mean_r2'], ascending=False).groupby('model_type').first()
+    
+    model_info = {
+        'model_type': best['model_type'],
+        'best_params': best['overrides'],
+        'all_results': {
+            family: {'cv_r2': row['mean_r2'], 'rung': int(row['rung']), 'wall_time_s': row['wall_time_s']}
+            for family, row in family_best.iterrows()
+        },
+        'cv_strategy': cv_strategy,
+        'n_models_tested': int(leaderboard['model_type'].nunique()),
+        'search': {
+            'mode': 'halving',
+            'n_candidates': len(leaderboard),
+            'n_jobs': search['n_jobs'],
+            'total_seconds': search['total_seconds'],
+            'budget_exhausted': search['budget_exhausted'],
+            'rungs': search['rungs'],
+            'discarded_families': search['discarded_families'],
+            'per_target_best': search['per_target_best'],
+            'leaderboard': leaderboard.to_dict(orient='records'),
+        }
+    }
+    
+    for target, info in search['per_target_best'].items():
+        logger.info(f"[AutoML] Best for {target}: {info['model_type']} (CV R²={info['r2']:.4f})")
+    
+    return final_model, model_info, metrics
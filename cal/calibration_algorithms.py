@@ -12,7 +12,6 @@ Author: Your Team
 """
 
 import numpy as np
-import random
 from typing import List, Dict, Tuple, Callable, Optional, Any
 import logging
 from dataclasses import dataclass
@@ -51,6 +50,81 @@ class OptimizationResult:
     pareto_front: List[Tuple[Dict[str, float], List[float]]] = None
 
 
+###############################################################################
+# Population kernels (shared by PSO and DE)
+###############################################################################
+
+def spec_bounds(param_specs: List['ParamSpec']) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lower bounds, upper bounds and integer mask of the parameter specs"""
+    lower = np.array([spec.min_value for spec in param_specs], dtype=float)
+    upper = np.array([spec.max_value for spec in param_specs], dtype=float)
+    is_integer = np.array([bool(spec.is_integer) for spec in param_specs])
+    return lower, upper, is_integer
+
+
+def sample_population(param_specs: List['ParamSpec'], n: int) -> np.ndarray:
+    """Uniform random (n x dims) population within the spec bounds"""
+    lower, upper, is_integer = spec_bounds(param_specs)
+    population = np.random.uniform(lower, upper, size=(n, len(param_specs)))
+    population[:, is_integer] = np.round(population[:, is_integer])
+    return population
+
+
+def apply_population_constraints(population: np.ndarray,
+                                 param_specs: List['ParamSpec']) -> np.ndarray:
+    """
+    Bound handling plus ParamSpec.apply_constraints for every row at once:
+    'min_ratio' / 'max_ratio' constraints against other parameters' columns,
+    then clipping to [min_value, max_value].
+    """
+    lower, upper, is_integer = spec_bounds(param_specs)
+    population = np.clip(population, lower, upper)
+    
+    column = {spec.name: j for j, spec in enumerate(param_specs)}
+    for j, spec in enumerate(param_specs):
+        constraints = getattr(spec, 'constraints', None) or []
+        for constraint in constraints:
+            other = column.get(constraint.get('other_param'))
+            if other is None:
+                continue
+            # Compare against the value the evaluator will see
+            other_values = np.round(population[:, other]) if is_integer[other] else population[:, other]
+            if constraint['type'] == 'min_ratio':
+                population[:, j] = np.maximum(population[:, j], other_values * constraint['ratio'])
+            elif constraint['type'] == 'max_ratio':
+                population[:, j] = np.minimum(population[:, j], other_values * constraint['ratio'])
+        if constraints:
+            population[:, j] = np.clip(population[:, j], lower[j], upper[j])
+    
+    return population
+
+
+def population_to_dicts(population: np.ndarray,
+                        param_specs: List['ParamSpec']) -> List[Dict[str, float]]:
+    """Parameter dictionaries for the evaluator (integers rounded)"""
+    _, _, is_integer = spec_bounds(param_specs)
+    names = [spec.name for spec in param_specs]
+    rows = population.tolist()
+    if is_integer.any():
+        int_cols = np.flatnonzero(is_integer).tolist()
+        for row in rows:
+            for j in int_cols:
+                row[j] = int(round(row[j]))
+    return [dict(zip(names, row)) for row in rows]
+
+
+def evaluate_population(objective_func: Callable,
+                        param_dicts: List[Dict[str, float]]) -> np.ndarray:
+    """
+    Objective values of a population. Objectives exposing
+    `evaluate_batch(list_of_param_dicts)` get the whole population in one call.
+    """
+    evaluate_batch = getattr(objective_func, 'evaluate_batch', None)
+    if evaluate_batch is not None:
+        return np.asarray(evaluate_batch(param_dicts), dtype=float)
+    return np.array([objective_func(param_dict) for param_dict in param_dicts], dtype=float)
+
+
 class ParticleSwarmOptimizer:
     """Particle Swarm Optimization implementation"""
     
@@ -96,40 +170,25 @@ class ParticleSwarmOptimizer:
             OptimizationResult
         """
         n_dims = len(param_specs)
+        lower, upper, _ = spec_bounds(param_specs)
+        
+        # Maximum velocity per dimension as a fraction of the range
+        param_range = upper - lower
+        for spec, r in zip(param_specs, param_range):
+            if r > 1e10:  # Arbitrary large threshold
+                logger.warning(f"Parameter {spec.name} has extremely large range: {r}")
+        v_max = np.minimum(np.minimum(param_range, 1e10) * self.velocity_clamp, 1e8)
         
         # Initialize particles
-        positions = np.zeros((self.n_particles, n_dims))
-        velocities = np.zeros((self.n_particles, n_dims))
-        pbest_positions = np.zeros((self.n_particles, n_dims))
+        positions = sample_population(param_specs, self.n_particles)
+        velocities = np.random.uniform(-v_max, v_max, size=(self.n_particles, n_dims))
+        pbest_positions = positions.copy()
         pbest_scores = np.full(self.n_particles, float('inf'))
         
         # Global best
-        gbest_position = np.zeros(n_dims)
+        gbest_position = positions[0].copy()
         gbest_score = float('inf')
         
-        # Initialize positions and velocities
-        for i in range(self.n_particles):
-            for j, spec in enumerate(param_specs):
-                positions[i, j] = spec.sample_random()
-                
-                # Initialize velocity as small fraction of range
-                param_range = spec.max_value - spec.min_value
-                
-                # Add bounds checking to prevent overflow
-                if param_range > 1e10:  # Arbitrary large threshold
-                    logger.warning(f"Parameter {spec.name} has extremely large range: {param_range}")
-                    param_range = 1e10  # Cap the range
-                
-                v_max = param_range * self.velocity_clamp
-                
-                # Additional safety check
-                v_max = min(v_max, 1e8)  # Ensure v_max doesn't exceed numpy limits
-                
-                if v_max > 0:
-                    velocities[i, j] = np.random.uniform(-v_max, v_max)
-                else:
-                    velocities[i, j] = 0.0
-        
         # History tracking
         history = []
         convergence_data = {
@@ -142,53 +201,33 @@ class ParticleSwarmOptimizer:
         current_inertia = self.inertia
         
         for iteration in range(self.max_iter):
-            scores = np.zeros(self.n_particles)
+            # Evaluate the swarm (bounds and constraints applied to the positions)
+            positions = apply_population_constraints(positions, param_specs)
+            param_dicts = population_to_dicts(positions, param_specs)
+            scores = evaluate_population(objective_func, param_dicts)
+            history.extend(zip(param_dicts, scores.tolist()))
             
-            # Evaluate all particles
-            for i in range(self.n_particles):
-                # Convert position to param dict
-                param_dict = {}
-                for j, spec in enumerate(param_specs):
-                    val = positions[i, j]
-                    # Clamp to bounds
-                    val = np.clip(val, spec.min_value, spec.max_value)
-                    if spec.is_integer:
-                        val = int(round(val))
-                    param_dict[spec.name] = val
-                
-                # Evaluate
-                score = objective_func(param_dict)
-                scores[i] = score
-                history.append((param_dict.copy(), score))
-                
-                # Update personal best
-                if score < pbest_scores[i]:
-                    pbest_scores[i] = score
-                    pbest_positions[i] = positions[i].copy()
-                
-                # Update global best
-                if score < gbest_score:
-                    gbest_score = score
-                    gbest_position = positions[i].copy()
+            # Update personal bests
+            improved = scores < pbest_scores
+            pbest_scores[improved] = scores[improved]
+            pbest_positions[improved] = positions[improved]
+            
+            # Update global best
+            best = int(np.argmin(scores))
+            if scores[best] < gbest_score:
+                gbest_score = float(scores[best])
+                gbest_position = positions[best].copy()
             
             # Update velocities and positions
-            for i in range(self.n_particles):
-                for j in range(n_dims):
-                    # Velocity update equation
-                    r1, r2 = np.random.random(), np.random.random()
-                    
-                    velocities[i, j] = (
-                        current_inertia * velocities[i, j] +
-                        self.cognitive * r1 * (pbest_positions[i, j] - positions[i, j]) +
-                        self.social * r2 * (gbest_position[j] - positions[i, j])
-                    )
-                    
-                    # Clamp velocity
-                    v_max = (param_specs[j].max_value - param_specs[j].min_value) * self.velocity_clamp
-                    velocities[i, j] = np.clip(velocities[i, j], -v_max, v_max)
-                    
-                    # Position update
-                    positions[i, j] += velocities[i, j]
+            r1 = np.random.random((self.n_particles, n_dims))
+            r2 = np.random.random((self.n_particles, n_dims))
+            velocities = (
+                current_inertia * velocities +
+                self.cognitive * r1 * (pbest_positions - positions) +
+                self.social * r2 * (gbest_position - positions)
+            )
+            velocities = np.clip(velocities, -v_max, v_max)
+            positions = positions + velocities
             
             # Update inertia
             current_inertia *= self.inertia_decay
@@ -206,13 +245,9 @@ class ParticleSwarmOptimizer:
                           f"mean={np.mean(scores):.6f}, diversity={diversity:.6f}")
         
         # Convert best position to param dict
-        best_params = {}
-        for j, spec in enumerate(param_specs):
-            val = gbest_position[j]
-            val = np.clip(val, spec.min_value, spec.max_value)
-            if spec.is_integer:
-                val = int(round(val))
-            best_params[spec.name] = val
+        best_params = population_to_dicts(
+            apply_population_constraints(gbest_position[np.newaxis, :], param_specs), param_specs
+        )[0]
         
         return OptimizationResult(
             best_params=best_params,
@@ -225,6 +260,9 @@ class ParticleSwarmOptimizer:
 class DifferentialEvolution:
     """Differential Evolution optimization"""
     
+    # Number of distinct random individuals each strategy draws
+    STRATEGY_SIZES = {'best1bin': 2, 'rand1bin': 3, 'rand2bin': 5, 'best2bin': 4}
+    
     def __init__(self,
                  pop_size: int = 50,
                  max_iter: int = 100,
@@ -253,20 +291,14 @@ class DifferentialEvolution:
                 param_specs: List['ParamSpec'],
                 verbose: bool = True) -> OptimizationResult:
         """Run DE optimization"""
+        if self.strategy not in self.STRATEGY_SIZES:
+            raise ValueError(f"Unknown strategy: {self.strategy}")
         n_dims = len(param_specs)
+        rows = np.arange(self.pop_size)
         
-        # Initialize population
-        population = np.zeros((self.pop_size, n_dims))
-        fitness = np.full(self.pop_size, float('inf'))
-        
-        for i in range(self.pop_size):
-            for j, spec in enumerate(param_specs):
-                population[i, j] = spec.sample_random()
-        
-        # Evaluate initial population
-        for i in range(self.pop_size):
-            param_dict = self._array_to_dict(population[i], param_specs)
-            fitness[i] = objective_func(param_dict)
+        # Initialize and evaluate population
+        population = apply_population_constraints(sample_population(param_specs, self.pop_size), param_specs)
+        fitness = evaluate_population(objective_func, population_to_dicts(population, param_specs))
         
         best_idx = np.argmin(fitness)
         best_individual = population[best_idx].copy()
@@ -279,88 +311,60 @@ class DifferentialEvolution:
             'std_fitness': []
         }
         
-        # Adaptive parameters
-        if self.adaptive:
-            F_values = np.full(self.pop_size, self.mutation_factor)
-            CR_values = np.full(self.pop_size, self.crossover_prob)
+        # Per-individual F and CR (adapted only if adaptive)
+        F_values = np.full(self.pop_size, self.mutation_factor)
+        CR_values = np.full(self.pop_size, self.crossover_prob)
         
         # DE iterations
         for generation in range(self.max_iter):
-            new_population = population.copy()
-            new_fitness = fitness.copy()
+            # Mutation
+            r = self._random_indices(self.pop_size, self.STRATEGY_SIZES[self.strategy])
+            F = F_values[:, np.newaxis]
+            if self.strategy == "best1bin":
+                # DE/best/1/bin
+                mutants = best_individual + F * (population[r[:, 0]] - population[r[:, 1]])
+            elif self.strategy == "rand1bin":
+                # DE/rand/1/bin
+                mutants = population[r[:, 0]] + F * (population[r[:, 1]] - population[r[:, 2]])
+            elif self.strategy == "rand2bin":
+                # DE/rand/2/bin
+                mutants = population[r[:, 0]] + F * (
+                    (population[r[:, 1]] - population[r[:, 2]]) + (population[r[:, 3]] - population[r[:, 4]])
+                )
+            else:
+                # DE/best/2/bin
+                mutants = best_individual + F * (
+                    (population[r[:, 0]] - population[r[:, 1]]) + (population[r[:, 2]] - population[r[:, 3]])
+                )
             
-            for i in range(self.pop_size):
-                # Mutation
-                if self.strategy == "best1bin":
-                    # DE/best/1/bin
-                    r1, r2 = self._select_random_indices(i, self.pop_size, 2)
-                    mutant = best_individual + self.mutation_factor * (population[r1] - population[r2])
-                elif self.strategy == "rand1bin":
-                    # DE/rand/1/bin
-                    r1, r2, r3 = self._select_random_indices(i, self.pop_size, 3)
-                    mutant = population[r1] + self.mutation_factor * (population[r2] - population[r3])
-                elif self.strategy == "rand2bin":
-                    # DE/rand/2/bin
-                    r1, r2, r3, r4, r5 = self._select_random_indices(i, self.pop_size, 5)
-                    mutant = population[r1] + self.mutation_factor * (
-                        (population[r2] - population[r3]) + (population[r4] - population[r5])
-                    )
-                elif self.strategy == "best2bin":
-                    # DE/best/2/bin
-                    r1, r2, r3, r4 = self._select_random_indices(i, self.pop_size, 4)
-                    mutant = best_individual + self.mutation_factor * (
-                        (population[r1] - population[r2]) + (population[r3] - population[r4])
-                    )
-                else:
-                    raise ValueError(f"Unknown strategy: {self.strategy}")
-                
-                # Adaptive mutation factor
-                if self.adaptive:
-                    F = F_values[i]
-                    mutant = best_individual + F * (population[r1] - population[r2])
-                
-                # Crossover
-                trial = population[i].copy()
-                CR = CR_values[i] if self.adaptive else self.crossover_prob
-                
-                # Binomial crossover
-                j_rand = np.random.randint(n_dims)
-                for j in range(n_dims):
-                    if np.random.random() < CR or j == j_rand:
-                        trial[j] = mutant[j]
-                
-                # Boundary constraints
-                for j, spec in enumerate(param_specs):
-                    trial[j] = np.clip(trial[j], spec.min_value, spec.max_value)
-                
-                # Selection
-                param_dict = self._array_to_dict(trial, param_specs)
-                trial_fitness = objective_func(param_dict)
-                history.append((param_dict.copy(), trial_fitness))
-                
-                if trial_fitness < fitness[i]:
-                    new_population[i] = trial
-                    new_fitness[i] = trial_fitness
-                    
-                    # Update best
-                    if trial_fitness < best_fitness:
-                        best_fitness = trial_fitness
-                        best_individual = trial.copy()
-                    
-                    # Adaptive parameter update (successful)
-                    if self.adaptive:
-                        # Simple adaptation: increase F and CR slightly
-                        F_values[i] = min(1.0, F_values[i] * 1.1)
-                        CR_values[i] = min(1.0, CR_values[i] * 1.1)
-                else:
-                    # Adaptive parameter update (unsuccessful)
-                    if self.adaptive:
-                        # Decrease F and CR slightly
-                        F_values[i] = max(0.1, F_values[i] * 0.9)
-                        CR_values[i] = max(0.1, CR_values[i] * 0.9)
+            # Binomial crossover (at least one gene from the mutant)
+            cross = np.random.random((self.pop_size, n_dims)) < CR_values[:, np.newaxis]
+            cross[rows, np.random.randint(n_dims, size=self.pop_size)] = True
+            trials = np.where(cross, mutants, population)
+            
+            # Boundary and parameter constraints
+            trials = apply_population_constraints(trials, param_specs)
             
-            population = new_population
-            fitness = new_fitness
+            # Selection
+            param_dicts = population_to_dicts(trials, param_specs)
+            trial_fitness = evaluate_population(objective_func, param_dicts)
+            history.extend(zip(param_dicts, trial_fitness.tolist()))
+            
+            improved = trial_fitness < fitness
+            population[improved] = trials[improved]
+            fitness[improved] = trial_fitness[improved]
+            
+            # Update best
+            best_idx = np.argmin(fitness)
+            if fitness[best_idx] < best_fitness:
+                best_fitness = fitness[best_idx]
+                best_individual = population[best_idx].copy()
+            
+            # Adaptive parameter update: successful individuals increase
+            # F and CR slightly, unsuccessful ones decrease them
+            if self.adaptive:
+                F_values = np.where(improved, np.minimum(1.0, F_values * 1.1), np.maximum(0.1, F_values * 0.9))
+                CR_values = np.where(improved, np.minimum(1.0, CR_values * 1.1), np.maximum(0.1, CR_values * 0.9))
             
             # Update convergence data
             convergence_data['best_fitness'].append(best_fitness)
@@ -372,7 +376,7 @@ class DifferentialEvolution:
                           f"mean={np.mean(fitness):.6f}, std={np.std(fitness):.6f}")
         
         # Convert best to param dict
-        best_params = self._array_to_dict(best_individual, param_specs)
+        best_params = population_to_dicts(best_individual[np.newaxis, :], param_specs)[0]
         
         return OptimizationResult(
             best_params=best_params,
@@ -381,21 +385,13 @@ class DifferentialEvolution:
             convergence_data=convergence_data
         )
     
-    def _array_to_dict(self, array: np.ndarray, param_specs: List['ParamSpec']) -> Dict[str, float]:
-        """Convert numpy array to parameter dictionary"""
-        param_dict = {}
-        for j, spec in enumerate(param_specs):
-            val = array[j]
-            if spec.is_integer:
-                val = int(round(val))
-            param_dict[spec.name] = val
-        return param_dict
-    
-    def _select_random_indices(self, exclude: int, pop_size: int, n: int) -> List[int]:
-        """Select n random indices excluding the given index"""
-        indices = list(range(pop_size))
-        indices.remove(exclude)
-        return random.sample(indices, n)
+    def _random_indices(self, pop_size: int, n: int) -> np.ndarray:
+        """(pop_size x n) distinct random indices per row, excluding the row's own index"""
+        if pop_size <= n:
+            raise ValueError(f"Strategy {self.strategy} needs a population larger than {n}")
+        keys = np.random.random((pop_size, pop_size))
+        keys[np.arange(pop_size), np.arange(pop_size)] = np.inf
+        return np.argsort(keys, axis=1)[:, :n]
 
 
 class NSGA2Optimizer:
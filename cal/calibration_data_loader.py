@@ -6,8 +6,18 @@ import pandas as pd
 import numpy as np
 import logging
 
+from validation.measured_data_cache import load_measured_data
+
 logger = logging.getLogger(__name__)
 
+
+def _building_key(building_id):
+    """Measured-data cache stores IDs as strings; keep numeric IDs numeric."""
+    try:
+        return int(building_id)
+    except (TypeError, ValueError):
+        return building_id
+
 def load_calibration_output_matrix(file_path: str) -> pd.DataFrame:
     """
     Load output_matrix.csv and convert to calibration format
@@ -63,44 +73,31 @@ def patch_calibration_data_loading():
         """Patched version that handles different data formats"""
         
         logger.info(f"Loading real data from: {real_data_path}")
-        df = pd.read_csv(real_data_path)
+        df, meta = load_measured_data(real_data_path)
         
         # Check format and convert as needed
-        if 'building_id' in df.columns and 'Variable' in df.columns:
+        if meta.get('layout') == 'long':
             # This is the parsed format - need to pivot to wide format
             logger.info("Converting parsed format to calibration format")
             
-            # Get unique variables
-            variables = df['Variable'].unique()
-            result_rows = []
+            # DateTime is already parsed by the cache; use MM/DD column names
+            # (with the time of day for sub-daily data)
+            times = df['DateTime']
+            if (times.dt.normalize() == times).all():
+                df['date_col'] = times.dt.strftime('%m/%d')
+            else:
+                df['date_col'] = times.dt.strftime('%m/%d %H:%M:%S')
             
-            for var in variables:
-                var_data = df[df['Variable'] == var]
-                if len(var_data) == 0:
-                    continue
-                    
+            result_rows = []
+            for var, var_data in df.groupby('Variable', sort=False):
                 # Create row for this variable
                 row = {
-                    'BuildingID': var_data['building_id'].iloc[0],
+                    'BuildingID': _building_key(var_data['building_id'].iloc[0]),
                     'VariableName': var
                 }
                 
                 # Add time series data
-                for _, data_row in var_data.iterrows():
-                    # Use DateTime as column name
-                    date_str = str(data_row['DateTime'])
-                    # Convert to MM/DD format if it's YYYY-MM-DD
-                    if '-' in date_str:
-                        parts = date_str.split('-')
-                        if len(parts) == 3:
-                            date_col = f"{parts[1]}/{parts[2]}"
-                        else:
-                            date_col = date_str
-                    else:
-                        date_col = date_str
-                    
-                    row[date_col] = data_row['Value']
-                
+                row.update(zip(var_data['date_col'], var_data['Value']))
                 result_rows.append(row)
             
             uc.REAL_DATA_DF = pd.DataFrame(result_rows)
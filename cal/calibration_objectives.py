@@ -310,7 +310,7 @@ def apply_time_filter_to_data(data: Dict[str, pd.DataFrame],
         Filtered data dictionary
     """
     # Import here to avoid circular imports
-    from cal.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
+    from c_surrogate.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
     
     filtered_data = {}
     
@@ -347,7 +347,7 @@ class TimeBasedObjective(CalibrationObjective):
         """
         if self.time_slice_config:
             # Apply time filtering
-            from cal.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
+            from c_surrogate.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
             
             if self.time_slice_config.get("method") == "predefined":
                 slice_name = self.time_slice_config.get("predefined_slice")
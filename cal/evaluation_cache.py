@@ -0,0 +1,191 @@
+"""
+evaluation_cache.py
+
+Shared memo table for calibration objective evaluations.
+
+Parameter vectors are quantized to each ParamSpec's resolution (integer
+parameters: 1; others: `relative_resolution` of the range unless the spec
+sets `resolution`), so identical and near-identical candidates - converged
+populations, re-sampled points, HybridOptimizer stage hand-offs - are
+evaluated once. Entries are namespaced by a context string (the objective's
+data/model inputs and the parameter names) and persisted as parquet, so
+later stages, calibration configurations and iterations reuse them.
+
+The cache is off by default (evaluation_cache.enabled): a stored value is
+only valid while everything the objective reads besides the parameters is
+part of the context.
+
+Usage:
+    cache = EvaluationCache(param_specs, context, path="evaluation_cache.parquet")
+    cached_eval = CachedObjective(eval_func, cache)
+    result = optimizer.optimize(cached_eval, param_specs)
+    cache.save()
+    cache.stats()   # hits, misses, hit_rate, ...
+
+Author: Your Team
+"""
+
+import os
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_EVALUATION_CACHE_CONFIG = {
+    'enabled': False,               # opt-in, see the module docstring
+    'path': None,                   # parquet file (default: <best_params_folder>/evaluation_cache.parquet)
+    'relative_resolution': 1e-6,    # quantum of non-integer parameters, as a fraction of their range
+}
+
+
+class EvaluationCache:
+    """
+    Objective values keyed on quantized parameter vectors.
+
+    Args:
+        param_specs: Parameter specifications (fix the key order and resolution)
+        context: Anything the objective depends on besides the parameters
+        path: Parquet file to load from and save to (None = in-memory only)
+        relative_resolution: Quantum of non-integer parameters as a fraction of their range
+    """
+
+    def __init__(self,
+                 param_specs: List['ParamSpec'],
+                 context: str = "",
+                 path: Optional[str] = None,
+                 relative_resolution: float = 1e-6):
+        self.names = [spec.name for spec in param_specs]
+        resolution = []
+        for spec in param_specs:
+            res = getattr(spec, 'resolution', None)
+            if not res:
+                res = 1.0 if spec.is_integer else (spec.max_value - spec.min_value) * relative_resolution
+            resolution.append(res if res > 0 else 1.0)
+        self.resolution = np.array(resolution, dtype=float)
+
+        self.namespace = hashlib.sha256(
+            (context + "|" + ",".join(self.names)).encode()
+        ).hexdigest()[:16]
+        self.path = path
+        self.table: Dict[Tuple[int, ...], Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.n_loaded = 0
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def key(self, param_dict: Dict[str, float]) -> Optional[Tuple[int, ...]]:
+        """Quantized key of a parameter dict (None if a parameter is missing)"""
+        try:
+            values = np.array([param_dict[name] for name in self.names], dtype=float)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return tuple(np.round(values / self.resolution).astype(np.int64).tolist())
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+    def load(self):
+        """Load this namespace's entries from the parquet file"""
+        try:
+            df = pd.read_parquet(self.path, filters=[('namespace', '==', self.namespace)])
+        except Exception as e:
+            logger.warning(f"[WARN] Could not read evaluation cache {self.path}: {e}")
+            return
+        for key, values, is_list in zip(df['key'], df['values'], df['is_list']):
+            value = [float(v) for v in values]
+            self.table[tuple(int(k) for k in key.split(','))] = value if is_list else value[0]
+        self.n_loaded = len(df)
+        logger.info(f"[INFO] Loaded {self.n_loaded} cached evaluations from {self.path}")
+
+    def save(self):
+        """Write this namespace's entries, keeping other namespaces in the file"""
+        if not self.path:
+            return
+        rows = pd.DataFrame({
+            'namespace': self.namespace,
+            'key': [','.join(map(str, key)) for key in self.table],
+            'values': [list(np.atleast_1d(np.asarray(v, dtype=float))) for v in self.table.values()],
+            'is_list': [isinstance(v, (list, tuple, np.ndarray)) for v in self.table.values()],
+        })
+        if os.path.exists(self.path):
+            try:
+                others = pd.read_parquet(self.path, filters=[('namespace', '!=', self.namespace)])
+                rows = pd.concat([others, rows], ignore_index=True)
+            except Exception as e:
+                logger.warning(f"[WARN] Rewriting unreadable evaluation cache {self.path}: {e}")
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        rows.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts of this run"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.table),
+            'loaded_entries': self.n_loaded,
+            'path': self.path,
+        }
+
+
+class CachedObjective:
+    """
+    Objective function wrapper that looks candidates up in an EvaluationCache
+    first. Supports single calls and evaluate_batch (duplicates within a
+    batch are evaluated once).
+    """
+
+    def __init__(self, objective_func: Callable, cache: EvaluationCache):
+        self.objective_func = objective_func
+        self.cache = cache
+
+    def __call__(self, param_dict: Dict[str, float]):
+        key = self.cache.key(param_dict)
+        if key is not None and key in self.cache.table:
+            self.cache.hits += 1
+            return self.cache.table[key]
+        self.cache.misses += 1
+        value = self.objective_func(param_dict)
+        if key is not None:
+            self.cache.table[key] = value
+        return value
+
+    def evaluate_batch(self, param_dicts: List[Dict[str, float]]) -> List[Any]:
+        keys = [self.cache.key(p) for p in param_dicts]
+        results: List[Any] = [None] * len(param_dicts)
+        pending: Dict[Any, List[int]] = {}
+        for i, key in enumerate(keys):
+            if key is not None and key in self.cache.table:
+                self.cache.hits += 1
+                results[i] = self.cache.table[key]
+            elif key is not None and key in pending:
+                self.cache.hits += 1
+                pending[key].append(i)
+            else:
+                self.cache.misses += 1
+                pending[key if key is not None else ('uncached', i)] = [i]
+
+        if pending:
+            first = [positions[0] for positions in pending.values()]
+            batch = getattr(self.objective_func, 'evaluate_batch', None)
+            if batch is not None:
+                values = list(batch([param_dicts[i] for i in first]))
+            else:
+                values = [self.objective_func(param_dicts[i]) for i in first]
+            for (key, positions), value in zip(pending.items(), values):
+                if key[0] != 'uncached':
+                    self.cache.table[key] = value
+                for i in positions:
+                    results[i] = value
+        return results
@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 import logging
 
+from validation.measured_data_cache import load_measured_data
+
 logger = logging.getLogger(__name__)
 
 # Store original function
@@ -12,7 +14,7 @@ def load_real_data_patched(real_data_path: str, time_aggregation: str = 'sum'):
     """Patched version that handles different data formats"""
     logger.info(f"Loading real data from {real_data_path}")
     
-    df = pd.read_csv(real_data_path)
+    df, _ = load_measured_data(real_data_path)
     logger.info(f"Loaded data shape: {df.shape}")
     
     # Check if it's in the expected format
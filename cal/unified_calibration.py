@@ -35,6 +35,7 @@ from cal.calibration_algorithms import (
     NSGA2Optimizer, CMAESOptimizer, HybridOptimizer,
     OptimizationResult
 )
+from cal.evaluation_cache import EvaluationCache, CachedObjective, DEFAULT_EVALUATION_CACHE_CONFIG
 
 # scikit-optimize for bayesian calibration
 try:
@@ -52,6 +53,9 @@ except ImportError:
 # For Surrogate usage
 import joblib
 
+from validation.measured_data_cache import load_measured_data
+from c_surrogate.surrogate_server import get_compiled_surrogate, SurrogateClient
+
 logger = logging.getLogger(__name__)
 
 ###############################################################################
@@ -76,13 +80,15 @@ class ParamSpec:
                  max_value: float, 
                  is_integer: bool = False,
                  group: Optional[str] = None,
-                 constraints: Optional[List[Dict]] = None):
+                 constraints: Optional[List[Dict]] = None,
+                 resolution: Optional[float] = None):
         self.name = name
         self.min_value = min_value
         self.max_value = max_value
         self.is_integer = is_integer
         self.group = group  # For grouping related parameters
         self.constraints = constraints or []  # Constraints with other parameters
+        self.resolution = resolution  # Evaluation cache quantum (None = from range)
 
     def sample_random(self) -> float:
         val = random.uniform(self.min_value, self.max_value)
@@ -120,7 +126,8 @@ def load_real_data_once(real_csv: str, time_aggregation: str = 'sum'):
     global REAL_DATA_DICT, REAL_DATA_DF
     if REAL_DATA_DF is None:
         logger.info(f"[INFO] Loading real data => {real_csv}")
-        REAL_DATA_DF = pd.read_csv(real_csv)
+        # Shared parquet cache with validation, keyed on the file's hash
+        REAL_DATA_DF, _ = load_measured_data(real_csv)
         
         # Create simple dictionary for backward compatibility
         # Aggregate across all time columns
@@ -171,7 +178,7 @@ def calculate_error_with_time_slice(
         
         # Apply time slicing if configured
         if time_slice_config and REAL_DATA_DF is not None:
-            from cal.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
+            from c_surrogate.time_slice_utils import filter_results_by_time_slice, apply_predefined_slice
             
             # Filter real data
             if time_slice_config.get("method") == "predefined":
@@ -217,6 +224,17 @@ def calculate_error_with_time_slice(
         return run_energyplus_and_compute_error(param_dict, config)
 
 
+_SURROGATE_CLIENTS: Dict[Tuple[str, Optional[str]], SurrogateClient] = {}
+
+
+def _get_surrogate_client(url: str, version: Optional[str] = None) -> SurrogateClient:
+    """One client (keep-alive connection per thread) per server URL and version."""
+    key = (url, version)
+    if key not in _SURROGATE_CLIENTS:
+        _SURROGATE_CLIENTS[key] = SurrogateClient(url, version=version)
+    return _SURROGATE_CLIENTS[key]
+
+
 def predict_with_surrogate(param_dict: Dict[str, float], config: dict) -> Dict[str, np.ndarray]:
     """
     Enhanced surrogate prediction returning multiple variables
@@ -224,10 +242,21 @@ def predict_with_surrogate(param_dict: Dict[str, float], config: dict) -> Dict[s
     model_path = config.get("surrogate_model_path", "heating_surrogate_model.joblib")
     columns_path = config.get("surrogate_columns_path", "heating_surrogate_columns.joblib")
     
-    load_surrogate_once(model_path, columns_path)
+    # Surrogate column name -> value (unknown columns are ignored downstream)
+    row = {transform_calib_name_to_surrogate_col(k): v for k, v in param_dict.items()}
     
-    df_sample = build_feature_row_from_param_dict(param_dict)
-    preds = MODEL_SURROGATE.predict(df_sample)
+    server_url = config.get("surrogate_server_url")
+    if server_url:
+        # Shared inference server (micro-batched across concurrent callers)
+        preds = _get_surrogate_client(server_url, config.get("surrogate_version")).predict(
+            np.array([list(row.values())], dtype=float), columns=list(row.keys())
+        )
+    else:
+        # Loaded once; the training scaler is applied like in build_and_save_surrogate*
+        surrogate = get_compiled_surrogate(model_path, columns_path)
+        preds = surrogate.predict(surrogate.rows_to_array([row]))
+    if preds.shape[1] == 1:
+        preds = preds[:, 0]
     
     # Handle multi-output models
     target_vars = config.get("target_variables", [config.get("target_variable")])
@@ -554,6 +583,20 @@ def run_single_calibration(config: dict) -> Dict[str, Any]:
                 pdict, config, None, time_slice_config
             )
     
+    # Evaluation cache shared by all stages (and runs with the same inputs), opt-in
+    cache_cfg = {**DEFAULT_EVALUATION_CACHE_CONFIG, **config.get("evaluation_cache", {})}
+    evaluation_cache = None
+    optimizer_func = eval_func
+    if cache_cfg["enabled"]:
+        evaluation_cache = EvaluationCache(
+            param_specs,
+            context=evaluation_cache_context(config),
+            path=cache_cfg["path"] or os.path.join(config.get("best_params_folder", "./"),
+                                                   "evaluation_cache.parquet"),
+            relative_resolution=cache_cfg["relative_resolution"]
+        )
+        optimizer_func = CachedObjective(eval_func, evaluation_cache)
+    
     # 5) Run optimization
     algorithm_config = config.get("algorithm_config", {})
     method = config.get("method", "ga")
@@ -574,9 +617,9 @@ def run_single_calibration(config: dict) -> Dict[str, Any]:
         ])
     
     # Run calibration
-    result = run_calibration_config(method_config, param_specs, eval_func)
+    result = run_calibration_config(method_config, param_specs, optimizer_func)
     
-    # 6) Validation
+    # 6) Validation (uncached: it re-evaluates the same parameters on purpose)
     validation_config = config.get("validation", {})
     if validation_config:
         validation_results = validate_calibration(
@@ -592,16 +635,44 @@ def run_single_calibration(config: dict) -> Dict[str, Any]:
     else:
         validation_results = None
     
+    cache_stats = None
+    if evaluation_cache is not None:
+        evaluation_cache.save()
+        cache_stats = evaluation_cache.stats()
+        logger.info(f"[INFO] Evaluation cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                    f"(hit rate {cache_stats['hit_rate']:.1%})")
+    
     # 7) Package results
     return {
         'optimization_result': result,
         'validation_results': validation_results,
+        'evaluation_cache': cache_stats,
         'config': config,
         'param_specs': param_specs,
         'df_scenarios': df_scen
     }
 
 
+def evaluation_cache_context(config: dict) -> str:
+    """
+    Everything besides the parameters that the objective value depends on:
+    data and model inputs (with their modification times), targets,
+    objectives, time slice and whether the objective is multi-valued.
+    """
+    context = {
+        key: config.get(key) for key in (
+            "use_surrogate", "surrogate_server_url", "surrogate_version",
+            "target_variable", "target_variables", "objectives",
+            "time_slice", "time_slice_config"
+        )
+    }
+    for key in ("real_data_csv", "surrogate_model_path", "surrogate_columns_path"):
+        path = config.get(key)
+        context[key] = [path, os.path.getmtime(path) if path and os.path.exists(path) else None]
+    context["multi_objective"] = len(config.get("objectives", [])) > 1 and config.get("method") == "nsga2"
+    return json.dumps(context, sort_keys=True, default=str)
+
+
 def combine_calibration_results(
     results: List[Dict[str, Any]],
     base_config: dict
@@ -626,7 +697,8 @@ def combine_calibration_results(
         
         combined['best_by_config'][config_name] = {
             'params': opt_result.best_params,
-            'objective': opt_result.best_objective
+            'objective': opt_result.best_objective,
+            'evaluation_cache': result.get('evaluation_cache')
         }
         
         if opt_result.best_objective < best_objective:
@@ -682,6 +754,9 @@ def save_calibration_results(result: Dict[str, Any], config: dict):
     if result['validation_results']:
         metadata['validation'] = result['validation_results']
     
+    if result.get('evaluation_cache'):
+        metadata['evaluation_cache'] = result['evaluation_cache']
+    
     if opt_result.pareto_front:
         metadata['n_pareto_solutions'] = len(opt_result.pareto_front)
     
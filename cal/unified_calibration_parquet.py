@@ -9,9 +9,39 @@ from pathlib import Path
 from typing import List, Dict, Optional
 import logging
 
+from c_surrogate.training_store import TrainingStore
+
 logger = logging.getLogger(__name__)
 
 
+def load_scenario_from_store(store: TrainingStore) -> pd.DataFrame:
+    """
+    Calibration parameters from the training store: bounds are the column-wise
+    min/max of the memory-mapped variant value matrix.
+    """
+    values = store.matrix('parameters', 'value')
+    with np.errstate(all='ignore'):
+        min_vals = np.nanmin(values.values, axis=0)
+        max_vals = np.nanmax(values.values, axis=0)
+        mean_vals = np.nanmean(values.values, axis=0)
+    
+    info = store.parameter_info().set_index('parameter').reindex(values.columns)
+    current_vals = np.where(np.isnan(info['original'].to_numpy(dtype=float)),
+                            mean_vals, info['original'].to_numpy(dtype=float))
+    
+    parameters = pd.DataFrame({
+        'param_name': values.columns,
+        'param_value': current_vals,
+        'param_min': min_vals,
+        'param_max': max_vals,
+        'category': info['category'].to_numpy(),
+        'source_file': [f"scenario_params_{cat}.csv" for cat in info['category']]
+    })
+    parameters = parameters[~np.isnan(min_vals)].reset_index(drop=True)
+    logger.info(f"Loaded {len(parameters)} parameters from training store {store.root}")
+    return parameters
+
+
 def load_scenario_from_parquet(output_dir: Path) -> pd.DataFrame:
     """
     Load scenario parameters directly from modifications parquet file
@@ -22,6 +52,10 @@ def load_scenario_from_parquet(output_dir: Path) -> pd.DataFrame:
     Returns:
         DataFrame with parameters in calibration format
     """
+    store = TrainingStore(output_dir)
+    if store.has('parameters'):
+        return load_scenario_from_store(store)
+    
     # Find modifications parquet file
     mod_files = list((output_dir / "modified_idfs").glob("modifications_detail_wide_*.parquet"))
     if not mod_files:
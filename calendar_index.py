@@ -0,0 +1,344 @@
+"""
+calendar_index.py
+
+Shared calendar index for time slicing (sensitivity, surrogate, calibration).
+
+A CalendarIndex holds vectorized calendar attributes (month, day, hour,
+weekday, season, peak/business-hour flags, holidays) for one set of distinct
+timestamps: a simulation period at a given frequency, the DateTime values of a
+long-format frame, or the "MM/DD  HH:MM:SS" column labels of an EnergyPlus
+wide frame. Indexes are built once and cached, and a slice configuration is
+compiled once per index into a boolean mask (also cached), so slicing any
+number of result frames that share the same time axis costs one parse.
+
+Usage:
+    mask = row_mask(df["DateTime"], time_slice_config)     # long format
+    df = df[mask]
+
+    cols = slice_columns(df.columns, time_slice_config)    # E+ wide format
+    df = df[non_time_cols + cols]
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PEAK_COOLING_MONTHS = [6, 7, 8]
+DEFAULT_PEAK_HEATING_MONTHS = [12, 1, 2]
+DEFAULT_PEAK_HOURS = [14, 15, 16, 17]
+
+SEASON_NAMES = ["winter", "spring", "summer", "fall"]
+# Month (1..12) -> index into SEASON_NAMES (position 0 unused)
+_MONTH_TO_SEASON = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+# EnergyPlus column labels carry no year; weekdays are taken from a leap year
+# so 02/29 is valid.
+EPLUS_REFERENCE_YEAR = 2024
+
+_EPLUS_COLUMN_RE = r"^\s*(\d{1,2})/(\d{1,2})\s+(\d{1,2}):(\d{1,2})"
+
+_CACHE_SIZE = 32
+
+
+def _month_day_keys(values: Iterable[Any]) -> np.ndarray:
+    """month*100 + day for holiday entries given as 'MM/DD', dates or timestamps."""
+    keys = []
+    for value in values:
+        if isinstance(value, str) and "/" in value and len(value) <= 5:
+            month, day = value.split("/")
+            keys.append(int(month) * 100 + int(day))
+        else:
+            ts = pd.Timestamp(value)
+            keys.append(ts.month * 100 + ts.day)
+    return np.array(keys, dtype=np.int32)
+
+
+class CalendarIndex:
+    """
+    Calendar attributes of n distinct timestamps, as numpy arrays of length n.
+
+    Attributes:
+        month, day, hour, minute, day_of_week (Monday=0), season (index into
+        SEASON_NAMES), is_weekend, is_peak_cooling, is_peak_heating,
+        is_peak_hour, is_business_hour, is_holiday; `datetimes` when the
+        timestamps carry a year (None for EnergyPlus column labels).
+    """
+
+    def __init__(self,
+                 month: np.ndarray,
+                 day: np.ndarray,
+                 hour: np.ndarray,
+                 minute: np.ndarray,
+                 day_of_week: np.ndarray,
+                 datetimes: Optional[pd.DatetimeIndex] = None,
+                 holidays: Sequence[Any] = ()):
+        self.month = np.asarray(month, dtype=np.int16)
+        self.day = np.asarray(day, dtype=np.int16)
+        self.hour = np.asarray(hour, dtype=np.int16)
+        self.minute = np.asarray(minute, dtype=np.int16)
+        self.day_of_week = np.asarray(day_of_week, dtype=np.int8)
+        self.datetimes = datetimes
+
+        self.month_day = self.month.astype(np.int32) * 100 + self.day
+        self.season = _MONTH_TO_SEASON[self.month]
+        self.is_weekend = self.day_of_week >= 5
+        self.is_peak_cooling = np.isin(self.month, DEFAULT_PEAK_COOLING_MONTHS)
+        self.is_peak_heating = np.isin(self.month, DEFAULT_PEAK_HEATING_MONTHS)
+        self.is_peak_hour = np.isin(self.hour, DEFAULT_PEAK_HOURS)
+        self.is_holiday = np.isin(self.month_day, _month_day_keys(holidays))
+        self.is_business_hour = (self.hour >= 8) & (self.hour <= 17) & ~self.is_weekend & ~self.is_holiday
+
+        self._masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Construction
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_datetimes(cls, datetimes: pd.DatetimeIndex, holidays: Sequence[Any] = ()) -> "CalendarIndex":
+        datetimes = pd.DatetimeIndex(datetimes)
+        return cls(datetimes.month, datetimes.day, datetimes.hour, datetimes.minute,
+                   datetimes.dayofweek, datetimes=datetimes, holidays=holidays)
+
+    @classmethod
+    def from_eplus_labels(cls, labels: Sequence[str],
+                          holidays: Sequence[Any] = ()) -> Tuple["CalendarIndex", np.ndarray]:
+        """
+        Parse "MM/DD  HH:MM[:SS]" labels in one vectorized pass.
+
+        Returns:
+            (index over the parseable labels, positions of those labels)
+        """
+        parts = pd.Series([str(label) for label in labels], dtype=object).str.extract(_EPLUS_COLUMN_RE)
+        parts = parts.apply(pd.to_numeric, errors="coerce")
+        dates = pd.to_datetime(
+            pd.DataFrame({"year": EPLUS_REFERENCE_YEAR, "month": parts[0], "day": parts[1]}),
+            errors="coerce"
+        )
+        valid = (dates.notna() & parts[2].notna() & parts[3].notna()).to_numpy()
+        positions = np.flatnonzero(valid)
+        parts = parts[valid].astype(np.int64)
+        index = cls(parts[0].to_numpy(), parts[1].to_numpy(), parts[2].to_numpy(), parts[3].to_numpy(),
+                    pd.DatetimeIndex(dates[valid]).dayofweek, holidays=holidays)
+        return index, positions
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+    @property
+    def has_dates(self) -> bool:
+        return self.datetimes is not None
+
+    def to_frame(self) -> pd.DataFrame:
+        """Attributes as a DataFrame (one row per timestamp)."""
+        return pd.DataFrame({
+            "month": self.month.astype(int),
+            "day": self.day.astype(int),
+            "hour": self.hour.astype(int),
+            "minute": self.minute.astype(int),
+            "day_of_week": self.day_of_week.astype(int),
+            "season": np.array(SEASON_NAMES, dtype=object)[self.season],
+            "is_weekend": self.is_weekend,
+            "is_peak_cooling": self.is_peak_cooling,
+            "is_peak_heating": self.is_peak_heating,
+            "is_peak_hour": self.is_peak_hour,
+            "is_business_hour": self.is_business_hour,
+            "is_holiday": self.is_holiday,
+        })
+
+    # -------------------------------------------------------------------------
+    # Slice compilation
+    # -------------------------------------------------------------------------
+    def mask(self, config: Dict[str, Any], default_season: str = "both") -> np.ndarray:
+        """
+        Boolean mask of the timestamps selected by a time slice config.
+
+        Understands the slice_type configs of the sensitivity TimeSlicer and
+        the surrogate TimeSliceManager:
+          peak_months  (season, peak_cooling_months, peak_heating_months)
+          time_of_day  (peak_hours as list or {start, end}, peak_hours_range)
+          day_of_week  (analyze_weekends)
+          combined     (months, hours, day_of_week; top level or combined_filters)
+          custom       (start_date, end_date, months, hours, weekdays_only,
+                        weekends_only, specific_days)
+        plus `holidays` (list of 'MM/DD' or dates) and `exclude_holidays`.
+
+        Masks are cached per config; treat the returned array as read-only.
+
+        Args:
+            config: Time slice configuration
+            default_season: Season used by peak_months when config has none
+        """
+        key = json.dumps([config, default_season], sort_keys=True, default=str)
+        with self._lock:
+            cached = self._masks.get(key)
+        if cached is None:
+            cached = self._compile(config, default_season)
+            cached.flags.writeable = False
+            with self._lock:
+                self._masks[key] = cached
+        return cached
+
+    def indices(self, config: Dict[str, Any], default_season: str = "both") -> np.ndarray:
+        """Integer positions selected by a time slice config."""
+        return np.flatnonzero(self.mask(config, default_season))
+
+    def _compile(self, config: Dict[str, Any], default_season: str) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        slice_type = config.get("slice_type", "none")
+
+        is_holiday = self.is_holiday
+        if config.get("holidays"):
+            is_holiday = np.isin(self.month_day, _month_day_keys(config["holidays"]))
+
+        if slice_type == "peak_months":
+            season = config.get("season", default_season)
+            cooling = config.get("peak_cooling_months", DEFAULT_PEAK_COOLING_MONTHS)
+            heating = config.get("peak_heating_months", DEFAULT_PEAK_HEATING_MONTHS)
+            if season == "cooling":
+                months = cooling
+            elif season == "heating":
+                months = heating
+            else:
+                months = list(cooling) + list(heating)
+            mask &= np.isin(self.month, months)
+
+        elif slice_type == "time_of_day":
+            hours = config.get("peak_hours", DEFAULT_PEAK_HOURS)
+            if isinstance(config.get("peak_hours_range"), dict):
+                hours = config["peak_hours_range"]
+            if isinstance(hours, dict):
+                mask &= (self.hour >= hours.get("start", 14)) & (self.hour <= hours.get("end", 17))
+            else:
+                mask &= np.isin(self.hour, hours)
+
+        elif slice_type == "day_of_week":
+            mask &= self.is_weekend if config.get("analyze_weekends", True) else ~self.is_weekend
+
+        elif slice_type == "combined":
+            filters = config.get("combined_filters", config)
+            if "months" in filters:
+                mask &= np.isin(self.month, filters["months"])
+            if "hours" in filters:
+                mask &= np.isin(self.hour, filters["hours"])
+            day_type = filters.get("day_of_week")
+            if day_type == "weekends":
+                mask &= self.is_weekend
+            elif day_type == "weekdays":
+                mask &= ~self.is_weekend
+            elif day_type == "holidays":
+                mask &= is_holiday
+
+        elif slice_type == "custom":
+            if self.has_dates:
+                if config.get("start_date"):
+                    mask &= np.asarray(self.datetimes >= pd.to_datetime(config["start_date"]))
+                if config.get("end_date"):
+                    mask &= np.asarray(self.datetimes <= pd.to_datetime(config["end_date"]))
+            if "months" in config:
+                mask &= np.isin(self.month, config["months"])
+            if "hours" in config:
+                mask &= np.isin(self.hour, config["hours"])
+            if config.get("weekdays_only"):
+                mask &= ~self.is_weekend
+            if config.get("weekends_only"):
+                mask &= self.is_weekend
+            if "specific_days" in config:
+                days = [int(month) * 100 + int(day) for month, day in config["specific_days"]]
+                mask &= np.isin(self.month_day, days)
+
+        if config.get("exclude_holidays"):
+            mask &= ~is_holiday
+        return mask
+
+
+###############################################################################
+# Cached construction
+###############################################################################
+_datetime_cache: "OrderedDict[Tuple, CalendarIndex]" = OrderedDict()
+_datetime_cache_lock = threading.Lock()
+
+
+def _holiday_key(holidays: Sequence[Any]) -> Tuple[str, ...]:
+    return tuple(str(h) for h in holidays)
+
+
+def calendar_for_datetimes(values: Any, holidays: Sequence[Any] = ()) -> Tuple[CalendarIndex, np.ndarray]:
+    """
+    Calendar of the distinct timestamps in `values`, plus the code of each value.
+
+    Rows that repeat the same time axis (many buildings, variables or variants)
+    share one index. Codes are -1 for missing timestamps.
+
+    Returns:
+        (CalendarIndex over distinct timestamps, int codes of length len(values))
+    """
+    if not isinstance(values, (pd.Series, pd.Index)) or not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(pd.Series(values))
+    codes, uniques = pd.factorize(values)
+    uniques = pd.DatetimeIndex(uniques)
+
+    key = (hashlib.sha1(uniques.asi8.tobytes()).hexdigest(), str(uniques.dtype), _holiday_key(holidays))
+    with _datetime_cache_lock:
+        index = _datetime_cache.get(key)
+        if index is not None:
+            _datetime_cache.move_to_end(key)
+            return index, codes
+
+    index = CalendarIndex.from_datetimes(uniques, holidays=holidays)
+    with _datetime_cache_lock:
+        _datetime_cache[key] = index
+        while len(_datetime_cache) > _CACHE_SIZE:
+            _datetime_cache.popitem(last=False)
+    return index, codes
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _calendar_for_labels(labels: Tuple[str, ...], holidays: Tuple[str, ...]) -> Tuple[CalendarIndex, np.ndarray]:
+    return CalendarIndex.from_eplus_labels(labels, holidays=holidays)
+
+
+def calendar_for_columns(columns: Iterable[Any], holidays: Sequence[Any] = ()) -> Tuple[CalendarIndex, List[Any]]:
+    """
+    Calendar of the EnergyPlus time columns ("MM/DD  HH:MM:SS") among `columns`.
+
+    Returns:
+        (CalendarIndex over the time columns, those column labels in order)
+    """
+    columns = list(columns)
+    candidates = [c for c in columns if "/" in str(c) and ":" in str(c)]
+    index, positions = _calendar_for_labels(tuple(str(c) for c in candidates), _holiday_key(holidays))
+    return index, [candidates[i] for i in positions]
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def period_calendar(start: str, end: str, freq: str, holidays: Tuple[str, ...] = ()) -> CalendarIndex:
+    """Calendar of a whole simulation period at a given frequency (e.g. 'h', 'D', 'MS')."""
+    return CalendarIndex.from_datetimes(pd.date_range(start, end, freq=freq), holidays=holidays)
+
+
+###############################################################################
+# Applying slices
+###############################################################################
+def row_mask(values: Any, config: Dict[str, Any], default_season: str = "both") -> np.ndarray:
+    """Boolean row mask for a column of timestamps (missing timestamps are dropped)."""
+    index, codes = calendar_for_datetimes(values)
+    mask = np.append(index.mask(config, default_season), False)
+    return mask[codes]
+
+
+def slice_columns(columns: Iterable[Any], config: Dict[str, Any], default_season: str = "both") -> List[Any]:
+    """EnergyPlus time columns selected by a time slice config, in column order."""
+    index, time_cols = calendar_for_columns(columns)
+    positions = index.indices(config, default_season)
+    return [time_cols[i] for i in positions]
@@ -2,18 +2,12 @@
 
 import math
 from .epw_lookup import epw_lookup
+from rule_index import rule_index_for
 
 def find_epw_overrides(building_id, desired_year, user_config_epw):
-    matches = []
-    for row in user_config_epw:
-        if "building_id" in row:
-            if row["building_id"] != building_id:
-                continue
-        if "desired_year" in row:
-            if row["desired_year"] != desired_year:
-                continue
-        matches.append(row)
-    return matches
+    return rule_index_for(user_config_epw, ("building_id", "desired_year")).match(
+        building_id=building_id, desired_year=desired_year
+    )
 
 def assign_epw_for_building_with_overrides(building_row, user_config_epw=None, assigned_epw_log=None):
     """
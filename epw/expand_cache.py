@@ -0,0 +1,222 @@
+# epw/expand_cache.py - Run ExpandObjects once per distinct template set
+
+"""
+ExpandObjects-once cache for the direct executor.
+
+`energyplus --expandobjects` runs ExpandObjects before every simulation.
+ExpandObjects turns HVACTemplate:* objects into the full HVAC objects and
+writes expanded.idf: the input's other objects followed by the generated
+ones. Variants of a building usually differ only in loads, materials or
+schedules, so they share the same templates and ExpandObjects generates
+the same objects each time.
+
+For each task, plan_expansion() reads the IDF as text and
+
+  - drops --expandobjects when there is nothing to expand (no HVACTemplate:*
+    or GroundHeatTransfer:* object; e.g. explicit ZoneHVAC:IdealLoadsAirSystem),
+  - otherwise keys the template set: a hash of the Version object and the
+    HVACTemplate:* objects in file order, plus the IDD and the EnergyPlus
+    executable (path, size, mtime and the IDD's !IDD_Version line), so a
+    changed installation does not reuse old fragments,
+  - on a cache hit, writes <scratch>/spliced.idf = the variant's non-template
+    objects + the cached generated objects and runs that without expansion,
+  - on a miss, runs with --expandobjects as before. Afterwards the objects
+    that the expanded file adds to the input are stored as the cached fragment
+    (the CLI renames expanded.idf to <output prefix>.expidf),
+    but only if every non-template input object came through unchanged;
+    otherwise the set is not cached.
+
+GroundHeatTransfer:* objects run the Slab/Basement preprocessors on the
+weather file, so IDFs containing them are always expanded normally.
+"""
+
+import os
+import hashlib
+import logging
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+# Classes ExpandObjects acts on (upper-case prefixes)
+EXPANDABLE_PREFIXES = ("HVACTEMPLATE:", "GROUNDHEATTRANSFER:")
+CACHEABLE_PREFIXES = ("HVACTEMPLATE:",)
+# Non-template classes the expansion depends on, part of the cache key
+KEY_CLASSES = ("VERSION",)
+
+SPLICED_IDF = "spliced.idf"
+EXPANDED_IDF = "expanded.idf"
+EXPIDF_SUFFIX = ".expidf"  # name of expanded.idf after the run: <output prefix>.expidf
+
+IDFObject = Tuple[str, Tuple[str, ...]]
+
+
+def split_idf_objects(text: str) -> List[IDFObject]:
+    """IDF text -> [(CLASS NAME, (field, ...)), ...] in file order, comments removed"""
+    body = "\n".join(line.split("!", 1)[0] for line in text.splitlines())
+    objects = []
+    for chunk in body.split(";"):
+        tokens = [t.strip() for t in chunk.split(",")]
+        if not tokens or not tokens[0]:
+            continue
+        objects.append((tokens[0].upper(), tuple(tokens[1:])))
+    return objects
+
+
+def format_idf_objects(objects: Sequence[IDFObject]) -> str:
+    lines = []
+    for class_name, fields in objects:
+        if not fields:
+            lines.append(f"{class_name};\n")
+            continue
+        lines.append(f"{class_name},")
+        lines.extend(f"    {value}," for value in fields[:-1])
+        lines.append(f"    {fields[-1]};\n")
+    return "\n".join(lines) + "\n"
+
+
+def _read_objects(path: str) -> List[IDFObject]:
+    with open(path, "r", encoding="latin-1") as f:
+        return split_idf_objects(f.read())
+
+
+def _is_template(class_name: str, prefixes: Sequence[str] = EXPANDABLE_PREFIXES) -> bool:
+    return class_name.startswith(tuple(prefixes))
+
+
+def _compare_form(obj: IDFObject) -> IDFObject:
+    return obj[0], tuple(value.lower() for value in obj[1])
+
+
+def expansion_environment(iddfile: str = "", exe: str = "") -> str:
+    """IDD and executable identity for the cache key: path, size and mtime of each, and the IDD version"""
+    parts = []
+    for path in (iddfile, exe):
+        if not path:
+            parts.append("")
+            continue
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+            parts.append(f"{path}|{st.st_size}|{st.st_mtime_ns}")
+        except OSError:
+            parts.append(path)
+    if iddfile:
+        try:
+            with open(iddfile, "r", encoding="latin-1") as f:
+                first_line = f.readline().strip()
+            if first_line.upper().startswith("!IDD_VERSION"):
+                parts.append(first_line)
+        except OSError:
+            pass
+    return "\n".join(parts)
+
+
+def template_key(objects: Sequence[IDFObject], environment: str = "") -> Optional[str]:
+    """
+    Cache key of the template set, None if the IDF has nothing to expand or
+    contains expandable objects that are not cached (GroundHeatTransfer:*).
+    environment is expansion_environment() of the IDD and executable.
+    """
+    templates = [obj for obj in objects if _is_template(obj[0])]
+    if not templates or any(not _is_template(obj[0], CACHEABLE_PREFIXES) for obj in templates):
+        return None
+    digest = hashlib.sha256(environment.encode())
+    for class_name, fields in objects:
+        if class_name in KEY_CLASSES or _is_template(class_name, CACHEABLE_PREFIXES):
+            digest.update(repr((class_name, fields)).encode())
+    return digest.hexdigest()
+
+
+def extract_fragment(source: Sequence[IDFObject], expanded: Sequence[IDFObject]) -> Optional[List[IDFObject]]:
+    """
+    Objects that ExpandObjects added (expanded minus the source's non-template
+    objects), or None if a non-template source object is missing from the
+    expanded file (ExpandObjects changed it, so splicing would be wrong).
+    """
+    remaining = Counter(_compare_form(obj) for obj in source if not _is_template(obj[0]))
+    fragment = []
+    for obj in expanded:
+        form = _compare_form(obj)
+        if remaining[form] > 0:
+            remaining[form] -= 1
+        elif not _is_template(obj[0]):
+            fragment.append(obj)
+    if +remaining:
+        return None
+    return fragment
+
+
+class ExpandCache:
+    """Fragments of generated objects on disk, one <key>.idf per template set, shared by workers"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.idf")
+
+    def get(self, key: str) -> Optional[List[IDFObject]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        return _read_objects(path)
+
+    def put(self, key: str, fragment: Sequence[IDFObject]):
+        path = self._path(key)
+        tmp = f"{path}.part{os.getpid()}"
+        with open(tmp, "w", encoding="latin-1") as f:
+            f.write(format_idf_objects(fragment))
+        os.replace(tmp, path)
+
+
+class ExpansionPlan:
+    """
+    How one task runs: `idf_path` and `expandobjects` go to the command line;
+    after the run, record() stores the fragment of a cache miss.
+    """
+
+    def __init__(self, idf_path: str, expandobjects: bool, key: Optional[str] = None,
+                 objects: Optional[List[IDFObject]] = None, hit: bool = False):
+        self.idf_path = idf_path
+        self.expandobjects = expandobjects
+        self.key = key
+        self.objects = objects
+        self.hit = hit
+
+    def record(self, scratch: str, cache: ExpandCache, output_prefix: str = "") -> bool:
+        """
+        Cache the generated objects of a successful expanding run; True if stored.
+        The expanded file is <output_prefix>.expidf in scratch (expanded.idf if not renamed).
+        """
+        if self.key is None or not self.expandobjects:
+            return False
+        candidates = [os.path.join(scratch, f"{output_prefix}{EXPIDF_SUFFIX}"), os.path.join(scratch, EXPANDED_IDF)]
+        expanded_path = next((path for path in candidates if os.path.exists(path)), None)
+        if expanded_path is None:
+            return False
+        fragment = extract_fragment(self.objects, _read_objects(expanded_path))
+        if fragment is None:
+            logging.warning(f"[ExpandCache] ExpandObjects modified input objects of {self.idf_path}; "
+                            f"not caching this template set")
+            return False
+        cache.put(self.key, fragment)
+        return True
+
+
+def plan_expansion(idf_path: str, scratch: str, cache: Optional[ExpandCache], iddfile: str = "",
+                   exe: str = "") -> ExpansionPlan:
+    """Decide whether the task needs ExpandObjects, and splice a cached expansion if there is one"""
+    objects = _read_objects(idf_path)
+    if not any(_is_template(class_name) for class_name, _ in objects):
+        return ExpansionPlan(idf_path, expandobjects=False)
+    key = template_key(objects, expansion_environment(iddfile, exe)) if cache is not None else None
+    if key is None:
+        return ExpansionPlan(idf_path, expandobjects=True)
+    fragment = cache.get(key)
+    if fragment is None:
+        return ExpansionPlan(idf_path, expandobjects=True, key=key, objects=objects)
+    spliced = [obj for obj in objects if not _is_template(obj[0])] + fragment
+    spliced_path = os.path.join(scratch, SPLICED_IDF)
+    with open(spliced_path, "w", encoding="latin-1") as f:
+        f.write(format_idf_objects(spliced))
+    return ExpansionPlan(spliced_path, expandobjects=False, key=key, hit=True)
@@ -3,9 +3,12 @@
 import os
 import logging
 from eppy.modeleditor import IDF
+from functools import partial
 from multiprocessing import Pool
 
 from .assign_epw_file import assign_epw_for_building_with_overrides
+from .sim_executor import find_energyplus, init_worker, run_energyplus_task, run_scratch_root
+from resource_slots import lease_workers
 
 # Global flag to track if IDD has been initialized
 _IDD_INITIALIZED = False
@@ -25,9 +28,10 @@ def initialize_idd(iddfile):
             else:
                 raise
 
-def run_simulation(args):
+def run_simulation(args, readvars=True):
     """
     :param args: tuple (idf_path, epwfile, iddfile, output_directory, building_index, building_id)
+    :param readvars: run ReadVarsESO (ESO -> CSV) after the simulation
     """
     idf_path, epwfile, iddfile, output_directory, bldg_idx, building_id = args
     try:
@@ -45,7 +49,7 @@ def run_simulation(args):
             "output_prefix": f"simulation_bldg{bldg_idx}_{building_id}",
             "output_suffix": "C",
             "output_directory": output_directory,
-            "readvars": True,
+            "readvars": readvars,
             "expandobjects": True
         }
 
@@ -115,18 +119,30 @@ def simulate_all(
     base_output_dir,
     user_config_epw=None,       # <--- new
     assigned_epw_log=None,      # <--- new
-    num_workers=4
+    num_workers=4,
+    readvars=True,
+    executor="direct",
+    staging=None
 ):
     """
     Runs E+ simulations in parallel:
       - For each row in df_buildings, we pick an EPW & IDF.
       - Group results by year so all building results for year X go in base_output_dir/X.
+
+    executor="direct" launches EnergyPlus on the IDF path from persistent
+    workers (see sim_executor.py); "eppy" runs each IDF through eppy's IDF.run.
+    staging (direct executor only) sets the local scratch root, the outputs
+    copied to base_output_dir and SQL compression (see DEFAULT_STAGING).
     """
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logging.info("[simulate_all] Starting...")
 
-    # Initialize IDD in the parent process before creating workers
-    initialize_idd(iddfile)
+    exe = find_energyplus(iddfile) if executor == "direct" else None
+    if executor == "direct" and not exe:
+        logging.warning("[simulate_all] EnergyPlus executable not found (set ENERGYPLUS_EXE); using eppy to run")
+    if not exe:
+        # Initialize IDD in the parent process before creating workers
+        initialize_idd(iddfile)
 
     tasks = list(
         generate_simulations(
@@ -143,12 +159,26 @@ def simulate_all(
         logging.warning("[simulate_all] No tasks to run. Exiting.")
         return
 
-    logging.info(f"[simulate_all] Found {len(tasks)} tasks. Using {num_workers} workers.")
-    
-    # Run simulations with better error handling
-    results = []
-    with Pool(num_workers) as pool:
-        results = pool.map(run_simulation, tasks)
+    # ExpandObjects fragments are shared by the runs of one job: keep them next to the results
+    staging = dict(staging or {})
+    if not staging.get("expand_cache_dir"):
+        staging["expand_cache_dir"] = os.path.join(os.path.dirname(os.path.abspath(base_output_dir)), "ep_expand_cache")
+
+    # When running inside the job service, idle CPU slots may be lent to this pool
+    with lease_workers(num_workers, max_useful_workers=len(tasks)) as pool_workers:
+        logging.info(f"[simulate_all] Found {len(tasks)} tasks. Using {pool_workers} workers.")
+        
+        # Run simulations with better error handling
+        results = []
+        if exe:
+            # one scratch directory per worker, set up once, all under a run root removed afterwards;
+            # tasks are long, so hand them out one by one
+            with run_scratch_root(staging) as run_root, \
+                    Pool(pool_workers, initializer=init_worker, initargs=(exe, iddfile, run_root, staging)) as pool:
+                results = pool.map(partial(run_energyplus_task, readvars=readvars), tasks, chunksize=1)
+        else:
+            with Pool(pool_workers) as pool:
+                results = pool.map(partial(run_simulation, readvars=readvars), tasks)
     
     # Summary of results
     successful = sum(1 for success, _ in results if success if isinstance(results[0], tuple))
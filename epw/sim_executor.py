@@ -0,0 +1,310 @@
+# epw/sim_executor.py - EnergyPlus executor without eppy in the loop
+
+"""
+Runs EnergyPlus straight from the IDF path.
+
+run_simulation() (eppy) parses every IDF into Python objects only to write
+it back out for the subprocess, and checks the IDD on every task. Here,
+each pool worker is initialized once (init_worker): it resolves the
+EnergyPlus executable and gets its own scratch directory. A task then
+
+  1. empties the worker's scratch directory,
+  2. runs `energyplus ... <idf_path>` with the scratch directory as working
+     and output directory (ExpandObjects writes expanded.idf into the cwd,
+     so concurrent runs cannot collide),
+  3. copies only the kept outputs (SQL, err, end; CSVs when ReadVarsESO ran)
+     to the result directory under the usual simulation_bldg<idx>_<id> prefix.
+
+Staging (the "staging" block of simulate_config, see DEFAULT_STAGING):
+the scratch directories live under a local scratch root, /dev/shm when it
+has enough free space, so the eso/mtr/audit/shd/html churn never reaches the
+shared output volume. simulate_all creates one directory per call under the
+root (run_scratch_root) for its workers and removes it after the pool is
+done, since pool workers exit without running atexit handlers. Kept outputs are written to a temporary name in the
+result directory and renamed into place, so readers never see a partial
+file. With compress_sql the SQL is stored as <prefix>.sql.zst (needs the
+zstandard package); the parsing step restores the .sql before reading.
+
+With expand_cache, ExpandObjects is skipped for IDFs without templates and
+run once per distinct HVACTemplate set otherwise (see expand_cache.py). The
+fragments live on the output volume, next to the simulation results (never
+under the RAM-backed scratch root), and go away with the job.
+
+The executable is taken from $ENERGYPLUS_EXE, the folder of the IDD, or
+PATH; a stub script can stand in for it (see test/check_sim_executor.py).
+"""
+
+import os
+import shutil
+import atexit
+import logging
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .expand_cache import ExpandCache, plan_expansion
+
+# Outputs moved to the result directory (suffixes after the output prefix)
+DEFAULT_KEEP_SUFFIXES = (".sql", ".err", ".end")
+READVARS_KEEP_SUFFIXES = (".csv",)
+
+DEFAULT_STAGING = {
+    "scratch_root": "auto",     # "auto": /dev/shm if it has min_free_mb free, else the system temp dir
+    "min_free_mb": 2048,        # free space /dev/shm needs for "auto" to pick it
+    "keep_suffixes": None,      # None: DEFAULT_KEEP_SUFFIXES (+ READVARS_KEEP_SUFFIXES with readvars)
+    "compress_sql": False,      # store the SQL as .sql.zst
+    "zstd_level": 3,
+    "expand_cache": True,       # expand each HVACTemplate set once, skip ExpandObjects without templates
+    "expand_cache_dir": None,   # None: simulate_all uses ep_expand_cache next to its output folder
+}
+SHM_DIR = "/dev/shm"
+
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def find_energyplus(iddfile: Optional[str] = None) -> Optional[str]:
+    """EnergyPlus executable: $ENERGYPLUS_EXE, next to the IDD, or on PATH"""
+    candidates = [os.environ.get("ENERGYPLUS_EXE")]
+    if iddfile:
+        idd_dir = os.path.dirname(os.path.abspath(iddfile))
+        candidates += [os.path.join(idd_dir, "energyplus"), os.path.join(idd_dir, "energyplus.exe")]
+    candidates += [shutil.which("energyplus")]
+    for path in candidates:
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return os.path.abspath(path)
+    return None
+
+
+def staging_config(staging: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """DEFAULT_STAGING updated with the user's staging block"""
+    cfg = dict(DEFAULT_STAGING)
+    cfg.update({k: v for k, v in (staging or {}).items() if v is not None})
+    return cfg
+
+
+def choose_scratch_root(scratch_root: Optional[str] = "auto", min_free_mb: float = DEFAULT_STAGING["min_free_mb"]) -> str:
+    """
+    Directory under which the worker scratch directories are created.
+
+    "auto" (or None) picks /dev/shm when it exists, is writable and has at
+    least min_free_mb free, and the system temp directory otherwise.
+    """
+    if scratch_root and scratch_root != "auto":
+        return scratch_root
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        try:
+            if shutil.disk_usage(SHM_DIR).free >= min_free_mb * 1024 * 1024:
+                return SHM_DIR
+        except OSError:
+            pass
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def run_scratch_root(staging: Optional[Dict[str, Any]] = None):
+    """
+    Directory for the worker scratch directories of one pool, created under
+    the scratch root and removed with everything in it on exit.
+    """
+    staging = staging_config(staging)
+    scratch_root = choose_scratch_root(staging["scratch_root"], staging["min_free_mb"])
+    os.makedirs(scratch_root, exist_ok=True)
+    run_root = tempfile.mkdtemp(prefix="ep_run_", dir=scratch_root)
+    try:
+        yield run_root
+    finally:
+        shutil.rmtree(run_root, ignore_errors=True)
+
+
+def build_command(
+    exe: str,
+    idf_path: str,
+    epwfile: str,
+    iddfile: str,
+    output_directory: str,
+    output_prefix: str,
+    readvars: bool = True,
+    expandobjects: bool = True
+) -> list:
+    """EnergyPlus command line as eppy's IDF.run builds it"""
+    cmd = [
+        exe,
+        "--weather", os.path.abspath(epwfile),
+        "--output-directory", os.path.abspath(output_directory),
+        "--idd", os.path.abspath(iddfile),
+        "--output-prefix", output_prefix,
+        "--output-suffix", "C",
+    ]
+    if expandobjects:
+        cmd.append("--expandobjects")
+    if readvars:
+        cmd.append("--readvars")
+    cmd.append(os.path.abspath(idf_path))
+    return cmd
+
+
+def init_worker(exe: Optional[str], iddfile: str, scratch_root: Optional[str] = None,
+                staging: Optional[Dict[str, Any]] = None):
+    """
+    Pool initializer: resolve the executable and create this worker's scratch
+    directory. atexit removes it when a serial caller exits; pool workers
+    skip atexit, so pools pass a run_scratch_root() directory as scratch_root.
+
+    Args:
+        exe: EnergyPlus executable (None: find_energyplus)
+        iddfile: IDD path
+        scratch_root: Overrides staging["scratch_root"]
+        staging: Staging options (see DEFAULT_STAGING)
+    """
+    staging = staging_config(staging)
+    if scratch_root:
+        staging["scratch_root"] = scratch_root
+    scratch_root = choose_scratch_root(staging["scratch_root"], staging["min_free_mb"])
+    os.makedirs(scratch_root, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=f"ep_worker_{os.getpid()}_", dir=scratch_root)
+    atexit.register(shutil.rmtree, scratch, True)
+    expand_cache = None
+    if staging["expand_cache"]:
+        cache_dir = staging["expand_cache_dir"]
+        if not cache_dir:
+            # no persistent location given: a cache for this process only
+            cache_dir = tempfile.mkdtemp(prefix="ep_expand_cache_", dir=scratch_root)
+            atexit.register(shutil.rmtree, cache_dir, True)
+        expand_cache = ExpandCache(cache_dir)
+    _WORKER_STATE.update({
+        "pid": os.getpid(),
+        "exe": exe or find_energyplus(iddfile),
+        "iddfile": os.path.abspath(iddfile),
+        "scratch": scratch,
+        "staging": staging,
+        "expand_cache": expand_cache,
+    })
+
+
+def _worker_state(iddfile: str) -> Dict[str, Any]:
+    # also usable without a pool (serial runs, tests): initialize lazily
+    if _WORKER_STATE.get("pid") != os.getpid():
+        init_worker(None, iddfile)
+    return _WORKER_STATE
+
+
+def _clear_directory(path: str):
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isdir(full) and not os.path.islink(full):
+            shutil.rmtree(full, ignore_errors=True)
+        else:
+            os.remove(full)
+
+
+def _zstd_compressor(level: int):
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdCompressor(level=level)
+
+
+def _publish(src: str, dst: str, compressor=None):
+    """Write src to dst (compressed if a compressor is given) via a temporary name, then rename"""
+    tmp = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.part{os.getpid()}")
+    try:
+        if compressor is not None:
+            with open(src, "rb") as fin, open(tmp, "wb") as fout:
+                compressor.copy_stream(fin, fout)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def collect_outputs(scratch: str, output_directory: str, output_prefix: str, keep_suffixes: Sequence[str],
+                    compress_sql: bool = False, zstd_level: int = DEFAULT_STAGING["zstd_level"]) -> list:
+    """
+    Copy the kept outputs of one run from scratch to the result directory.
+
+    Each file appears at its final path only once complete. With compress_sql
+    the .sql is written as .sql.zst; if zstandard is missing it is copied as is.
+    A .sql or .sql.zst left by an earlier run under the other name is removed,
+    so parsing cannot pick up the stale one.
+
+    Returns:
+        Paths written in the result directory
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    compressor = _zstd_compressor(zstd_level) if compress_sql else None
+    if compress_sql and compressor is None:
+        logging.warning("[collect_outputs] compress_sql is set but zstandard is not installed; keeping plain .sql")
+    written = []
+    for name in os.listdir(scratch):
+        if not name.startswith(output_prefix):
+            continue
+        if not any(name.endswith(suffix) for suffix in keep_suffixes):
+            continue
+        src = os.path.join(scratch, name)
+        if compressor is not None and name.endswith(".sql"):
+            dst = os.path.join(output_directory, name + ".zst")
+            _publish(src, dst, compressor)
+            stale = os.path.join(output_directory, name)
+        else:
+            dst = os.path.join(output_directory, name)
+            _publish(src, dst)
+            stale = dst + ".zst" if name.endswith(".sql") else None
+        if stale and os.path.exists(stale):
+            os.remove(stale)
+        written.append(dst)
+    return written
+
+
+def run_energyplus_task(args: Tuple, readvars: bool = True, expandobjects: bool = True,
+                        timeout: Optional[float] = None) -> Tuple[bool, str]:
+    """
+    Same task tuple and result as run_simulation:
+    (idf_path, epwfile, iddfile, output_directory, building_index, building_id) -> (ok, message)
+    """
+    idf_path, epwfile, iddfile, output_directory, bldg_idx, building_id = args
+    state = _worker_state(iddfile)
+    if not state["exe"]:
+        return False, f"Error: {idf_path} - EnergyPlus executable not found"
+
+    prefix = f"simulation_bldg{bldg_idx}_{building_id}"
+    scratch = state["scratch"]
+    staging = state["staging"]
+    keep = tuple(staging["keep_suffixes"] or DEFAULT_KEEP_SUFFIXES) + (READVARS_KEEP_SUFFIXES if readvars else ())
+    try:
+        _clear_directory(scratch)
+        plan = None
+        run_idf, run_expand = idf_path, expandobjects
+        if expandobjects and staging["expand_cache"]:
+            plan = plan_expansion(idf_path, scratch, state["expand_cache"], state["iddfile"], state["exe"])
+            run_idf, run_expand = plan.idf_path, plan.expandobjects
+        cmd = build_command(state["exe"], run_idf, epwfile, state["iddfile"], scratch, prefix,
+                            readvars=readvars, expandobjects=run_expand)
+        proc = subprocess.run(cmd, cwd=scratch, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, timeout=timeout)
+        if plan is not None and proc.returncode == 0:
+            try:
+                plan.record(scratch, state["expand_cache"], prefix)
+            except Exception as e:
+                logging.warning(f"[run_energyplus_task] Could not cache the expansion of {idf_path}: {e}")
+        # keep the .err of failed runs too, it says why
+        collect_outputs(scratch, output_directory, prefix, keep,
+                        compress_sql=staging["compress_sql"], zstd_level=staging["zstd_level"])
+        if proc.returncode != 0:
+            tail = "\n".join((proc.stdout or "").strip().splitlines()[-5:])
+            logging.error(f"[run_energyplus_task] EnergyPlus failed (exit {proc.returncode}) for building "
+                          f"idx={bldg_idx}, ID={building_id} with {idf_path}: {tail}")
+            return False, f"Error: {idf_path} - EnergyPlus exited with {proc.returncode}"
+        logging.info(f"[run_energyplus_task] OK: {idf_path} (Bldg idx={bldg_idx}, ID={building_id}) "
+                     f"with EPW {epwfile} -> {output_directory}")
+        return True, f"Success: {idf_path}"
+    except Exception as e:
+        logging.error(f"[run_energyplus_task] Error for building idx={bldg_idx}, ID={building_id} "
+                      f"with {idf_path} & {epwfile}: {e}", exc_info=True)
+        return False, f"Error: {idf_path} - {str(e)}"
+    finally:
+        # scratch may be tmpfs (RAM): drop the eso/mtr/... now, not at the next task
+        _clear_directory(scratch)
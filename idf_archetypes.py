@@ -0,0 +1,184 @@
+"""
+idf_archetypes.py
+
+Archetype deduplication for base simulations.
+
+Many buildings yield IDFs that differ only in object names (same area,
+perimeter, floors, age range and function with midpoint picks). After IDF
+creation, every building gets a canonical signature:
+
+  - the IDF text with the object names that embed the building index or
+    ogc_fid (ARCHETYPE_NAME_PATTERNS) normalized, and
+  - the EPW file it would be simulated with.
+
+Only one representative per signature is simulated; afterwards its output
+files (simulation_bldg<idx>_<id>.*) are linked or copied under each member's
+own prefix, so merging and parsing see one result set per building as before.
+A member list and the dedup ratio are written to <logs_base_dir>/archetypes/.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from epw.assign_epw_file import assign_epw_for_building_with_overrides
+
+logger = logging.getLogger(__name__)
+
+ARCHETYPE_COLUMNS = ["archetype_signature", "archetype_id", "archetype_representative"]
+
+# Object names that idf_creation builds from the building index ({idx}) or ogc_fid ({fid})
+ARCHETYPE_NAME_PATTERNS = (
+    "Sample_Building_{idx}",  # BUILDING object
+    "MyDHW_{idx}",            # DHW water heater and its schedules
+    "Shade_Bldg_{fid}_",      # neighbour building shading surfaces
+    "Shade_Tree_{fid}_",      # tree shading surfaces
+)
+
+
+def _building_id(row: pd.Series, idx: Any) -> Any:
+    """Building ID as used in the simulation output prefix (see generate_simulations)."""
+    return row.get("ogc_fid", row.get("BuildingID", row.get("building_id", idx)))
+
+
+def simulation_prefix(row: pd.Series, idx: Any) -> str:
+    return f"simulation_bldg{idx}_{_building_id(row, idx)}"
+
+
+def idf_signature(idf_path: str, idx: Any, building_id: Any) -> str:
+    """
+    Hash of an IDF with building-specific object names normalized.
+
+    Only the exact names of ARCHETYPE_NAME_PATTERNS are replaced; numbers in
+    other names (Zone1, Wall_2) and field values are left as they are.
+    """
+    with open(idf_path, "r", errors="replace") as f:
+        text = f.read()
+    for template in ARCHETYPE_NAME_PATTERNS:
+        name = template.format(idx=idx, fid=building_id)
+        placeholder = template.format(idx="{IDX}", fid="{FID}")
+        text = re.sub(rf"{re.escape(name)}(?![0-9])", placeholder, text, flags=re.IGNORECASE)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def assign_archetypes(
+    df_buildings: pd.DataFrame,
+    idf_directory: str,
+    user_config_epw: Optional[list] = None
+) -> pd.DataFrame:
+    """
+    Add archetype_signature, archetype_id and archetype_representative (index
+    label of the row simulated for the archetype) to the buildings with an IDF.
+    """
+    signatures = {}
+    for idx, row in df_buildings.iterrows():
+        idf_path = os.path.join(idf_directory, str(row.get("idf_name", "")))
+        if not os.path.isfile(idf_path):
+            continue
+        epw_path = assign_epw_for_building_with_overrides(
+            building_row=row, user_config_epw=user_config_epw, assigned_epw_log=None
+        )
+        signatures[idx] = hashlib.sha256(
+            f"{idf_signature(idf_path, idx, _building_id(row, idx))}|{epw_path}".encode()
+        ).hexdigest()[:16]
+
+    df = df_buildings.copy()
+    df["archetype_signature"] = pd.Series(signatures)
+    representatives: Dict[str, Any] = {}
+    archetype_ids: Dict[str, int] = {}
+    for idx, signature in df["archetype_signature"].dropna().items():
+        if signature not in representatives:
+            representatives[signature] = idx
+            archetype_ids[signature] = len(archetype_ids)
+    df["archetype_id"] = df["archetype_signature"].map(archetype_ids)
+    # object dtype keeps integer index labels intact next to missing values
+    df["archetype_representative"] = pd.Series(
+        [representatives.get(s) for s in df["archetype_signature"]], index=df.index, dtype=object
+    )
+    return df
+
+
+def representatives_only(df_archetypes: pd.DataFrame) -> pd.DataFrame:
+    """Rows that are simulated (one per archetype; rows without signature are kept)."""
+    keep = df_archetypes["archetype_representative"].isna() | (
+        df_archetypes["archetype_representative"] == df_archetypes.index.to_series()
+    )
+    return df_archetypes[keep]
+
+
+def fan_out_simulation_results(df_archetypes: pd.DataFrame, base_output_dir: str) -> int:
+    """
+    Give every member building the output files of its representative,
+    renamed to the member's simulation prefix and placed in its climate-year
+    folder. Hard links are used where possible.
+
+    Returns:
+        Number of members that received results
+    """
+    n_fanned = 0
+    for idx, row in df_archetypes.iterrows():
+        rep_idx = row.get("archetype_representative")
+        if pd.isna(rep_idx) or rep_idx == idx:
+            continue
+        rep_row = df_archetypes.loc[rep_idx]
+        rep_prefix = simulation_prefix(rep_row, rep_idx)
+        rep_dir = os.path.join(base_output_dir, str(rep_row.get("desired_climate_year", 2020)))
+        member_prefix = simulation_prefix(row, idx)
+        member_dir = os.path.join(base_output_dir, str(row.get("desired_climate_year", 2020)))
+        if not os.path.isdir(rep_dir):
+            continue
+
+        os.makedirs(member_dir, exist_ok=True)
+        copied = False
+        for name in os.listdir(rep_dir):
+            # simulation_bldg1_23.sql must not match simulation_bldg1_234.sql
+            if not name.startswith(rep_prefix) or name[len(rep_prefix):][:1].isdigit():
+                continue
+            src = os.path.join(rep_dir, name)
+            dst = os.path.join(member_dir, member_prefix + name[len(rep_prefix):])
+            if os.path.exists(dst):
+                os.remove(dst)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+            copied = True
+        if copied:
+            n_fanned += 1
+        else:
+            logger.warning(f"[WARN] No simulation output of representative {rep_prefix} to fan out to {member_prefix}")
+    return n_fanned
+
+
+def write_archetype_report(df_archetypes: pd.DataFrame, logs_base_dir: Optional[str]) -> Dict[str, Any]:
+    """Member list and dedup summary under <logs_base_dir>/archetypes/."""
+    report_dir = os.path.join(logs_base_dir, "archetypes") if logs_base_dir else "output/archetypes"
+    os.makedirs(report_dir, exist_ok=True)
+
+    members = df_archetypes[df_archetypes["archetype_signature"].notna()]
+    n_buildings = len(members)
+    n_archetypes = int(members["archetype_signature"].nunique())
+    summary = {
+        "n_buildings": n_buildings,
+        "n_archetypes": n_archetypes,
+        "simulations_saved": n_buildings - n_archetypes,
+        "dedup_ratio": (1 - n_archetypes / n_buildings) if n_buildings else 0.0,
+        "largest_archetype": int(members["archetype_signature"].value_counts().max()) if n_buildings else 0,
+    }
+
+    cols = [c for c in ["ogc_fid", "idf_name"] if c in members.columns] + ARCHETYPE_COLUMNS
+    members[cols].rename_axis("building_index").reset_index().to_csv(
+        os.path.join(report_dir, "archetype_members.csv"), index=False
+    )
+    with open(os.path.join(report_dir, "archetype_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(f"[INFO] Archetypes: {n_archetypes} unique of {n_buildings} buildings "
+                f"(dedup ratio {summary['dedup_ratio']:.1%}, {summary['simulations_saved']} simulations saved)")
+    return summary
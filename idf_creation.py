@@ -22,6 +22,8 @@ import pandas as pd
 
 # geomeppy for IDF manipulation
 from geomeppy import IDF
+from idf_text import TextIDF
+from batch_assignment import BatchAssignment, activate as activate_batch
 
 # --- Import your custom submodules ---
 from idf_objects.geomz.building import create_building_with_roof_type
@@ -41,10 +43,14 @@ from idf_objects.tempground.add_ground_temperatures import add_ground_temperatur
 from idf_objects.other.zonelist import create_zonelist
 
 # Output & simulation modules
-from idf_objects.outputdef.assign_output_settings import assign_output_settings
+from idf_objects.outputdef.assign_output_settings import assign_output_settings, assign_demanded_output_settings
 from idf_objects.outputdef.add_output_definitions import add_output_definitions
 from postproc.merge_results import merge_all_results
 from epw.run_epw_sims import simulate_all
+from idf_archetypes import (
+    assign_archetypes, representatives_only, fan_out_simulation_results,
+    write_archetype_report, ARCHETYPE_COLUMNS
+)
 
 # Configure logger for this module (or ensure it's configured at the application entry point)
 logger = logging.getLogger(__name__)
@@ -72,6 +78,9 @@ def create_idf_for_building(
     # Geometry
     user_config_geom=None,
     assigned_geom_log=None,
+    collapse_floors=False,
+    # IDF model: "eppy" (geomeppy objects) or "text" (idf_text.TextIDF records)
+    idf_backend="eppy",
     # Lighting
     user_config_lighting=None,
     assigned_lighting_log=None,
@@ -107,11 +116,17 @@ def create_idf_for_building(
 ):
     """
     Build an IDF for a single building.
+
+    With idf_backend="text" the builders work on idf_text.TextIDF, which
+    keeps plain records with a name index and writes the IDF text directly.
     """
     logger.info(f"Starting IDF creation for building_index: {building_index}, ogc_fid: {building_row.get('ogc_fid', 'N/A')}")
     # 1) Setup IDF from the minimal template
-    IDF.setiddname(idf_config["iddfile"])
-    idf = IDF(idf_config["idf_file_path"])
+    if idf_backend == "text":
+        idf = TextIDF(idf_config["idf_file_path"], iddfile=idf_config["iddfile"])
+    else:
+        IDF.setiddname(idf_config["iddfile"])
+        idf = IDF(idf_config["idf_file_path"])
 
     # 2) Basic building object settings
     building_obj = idf.newidfobject("BUILDING")
@@ -143,7 +158,8 @@ def create_idf_for_building(
         strategy=strategy, # Global strategy
         random_seed=random_seed,
         user_config=user_config_geom,
-        assigned_geom_log=assigned_geom_log
+        assigned_geom_log=assigned_geom_log,
+        collapse_floors=collapse_floors
     )
     logger.debug(f"[{building_index}] Geometry created.")
 
@@ -293,14 +309,22 @@ def create_idf_for_building(
             "include_tables": True,
             "include_summary": True
         }
-    out_settings = assign_output_settings(
-        desired_variables=output_definitions.get("desired_variables", []),
-        desired_meters=output_definitions.get("desired_meters", []),
-        override_variable_frequency=output_definitions.get("override_variable_frequency", "Hourly"),
-        override_meter_frequency=output_definitions.get("override_meter_frequency", "Hourly"),
-        include_tables=output_definitions.get("include_tables", True),
-        include_summary=output_definitions.get("include_summary", True)
-    )
+    if output_definitions.get("demanded_outputs"):
+        # Only what the downstream steps read (orchestrator/output_demand.py)
+        out_settings = assign_demanded_output_settings(
+            demanded_outputs=output_definitions["demanded_outputs"],
+            include_tables=output_definitions.get("include_tables", True),
+            include_summary=output_definitions.get("include_summary", True)
+        )
+    else:
+        out_settings = assign_output_settings(
+            desired_variables=output_definitions.get("desired_variables", []),
+            desired_meters=output_definitions.get("desired_meters", []),
+            override_variable_frequency=output_definitions.get("override_variable_frequency", "Hourly"),
+            override_meter_frequency=output_definitions.get("override_meter_frequency", "Hourly"),
+            include_tables=output_definitions.get("include_tables", True),
+            include_summary=output_definitions.get("include_summary", True)
+        )
     add_output_definitions(idf, out_settings)
     logger.debug(f"[{building_index}] Output definitions added.")
 
@@ -347,10 +371,26 @@ def create_idfs_for_all_buildings(
     simulate_config=None,
     post_process=True,
     post_process_config=None,
-    logs_base_dir=None
+    logs_base_dir=None,
+    deduplicate_archetypes=False,
+    collapse_floors=False,
+    readvars=True,
+    idf_backend="eppy",
+    batch_assignment=False
 ):
     """
     Loops over df_buildings, calls create_idf_for_building for each.
+
+    With deduplicate_archetypes, buildings whose IDFs differ only in names
+    (and share an EPW) are simulated once; see idf_archetypes.py.
+    With collapse_floors, buildings of 4+ floors get one representative
+    middle floor with zone multipliers; see idf_objects/geomz/floor_collapsing.py.
+    Without readvars, no ESO -> CSV conversion is run and the CSV merge of
+    post-processing is skipped.
+    idf_backend selects the IDF model used for building ("eppy" or "text").
+    With batch_assignment, strategy-"B" draws come from per-building seeded
+    arrays drawn up front and are also written as tidy tables
+    (assigned/assigned_params_<category>.csv); see batch_assignment.py.
     """
     func_logger = logging.getLogger(f"{__name__}.create_idfs_for_all_buildings")
     func_logger.info(f"Starting to create IDFs for {len(df_buildings)} buildings.")
@@ -367,78 +407,91 @@ def create_idfs_for_all_buildings(
     assigned_groundtemp_log = {}
     assigned_setzone_log    = {}
 
-    for idx, row in df_buildings.iterrows():
-        building_specific_seed = random_seed + idx 
-
-        # Possibly filter shading overrides from user_config_shading if it’s a list of rules:
-        specific_shading_overrides = {}
-        if isinstance(user_config_shading, list):
-            try:
-                from idf_objects.wshading.shading_overrides_from_excel import pick_shading_params_from_rules
-                bldg_identifier = row.get("ogc_fid", idx)
-                specific_shading_overrides = pick_shading_params_from_rules(
-                    building_id=bldg_identifier,
-                    shading_type_key=shading_type_key_for_blinds,
-                    all_rules=user_config_shading,
-                    fallback={}
-                )
-                if specific_shading_overrides:
-                    func_logger.info(f"Found specific Excel shading overrides for building {bldg_identifier}: {specific_shading_overrides}")
-            except ImportError:
-                func_logger.warning("shading_overrides_from_excel.py not found. Skipping Excel-based shading overrides.")
-            except Exception as e_excel_override:
-                func_logger.error(f"Error applying Excel shading overrides for building {row.get('ogc_fid', idx)}: {e_excel_override}", exc_info=True)
-        elif isinstance(user_config_shading, dict):
-            specific_shading_overrides = user_config_shading
-
-        idf_path = create_idf_for_building(
-            building_row=row,
-            building_index=idx,
-            scenario=scenario,
-            calibration_stage=calibration_stage,
-            strategy=strategy,
-            random_seed=building_specific_seed,
-            # geometry
-            user_config_geom=user_config_geom,
-            assigned_geom_log=assigned_geom_log,
-            # lighting
-            user_config_lighting=user_config_lighting,
-            assigned_lighting_log=assigned_lighting_log,
-            # electric equipment
-            user_config_equipment=user_config_equipment,
-            assigned_equip_log=assigned_equip_log,
-            # DHW
-            user_config_dhw=user_config_dhw,
-            assigned_dhw_log=assigned_dhw_log,
-            # Fenestration
-            res_data=res_data,
-            nonres_data=nonres_data,
-            assigned_fenez_log=assigned_fenez_log,
-            # Window shading
-            shading_type_key_for_blinds=shading_type_key_for_blinds,
-            user_config_shading=specific_shading_overrides,
-            assigned_shading_log=assigned_shading_log,
-            apply_blind_shading=apply_blind_shading,
-            apply_geometric_shading=apply_geometric_shading,
-            shading_strategy=shading_strategy,
-            # HVAC
-            user_config_hvac=user_config_hvac,
-            assigned_hvac_log=assigned_hvac_log,
-            # Vent
-            user_config_vent=user_config_vent,
-            assigned_vent_log=assigned_vent_log,
-            # zone sizing
-            assigned_setzone_log=assigned_setzone_log,
-            # ground temps
-            assigned_groundtemp_log=assigned_groundtemp_log,
-            # output definitions
-            output_definitions=output_definitions
-        )
-        if idf_path:
-            df_buildings.loc[idx, "idf_name"] = os.path.basename(idf_path)
-        else:
-            df_buildings.loc[idx, "idf_name"] = "ERROR_CREATING_IDF"
-            func_logger.error(f"IDF creation failed for building index {idx}. See previous errors.")
+    batch = BatchAssignment.for_buildings(df_buildings, random_seed) if batch_assignment else None
+    activate_batch(batch)
+    try:
+        for idx, row in df_buildings.iterrows():
+            building_specific_seed = random_seed + idx 
+            if batch is not None:
+                batch.set_building(idx)
+
+            # Possibly filter shading overrides from user_config_shading if it’s a list of rules:
+            specific_shading_overrides = {}
+            if isinstance(user_config_shading, list):
+                try:
+                    from idf_objects.wshading.shading_overrides_from_excel import pick_shading_params_from_rules
+                    bldg_identifier = row.get("ogc_fid", idx)
+                    specific_shading_overrides = pick_shading_params_from_rules(
+                        building_id=bldg_identifier,
+                        shading_type_key=shading_type_key_for_blinds,
+                        all_rules=user_config_shading,
+                        fallback={}
+                    )
+                    if specific_shading_overrides:
+                        func_logger.info(f"Found specific Excel shading overrides for building {bldg_identifier}: {specific_shading_overrides}")
+                except ImportError:
+                    func_logger.warning("shading_overrides_from_excel.py not found. Skipping Excel-based shading overrides.")
+                except Exception as e_excel_override:
+                    func_logger.error(f"Error applying Excel shading overrides for building {row.get('ogc_fid', idx)}: {e_excel_override}", exc_info=True)
+            elif isinstance(user_config_shading, dict):
+                specific_shading_overrides = user_config_shading
+
+            idf_path = create_idf_for_building(
+                building_row=row,
+                building_index=idx,
+                scenario=scenario,
+                calibration_stage=calibration_stage,
+                strategy=strategy,
+                random_seed=building_specific_seed,
+                # geometry
+                user_config_geom=user_config_geom,
+                assigned_geom_log=assigned_geom_log,
+                collapse_floors=collapse_floors,
+                idf_backend=idf_backend,
+                # lighting
+                user_config_lighting=user_config_lighting,
+                assigned_lighting_log=assigned_lighting_log,
+                # electric equipment
+                user_config_equipment=user_config_equipment,
+                assigned_equip_log=assigned_equip_log,
+                # DHW
+                user_config_dhw=user_config_dhw,
+                assigned_dhw_log=assigned_dhw_log,
+                # Fenestration
+                res_data=res_data,
+                nonres_data=nonres_data,
+                assigned_fenez_log=assigned_fenez_log,
+                # Window shading
+                shading_type_key_for_blinds=shading_type_key_for_blinds,
+                user_config_shading=specific_shading_overrides,
+                assigned_shading_log=assigned_shading_log,
+                apply_blind_shading=apply_blind_shading,
+                apply_geometric_shading=apply_geometric_shading,
+                shading_strategy=shading_strategy,
+                # HVAC
+                user_config_hvac=user_config_hvac,
+                assigned_hvac_log=assigned_hvac_log,
+                # Vent
+                user_config_vent=user_config_vent,
+                assigned_vent_log=assigned_vent_log,
+                # zone sizing
+                assigned_setzone_log=assigned_setzone_log,
+                # ground temps
+                assigned_groundtemp_log=assigned_groundtemp_log,
+                # output definitions
+                output_definitions=output_definitions
+            )
+            if idf_path:
+                df_buildings.loc[idx, "idf_name"] = os.path.basename(idf_path)
+            else:
+                df_buildings.loc[idx, "idf_name"] = "ERROR_CREATING_IDF"
+                func_logger.error(f"IDF creation failed for building index {idx}. See previous errors.")
+    finally:
+        activate_batch(None)
+    if batch is not None:
+        assigned_dir = os.path.join(logs_base_dir, "assigned") if logs_base_dir else None
+        for path in batch.write_tables(assigned_dir):
+            func_logger.info(f"Batch-assigned parameters written to {path}")
 
     if run_simulations:
         func_logger.info("Proceeding to run simulations for generated IDFs.")
@@ -451,15 +504,33 @@ def create_idfs_for_all_buildings(
         idf_directory = idf_config["output_dir"]
         iddfile       = idf_config["iddfile"]
 
+        df_to_simulate = df_buildings[df_buildings["idf_name"] != "ERROR_CREATING_IDF"]
+        df_archetypes = None
+        if deduplicate_archetypes:
+            df_archetypes = assign_archetypes(df_to_simulate, idf_directory, user_config_epw)
+            for col in ARCHETYPE_COLUMNS:
+                df_buildings[col] = df_archetypes[col]
+            df_to_simulate = representatives_only(df_archetypes)
+            func_logger.info(f"Simulating {len(df_to_simulate)} archetype representatives "
+                             f"for {len(df_archetypes)} buildings.")
+
         simulate_all(
-            df_buildings=df_buildings[df_buildings["idf_name"] != "ERROR_CREATING_IDF"],
+            df_buildings=df_to_simulate,
             idf_directory=idf_directory,
             iddfile=iddfile,
             base_output_dir=sim_output_dir,
             user_config_epw=user_config_epw,
             assigned_epw_log=assigned_epw_log,
             num_workers=simulate_config.get("num_workers", 4),
+            readvars=readvars,
+            executor=simulate_config.get("executor", "direct"),
+            staging=simulate_config.get("staging"),
         )
+
+        if df_archetypes is not None:
+            n_fanned = fan_out_simulation_results(df_archetypes, sim_output_dir)
+            func_logger.info(f"Fanned out archetype results to {n_fanned} member buildings.")
+            write_archetype_report(df_archetypes, logs_base_dir)
     else:
         func_logger.info("Skipping simulations as per configuration.")
 
@@ -478,6 +549,9 @@ def create_idfs_for_all_buildings(
         base_sim_dir_for_merge = os.path.join(logs_base_dir, "Sim_Results") if logs_base_dir else current_post_process_config.get("base_output_dir")
         
         multiple_outputs = current_post_process_config.get("outputs", [])
+        if not readvars:
+            func_logger.info("ReadVarsESO was skipped; no simulation CSVs to merge.")
+            multiple_outputs = []
 
         for proc_item in multiple_outputs:
             out_csv_path = proc_item.get("output_csv", "output/results/merged_default.csv")
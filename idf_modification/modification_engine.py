@@ -21,6 +21,7 @@ from idf_modification.data_classes import (
 from parserr.idf_parser import EnhancedIDFParser
 
 from idf_modification.modification_tracker import ModificationTracker
+from idf_modification.scenario_generator import ScenarioGenerator
 
 # Import modifiers
 from .modifiers.hvac_modifier import HVACModifier
@@ -666,13 +667,18 @@ class ModificationEngine:
             'sampling_method': self.config['modification_strategy'].get('sampling_method', 'uniform')
         }
         
-        num_variants = self.config['modification_strategy'].get('num_variants', 10)
+        strategy_cfg = self.config['modification_strategy']
+        num_variants = strategy_cfg.get('num_variants', 10)
         results['samples_generated'] = num_variants
         
-        # Generate parameter samples
-        samples = self.scenario_generator.generate_samples(num_variants)
+        # Sample the 'range'/'choice' parameters of categories_to_modify as one design matrix
+        categories = self.config.get('categories_to_modify', {})
+        generator = ScenarioGenerator(ScenarioGenerator.parameter_ranges_from_config(categories))
+        if 'seed' in strategy_cfg:
+            generator.set_random_seed(strategy_cfg['seed'])
+        design = generator.generate_samples(num_variants, method=results['sampling_method'])
         
-        for i, sample in enumerate(samples):
+        for i, sample in enumerate(design.iter_parameter_values(categories)):
             variant_id = f"sample_{i:03d}"
             self.logger.info(f"Processing sample {i+1}/{num_variants}")
             
@@ -7,15 +7,15 @@ and constraints.
 """
 Scenario Generator - Generate modification scenarios for IDF files
 """
+import sys
 import json
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass, field
 import pandas as pd
 from scipy.stats import qmc  # For Latin Hypercube Sampling
 import random
-import itertools
 
 @dataclass
 class Scenario:
@@ -36,6 +36,72 @@ class ParameterRange:
     distribution: str = 'uniform'
     discrete_values: Optional[List[Any]] = None
 
+@dataclass
+class DesignMatrix:
+    """
+    Sampled design: one row per sample, one column per parameter.
+
+    Continuous columns of `values` hold the sampled values. Discrete columns
+    hold integer level codes into `lookups[column]`, so the matrix stays a
+    plain float array regardless of what the discrete values are.
+    """
+    columns: List[str]                      # "category.parameter"
+    values: np.ndarray                      # shape (n_samples, n_params)
+    lookups: Dict[int, np.ndarray] = field(default_factory=dict)
+    method: str = ''
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def decoded_column(self, j: int) -> np.ndarray:
+        """Column j with discrete codes replaced by their values"""
+        if j in self.lookups:
+            return self.lookups[j][self.values[:, j].astype(np.intp)]
+        return self.values[:, j]
+
+    def rows(self) -> List[List[Any]]:
+        """Decoded samples as lists of Python scalars"""
+        if not self.lookups:
+            return self.values.tolist()
+        columns = [self.decoded_column(j).tolist() for j in range(len(self.columns))]
+        return [list(row) for row in zip(*columns)]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Decoded design as a DataFrame (one column per parameter)"""
+        return pd.DataFrame({name: self.decoded_column(j) for j, name in enumerate(self.columns)})
+
+    def to_arrow(self):
+        """Decoded design as a pyarrow Table"""
+        import pyarrow as pa
+        return pa.Table.from_pandas(self.to_dataframe(), preserve_index=False)
+
+    def iter_parameter_values(self,
+                              base_modifications: Optional[Dict[str, Dict[str, Any]]] = None
+                              ) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Yield one parameter_values dict per sample, in the shape
+        ModificationEngine.modify_building expects.
+
+        Args:
+            base_modifications: categories_to_modify config; sampled parameters
+                replace their entries, everything else is passed through
+        """
+        base_modifications = base_modifications or {}
+        param_map = [column.split('.', 1) for column in self.columns]
+        for sample in self.rows():
+            modifications = {
+                category: dict(cfg, parameters=dict(cfg.get('parameters', {})))
+                for category, cfg in base_modifications.items()
+            }
+            for (category, param_name), value in zip(param_map, sample):
+                category_cfg = modifications.setdefault(category, {
+                    'enabled': True,
+                    'strategy': 'parametric_analysis',
+                    'parameters': {}
+                })
+                category_cfg['parameters'][param_name] = {'method': 'absolute', 'value': value}
+            yield modifications
+
 class ScenarioGenerator:
     """Generate modification scenarios for parametric analysis"""
     
@@ -181,12 +247,40 @@ class ScenarioGenerator:
         """
         self.parameter_registry = parameter_registry or {}
         self.random_state = None
+        self.rng = np.random.default_rng()
     
     def set_random_seed(self, seed: int):
         """Set random seed for reproducibility"""
         self.random_state = seed
         random.seed(seed)
         np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def parameter_ranges_from_config(categories_to_modify: Dict[str, Any]) -> Dict[str, List[ParameterRange]]:
+        """
+        Collect the sampled parameters of a categories_to_modify config:
+        'range' parameters become continuous ranges, 'choice' parameters
+        (with a 'values' list) become discrete ones.
+        """
+        ranges = {}
+        for category, cfg in (categories_to_modify or {}).items():
+            if not cfg.get('enabled', True):
+                continue
+            for param_name, spec in cfg.get('parameters', {}).items():
+                method = spec.get('method')
+                if method == 'range' and len(spec.get('range', [])) == 2:
+                    low, high = spec['range']
+                    ranges.setdefault(category, []).append(ParameterRange(
+                        parameter=param_name, min_value=float(low), max_value=float(high),
+                        distribution=spec.get('distribution', 'uniform')
+                    ))
+                elif method == 'choice' and spec.get('values'):
+                    ranges.setdefault(category, []).append(ParameterRange(
+                        parameter=param_name, min_value=0.0, max_value=0.0,
+                        discrete_values=list(spec['values'])
+                    ))
+        return ranges
     
     def generate_predefined_scenarios(self, 
                                     scenario_names: Optional[List[str]] = None) -> List[Scenario]:
@@ -233,30 +327,12 @@ class ScenarioGenerator:
         Returns:
             List of Scenario objects
         """
-        # Flatten parameters for sampling
-        flat_params = []
-        param_map = []
-        
-        for category, param_list in parameters.items():
-            for param_range in param_list:
-                flat_params.append(param_range)
-                param_map.append((category, param_range.parameter))
-        
-        # Generate samples
-        if method == 'uniform':
-            samples = self._uniform_sampling(flat_params, num_scenarios)
-        elif method == 'latin_hypercube':
-            samples = self._latin_hypercube_sampling(flat_params, num_scenarios)
-        elif method == 'sobol':
-            samples = self._sobol_sampling(flat_params, num_scenarios)
-        elif method == 'factorial':
-            samples = self._factorial_sampling(flat_params, num_scenarios)
-        else:
-            raise ValueError(f"Unknown sampling method: {method}")
+        design = self.generate_design_matrix(parameters, num_scenarios, method)
+        param_map = [tuple(column.split('.', 1)) for column in design.columns]
         
         # Create scenarios from samples
         scenarios = []
-        for i, sample in enumerate(samples):
+        for i, sample in enumerate(design.rows()):
             modifications = {}
             
             for j, (category, param_name) in enumerate(param_map):
@@ -288,6 +364,55 @@ class ScenarioGenerator:
         
         return scenarios
     
+    def generate_design_matrix(self,
+                               parameters: Dict[str, List[ParameterRange]],
+                               num_samples: int,
+                               method: str = 'latin_hypercube') -> DesignMatrix:
+        """
+        Sample a design matrix without building per-sample Python objects
+        
+        Args:
+            parameters: Dictionary of category -> parameter ranges
+            num_samples: Number of samples (rows)
+            method: Sampling method ('uniform', 'latin_hypercube', 'sobol', 'factorial')
+            
+        Returns:
+            DesignMatrix
+        """
+        flat_params = [p for param_list in parameters.values() for p in param_list]
+        columns = [f"{category}.{p.parameter}"
+                   for category, param_list in parameters.items() for p in param_list]
+        
+        if method == 'uniform':
+            values, lookups = self._uniform_sampling(flat_params, num_samples)
+        elif method == 'latin_hypercube':
+            values, lookups = self._latin_hypercube_sampling(flat_params, num_samples)
+        elif method == 'sobol':
+            values, lookups = self._sobol_sampling(flat_params, num_samples)
+        elif method == 'factorial':
+            values, lookups = self._factorial_sampling(flat_params, num_samples)
+        else:
+            raise ValueError(f"Unknown sampling method: {method}")
+        
+        return DesignMatrix(columns=columns, values=values, lookups=lookups, method=method)
+    
+    def generate_samples(self,
+                         num_samples: int,
+                         method: str = 'latin_hypercube',
+                         parameters: Optional[Dict[str, List[ParameterRange]]] = None) -> DesignMatrix:
+        """
+        Sample the registered parameters (or the given ones)
+        
+        Args:
+            num_samples: Number of samples
+            method: Sampling method
+            parameters: Category -> parameter ranges; defaults to parameter_registry
+            
+        Returns:
+            DesignMatrix
+        """
+        return self.generate_design_matrix(parameters or self.parameter_registry, num_samples, method)
+    
     def generate_optimization_scenarios(self,
                                       objectives: List[str],
                                       constraints: Optional[Dict[str, Any]] = None,
@@ -529,80 +654,65 @@ class ScenarioGenerator:
         
         return scenarios
     
-    def _uniform_sampling(self, parameters: List[ParameterRange], n_samples: int) -> List[List[float]]:
-        """Generate uniform random samples"""
-        samples = []
-        
-        for _ in range(n_samples):
-            sample = []
-            for param in parameters:
-                if param.discrete_values:
-                    value = random.choice(param.discrete_values)
-                else:
-                    value = random.uniform(param.min_value, param.max_value)
-                sample.append(value)
-            samples.append(sample)
+    def _scale_unit_samples(self,
+                            parameters: List[ParameterRange],
+                            unit_samples: np.ndarray) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        """
+        Scale samples in [0, 1) to the parameter ranges, column-wise.
         
-        return samples
+        Continuous columns are scaled to [min_value, max_value]; discrete columns
+        become level codes into a lookup table of their values.
+        """
+        values = np.empty_like(unit_samples, dtype=float)
+        lookups = {}
+        
+        discrete = np.array([bool(p.discrete_values) for p in parameters], dtype=bool)
+        if (~discrete).any():
+            low = np.array([p.min_value for p in parameters], dtype=float)[~discrete]
+            high = np.array([p.max_value for p in parameters], dtype=float)[~discrete]
+            values[:, ~discrete] = low + unit_samples[:, ~discrete] * (high - low)
+        
+        for j in np.flatnonzero(discrete):
+            table = np.array(parameters[j].discrete_values, dtype=object)
+            codes = np.minimum((unit_samples[:, j] * len(table)).astype(np.intp), len(table) - 1)
+            values[:, j] = codes
+            lookups[int(j)] = table
+        
+        return values, lookups
+    
+    def _uniform_sampling(self, parameters: List[ParameterRange],
+                          n_samples: int) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        """Generate uniform random samples"""
+        unit_samples = self.rng.random((n_samples, len(parameters)))
+        return self._scale_unit_samples(parameters, unit_samples)
     
-    def _latin_hypercube_sampling(self, parameters: List[ParameterRange], n_samples: int) -> List[List[float]]:
+    def _latin_hypercube_sampling(self, parameters: List[ParameterRange],
+                                  n_samples: int) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
         """Generate Latin Hypercube samples"""
-        n_params = len(parameters)
-        
-        # Generate LHS samples in [0, 1]
-        sampler = qmc.LatinHypercube(d=n_params, seed=self.random_state)
-        unit_samples = sampler.random(n=n_samples)
-        
-        # Scale to parameter ranges
-        samples = []
-        for unit_sample in unit_samples:
-            sample = []
-            for i, param in enumerate(parameters):
-                if param.discrete_values:
-                    # Map to discrete values
-                    idx = int(unit_sample[i] * len(param.discrete_values))
-                    idx = min(idx, len(param.discrete_values) - 1)
-                    value = param.discrete_values[idx]
-                else:
-                    # Scale to continuous range
-                    value = param.min_value + unit_sample[i] * (param.max_value - param.min_value)
-                sample.append(value)
-            samples.append(sample)
-        
-        return samples
+        sampler = qmc.LatinHypercube(d=len(parameters), seed=self.random_state)
+        return self._scale_unit_samples(parameters, sampler.random(n=n_samples))
     
-    def _sobol_sampling(self, parameters: List[ParameterRange], n_samples: int) -> List[List[float]]:
+    def _sobol_sampling(self, parameters: List[ParameterRange],
+                        n_samples: int) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
         """Generate Sobol sequence samples"""
-        n_params = len(parameters)
-        
-        # Generate Sobol samples in [0, 1]
-        sampler = qmc.Sobol(d=n_params, seed=self.random_state)
-        unit_samples = sampler.random(n=n_samples)
-        
-        # Scale to parameter ranges (same as LHS)
-        samples = []
-        for unit_sample in unit_samples:
-            sample = []
-            for i, param in enumerate(parameters):
-                if param.discrete_values:
-                    idx = int(unit_sample[i] * len(param.discrete_values))
-                    idx = min(idx, len(param.discrete_values) - 1)
-                    value = param.discrete_values[idx]
-                else:
-                    value = param.min_value + unit_sample[i] * (param.max_value - param.min_value)
-                sample.append(value)
-            samples.append(sample)
-        
-        return samples
+        sampler = qmc.Sobol(d=len(parameters), seed=self.random_state)
+        return self._scale_unit_samples(parameters, sampler.random(n=n_samples))
     
-    def _factorial_sampling(self, parameters: List[ParameterRange], n_samples: int) -> List[List[float]]:
-        """Generate factorial design samples"""
+    def _factorial_sampling(self, parameters: List[ParameterRange],
+                            n_samples: int) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        """
+        Generate factorial design samples.
+        
+        Design points are addressed by their index in the full factorial
+        (mixed-radix over the parameter levels), so only the selected rows are
+        ever decoded - the full product is never materialized.
+        """
         # For each parameter, use 3 levels (min, mid, max)
         levels = []
         for param in parameters:
             if param.discrete_values:
                 if len(param.discrete_values) <= 3:
-                    levels.append(param.discrete_values)
+                    levels.append(list(param.discrete_values))
                 else:
                     # Take first, middle, last
                     n = len(param.discrete_values)
@@ -613,19 +723,48 @@ class ScenarioGenerator:
                 mid = (param.min_value + param.max_value) / 2
                 levels.append([param.min_value, mid, param.max_value])
         
-        # Generate full factorial
-        all_combinations = list(itertools.product(*levels))
+        radices = [len(lv) for lv in levels]
+        total = 1
+        for r in radices:
+            total *= r
         
-        # If too many combinations, sample randomly
-        if len(all_combinations) > n_samples:
-            samples = random.sample(all_combinations, n_samples)
+        if total > n_samples:
+            # Sample design points by index, without replacement
+            rng = random.Random(self.random_state)
+            if total <= sys.maxsize:
+                indices = rng.sample(range(total), n_samples)
+            else:
+                # Too large for range(); collisions are vanishingly rare at this size
+                chosen = set()
+                while len(chosen) < n_samples:
+                    chosen.add(rng.randrange(total))
+                indices = list(chosen)
+        else:
+            # Repeat the full design to reach n_samples
+            indices = [i % total for i in range(n_samples)]
+        
+        # Mixed-radix decode (first parameter varies slowest, like itertools.product)
+        codes = np.empty((len(indices), len(radices)), dtype=np.intp)
+        if total < 2**63:
+            remaining = np.array(indices, dtype=np.int64)
+            for j in range(len(radices) - 1, -1, -1):
+                remaining, codes[:, j] = np.divmod(remaining, radices[j])
         else:
-            samples = all_combinations
-            # Repeat to reach n_samples
-            while len(samples) < n_samples:
-                samples.extend(all_combinations[:n_samples - len(samples)])
+            for i, index in enumerate(indices):
+                for j in range(len(radices) - 1, -1, -1):
+                    index, codes[i, j] = divmod(index, radices[j])
+        
+        values = np.empty(codes.shape, dtype=float)
+        lookups = {}
+        for j, param in enumerate(parameters):
+            table = np.array(levels[j], dtype=object if param.discrete_values else float)
+            if param.discrete_values:
+                values[:, j] = codes[:, j]
+                lookups[j] = table
+            else:
+                values[:, j] = table[codes[:, j]]
         
-        return [list(s) for s in samples]
+        return values, lookups
     
     def _generate_weights(self, n_objectives: int, n_samples: int) -> List[List[float]]:
         """Generate weight combinations for multi-objective optimization"""
@@ -2,6 +2,10 @@
 
 import random
 from .dhw_lookup import dhw_lookup
+from rule_index import rule_index_for, casefold
+from batch_assignment import draw_uniform
+
+DHW_OVERRIDE_FIELDS = ("building_id", "dhw_key", "building_function", "age_range")
 
 def find_dhw_overrides(
     building_id,
@@ -34,37 +38,12 @@ def find_dhw_overrides(
       }
       etc.
     """
-    matches = []
-    for row in (user_config or []):
-        # 1) If row has "building_id", must match building_id
-        if "building_id" in row:
-            if row["building_id"] is not None and row["building_id"] != building_id:
-                continue
-
-        # 2) If row has "dhw_key", must match dhw_key
-        if "dhw_key" in row:
-            if row["dhw_key"] is not None and row["dhw_key"] != dhw_key:
-                continue
-
-        # 3) If row has "building_function", must match (case-insensitive)
-        if "building_function" in row:
-            if row["building_function"] is not None:
-                if building_function is None:
-                    continue
-                if row["building_function"].lower() != building_function.lower():
-                    continue
-
-        # 4) If row has "age_range", must match exactly
-        if "age_range" in row:
-            if row["age_range"] is not None:
-                if age_range is None:
-                    continue
-                if row["age_range"] != age_range:
-                    continue
-
-        # If we haven't continued away, it's a match
-        matches.append(row)
-    return matches
+    if not user_config:
+        return []
+    # A field set to None in the row does not constrain it
+    return rule_index_for(
+        user_config, DHW_OVERRIDE_FIELDS, wildcard="none", normalize={"building_function": casefold}
+    ).match(building_id=building_id, dhw_key=dhw_key, building_function=building_function, age_range=age_range)
 
 def pick_val_with_range(
     rng_tuple,
@@ -101,7 +80,7 @@ def pick_val_with_range(
     if strategy == "A":
         chosen = (min_val + max_val) / 2.0
     elif strategy == "B":
-        chosen = random.uniform(min_val, max_val)
+        chosen = draw_uniform("dhw", param_name, min_val, max_val)
     else:
         chosen = min_val
 
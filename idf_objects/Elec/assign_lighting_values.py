@@ -9,6 +9,7 @@ from .constants import ( # Ensure all DEFAULT constants are imported
     DEFAULT_EQUIP_FRACTION_RADIANT, DEFAULT_EQUIP_FRACTION_LOST
 )
 from .overrides_helper import find_applicable_overrides # Assuming this helper function exists and is correct
+from batch_assignment import draw_uniform
 
 
 def assign_lighting_parameters(
@@ -180,7 +181,7 @@ def assign_lighting_parameters(
     def pick_val(param_name, r): # Added param_name for better logging
         val = None
         if strategy == "A": val = (r[0] + r[1]) / 2.0
-        elif strategy == "B": val = random.uniform(r[0], r[1])
+        elif strategy == "B": val = draw_uniform("lighting", param_name, r[0], r[1])
         else: val = r[0]
         print(f"  [DEBUG assign_light_params] pick_val for '{param_name}': range={r}, strategy='{strategy}', picked={val}")
         return val
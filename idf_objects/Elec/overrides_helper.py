@@ -5,6 +5,11 @@ Helper functions to filter user_config rows that match a given building's
 characteristics (id, type, age_range, scenario, etc.).
 """
 
+from rule_index import rule_index_for, casefold
+
+# building_id constrains unless None; building_type / age_range unless empty
+LIGHTING_OVERRIDE_WILDCARDS = {"building_id": "none", "building_type": "falsy", "age_range": "falsy"}
+
 def find_applicable_overrides(building_id, building_type, age_range, user_config):
     """
     Given a building's unique ID, type, and age_range, plus a user_config list (or table)
@@ -33,34 +38,14 @@ def find_applicable_overrides(building_id, building_type, age_range, user_config
     if not user_config:
         return []
 
-    matches = []
-    for row in user_config:
-        # building_id check (if specified in row)
-        if "building_id" in row and row["building_id"] is not None:
-            if row["building_id"] != building_id:
-                continue  # skip if mismatch
-
-        # building_type check (if specified in row)
-        if "building_type" in row and row["building_type"]:
-            if row["building_type"].lower() != building_type.lower():
-                continue  # skip if mismatch
-
-        # age_range check (if specified in row)
-        if "age_range" in row and row["age_range"]:
-            if age_range and row["age_range"] != age_range:
-                continue  # skip if mismatch
-            elif age_range is None and row["age_range"]:
-                # If building has no age_range but row requires one, skip
-                continue
-
-        # scenario check, if you want to handle scenario-based overrides:
-        # if "scenario" in row and row["scenario"]:
-        #     # Suppose building has building_row["scenario"] => compare
-        #     # Or if you pass scenario as a parameter to find_applicable_overrides
-        #     # you can do a similar logic here.
-        #     pass
-
-        # If we got here, it means the row matches all relevant criteria
-        matches.append(row)
-
-    return matches
+    # building_type is compared case-insensitively; an empty (not None)
+    # building age_range does not filter on age_range at all
+    fields = ("building_id", "building_type", "age_range")
+    if not age_range and age_range is not None:
+        fields = fields[:2]
+    return rule_index_for(
+        user_config,
+        fields,
+        wildcard=LIGHTING_OVERRIDE_WILDCARDS,
+        normalize={"building_type": casefold},
+    ).match(building_id=building_id, building_type=building_type, age_range=age_range)
@@ -1,7 +1,14 @@
 # File: HVAC/assign_hvac_values.py
 
 import random
-from .hvac_lookup import hvac_lookup
+from Lookups.lookup_store import load_lookup
+from rule_index import rule_index_for
+from batch_assignment import draw_uniform
+
+HVAC_OVERRIDE_FIELDS = (
+    "building_id", "building_function", "residential_type", "non_residential_type",
+    "age_range", "scenario", "calibration_stage",
+)
 
 def find_hvac_overrides(
     building_id,
@@ -33,27 +40,18 @@ def find_hvac_overrides(
         ]
       }
     """
-    matches = []
-    for row in user_config or []:
-        if "building_id" in row and row["building_id"] != building_id:
-            continue
-        if "building_function" in row and row["building_function"] != building_function:
-            continue
-
-        if "residential_type" in row and row["residential_type"] != residential_type:
-            continue
-        if "non_residential_type" in row and row["non_residential_type"] != non_residential_type:
-            continue
-
-        if "age_range" in row and row["age_range"] != age_range:
-            continue
-        if "scenario" in row and row["scenario"] != scenario:
-            continue
-        if "calibration_stage" in row and row["calibration_stage"] != calibration_stage:
-            continue
-
-        matches.append(row)
-    return matches
+    if not user_config:
+        return []
+    # A field constrains a row only if the row sets it
+    return rule_index_for(user_config, HVAC_OVERRIDE_FIELDS).match(
+        building_id=building_id,
+        building_function=building_function,
+        residential_type=residential_type,
+        non_residential_type=non_residential_type,
+        age_range=age_range,
+        scenario=scenario,
+        calibration_stage=calibration_stage,
+    )
 
 
 def pick_val_with_range(rng_tuple, strategy="A", log_dict=None, param_name=None):
@@ -71,7 +69,7 @@ def pick_val_with_range(rng_tuple, strategy="A", log_dict=None, param_name=None)
     if strategy == "A":  # midpoint
         chosen = (min_v + max_v) / 2.0
     elif strategy == "B":
-        chosen = random.uniform(min_v, max_v)
+        chosen = draw_uniform("hvac", param_name, min_v, max_v)
     else:
         chosen = min_v  # default => pick min
 
@@ -170,6 +168,7 @@ def assign_hvac_ideal_parameters(
         random.seed(random_seed)
 
     # 1) Lookup the base data in hvac_lookup
+    hvac_lookup = load_lookup("hvac_lookup")
     if calibration_stage not in hvac_lookup:
         calibration_stage = "pre_calibration"
     stage_block = hvac_lookup[calibration_stage]
@@ -131,22 +131,9 @@ def create_or_update_time_block_schedule(
         print(f"[Schedule Creation] Created new SCHEDULE:COMPACT: {sched_name}")
     else:
         print(f"[Schedule Creation] Found existing SCHEDULE:COMPACT: {sched_name}, updating fields.")
-        # Clear existing fields beyond Name and TypeLimits to avoid leftover data
-        max_field_num = 0
-        for i in range(1, 200): # Check a reasonable number of fields
-             field_attr = f"Field_{i}"
-             if hasattr(sched_obj, field_attr) and getattr(sched_obj, field_attr, None):
-                 max_field_num = i
-             elif not hasattr(sched_obj, field_attr): # Stop if attribute doesn't exist
-                 break
-        # Clear potentially unused fields by setting them to empty string
-        for i in range(1, max_field_num + 1):
-             field_attr = f"Field_{i}"
-             try:
-                 if hasattr(sched_obj, field_attr):
-                     setattr(sched_obj, field_attr, '')
-             except AttributeError:
-                 pass
+        # Drop existing fields beyond Name and TypeLimits ([KEY, Name, TypeLimits, Field_1, ...])
+        # so no leftover data remains; both eppy and the text backend extend obj again on assignment
+        del sched_obj.obj[3:]
 
     sched_obj.Schedule_Type_Limits_Name = schedule_type_limits
 
@@ -3,6 +3,7 @@
 import random
 from .equip_lookup import equip_lookup
 from .overrides_helper import find_applicable_overrides # if you use override logic
+from batch_assignment import draw_uniform
 from idf_objects.Elec.constants import (
     DEFAULT_EQUIP_FRACTION_LATENT,
     DEFAULT_EQUIP_FRACTION_RADIANT,
@@ -185,7 +186,7 @@ def assign_equipment_parameters(
         if current_strategy == "A": # midpoint
             val = (r[0] + r[1]) / 2.0
         elif current_strategy == "B": # random
-            val = random.uniform(r[0], r[1])
+            val = draw_uniform("equipment", param_name, r[0], r[1])
         else: # fallback => pick min
             val = r[0]
         print(f"  [DEBUG assign_equip_params] pick_val for '{param_name}': range={r}, strategy='{current_strategy}', picked={val}")
@@ -1,5 +1,7 @@
 # eequip/overrides_helper.py
 
+from rule_index import rule_index_for
+
 def find_applicable_overrides(building_id, building_type, age_range, user_config):
     """
     This function filters the user_config (list of override rows)
@@ -19,23 +21,7 @@ def find_applicable_overrides(building_id, building_type, age_range, user_config
     Returns a list of matching rows.
     """
 
-    matches = []
-    for row in user_config:
-        # building_id check: only if row has building_id
-        if "building_id" in row and row["building_id"] is not None:
-            if row["building_id"] != building_id:
-                continue
-
-        # building_type check
-        if "building_type" in row and row["building_type"] is not None:
-            if row["building_type"] != building_type:
-                continue
-
-        # age_range check
-        if "age_range" in row and row["age_range"] is not None:
-            if row["age_range"] != age_range:
-                continue
-
-        matches.append(row)
-
-    return matches
+    # a field set to None in the row does not constrain it
+    return rule_index_for(
+        user_config, ("building_id", "building_type", "age_range"), wildcard="none"
+    ).match(building_id=building_id, building_type=building_type, age_range=age_range)
@@ -10,6 +10,7 @@ Key function: add_fenestration(...)
 
 import pandas as pd
 from geomeppy import IDF as GeppyIDF
+from idf_text import TextIDF
 from .assign_fenestration_values import assign_fenestration_parameters
 
 
@@ -89,7 +90,10 @@ def add_fenestration(
     # 4) Use geomeppy to create new window surfaces for each exterior wall
     #    The default or fallback construction name is "Window1C".
     #    Make sure your updated materials/constructions code has created "Window1C" or a suitable name.
-    GeppyIDF.set_wwr(idf, wwr=wwr, construction="Window1C")
+    if isinstance(idf, TextIDF):
+        idf.set_wwr(wwr=wwr, construction="Window1C")
+    else:
+        GeppyIDF.set_wwr(idf, wwr=wwr, construction="Window1C")
 
     # 5) Optional: Log fenestration object names
     new_fens = idf.idfobjects["FENESTRATIONSURFACE:DETAILED"]
@@ -14,9 +14,8 @@ Key functions:
 
 import random
 
-# Update these imports to match your actual file locations:
-from Lookups.data_materials_residential import residential_materials_data
-from Lookups.data_materials_non_residential import non_residential_materials_data
+# Compiled tables when built (python -m Lookups.lookup_store), else the Lookups modules
+from Lookups.lookup_store import load_lookup
 from .materials_lookup import material_lookup
 
 
@@ -211,9 +210,9 @@ def get_extended_materials_data(
 
     # Pick which dataset to use
     if building_function.lower() == "residential":
-        ds = residential_materials_data
+        ds = load_lookup("residential_materials_data")
     else:
-        ds = non_residential_materials_data
+        ds = load_lookup("non_residential_materials_data")
 
     dict_key = (building_type, age_range, scenario, calibration_stage)
     if dict_key not in ds:
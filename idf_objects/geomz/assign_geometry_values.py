@@ -3,6 +3,8 @@
 import random
 from .geometry_lookup import geometry_lookup
 from .geometry_overrides_from_excel import pick_geom_params_from_rules
+from rule_index import rule_index_for
+from batch_assignment import draw_uniform
 
 
 def find_geom_overrides(building_id, building_type, user_config):
@@ -15,18 +17,11 @@ def find_geom_overrides(building_id, building_type, user_config):
       - min_val, max_val (for numeric overrides)
       - fixed_value (for boolean or "lock" numeric)
     """
-    matches = []
-    for row in (user_config or []):
-        # Match building_id if specified
-        if "building_id" in row:
-            if row["building_id"] != building_id:
-                continue
-        # Match building_type if specified
-        if "building_type" in row:
-            if row["building_type"] != building_type:
-                continue
-        matches.append(row)
-    return matches
+    if not user_config:
+        return []
+    return rule_index_for(user_config, ("building_id", "building_type")).match(
+        building_id=building_id, building_type=building_type
+    )
 
 
 def pick_val_with_range(
@@ -52,7 +47,7 @@ def pick_val_with_range(
     if strategy == "A":         # midpoint
         chosen = (min_v + max_v) / 2.0
     elif strategy == "B":       # random uniform
-        chosen = random.uniform(min_v, max_v)
+        chosen = draw_uniform("geometry", param_name, min_v, max_v)
     else:
         chosen = min_v          # fallback => min
 
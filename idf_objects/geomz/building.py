@@ -3,6 +3,7 @@
 from .assign_geometry_values import assign_geometry_values
 from .geometry import compute_dimensions_from_area_perimeter, create_building_base_polygon
 from .zoning import create_zones_with_perimeter_depth, link_surfaces
+from .floor_collapsing import collapsed_floor_plan, represented_floors
 import math
 import pandas as pd
 
@@ -21,11 +22,16 @@ def create_building_with_roof_type(
     random_seed=None,
     user_config=None,
     assigned_geom_log=None,
-    excel_rules=None
+    excel_rules=None,
+    collapse_floors=False
 ):
     """
     Create building geometry in the IDF, multi-floor, optionally perimeter+core.
     Now includes logic to link each new floor's Floor to the old floor's Ceiling.
+
+    With collapse_floors, buildings of 4+ floors are modeled as ground floor,
+    one representative middle floor (zone multiplier) and top floor; see
+    floor_collapsing.py.
     """
 
      # --------------------------------------------------------------------
@@ -138,15 +144,27 @@ def create_building_with_roof_type(
     A0, B0, C0, D0 = create_building_base_polygon(width, length, orientation)
     base_poly_0 = [A0, B0, C0, D0]
 
-    # 5) Create each floor in a loop
+    # 5) Create each modeled floor in a loop (every floor unless collapsed)
+    floor_plan = collapsed_floor_plan(num_floors, collapse_floors)
+    is_collapsed = len(floor_plan) < num_floors
+
+    bldg_id = building_row.get("ogc_fid")
+    if assigned_geom_log is not None and bldg_id in assigned_geom_log:
+        assigned_geom_log[bldg_id]["num_floors"] = num_floors
+        assigned_geom_log[bldg_id]["floor_collapsing"] = is_collapsed
+        if is_collapsed:
+            assigned_geom_log[bldg_id]["zone_multiplier"] = floor_plan[1][1]
+            assigned_geom_log[bldg_id]["modeled_floors"] = ",".join(str(f[0]) for f in floor_plan)
+
     floors_zones = {}
-    current_base_poly = base_poly_0
 
     prev_floor_zones = None  # Will store the zone surfaces from the previous floor
-    for floor_i in range(1, num_floors + 1):
+    for floor_i, multiplier, is_top_floor in floor_plan:
         # "Ground" for 1st floor, else "Internal"
         floor_type = "Ground" if floor_i == 1 else "Internal"
-        is_top_floor = (floor_i == num_floors)
+
+        # floors are placed at their real elevation, also when collapsed
+        current_base_poly = [(p[0], p[1], p[2] + (floor_i - 1) * wall_height) for p in base_poly_0]
 
         # Create zones for this floor (could be single or perimeter+core)
         zones_data = create_zones_with_perimeter_depth(
@@ -162,10 +180,18 @@ def create_building_with_roof_type(
         )
         floors_zones[floor_i] = zones_data
 
+        if multiplier > 1:
+            for zone_name in zones_data:
+                idf.getobject("ZONE", zone_name).Multiplier = multiplier
+            if assigned_geom_log is not None and bldg_id in assigned_geom_log:
+                floors = represented_floors(floor_i, multiplier)
+                assigned_geom_log[bldg_id]["represented_floors"] = f"{floors[0]}-{floors[-1]}"
+
         # -------------------------------------------------------
         #  LINK THIS FLOOR’S "FLOOR" SURFACES TO PREV FLOOR’S "CEILING" SURFACES
+        #  (not when collapsed: those floors/ceilings stay Adiabatic)
         # -------------------------------------------------------
-        if floor_i > 1 and prev_floor_zones:
+        if floor_i > 1 and prev_floor_zones and not is_collapsed:
             # We'll do a basic approach: match zone names in sorted order
             old_zone_names = sorted(prev_floor_zones.keys())
             new_zone_names = sorted(zones_data.keys())
@@ -192,8 +218,5 @@ def create_building_with_roof_type(
 
         prev_floor_zones = zones_data
 
-        # shift the base polygon upward by wall_height for the next floor
-        current_base_poly = [(p[0], p[1], p[2] + wall_height) for p in current_base_poly]
-
     # (Optional) if you want to add pitched roof logic, do it after the top floor is created
     return floors_zones
@@ -0,0 +1,52 @@
+# geomz/floor_collapsing.py
+
+"""
+Floor collapsing for multi-storey buildings.
+
+Instead of one set of perimeter/core zones per floor, a collapsed building
+models three floors:
+
+  - the ground floor (floor 1),
+  - one representative middle floor with ZONE Multiplier = num_floors - 2,
+    placed at the elevation of the middle of the floors it stands for,
+  - the top floor (floor num_floors) at its real elevation.
+
+Zones keep their real floor index in the name (Zone{floor}_Core, ...), and
+the floor/ceiling surfaces between modeled floors stay Adiabatic: the
+neglected heat exchange is between floors that are assumed identical.
+
+Zone-level outputs of the representative floor are those of a single floor,
+so parsing copies them to every floor it represents (see
+parserr.sql_helpers.expand_collapsed_zones). Facility meters already include
+the multiplier.
+"""
+
+MIN_FLOORS_TO_COLLAPSE = 4  # with 3 floors the middle one would have multiplier 1
+
+
+def represented_floors(floor_i, multiplier):
+    """
+    Floors stood for by a modeled floor: a block of `multiplier` floors
+    centred on floor_i (for the representative middle floor: 2 .. num_floors-1).
+    """
+    start = floor_i - (multiplier - 1) // 2
+    return list(range(start, start + multiplier))
+
+
+def collapsed_floor_plan(num_floors, collapse_floors=False):
+    """
+    Floors to model as a list of (floor_i, multiplier, is_top_floor).
+
+    Without collapsing (or with fewer than MIN_FLOORS_TO_COLLAPSE floors)
+    every floor is modeled with multiplier 1.
+    """
+    if not collapse_floors or num_floors < MIN_FLOORS_TO_COLLAPSE:
+        return [(floor_i, 1, floor_i == num_floors) for floor_i in range(1, num_floors + 1)]
+
+    middle_multiplier = num_floors - 2
+    middle_floor = (num_floors + 1) // 2
+    return [
+        (1, 1, False),
+        (middle_floor, middle_multiplier, False),
+        (num_floors, 1, True),
+    ]
@@ -1,5 +1,7 @@
 # geomz/geometry_overrides_helper.py
 
+from rule_index import rule_index_for
+
 def find_geom_overrides(building_id, building_type, user_config):
     """
     Returns a list of geometry override rows that match the given building_id and/or building_type.
@@ -10,13 +12,8 @@ def find_geom_overrides(building_id, building_type, user_config):
       - for numeric: (min_val, max_val)
       - for boolean: (fixed_value)
     """
-    matches = []
-    for row in user_config:
-        if "building_id" in row:
-            if row["building_id"] != building_id:
-                continue
-        if "building_type" in row:
-            if row["building_type"] != building_type:
-                continue
-        matches.append(row)
-    return matches
+    if not user_config:
+        return []
+    return rule_index_for(user_config, ("building_id", "building_type")).match(
+        building_id=building_id, building_type=building_type
+    )
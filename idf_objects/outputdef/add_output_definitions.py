@@ -9,19 +9,21 @@ def add_output_definitions(idf, output_settings, assigned_output_log=None):
     # 1) Variables
     added_vars = []
     skipped_vars = []
+    # (name, FREQUENCY) of what is already defined, checked once per request
+    existing_vars = {
+        (ov.Variable_Name, ov.Reporting_Frequency.upper())
+        for ov in idf.idfobjects["OUTPUT:VARIABLE"]
+    }
     for var in output_settings["variables"]:
         var_name = var["variable_name"]
         freq = var["reporting_frequency"]
 
-        existing_vars = [
-            ov for ov in idf.idfobjects["OUTPUT:VARIABLE"]
-            if ov.Variable_Name == var_name and ov.Reporting_Frequency.upper() == freq.upper()
-        ]
-        if not existing_vars:
+        if (var_name, freq.upper()) not in existing_vars:
             new_var = idf.newidfobject("OUTPUT:VARIABLE")
             new_var.Key_Value = "*"
             new_var.Variable_Name = var_name
             new_var.Reporting_Frequency = freq
+            existing_vars.add((var_name, freq.upper()))
             added_vars.append((var_name, freq))
         else:
             skipped_vars.append((var_name, freq))
@@ -29,17 +31,18 @@ def add_output_definitions(idf, output_settings, assigned_output_log=None):
     # 2) Meters
     added_meters = []
     skipped_meters = []
+    existing_meters = {
+        (om.Key_Name, om.Reporting_Frequency.upper())
+        for om in idf.idfobjects["OUTPUT:METER"]
+    }
     for meter in output_settings["meters"]:
         key_name = meter["key_name"]
         freq = meter["reporting_frequency"]
-        existing_meters = [
-            om for om in idf.idfobjects["OUTPUT:METER"]
-            if om.Key_Name == key_name and om.Reporting_Frequency.upper() == freq.upper()
-        ]
-        if not existing_meters:
+        if (key_name, freq.upper()) not in existing_meters:
             new_meter = idf.newidfobject("OUTPUT:METER")
             new_meter.Key_Name = key_name
             new_meter.Reporting_Frequency = freq
+            existing_meters.add((key_name, freq.upper()))
             added_meters.append((key_name, freq))
         else:
             skipped_meters.append((key_name, freq))
@@ -73,3 +73,35 @@ def assign_output_settings(
         assigned_output_log["final_output_settings"] = result
 
     return result
+
+
+def assign_demanded_output_settings(
+    demanded_outputs,
+    include_tables=True,
+    include_summary=True,
+    assigned_output_log=None
+):
+    """
+    Like assign_output_settings, but for an explicit {name: frequency} dict
+    (see orchestrator/output_demand.py). Names are not limited to output_lookup;
+    names containing ':' are meters, the others variables.
+    """
+    final_variables = []
+    final_meters = []
+    for name, freq in demanded_outputs.items():
+        if ":" in name:
+            final_meters.append({"key_name": name, "reporting_frequency": freq})
+        else:
+            final_variables.append({"variable_name": name, "reporting_frequency": freq})
+
+    result = {
+        "variables": final_variables,
+        "meters": final_meters,
+        "tables": list(output_lookup["tables"]) if include_tables else [],
+        "summary_reports": list(output_lookup["summary_reports"]) if include_summary else []
+    }
+
+    if assigned_output_log is not None:
+        assigned_output_log["final_output_settings"] = result
+
+    return result
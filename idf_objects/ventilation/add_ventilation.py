@@ -287,7 +287,10 @@ def add_ventilation_to_idf(
                     if area_val < 0: area_val = 0.0 
                 except Exception: area_val = 0.0
             effective_zone_info_map[zone_name_key] = {'area': area_val, 'is_core': "_core" in safe_lower(zone_name_key)}
-            sum_of_individual_zone_areas += area_val
+            # zones with a multiplier (collapsed floors) stand for several floors' area
+            try: zone_multiplier = max(int(float(getattr(zone_obj, 'Multiplier', 1) or 1)), 1)
+            except (ValueError, TypeError): zone_multiplier = 1
+            sum_of_individual_zone_areas += area_val * zone_multiplier
 
     # FIX for VENT_011: Improve zone area fallback logic
     use_equal_split_fallback = False
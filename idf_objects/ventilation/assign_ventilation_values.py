@@ -3,6 +3,10 @@
 import random
 import math # Import math for isnan check
 from .ventilation_lookup import ventilation_lookup # Assuming ventilation_lookup is in the same directory
+from rule_index import rule_index_for
+from batch_assignment import draw_uniform
+
+VENT_OVERRIDE_FIELDS = ("building_id", "building_function", "age_range", "scenario", "calibration_stage")
 
 def find_vent_overrides(
     building_id,
@@ -17,26 +21,17 @@ def find_vent_overrides(
     building_id, building_function, age_range, scenario, and calibration_stage.
     Returns a list of matching dict rows.
     """
-    matches = []
     if not user_config: # Handle empty or None user_config
-        return matches
-
-    for row in user_config:
-        if not isinstance(row, dict):
-            continue
+        return []
 
-        if "building_id" in row and row["building_id"] != building_id:
-            continue
-        if "building_function" in row and row["building_function"] != building_function:
-            continue
-        if "age_range" in row and row["age_range"] != age_range:
-            continue
-        if "scenario" in row and row["scenario"] != scenario:
-            continue
-        if "calibration_stage" in row and row["calibration_stage"] != calibration_stage:
-            continue
-        matches.append(row)
-    return matches
+    # Non-dict entries are skipped by the index
+    return rule_index_for(user_config, VENT_OVERRIDE_FIELDS).match(
+        building_id=building_id,
+        building_function=building_function,
+        age_range=age_range,
+        scenario=scenario,
+        calibration_stage=calibration_stage,
+    )
 
 
 def pick_val_with_range(
@@ -71,7 +66,7 @@ def pick_val_with_range(
     if strategy == "A":
         chosen = (min_v + max_v) / 2.0
     elif strategy == "B":
-        chosen = random.uniform(min_v, max_v)
+        chosen = draw_uniform("ventilation", param_name, min_v, max_v)
     elif strategy == "C":
         chosen = min_v
     else:
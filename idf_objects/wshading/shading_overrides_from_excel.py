@@ -15,8 +15,15 @@ Analogous to geometry_overrides_from_excel.py or dict_override_excel.py:
 import pandas as pd
 import logging
 
+from rule_index import rule_index_for
+
 logger = logging.getLogger(__name__)
 
+
+def _lower_str(value):
+    """Rule and building identifiers are compared as lower-case strings"""
+    return str(value).lower()
+
 def read_shading_overrides_excel(excel_path):
     """
     Reads an Excel file containing shading override rules.
@@ -163,29 +170,19 @@ def pick_shading_params_from_rules(
     if not all_rules:
         return fallback
 
-    best_rule_content = None
-    building_id_str = str(building_id).lower()
-    shading_type_key_str = str(shading_type_key).lower()
-
-    for rule in all_rules:
-        # building_id must match (case-insensitive)
-        rule_building_id = str(rule.get("building_id", "")).lower()
-        if rule_building_id != building_id_str:
-            continue
-
-        # shading_type_key must match (case-insensitive)
-        rule_shading_type_key = str(rule.get("shading_type_key", "")).lower()
-        if rule_shading_type_key != shading_type_key_str:
-            continue
-        
-        # If we are here, both IDs matched.
-        # The last match in the list takes precedence.
-        current_overrides = dict(rule)
-        current_overrides.pop("building_id", None)
-        current_overrides.pop("shading_type_key", None)
-        best_rule_content = current_overrides
-
-    if best_rule_content is None:
+    # Both fields must match (a rule without one only matches an empty value)
+    matches = rule_index_for(
+        all_rules,
+        ("building_id", "shading_type_key"),
+        wildcard=None,
+        normalize={"building_id": _lower_str, "shading_type_key": _lower_str},
+        missing_value="",
+    ).match(building_id=building_id, shading_type_key=shading_type_key)
+    if not matches:
         return fallback
 
+    # The last match in the list takes precedence.
+    best_rule_content = dict(matches[-1])
+    best_rule_content.pop("building_id", None)
+    best_rule_content.pop("shading_type_key", None)
     return best_rule_content
\ No newline at end of file
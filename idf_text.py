@@ -0,0 +1,520 @@
+"""
+idf_text.py
+
+Lightweight IDF builder for bulk generation.
+
+TextIDF is a drop-in for the geomeppy/eppy IDF object as the idf_objects/*
+builders use it (newidfobject, getobject, idfobjects[...], removeidfobject,
+save, surface.setcoords, set_wwr). Objects are plain records: a list
+[KEY, field1, field2, ...] like eppy's `obj`, with field positions resolved
+from the IDD once per class. Objects are indexed by (class, upper-case name),
+so getobject and duplicate checks are dict lookups instead of scans, and the
+model serializes straight to IDF text in eppy's layout (class order of the
+IDD, one field per line with its field-name comment).
+
+Selected with idf_creation.idf_backend = "text". compare_idf_files() diffs
+two IDFs object by object (numbers compared numerically, vertex lists up to
+their starting vertex) to check the output against the geomeppy path.
+"""
+
+import os
+import re
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_IDD_CACHE: Dict[str, "IDDSchema"] = {}
+
+_CLASS_LINE = re.compile(r'^([A-Za-z][A-Za-z0-9:_\- ]*)\s*[,;]\s*(?:!.*)?$')
+_FIELD_LINE = re.compile(r'^\s*([AN])(\d+)\s*([,;])\s*(?:\\field\s+(.*?))?\s*$')
+
+
+def eppy_field_name(idd_name: str) -> str:
+    """Attribute name eppy derives from an IDD field name ('Vertex 1 X-coordinate' -> 'Vertex_1_Xcoordinate')"""
+    legal = "".join(c for c in idd_name if c.isascii() and (c.isalnum() or c == " "))
+    return legal.replace(" ", "_")
+
+
+def _convert_numeric(value: Any) -> Any:
+    """eppy keeps numeric fields as int/float; anything else (autosize, ...) as text"""
+    if not isinstance(value, str) or not value:
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class IDDClass:
+    """Field layout of one IDD class"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.fields: List[str] = []          # eppy attribute names
+        self.numeric: List[bool] = []
+        self.defaults: List[Any] = []
+        self.ext_start: Optional[int] = None  # first field of the repeating group
+        self.ext_size = 0
+        self.index: Dict[str, int] = {}
+        self._ext_patterns: List[Tuple[re.Pattern, int]] = []
+
+    def finalize(self):
+        self.index = {name: i for i, name in enumerate(self.fields)}
+        if self.ext_size and self.ext_start is None:
+            self.ext_start = max(len(self.fields) - self.ext_size, 0)
+        if self.ext_size:
+            group = self.fields[self.ext_start:self.ext_start + self.ext_size]
+            for offset, name in enumerate(group):
+                if re.search(r'\d+', name):
+                    pattern = re.compile("^" + re.sub(r'\\?\d+', r'(\\d+)', re.escape(name), count=1) + "$")
+                    self._ext_patterns.append((pattern, offset))
+
+    def field_index(self, attr: str) -> Optional[int]:
+        idx = self.index.get(attr)
+        if idx is not None or not self._ext_patterns:
+            return idx
+        for pattern, offset in self._ext_patterns:
+            match = pattern.match(attr)
+            if match:
+                return self.ext_start + (int(match.group(1)) - 1) * self.ext_size + offset
+        return None
+
+    def field_name(self, idx: int) -> str:
+        if idx < len(self.fields):
+            return self.fields[idx]
+        if self.ext_size:
+            rel = idx - self.ext_start
+            base = self.fields[self.ext_start + rel % self.ext_size]
+            return re.sub(r'\d+', str(rel // self.ext_size + 1), base, count=1)
+        return f"Field_{idx + 1}"
+
+    def is_numeric(self, idx: int) -> bool:
+        if idx < len(self.numeric):
+            return self.numeric[idx]
+        if self.ext_size:
+            return self.numeric[self.ext_start + (idx - self.ext_start) % self.ext_size]
+        return False
+
+
+class IDDSchema:
+    """Classes of an Energy+.idd in file order"""
+
+    def __init__(self, classes: Dict[str, IDDClass]):
+        self.classes = classes
+        self.order = {key: i for i, key in enumerate(classes)}
+
+    @classmethod
+    def load(cls, iddfile: str) -> "IDDSchema":
+        """Parse (and cache per process) an IDD file"""
+        path = os.path.abspath(iddfile)
+        if path not in _IDD_CACHE:
+            _IDD_CACHE[path] = cls._parse(path)
+        return _IDD_CACHE[path]
+
+    @classmethod
+    def _parse(cls, path: str) -> "IDDSchema":
+        classes: Dict[str, IDDClass] = {}
+        current: Optional[IDDClass] = None
+        with open(path, "r", errors="replace") as f:
+            for raw in f:
+                line = raw.rstrip()
+                stripped = line.strip()
+                if not stripped or stripped.startswith("!"):
+                    continue
+                if not line[0].isspace() and not stripped.startswith("\\"):
+                    match = _CLASS_LINE.match(stripped)
+                    if match:
+                        if current is not None:
+                            current.finalize()
+                        current = IDDClass(match.group(1).strip())
+                        classes[current.name.upper()] = current
+                    continue
+                if current is None:
+                    continue
+                match = _FIELD_LINE.match(line)
+                if match:
+                    kind, _, _, name = match.groups()
+                    current.fields.append(eppy_field_name(name or f"{kind}{match.group(2)}"))
+                    current.numeric.append(kind == "N")
+                    current.defaults.append("")
+                    continue
+                if stripped.startswith("\\default") and current.fields:
+                    value = stripped[len("\\default"):].strip()
+                    current.defaults[-1] = _convert_numeric(value) if current.numeric[-1] else value
+                elif stripped.startswith("\\extensible:"):
+                    size = re.match(r'\\extensible:(\d+)', stripped)
+                    current.ext_size = int(size.group(1)) if size else 0
+                elif stripped.startswith("\\begin-extensible") and current.fields:
+                    current.ext_start = len(current.fields) - 1
+        if current is not None:
+            current.finalize()
+        return cls(classes)
+
+    def get(self, key: str) -> IDDClass:
+        idd_class = self.classes.get(key.upper())
+        if idd_class is None:
+            # Unknown to the IDD: keep the object, fields become Field_1, Field_2, ...
+            idd_class = IDDClass(key.upper())
+            idd_class.finalize()
+            self.classes[key.upper()] = idd_class
+            self.order[key.upper()] = len(self.order)
+        return idd_class
+
+
+class IDFRecord:
+    """
+    One IDF object. `obj` is [KEY, field values...] as in eppy; fields are
+    read and written as attributes (Name, Zone_Name, Vertex_1_Xcoordinate, ...).
+    """
+
+    __slots__ = ("obj", "idd_class", "idf")
+
+    def __init__(self, obj: List[Any], idd_class: IDDClass, idf: Optional["TextIDF"] = None):
+        object.__setattr__(self, "obj", obj)
+        object.__setattr__(self, "idd_class", idd_class)
+        object.__setattr__(self, "idf", idf)
+
+    @property
+    def key(self) -> str:
+        return self.obj[0]
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return ["key"] + [self.idd_class.field_name(i) for i in range(len(self.obj) - 1)]
+
+    @property
+    def fieldvalues(self) -> List[Any]:
+        return self.obj
+
+    def __getattr__(self, attr: str) -> Any:
+        idx = self.idd_class.field_index(attr)
+        if idx is None:
+            raise AttributeError(f"{self.obj[0]} has no field '{attr}'")
+        return self.obj[idx + 1] if idx + 1 < len(self.obj) else ""
+
+    def __setattr__(self, attr: str, value: Any):
+        if attr in IDFRecord.__slots__:
+            object.__setattr__(self, attr, value)
+            return
+        idx = self.idd_class.field_index(attr)
+        if idx is None:
+            raise AttributeError(f"{self.obj[0]} has no field '{attr}'")
+        if idx + 1 >= len(self.obj):
+            self.obj.extend([""] * (idx + 2 - len(self.obj)))
+        old = self.obj[idx + 1]
+        self.obj[idx + 1] = value
+        if attr == "Name" and self.idf is not None:
+            self.idf._rename(self, old)
+
+    def __getitem__(self, attr: str) -> Any:
+        return getattr(self, attr)
+
+    def __setitem__(self, attr: str, value: Any):
+        setattr(self, attr, value)
+
+    # --- geometry (geomeppy surface API) ---
+    def setcoords(self, coords: Iterable[Tuple[float, float, float]], ggr: Any = None):
+        """Replace the vertex fields. Consecutive duplicate vertices are dropped."""
+        coords = [tuple(float(c) for c in point) for point in coords]
+        coords = [c for i, c in enumerate(coords) if c != coords[(i + 1) % len(coords)]]
+        first_x = self.idd_class.field_index("Number_of_Vertices") + 2
+        del self.obj[first_x:]
+        self.obj.extend(c for point in coords for c in point)
+
+    @property
+    def coords(self) -> List[Tuple[float, float, float]]:
+        first_x = self.idd_class.field_index("Number_of_Vertices") + 2
+        values = [float(v) for v in self.obj[first_x:] if v != ""]
+        return [tuple(values[i:i + 3]) for i in range(0, len(values) - 2, 3)]
+
+    @property
+    def area(self) -> float:
+        """Polygon area (Newell's method)"""
+        pts = self.coords
+        nx = ny = nz = 0.0
+        for (x1, y1, z1), (x2, y2, z2) in zip(pts, pts[1:] + pts[:1]):
+            nx += (y1 - y2) * (z1 + z2)
+            ny += (z1 - z2) * (x1 + x2)
+            nz += (x1 - x2) * (y1 + y2)
+        return 0.5 * math.sqrt(nx * nx + ny * ny + nz * nz)
+
+    def __repr__(self) -> str:
+        """IDF snippet in eppy's layout"""
+        values = [str(v) for v in self.obj]
+        comments = [name.replace("_", " ") for name in self.fieldnames]
+        lines = [f"{values[0]},"]
+        for i, value in enumerate(values[1:], start=1):
+            end = ";" if i == len(values) - 1 else ","
+            lines.append(f"{('    ' + value + end).ljust(26)}    !- {comments[i]}")
+        if len(values) == 1:
+            lines[0] = f"{values[0]};"
+        return "\n" + "\n".join(lines) + "\n"
+
+
+class _ObjectList(list):
+    """Objects of one class; keeps the TextIDF name index in sync on removal"""
+
+    def __init__(self, idf: "TextIDF"):
+        super().__init__()
+        self._idf = idf
+
+    def append(self, record: IDFRecord):
+        super().append(record)
+        self._idf._attach(record)
+
+    def remove(self, record: IDFRecord):
+        super().remove(record)
+        self._idf._detach(record)
+
+    def pop(self, i: int = -1) -> IDFRecord:
+        record = super().pop(i)
+        self._idf._detach(record)
+        return record
+
+    def clear(self):
+        removed = list(self)
+        super().clear()
+        for record in removed:
+            self._idf._detach(record)
+
+    def __delitem__(self, i):
+        removed = self[i] if isinstance(i, slice) else [self[i]]
+        super().__delitem__(i)
+        for record in removed:
+            self._idf._detach(record)
+
+
+class _ObjectStore(dict):
+    """idfobjects: class name (any case) -> list of records"""
+
+    def __init__(self, idf: "TextIDF"):
+        super().__init__()
+        self._idf = idf
+
+    def __getitem__(self, key: str) -> _ObjectList:
+        key = key.upper()
+        if not dict.__contains__(self, key):
+            dict.__setitem__(self, key, _ObjectList(self._idf))
+        return dict.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if dict.__contains__(self, key.upper()) or key.upper() in self._idf.schema.classes:
+            return self[key]
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and dict.__contains__(self, key.upper())
+
+
+class TextIDF:
+    """
+    IDF model of plain records, serialized straight to IDF text.
+
+    Args:
+        idf_path: Base IDF to start from (e.g. EnergyPlus/Minimal.idf)
+        iddfile: Energy+.idd (parsed once per process)
+        epw: Weather file, kept for API compatibility
+    """
+
+    def __init__(self, idf_path: Optional[str] = None, iddfile: str = "EnergyPlus/Energy+.idd",
+                 epw: Optional[str] = None):
+        self.schema = IDDSchema.load(iddfile)
+        self.idfname = idf_path
+        self.epw = epw
+        self.idfobjects = _ObjectStore(self)
+        self._names: Dict[Tuple[str, str], IDFRecord] = {}
+        if idf_path:
+            with open(idf_path, "r", errors="replace") as f:
+                self._read(f.read())
+
+    # --- index maintenance ---
+    @staticmethod
+    def _name_of(record: IDFRecord) -> Optional[str]:
+        idx = record.idd_class.index.get("Name")
+        if idx is None or idx + 1 >= len(record.obj) or record.obj[idx + 1] in ("", None):
+            return None
+        return str(record.obj[idx + 1]).upper()
+
+    def _attach(self, record: IDFRecord):
+        record.idf = self
+        name = self._name_of(record)
+        if name is not None:
+            self._names.setdefault((record.obj[0].upper(), name), record)
+
+    def _detach(self, record: IDFRecord):
+        record.idf = None
+        name = self._name_of(record)
+        key = (record.obj[0].upper(), name)
+        if name is not None and self._names.get(key) is record:
+            del self._names[key]
+            # another object of the same name takes over (getobject returns the first)
+            for other in dict.get(self.idfobjects, key[0], []):
+                if self._name_of(other) == name:
+                    self._names[key] = other
+                    break
+
+    def _rename(self, record: IDFRecord, old_name: Any):
+        if old_name not in ("", None):
+            old_key = (record.obj[0].upper(), str(old_name).upper())
+            if self._names.get(old_key) is record:
+                del self._names[old_key]
+        self._attach(record)
+
+    # --- reading ---
+    def _read(self, text: str):
+        body = "\n".join(line.split("!", 1)[0] for line in text.splitlines())
+        for chunk in body.split(";"):
+            tokens = [t.strip() for t in chunk.split(",")]
+            if not tokens or not tokens[0]:
+                continue
+            idd_class = self.schema.get(tokens[0])
+            values = [_convert_numeric(v) if idd_class.is_numeric(i) else v
+                      for i, v in enumerate(tokens[1:])]
+            self.idfobjects[tokens[0]].append(IDFRecord([tokens[0].upper()] + values, idd_class))
+
+    # --- eppy API ---
+    def newidfobject(self, key: str, **kwargs) -> IDFRecord:
+        idd_class = self.schema.get(key)
+        obj = [key.upper()] + list(idd_class.defaults)
+        while len(obj) > 1 and obj[-1] == "":
+            obj.pop()
+        record = IDFRecord(obj, idd_class)
+        self.idfobjects[key].append(record)
+        for attr, value in kwargs.items():
+            setattr(record, attr, value)
+        return record
+
+    def getobject(self, key: str, name: str) -> Optional[IDFRecord]:
+        return self._names.get((key.upper(), str(name).upper()))
+
+    def removeidfobject(self, record: IDFRecord):
+        self.idfobjects[record.obj[0]].remove(record)
+
+    def copyidfobject(self, record: IDFRecord) -> IDFRecord:
+        copy = IDFRecord(list(record.obj), self.schema.get(record.obj[0]))
+        self.idfobjects[record.obj[0]].append(copy)
+        return copy
+
+    def idfstr(self) -> str:
+        keys = sorted((k for k, objs in dict.items(self.idfobjects) if objs),
+                      key=lambda k: self.schema.order.get(k, len(self.schema.order)))
+        return "".join(repr(record) for key in keys for record in dict.__getitem__(self.idfobjects, key))
+
+    def save(self, filename: Optional[str] = None, encoding: str = "latin-1"):
+        filename = filename or self.idfname
+        with open(filename, "w", encoding=encoding, errors="replace") as f:
+            f.write("!- Linux Line endings \n")
+            f.write(self.idfstr())
+        self.idfname = filename
+
+    def saveas(self, filename: str, encoding: str = "latin-1"):
+        self.save(filename, encoding)
+
+    # --- geomeppy recipes used by the builders ---
+    def set_wwr(self, wwr: float = 0.2, construction: Optional[str] = None):
+        """
+        One window per exterior wall: the wall polygon scaled by sqrt(wwr)
+        about its centroid (geomeppy's set_wwr without orientation maps).
+        """
+        walls = [s for s in self.idfobjects["BUILDINGSURFACE:DETAILED"]
+                 if str(s.Surface_Type).lower() == "wall"
+                 and str(s.Outside_Boundary_Condition).lower() == "outdoors"]
+        subsurfaces = self.idfobjects["FENESTRATIONSURFACE:DETAILED"]
+        scale = wwr ** 0.5
+        for wall in walls:
+            for sub in [s for s in subsurfaces if s.Building_Surface_Name == wall.Name]:
+                self.removeidfobject(sub)
+            if not wwr:
+                continue
+            pts = wall.coords
+            centroid = tuple(sum(p[k] for p in pts) / len(pts) for k in range(3))
+            window = self.newidfobject(
+                "FENESTRATIONSURFACE:DETAILED",
+                Name=f"{wall.Name} window",
+                Surface_Type="Window",
+                Construction_Name=construction or "",
+                Building_Surface_Name=wall.Name,
+                View_Factor_to_Ground="autocalculate",
+            )
+            window.setcoords([tuple(c + (p[k] - c) * scale for k, c in enumerate(centroid)) for p in pts])
+
+
+# -----------------------------------------------------------------------------
+# Validation against the geomeppy path
+# -----------------------------------------------------------------------------
+def _normalize_value(value: Any) -> Any:
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        return text.lower()
+
+
+def _values_equal(a: Any, b: Any, rel_tol: float) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=rel_tol, abs_tol=rel_tol)
+    return a == b
+
+
+def _object_signature(record: IDFRecord) -> Tuple[str, List[Any], List[Any]]:
+    """(class, leading fields, vertex list) with trailing blanks removed"""
+    values = [_normalize_value(v) for v in record.obj[1:]]
+    while values and values[-1] == "":
+        values.pop()
+    nv = record.idd_class.field_index("Number_of_Vertices")
+    if nv is None:
+        return record.obj[0].upper(), values, []
+    head = values[:nv]  # Number_of_Vertices itself may be autocalculate or a count
+    flat = values[nv + 1:]
+    vertices = [tuple(flat[i:i + 3]) for i in range(0, len(flat) - 2, 3)]
+    return record.obj[0].upper(), head, vertices
+
+
+def _vertices_equal(a: List[Tuple], b: List[Tuple], rel_tol: float) -> bool:
+    """Same polygon, possibly with another starting vertex"""
+    if len(a) != len(b):
+        return False
+    for shift in range(len(b) or 1):
+        rotated = b[shift:] + b[:shift]
+        if all(_values_equal(x, y, rel_tol) for pa, pb in zip(a, rotated) for x, y in zip(pa, pb)):
+            return True
+    return False
+
+
+def compare_idf_files(path_a: str, path_b: str, iddfile: str = "EnergyPlus/Energy+.idd",
+                      rel_tol: float = 1e-9) -> List[str]:
+    """
+    Object-by-object differences between two IDF files (empty list = equivalent).
+    Objects are matched by class and name (by position for unnamed objects).
+    """
+    idf_a, idf_b = TextIDF(path_a, iddfile), TextIDF(path_b, iddfile)
+    differences = []
+    keys = set(dict.keys(idf_a.idfobjects)) | set(dict.keys(idf_b.idfobjects))
+    for key in sorted(keys):
+        objs_a = list(dict.get(idf_a.idfobjects, key, []))
+        objs_b = list(dict.get(idf_b.idfobjects, key, []))
+        if len(objs_a) != len(objs_b):
+            differences.append(f"{key}: {len(objs_a)} vs {len(objs_b)} objects")
+        named_b = {TextIDF._name_of(o): o for o in objs_b}
+        for i, obj_a in enumerate(objs_a):
+            name = TextIDF._name_of(obj_a)
+            obj_b = named_b.get(name) if name is not None else (objs_b[i] if i < len(objs_b) else None)
+            label = f"{key} '{name}'" if name is not None else f"{key} #{i}"
+            if obj_b is None:
+                differences.append(f"{label}: only in {path_a}")
+                continue
+            _, head_a, vert_a = _object_signature(obj_a)
+            _, head_b, vert_b = _object_signature(obj_b)
+            if len(head_a) != len(head_b) or not all(_values_equal(x, y, rel_tol) for x, y in zip(head_a, head_b)):
+                differences.append(f"{label}: fields differ {head_a} vs {head_b}")
+            elif not _vertices_equal(vert_a, vert_b, rel_tol):
+                differences.append(f"{label}: vertices differ")
+        names_a = {TextIDF._name_of(o) for o in objs_a}
+        for obj_b in objs_b:
+            name = TextIDF._name_of(obj_b)
+            if name is not None and name not in names_a:
+                differences.append(f"{key} '{name}': only in {path_b}")
+    return differences
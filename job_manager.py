@@ -7,42 +7,84 @@ QUEUED, RUNNING, FINISHED, ERROR, or CANCELED.
 
 Features:
   - Unique job_id generation
-  - Concurrency limit (max simultaneous running jobs)
-  - Job queue (if concurrency limit is reached)
-  - In-memory log queue for real-time streaming
+  - Each job runs orchestrate_workflow in its own subprocess
+    (no shared GIL between jobs, a crashed job cannot take down the service)
+  - Resource-aware admission: a global pool of CPU slots and a memory budget
+    (see resource_slots.py). Jobs are admitted from a priority queue when their
+    declared num_workers and memory fit.
+  - Idle slots are lent to running jobs' simulation pools while nothing is queued
+  - In-memory log queue for real-time streaming (forwarded from the subprocess)
   - Support for cancellation
-  - Placeholders for persistence (if needed in future)
+  - Durable job records in SQLite (job_store.py). On startup, recover_jobs()
+    re-queues jobs that were QUEUED or RUNNING when the service stopped; they
+    resume from their last completed stage (orchestrator/checkpoints.py).
+
+Configuration (environment):
+  - EP_TOTAL_CPU_SLOTS       total CPU slots shared by all jobs (default: cpu_count)
+  - EP_MEMORY_BUDGET_MB      memory budget shared by all jobs (default: 80% of RAM)
+  - EP_MEMORY_PER_WORKER_MB  memory estimate per simulation worker (default: 1024)
+
+Per-job resources are read from the job config:
+  - posted_data["job_resources"] = {"num_workers": int, "memory_mb": int, "priority": int}
+  - otherwise num_workers is the largest num_workers found in
+    idf_creation.simulate_config and modification.post_modification.simulation_config
 
 CAVEATS:
-  - If the Python process exits, in-memory jobs are lost.
-  - For production usage, consider a persistent store (Redis, DB).
+  - Logs and results are kept in memory only; a recovered job's log stream
+    starts with the resumed run.
+  - The store is a local SQLite file, so it is meant for a single service
+    instance (not several gunicorn workers on different hosts).
 """
 
 import uuid
 import queue
+import heapq
+import itertools
+import logging
+import multiprocessing
 import threading
 import time
 import enum
 import traceback
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from orchestrator import WorkflowCanceled
+from resource_slots import SlotPool, DEFAULT_MEMORY_PER_WORKER_MB, attach_pool
+from job_store import get_job_store
+
+logger = logging.getLogger(__name__)
 
 
 ###############################################################################
-# Global Job Store and Concurrency
+# Global Job Store and Scheduler State
 ###############################################################################
 
-# You can store up to X jobs as RUNNING at once. Others will wait in a queue.
-MAX_RUNNING_JOBS = 2
+# Jobs run as spawned subprocesses (never forked from the threaded Flask process).
+_mp_context = multiprocessing.get_context("spawn")
+
+# Shared CPU-slot / memory accounting, also handed to every job subprocess.
+_slot_pool = SlotPool(ctx=_mp_context)
 
-# The global store for jobs and a global queue for waiting jobs.
+# The global store for jobs and a priority heap of waiting jobs:
+# entries are (-priority, sequence, job_id) so higher priority and then FIFO wins.
 _jobs: Dict[str, Dict] = {}
-_waiting_jobs: queue.Queue = queue.Queue()  # For jobs awaiting execution if concurrency is at max.
+_waiting_heap: list = []
+_waiting_seq = itertools.count()
 
-# A global lock to protect shared state, e.g., reading/writing _jobs, counting running jobs, etc.
+# Reservations of running jobs: job_id -> (slots, memory_mb)
+_reservations: Dict[str, Tuple[int, int]] = {}
+
+# SlotPool ledger entry each running job's loans are recorded under: job_id -> entry
+_loan_ledgers: Dict[str, int] = {}
+
+# A global lock to protect shared state, e.g., reading/writing _jobs, the heap, reservations.
 _jobs_lock = threading.Lock()
 
+# Wakes the scheduler thread; it also polls so slots returned by borrowers are noticed.
+_schedule_event = threading.Event()
+SCHEDULER_POLL_SECONDS = 2.0
+_scheduler_thread: Optional[threading.Thread] = None
+
 ###############################################################################
 # Enum: JobStatus
 ###############################################################################
@@ -63,9 +105,12 @@ class JobStatus(str, enum.Enum):
 #       "status": JobStatus,
 #       "config": dict,             # includes "job_id" and other user config
 #       "logs": queue.Queue,        # For log streaming
-#       "thread": threading.Thread or None,
+#       "process": multiprocessing.Process or None,
+#       "monitor": threading.Thread or None,  # forwards subprocess messages
 #       "result": Any,              # Store final result or summary
-#       "cancel_event": threading.Event # Signals that we want to cancel
+#       "cancel_event": multiprocessing.Event # Signals that we want to cancel
+#       "priority": int,            # Higher runs first
+#       "resources": {"num_workers": int, "memory_mb": int}
 #   }
 
 
@@ -76,7 +121,7 @@ class JobStatus(str, enum.Enum):
 def create_job(config: dict) -> str:
     """
     Create a new job, store it in _jobs, return its job_id.
-    
+
     :param config: Dictionary of user-supplied config for the job
     :return: job_id (string)
     """
@@ -89,17 +134,66 @@ def create_job(config: dict) -> str:
             "status": JobStatus.CREATED,
             "config": config,
             "logs": queue.Queue(),
-            "thread": None,
+            "process": None,
+            "monitor": None,
             "result": None,
-            "cancel_event": threading.Event(),
+            "cancel_event": _mp_context.Event(),
+            "priority": 0,
+            "resources": None,
         }
+        _persist_job(job_id)
     return job_id
 
 
-def enqueue_job(job_id: str) -> None:
+def update_job_config(job_id: str, config: dict) -> bool:
     """
-    Place a job into the waiting queue if concurrency is at max, or run it immediately if not.
+    Replace the config of a job that has not been enqueued yet (and persist it).
+
+    :return: True if the config was updated
     """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job or job["status"] != JobStatus.CREATED:
+            return False
+        config["job_id"] = job_id
+        job["config"] = config
+        _persist_job(job_id)
+    return True
+
+
+def reset_job(job_id: str, config: dict) -> bool:
+    """
+    Put a FINISHED, ERROR or CANCELED job back into CREATED with a new config,
+    keeping its job_id (and therefore its output folder and stage checkpoints).
+
+    :return: True if the job was reset
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job or job["status"] not in (JobStatus.FINISHED, JobStatus.ERROR, JobStatus.CANCELED):
+            return False
+        config["job_id"] = job_id
+        job.update({
+            "status": JobStatus.CREATED,
+            "config": config,
+            "logs": queue.Queue(),
+            "process": None,
+            "monitor": None,
+            "result": None,
+            "cancel_event": _mp_context.Event(),
+        })
+        _persist_job(job_id)
+    return True
+
+
+def enqueue_job(job_id: str, priority: Optional[int] = None) -> None:
+    """
+    Place a job into the priority queue; the scheduler starts it as soon as
+    enough CPU slots and memory are free.
+
+    :param priority: Higher values are admitted first (default: job_resources.priority or 0)
+    """
+    _ensure_scheduler()
     with _jobs_lock:
         job = _jobs.get(job_id)
         if not job:
@@ -108,15 +202,16 @@ def enqueue_job(job_id: str) -> None:
         if job["status"] != JobStatus.CREATED:
             return
 
-        # Count how many are running
-        running_count = sum(1 for j in _jobs.values() if j["status"] == JobStatus.RUNNING)
-        if running_count < MAX_RUNNING_JOBS:
-            # We can start this job immediately
-            _start_job(job_id)
-        else:
-            # We have to queue it
-            job["status"] = JobStatus.QUEUED
-            _waiting_jobs.put(job_id)
+        resources = _declared_resources(job["config"])
+        job["resources"] = resources
+        if priority is None:
+            priority = resources["priority"]
+        job["priority"] = int(priority)
+
+        job["status"] = JobStatus.QUEUED
+        _persist_job(job_id)
+        heapq.heappush(_waiting_heap, (-job["priority"], next(_waiting_seq), job_id))
+        _schedule_locked()
 
 
 def get_job(job_id: str) -> Optional[Dict]:
@@ -143,11 +238,22 @@ def get_job_logs_queue(job_id: str) -> Optional[queue.Queue]:
     return None
 
 
+def get_scheduler_status() -> Dict[str, Any]:
+    """Return slot/memory usage, running reservations and the queue order."""
+    with _jobs_lock:
+        return {
+            "pool": _slot_pool.snapshot(),
+            "running": {j: {"slots": s, "memory_mb": m} for j, (s, m) in _reservations.items()},
+            "queued": [j for _, _, j in sorted(_waiting_heap)
+                       if _jobs.get(j, {}).get("status") == JobStatus.QUEUED],
+        }
+
+
 def cancel_job(job_id: str) -> bool:
     """
     Signal that a job should be canceled (if RUNNING or QUEUED).
-    This sets the 'cancel_event' so the job's thread can check and stop if possible.
-    
+    This sets the 'cancel_event' so the job's subprocess can check and stop if possible.
+
     :return: True if job was canceled or is in the process of being canceled, False if not found.
     """
     with _jobs_lock:
@@ -159,21 +265,22 @@ def cancel_job(job_id: str) -> bool:
         if status in [JobStatus.FINISHED, JobStatus.ERROR, JobStatus.CANCELED]:
             return False  # It's already done or canceled
 
-        # Signal the thread to stop
+        # Signal the subprocess to stop
         job["cancel_event"].set()
 
         if status == JobStatus.QUEUED:
-            # If queued, remove it from the queue
-            # We'll need to rebuild the queue without that job_id
-            _remove_queued_job(job_id)
+            # Stale heap entries are skipped by the scheduler
             job["status"] = JobStatus.CANCELED
+            job["logs"].put(None)
+            _persist_status(job_id, JobStatus.CANCELED)
         elif status == JobStatus.RUNNING:
-            # The thread should eventually notice the cancel_event
+            # The subprocess should eventually notice the cancel_event
             pass
         else:
             # If CREATED and not yet enqueued, we'll just mark it canceled
             if status == JobStatus.CREATED:
                 job["status"] = JobStatus.CANCELED
+                _persist_status(job_id, JobStatus.CANCELED)
 
         return True
 
@@ -194,85 +301,274 @@ def get_job_result(job_id: str) -> Any:
     return None
 
 
+def recover_jobs() -> int:
+    """
+    Reload jobs from the durable store after a restart.
+
+    Jobs that were QUEUED or RUNNING are queued again (keeping their priority)
+    and resume from their last completed stage. Other jobs are restored for
+    status lookups only.
+
+    :return: Number of jobs re-queued
+    """
+    try:
+        records = get_job_store().list_jobs()
+    except Exception as e:
+        logger.error(f"[ERROR] Could not read job store, no jobs recovered: {e}")
+        return 0
+
+    to_requeue = []
+    with _jobs_lock:
+        for record in records:
+            job_id = record["job_id"]
+            if job_id in _jobs:
+                continue
+            try:
+                status = JobStatus(record["status"])
+            except ValueError:
+                status = JobStatus.ERROR
+            resume = status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+            logs = queue.Queue()
+            if not resume and status != JobStatus.CREATED:
+                logs.put(None)  # nothing more will be streamed
+
+            _jobs[job_id] = {
+                "status": JobStatus.CREATED if resume else status,
+                "config": record["config"],
+                "logs": logs,
+                "process": None,
+                "monitor": None,
+                "result": None,
+                "cancel_event": _mp_context.Event(),
+                "priority": record["priority"],
+                "resources": None,
+            }
+            if resume:
+                to_requeue.append((job_id, record["priority"], record["attempts"]))
+
+    for job_id, priority, attempts in to_requeue:
+        logger.info(f"[INFO] Recovering job {job_id} (previous attempts: {attempts})")
+        enqueue_job(job_id, priority=priority)
+    return len(to_requeue)
+
+
 ###############################################################################
-# Internal Worker Helpers
+# Internal Scheduler Helpers
 ###############################################################################
 
+def _persist_job(job_id: str) -> None:
+    """Write the job record (status, priority, config) to the store. Caller must hold _jobs_lock."""
+    job = _jobs[job_id]
+    try:
+        get_job_store().save_job(job_id, job["status"].value, job["config"], job["priority"])
+    except Exception as e:
+        logger.warning(f"[WARN] Could not persist job {job_id}: {e}")
+
+
+def _persist_status(job_id: str, status: JobStatus, increment_attempts: bool = False) -> None:
+    try:
+        get_job_store().update_status(job_id, status.value, increment_attempts=increment_attempts)
+    except Exception as e:
+        logger.warning(f"[WARN] Could not persist status of job {job_id}: {e}")
+
+
+def _declared_resources(config: dict) -> Dict[str, int]:
+    """
+    Work out the slots, memory and priority a job asks for.
+
+    Explicit posted_data["job_resources"] wins; otherwise num_workers is taken
+    from the simulation configs the workflow will actually use.
+    """
+    posted = config.get("posted_data") or {}
+    explicit = posted.get("job_resources") or config.get("job_resources") or {}
+
+    num_workers = explicit.get("num_workers")
+    if num_workers is None:
+        main_cfg = posted.get("main_config", {}) or {}
+        candidates = [
+            main_cfg.get("idf_creation", {}).get("simulate_config", {}).get("num_workers"),
+            main_cfg.get("modification", {}).get("post_modification", {})
+                    .get("simulation_config", {}).get("num_workers"),
+        ]
+        candidates = [int(c) for c in candidates if c]
+        num_workers = max(candidates) if candidates else 1
+
+    # A job can never need more than the whole pool
+    num_workers = max(1, min(int(num_workers), _slot_pool.total_slots))
+
+    memory_mb = explicit.get("memory_mb")
+    if memory_mb is None:
+        memory_mb = num_workers * DEFAULT_MEMORY_PER_WORKER_MB
+    memory_mb = max(1, min(int(memory_mb), _slot_pool.memory_budget_mb))
+
+    return {
+        "num_workers": num_workers,
+        "memory_mb": memory_mb,
+        "priority": int(explicit.get("priority", 0)),
+    }
+
+
+def _ensure_scheduler() -> None:
+    """Start the background scheduler thread once."""
+    global _scheduler_thread
+    if _scheduler_thread is None or not _scheduler_thread.is_alive():
+        _scheduler_thread = threading.Thread(target=_scheduler_loop, daemon=True)
+        _scheduler_thread.start()
+
+
+def _scheduler_loop() -> None:
+    while True:
+        _schedule_event.wait(timeout=SCHEDULER_POLL_SECONDS)
+        _schedule_event.clear()
+        with _jobs_lock:
+            _schedule_locked()
+
+
+def _schedule_locked() -> None:
+    """
+    Admit queued jobs in priority order while their reservations fit.
+    Caller must hold _jobs_lock.
+
+    Admission stops at the first job that does not fit, so a large high-priority
+    job is not starved by smaller ones behind it. Lending is only enabled when
+    nothing is waiting.
+    """
+    while _waiting_heap:
+        _, _, job_id = _waiting_heap[0]
+        job = _jobs.get(job_id)
+        if not job or job["status"] != JobStatus.QUEUED:
+            heapq.heappop(_waiting_heap)  # canceled or removed
+            continue
+
+        resources = job["resources"]
+        if not _slot_pool.try_acquire(resources["num_workers"], resources["memory_mb"]):
+            break
+
+        heapq.heappop(_waiting_heap)
+        _reservations[job_id] = (resources["num_workers"], resources["memory_mb"])
+        _start_job(job_id)
+
+    _slot_pool.set_lending(not _waiting_heap)
+
+
 def _start_job(job_id: str) -> None:
     """
-    Transition job to RUNNING and spawn a thread to execute it.
+    Transition job to RUNNING, spawn its subprocess and a monitor thread.
+    Caller must hold _jobs_lock.
     """
     job = _jobs[job_id]
     job["status"] = JobStatus.RUNNING
+    _persist_status(job_id, JobStatus.RUNNING, increment_attempts=True)
 
-    # We'll create a new thread that calls _job_thread_runner(job_id)
-    t = threading.Thread(target=_job_thread_runner, args=(job_id,), daemon=True)
-    job["thread"] = t
-    t.start()
+    # every running job holds at least one slot, so a free entry always exists
+    used = set(_loan_ledgers.values())
+    ledger = next(i for i in range(_slot_pool.total_slots) if i not in used)
+    _loan_ledgers[job_id] = ledger
 
+    messages = _mp_context.Queue()
+    proc = _mp_context.Process(
+        target=_job_process_main,
+        args=(job["config"], job["cancel_event"], messages, _slot_pool, job["resources"]["num_workers"], ledger),
+        name=f"job-{job_id}",
+        daemon=False,  # the job creates its own multiprocessing Pool
+    )
+    job["process"] = proc
+    proc.start()
 
-def _job_thread_runner(job_id: str) -> None:
-    """Worker function that runs in a separate thread for each job."""
+    monitor = threading.Thread(target=_job_monitor, args=(job_id, proc, messages), daemon=True)
+    job["monitor"] = monitor
+    monitor.start()
+
+
+def _job_monitor(job_id: str, proc, messages) -> None:
+    """
+    Forward subprocess logs/status to the job record and, when it exits,
+    release its slots together with any loans it did not return.
+    """
+    job = _jobs[job_id]
+    final_status = None
     try:
-        job = _jobs[job_id]
-        cancel_event = job["cancel_event"]
+        while True:
+            try:
+                kind, payload = messages.get(timeout=1.0)
+            except queue.Empty:
+                if not proc.is_alive():
+                    break
+                continue
+            if kind == "log":
+                job["logs"].put(payload)
+            elif kind == "status":
+                final_status = JobStatus(payload)
+            elif kind == "done":
+                break
+    finally:
+        proc.join()
+        with _jobs_lock:
+            if final_status is None:
+                final_status = JobStatus.ERROR
+                job["logs"].put(f"[Job {job_id}] process exited unexpectedly (exitcode={proc.exitcode})")
+            job["status"] = final_status
+            _persist_status(job_id, final_status)
+            slots, memory_mb = _reservations.pop(job_id, (0, 0))
+            _slot_pool.release(slots, memory_mb)
+            ledger = _loan_ledgers.pop(job_id, None)
+            if ledger is not None:
+                reclaimed = _slot_pool.reclaim_loans(ledger)
+                if reclaimed:
+                    job["logs"].put(f"[Job {job_id}] reclaimed {reclaimed} borrowed slot(s) it did not return")
+        _signal_end_of_logs(job_id)
+        _schedule_event.set()
+
+
+class _QueueLogHandler(logging.Handler):
+    """Logging handler used inside the job subprocess to stream records to the parent."""
+
+    def __init__(self, messages):
+        super().__init__()
+        self.messages = messages
+
+    def emit(self, record):
+        try:
+            self.messages.put(("log", self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
+def _job_process_main(config: dict, cancel_event, messages, slot_pool: SlotPool,
+                      reserved_slots: Optional[int] = None, loan_ledger: Optional[int] = None) -> None:
+    """Entry point of the job subprocess."""
+    job_id = config.get("job_id", "unknown_job_id")
+    attach_pool(slot_pool, reserved_slots, loan_ledger)
+
+    handler = _QueueLogHandler(messages)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    if root_logger.level > logging.INFO or root_logger.level == logging.NOTSET:
+        root_logger.setLevel(logging.INFO)
 
+    try:
         # 1) Import orchestrate_workflow
         from orchestrator import orchestrate_workflow
 
-        # 2) Run the workflow, passing the entire job["config"] which has "job_id"
-        orchestrate_workflow(job["config"], cancel_event=cancel_event)
+        # 2) Run the workflow, passing the entire config which has "job_id"
+        orchestrate_workflow(config, cancel_event=cancel_event)
 
         # If orchestrate_workflow finishes with no exception => FINISHED
-        job["status"] = JobStatus.FINISHED
+        messages.put(("status", JobStatus.FINISHED.value))
 
     except WorkflowCanceled:
-        job["status"] = JobStatus.CANCELED
+        messages.put(("status", JobStatus.CANCELED.value))
     except Exception as e:
-        job["status"] = JobStatus.ERROR
-        err_msg = f"[Job {job_id}] crashed => {e}"
-        job["logs"].put(err_msg)
-        job["logs"].put(traceback.format_exc())
+        messages.put(("log", f"[Job {job_id}] crashed => {e}"))
+        messages.put(("log", traceback.format_exc()))
+        messages.put(("status", JobStatus.ERROR.value))
     finally:
-        _signal_end_of_logs(job_id)
-        _try_start_next_queued_job()
-
-
-def _try_start_next_queued_job():
-    """
-    Check if there's a queued job. If concurrency allows, start it.
-    """
-    with _jobs_lock:
-        running_count = sum(1 for j in _jobs.values() if j["status"] == JobStatus.RUNNING)
-        if running_count >= MAX_RUNNING_JOBS:
-            return  # No slot available
-
-        # Otherwise, pop from waiting queue if any
-        while not _waiting_jobs.empty():
-            next_job_id = _waiting_jobs.get()
-            job = _jobs.get(next_job_id)
-            if not job:
-                continue  # might have been canceled or removed
-
-            if job["status"] == JobStatus.QUEUED:
-                # Start it
-                _start_job(next_job_id)
-                break
-
-
-def _remove_queued_job(job_id: str):
-    """
-    Remove a job from the waiting queue if it's in there by rebuilding the queue 
-    without that job_id.
-    """
-    temp_list = []
-    while not _waiting_jobs.empty():
-        j_id = _waiting_jobs.get()
-        if j_id != job_id:
-            temp_list.append(j_id)
-    # re-queue the others
-    for j_id in temp_list:
-        _waiting_jobs.put(j_id)
+        root_logger.removeHandler(handler)
+        messages.put(("done", None))
+        messages.close()
+        messages.join_thread()
 
 
 def _signal_end_of_logs(job_id: str):
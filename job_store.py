@@ -0,0 +1,204 @@
+"""
+job_store.py
+
+Durable SQLite-backed store for job records and per-stage checkpoints.
+
+Two tables:
+  - jobs:   one row per job (status, priority, config JSON, timestamps)
+  - stages: one row per completed workflow stage of a job
+            (completion time, output fingerprint, input hash, small JSON result payload)
+
+job_manager.py writes job records so queued/running jobs survive a service
+restart (see job_manager.recover_jobs). The orchestrator subprocess writes
+stage rows through orchestrator/checkpoints.py so a resumed job can skip the
+stages that already finished.
+
+Every call opens its own short-lived connection, so the store can be shared
+between the Flask process, its scheduler threads and the job subprocesses.
+
+Location: EP_JOB_STORE_PATH, or <OUTPUT_DIR>/job_store.sqlite.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    config_json TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS stages (
+    job_id       TEXT NOT NULL,
+    stage        TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    fingerprint  TEXT,
+    inputs_hash  TEXT,
+    outputs_json TEXT,
+    result_json  TEXT,
+    PRIMARY KEY (job_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+"""
+
+
+def default_store_path() -> str:
+    env_path = os.environ.get("EP_JOB_STORE_PATH")
+    if env_path:
+        return env_path
+    out_dir = os.environ.get("OUTPUT_DIR", "/usr/src/app/output")
+    return os.path.join(out_dir, "job_store.sqlite")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class JobStore:
+    """Thin wrapper around a SQLite file holding job records and stage checkpoints."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or default_store_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Stores created before inputs_hash existed
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(stages)")}
+            if "inputs_hash" not in columns:
+                conn.execute("ALTER TABLE stages ADD COLUMN inputs_hash TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Jobs
+    # -------------------------------------------------------------------------
+    def save_job(self, job_id: str, status: str, config: dict, priority: int = 0) -> None:
+        """Insert or replace a job record (status, priority and config)."""
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO jobs (job_id, status, priority, config_json, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    status=excluded.status,
+                    priority=excluded.priority,
+                    config_json=excluded.config_json,
+                    updated_at=excluded.updated_at
+                """,
+                (job_id, str(status), int(priority), json.dumps(config, default=str), now, now),
+            )
+
+    def update_status(self, job_id: str, status: str, increment_attempts: bool = False) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status=?, updated_at=?, attempts=attempts+? WHERE job_id=?",
+                (str(status), _now(), 1 if increment_attempts else 0, job_id),
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, statuses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """List jobs (optionally filtered by status), oldest first."""
+        query = "SELECT * FROM jobs"
+        params: tuple = ()
+        if statuses:
+            query += " WHERE status IN (%s)" % ",".join("?" * len(statuses))
+            params = tuple(str(s) for s in statuses)
+        query += " ORDER BY created_at"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._job_row(r) for r in rows]
+
+    @staticmethod
+    def _job_row(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["config"] = json.loads(record.pop("config_json"))
+        return record
+
+    # -------------------------------------------------------------------------
+    # Stage checkpoints
+    # -------------------------------------------------------------------------
+    def mark_stage(self, job_id: str, stage: str, fingerprint: Optional[str],
+                   outputs: Optional[List[str]] = None, result: Any = None,
+                   inputs_hash: Optional[str] = None) -> None:
+        """Record that a stage completed, with its output fingerprint, input hash and result payload."""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO stages
+                    (job_id, stage, completed_at, fingerprint, inputs_hash, outputs_json, result_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, stage, _now(), fingerprint, inputs_hash,
+                 json.dumps(outputs or []), json.dumps(result, default=str)),
+            )
+
+    def get_stage(self, job_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM stages WHERE job_id=? AND stage=?", (job_id, stage)
+            ).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        record["outputs"] = json.loads(record.pop("outputs_json") or "[]")
+        record["result"] = json.loads(record.pop("result_json") or "null")
+        return record
+
+    def list_stages(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT stage, completed_at, fingerprint, inputs_hash FROM stages WHERE job_id=? ORDER BY completed_at",
+                (job_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def clear_stages(self, job_id: str, stages: Optional[List[str]] = None) -> None:
+        """Forget checkpoints of a job (all, or only the given stages)."""
+        with self._connect() as conn:
+            if stages:
+                conn.execute(
+                    "DELETE FROM stages WHERE job_id=? AND stage IN (%s)" % ",".join("?" * len(stages)),
+                    (job_id, *stages),
+                )
+            else:
+                conn.execute("DELETE FROM stages WHERE job_id=?", (job_id,))
+
+
+###############################################################################
+# Per-process singleton
+###############################################################################
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Return this process's JobStore for the default path."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
@@ -0,0 +1,212 @@
+"""
+orchestrator/active_learning_step.py
+
+Active-learning replacement for the up-front modification sampling.
+
+Enabled with modification.active_learning.enabled. A candidate pool is
+sampled from the 'range'/'choice' parameters of categories_to_modify, and
+c_surrogate/active_learning.ActiveLearningLoop decides which candidates go
+through modification -> simulation -> parsing. Variants are written as
+variant_<pool index> into the usual modified_idfs / Modified_Sim_Results /
+parsed_modified_results folders, so the later stages read them as if the
+standard modification step had produced them.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from idf_modification.modification_engine import ModificationEngine
+from idf_modification.scenario_generator import ScenarioGenerator, DesignMatrix
+from c_surrogate.active_learning import ActiveLearningLoop, DEFAULT_ACTIVE_LEARNING_CONFIG
+from c_surrogate.training_store import TrainingStore
+from .modification_step import select_idfs_to_modify
+from .simulation_step import run_simulations_on_modified_idfs
+from .parsing_step import run_parsing_modified_results
+
+
+def extract_variant_targets(job_output_dir: str, sur_cfg: dict, logger: logging.Logger,
+                            variant_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Surrogate targets per (building_id, variant_id) from the parsed modified
+    results, using the surrogate step's extraction and preprocessing config.
+
+    When the preprocessor can read the training store, the targets come from
+    there and the full extraction is skipped. variant_ids limits the result
+    to those variants.
+    """
+    from c_surrogate.surrogate_data_extractor import SurrogateDataExtractor
+    from c_surrogate.surrogate_data_preprocessor import SurrogateDataPreprocessor
+
+    preprocessing_config = {
+        "training_store_dir": job_output_dir,
+        **sur_cfg.get("preprocessing", {}),
+        "use_sensitivity_filter": False,
+        "normalize_features": False,
+    }
+    if "target_variable" in sur_cfg:
+        target_vars = sur_cfg["target_variable"]
+        preprocessing_config["target_variables"] = [target_vars] if isinstance(target_vars, str) else target_vars
+
+    store = TrainingStore(job_output_dir)
+    if (preprocessing_config.get("aggregation_level", "building") != "zone"
+            and store.has("parameters") and store.has("targets")):
+        extracted = {}
+    else:
+        extracted = SurrogateDataExtractor(job_output_dir, sur_cfg.get("data_extraction", {})).extract_all()
+    processed = SurrogateDataPreprocessor(extracted, preprocessing_config).preprocess_all()
+    target_cols = processed["metadata"]["target_columns"]
+    logger.info(f"[INFO] Active learning targets: {target_cols}")
+    targets = processed["targets"][["building_id", "variant_id"] + target_cols]
+    if variant_ids is not None:
+        targets = targets[targets["variant_id"].astype(str).isin(set(variant_ids))]
+    return targets
+
+
+def run_active_learning(
+    modification_cfg: dict,
+    sur_cfg: dict,
+    job_output_dir: str,
+    job_idf_dir: str,
+    idf_cfg: dict,
+    user_config_epw: list,
+    logger: logging.Logger
+) -> Optional[Dict[str, Any]]:
+    """
+    Simulate only the most informative variants of a sampled candidate pool.
+
+    Returns:
+        Dictionary like run_modification's (modified_building_data,
+        modified_idfs_dir) plus the active-learning history, or None if
+        nothing could be set up
+    """
+    logger.info("[STEP] Starting active-learning modification loop ...")
+
+    al_cfg = {**DEFAULT_ACTIVE_LEARNING_CONFIG, **modification_cfg.get("active_learning", {})}
+    categories_to_modify = modification_cfg.get("categories_to_modify", {})
+    post_mod_cfg = modification_cfg.get("post_modification", {})
+
+    # Candidate pool
+    parameter_ranges = ScenarioGenerator.parameter_ranges_from_config(categories_to_modify)
+    if not parameter_ranges:
+        logger.warning("[WARN] Active learning needs 'range' or 'choice' parameters in categories_to_modify")
+        return None
+    generator = ScenarioGenerator(parameter_ranges)
+    generator.set_random_seed(al_cfg["seed"])
+    pool = generator.generate_samples(int(al_cfg["pool_size"]), method=al_cfg["sampling_method"])
+
+    idf_files_to_modify = select_idfs_to_modify(
+        modification_cfg.get("base_idf_selection", {}), job_idf_dir, logger
+    )
+    if not idf_files_to_modify:
+        logger.warning("[WARN] No IDF files found to modify")
+        return None
+
+    mod_engine = ModificationEngine(
+        project_dir=Path(job_output_dir),
+        config={
+            "base_idf_selection": modification_cfg.get("base_idf_selection", {}),
+            "output_options": modification_cfg.get("output_options", {}),
+            "categories": categories_to_modify
+        }
+    )
+    modified_idfs_dir = Path(job_output_dir) / "modified_idfs"
+    modified_idfs_dir.mkdir(exist_ok=True)
+    all_building_data: List[Dict[str, Any]] = []
+    store = TrainingStore(job_output_dir)
+    store.reset("parameters")
+    store.reset("targets")
+
+    def simulate(indices: List[int]) -> pd.DataFrame:
+        """Modify, simulate and parse the given pool rows; return their targets."""
+        batch_design = DesignMatrix(columns=pool.columns, values=pool.values[indices],
+                                    lookups=pool.lookups, method=pool.method)
+        batch_building_data = []
+        batch_modifications = []
+        for pool_index, parameter_values in zip(indices, batch_design.iter_parameter_values(categories_to_modify)):
+            variant_id = f"variant_{pool_index}"
+            for idf_path, building_id in idf_files_to_modify:
+                try:
+                    result = mod_engine.modify_building(
+                        building_id=building_id,
+                        idf_path=idf_path,
+                        parameter_values=parameter_values,
+                        variant_id=variant_id
+                    )
+                except Exception as e:
+                    logger.error(f"[ERROR] Failed to modify building {building_id} ({variant_id}): {e}")
+                    continue
+                if result["success"]:
+                    batch_modifications.extend(result["modifications"])
+                    batch_building_data.append({
+                        "building_id": building_id,
+                        "variant_id": variant_id,
+                        "idf_path": result["output_file"],
+                        "original_building_id": building_id
+                    })
+                else:
+                    logger.error(f"[ERROR] Failed to create variant {variant_id}: {result['errors']}")
+
+        if not batch_building_data:
+            return pd.DataFrame()
+        all_building_data.extend(batch_building_data)
+        store.append_parameters(batch_modifications)
+
+        batch_results = {"modified_building_data": batch_building_data,
+                         "modified_idfs_dir": str(modified_idfs_dir)}
+        if not run_simulations_on_modified_idfs(batch_results, post_mod_cfg, job_output_dir,
+                                                idf_cfg, user_config_epw, logger):
+            logger.warning("[WARN] Active-learning batch simulations failed")
+            return pd.DataFrame()
+
+        # Parse only this batch; its comparisons and targets are added to the earlier rounds'
+        batch_variants = {f"variant_{i}" for i in indices}
+        run_parsing_modified_results(
+            parse_cfg=post_mod_cfg.get("parse_results", {}),
+            job_output_dir=job_output_dir,
+            modified_sim_output=os.path.join(job_output_dir, "Modified_Sim_Results"),
+            modified_idfs_dir=str(modified_idfs_dir),
+            idf_map_csv=os.path.join(job_output_dir, "extracted_idf_buildings.csv"),
+            logger=logger,
+            variant_ids=batch_variants
+        )
+
+        targets = extract_variant_targets(job_output_dir, sur_cfg, logger, variant_ids=batch_variants).copy()
+        targets.insert(0, "pool_index", targets.pop("variant_id").astype(str).str.rsplit("_", n=1).str[-1].astype(int))
+        return targets
+
+    pool_features = pd.DataFrame(pool.values, columns=pool.columns)
+    loop_result = ActiveLearningLoop(pool_features, simulate, al_cfg).run()
+
+    # Save the loop history and the simulated part of the design
+    al_dir = Path(job_output_dir) / "active_learning"
+    al_dir.mkdir(exist_ok=True)
+    loop_result["history"].to_csv(al_dir / "history.csv", index=False)
+    design_df = pool.to_dataframe()
+    design_df.insert(0, "variant_id", [f"variant_{i}" for i in range(len(design_df))])
+    design_df.iloc[loop_result["simulated_indices"]].to_parquet(al_dir / "simulated_design.parquet", index=False)
+    with open(al_dir / "summary.json", "w") as f:
+        json.dump({
+            "stop_reason": loop_result["stop_reason"],
+            "pool_size": len(pool),
+            "n_simulated": len(loop_result["simulated_indices"]),
+            "target_columns": loop_result["target_columns"],
+            "config": al_cfg
+        }, f, indent=2, default=str)
+
+    logger.info(f"[INFO] Active learning finished ({loop_result['stop_reason']}): "
+                f"{len(loop_result['simulated_indices'])} of {len(pool)} candidate variants simulated")
+
+    return {
+        "modified_building_data": all_building_data,
+        "modified_idfs_dir": str(modified_idfs_dir),
+        "active_learning": {
+            "stop_reason": loop_result["stop_reason"],
+            "n_simulated": len(loop_result["simulated_indices"]),
+            "history_path": str(al_dir / "history.csv")
+        }
+    }
@@ -78,6 +78,11 @@ def patch_calibration_paths(cal_cfg: dict, job_output_dir: str) -> None:
         if key in cal_cfg and cal_cfg[key]:
             cal_cfg[key] = patch_if_relative(cal_cfg[key], job_output_dir)
     
+    # Evaluation cache file
+    cache_cfg = cal_cfg.get("evaluation_cache", {})
+    if cache_cfg.get("path"):
+        cache_cfg["path"] = patch_if_relative(cache_cfg["path"], job_output_dir)
+    
     # Handle multiple calibration configurations
     if "calibration_configs" in cal_cfg:
         for config in cal_cfg["calibration_configs"]:
@@ -0,0 +1,297 @@
+"""
+orchestrator/checkpoints.py
+
+Make-style incremental execution for orchestrate_workflow.
+
+Every stage declares its inputs (a hash of the config subsections it reads)
+and, through STAGE_UPSTREAM, the stages whose artifacts it consumes. When a
+stage completes, its output fingerprint and input hash are stored in the
+durable job store (job_store.py). On a later run of the same job (crash
+recovery, or a rerun with an edited config) a stage is skipped when:
+  - it completed before,
+  - its outputs are still on disk and unchanged,
+  - its config subsections are unchanged, and
+  - the artifacts of its upstream stages are the ones it was built from.
+
+Anything else is stale and runs again, which in turn makes the stages that
+consume its outputs stale.
+
+Several stages write into the same directory (parsed_data, validation_results,
+parsed_modified_results). A stage therefore records only the files under its
+declared outputs that it wrote itself (modified since the stage started), so
+another stage rewriting its own files in that directory does not make it stale.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Stage -> stages whose outputs it reads. Stages that are disabled in a run
+# still count through whatever they left on disk.
+STAGE_UPSTREAM: Dict[str, Tuple[str, ...]] = {
+    "idf_creation":            (),
+    "parsing":                 ("idf_creation",),
+    "timeseries_aggregation":  ("parsing",),
+    "validation_parsing":      ("parsing", "timeseries_aggregation"),
+    "iterations":              ("idf_creation", "parsing", "validation_parsing"),
+    "modification":            ("idf_creation", "parsing", "iterations"),
+    "modified_simulation":     ("modification",),
+    "modified_parsing":        ("modified_simulation",),
+    "modified_aggregation":    ("modified_parsing",),
+    "validation_modification": ("modified_parsing", "modified_aggregation"),
+    "validation":              ("parsing", "timeseries_aggregation", "modified_parsing", "modified_aggregation"),
+    "sensitivity":             ("parsing", "timeseries_aggregation", "modification",
+                                "modified_parsing", "modified_aggregation", "validation"),
+    "surrogate":               ("parsing", "modification", "modified_parsing", "sensitivity"),
+    "calibration":             ("parsing", "modified_parsing", "validation", "sensitivity", "surrogate"),
+}
+
+
+def hash_config(config: Any) -> str:
+    """Stable hash of a JSON-like config object (key order does not matter)."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def files_written_since(job_output_dir: str, outputs: Iterable[str], since_ns: int) -> List[str]:
+    """
+    Files under the given outputs (relative to job_output_dir) modified at or
+    after since_ns, as sorted relative paths.
+    """
+    written = []
+    for rel_path in outputs:
+        path = os.path.join(job_output_dir, rel_path)
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = []
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names)
+        for file_path in files:
+            if os.stat(file_path).st_mtime_ns >= since_ns:
+                written.append(os.path.relpath(file_path, job_output_dir))
+    return sorted(set(written))
+
+
+def fingerprint_outputs(job_output_dir: str, outputs: Iterable[str], cutoff_ns: int) -> Optional[str]:
+    """
+    Fingerprint stage outputs from file metadata (relative path, size, mtime).
+
+    Only files last modified before cutoff_ns (the stage's completion time) are
+    included, so files that later stages add to a shared directory do not
+    invalidate the stage, while a rewritten or deleted output does.
+
+    Args:
+        job_output_dir: Job output directory that outputs are relative to
+        outputs: Files or directories produced by the stage
+        cutoff_ns: Completion time of the stage (time.time_ns())
+
+    Returns:
+        Hex digest, or None if any output is missing
+    """
+    digest = hashlib.sha256()
+    for rel_path in sorted(outputs):
+        path = os.path.join(job_output_dir, rel_path)
+        if not os.path.exists(path):
+            return None
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = []
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names)
+        for file_path in sorted(files):
+            stat = os.stat(file_path)
+            if stat.st_mtime_ns > cutoff_ns:
+                continue
+            rel = os.path.relpath(file_path, job_output_dir)
+            digest.update(f"{rel}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+class StageCheckpoints:
+    """
+    Stage checkpoint bookkeeping for a single job.
+
+    Usage:
+        checkpoints.declare_inputs({"parsing": parsing_cfg, ...})
+        checkpoints.log_report(["parsing", ...])
+
+        if checkpoints.is_done("parsing"):
+            ...skip...
+        else:
+            run_parsing(...)
+            checkpoints.mark_done("parsing", outputs=["parsed_data"])
+    """
+
+    def __init__(self, job_id: str, job_output_dir: str, logger: logging.Logger, store=None):
+        self.job_id = job_id
+        self.job_output_dir = job_output_dir
+        self.logger = logger
+        self.store = store
+        self._resumed_stages: List[str] = []
+        self._config_hashes: Dict[str, str] = {}
+        # Stage -> time it was found stale (its run starts then); fallback: this run's start
+        self._run_started_ns = time.time_ns()
+        self._started_ns: Dict[str, int] = {}
+
+        if self.store is None:
+            try:
+                from job_store import get_job_store
+                self.store = get_job_store()
+            except Exception as e:
+                logger.warning(f"[WARN] Job store unavailable, stage checkpoints disabled: {e}")
+
+    def declare_inputs(self, stage_configs: Dict[str, Any]) -> None:
+        """
+        Declare the config each stage depends on.
+
+        Hashes are taken immediately, so later in-place edits of the config
+        dicts during the run do not change a stage's identity.
+
+        Args:
+            stage_configs: Stage name -> config subsection(s) the stage reads
+        """
+        for stage, config in stage_configs.items():
+            self._config_hashes[stage] = hash_config(config)
+
+    # -------------------------------------------------------------------------
+    # Hashing helpers
+    # -------------------------------------------------------------------------
+    def _output_fingerprint(self, record: Dict[str, Any]) -> Optional[str]:
+        """Current fingerprint of a recorded stage's outputs (None if missing)."""
+        cutoff, _, _ = (record["fingerprint"] or "").partition(":")
+        return fingerprint_outputs(self.job_output_dir, record["outputs"], int(cutoff or 0))
+
+    def _upstream_state(self, stage: str) -> Dict[str, Optional[str]]:
+        """Current artifact fingerprint of each upstream stage (None if absent)."""
+        state = {}
+        for upstream in STAGE_UPSTREAM.get(stage, ()):
+            record = self.store.get_stage(self.job_id, upstream)
+            state[upstream] = self._output_fingerprint(record) if record else None
+        return state
+
+    def _inputs_hash(self, stage: str) -> str:
+        """Input hash of a stage as "<config hash>:<upstream artifacts hash>"."""
+        config_hash = self._config_hashes.get(stage) or hash_config(None)
+        return f"{config_hash}:{hash_config(self._upstream_state(stage))}"
+
+    # -------------------------------------------------------------------------
+    # Status
+    # -------------------------------------------------------------------------
+    def stale_reason(self, stage: str) -> Optional[str]:
+        """
+        Why a stage has to run, or None if it is up to date.
+        """
+        if self.store is None:
+            return "checkpoints disabled"
+        record = self.store.get_stage(self.job_id, stage)
+        if not record:
+            return "never completed"
+
+        current = self._output_fingerprint(record)
+        if current is None:
+            return "outputs missing"
+        if current != record["fingerprint"].partition(":")[2]:
+            return "outputs changed"
+
+        stored_config, _, stored_upstream = (record.get("inputs_hash") or "").partition(":")
+        current_config, _, current_upstream = self._inputs_hash(stage).partition(":")
+        if stored_config != current_config:
+            return "config changed"
+        if stored_upstream != current_upstream:
+            return "upstream artifacts changed"
+        return None
+
+    def log_report(self, enabled_stages: List[str]) -> Dict[str, str]:
+        """
+        Log an up-to-date/stale table for the stages enabled in this run.
+
+        A stage whose upstream is stale (and enabled) is reported stale too,
+        since re-running the upstream will change its inputs.
+
+        Returns:
+            Stage name -> "up-to-date" or "stale: <reason>"
+        """
+        report: Dict[str, str] = {}
+        stale = set()
+        for stage in STAGE_UPSTREAM:
+            if stage not in enabled_stages:
+                continue
+            reason = self.stale_reason(stage)
+            if reason is None:
+                stale_upstream = [u for u in STAGE_UPSTREAM[stage] if u in stale]
+                if stale_upstream:
+                    reason = f"upstream '{stale_upstream[0]}' is stale"
+            if reason is None:
+                report[stage] = "up-to-date"
+            else:
+                stale.add(stage)
+                report[stage] = f"stale: {reason}"
+
+        if report:
+            self.logger.info("[CHECKPOINT] Stage status for this run:")
+            for stage, status in report.items():
+                self.logger.info(f"[CHECKPOINT]   {stage:<25} {status}")
+        return report
+
+    def is_done(self, stage: str) -> bool:
+        """
+        True if the stage is up to date and can be skipped. A stale stage's
+        old checkpoint is dropped, so its consumers become stale as well even
+        if the re-run fails.
+        """
+        reason = self.stale_reason(stage)
+        if reason is None:
+            self._resumed_stages.append(stage)
+            self.logger.info(f"[CHECKPOINT] Skipping '{stage}' (up to date)")
+            return True
+
+        if self.store is not None and reason != "never completed":
+            self.logger.info(f"[CHECKPOINT] Re-running '{stage}': {reason}")
+            self.store.clear_stages(self.job_id, [stage])
+        self._started_ns[stage] = time.time_ns()
+        return False
+
+    def get_result(self, stage: str) -> Any:
+        """Result payload stored with a completed stage (None if absent)."""
+        if self.store is None:
+            return None
+        record = self.store.get_stage(self.job_id, stage)
+        return record["result"] if record else None
+
+    def mark_done(self, stage: str, outputs: Optional[List[str]] = None, result: Any = None) -> None:
+        """
+        Record a completed stage.
+
+        Only the files under outputs that were written since the stage started
+        (see is_done) are recorded and fingerprinted.
+
+        Args:
+            stage: Stage name
+            outputs: Paths (relative to job_output_dir) the stage produced
+            result: Small JSON-serializable payload needed by later stages on resume
+        """
+        if self.store is None:
+            return
+        outputs = [o for o in (outputs or []) if os.path.exists(os.path.join(self.job_output_dir, o))]
+        started_ns = self._started_ns.pop(stage, self._run_started_ns)
+        try:
+            outputs = files_written_since(self.job_output_dir, outputs, started_ns)
+            inputs_hash = self._inputs_hash(stage)
+            cutoff_ns = time.time_ns()
+            fingerprint = fingerprint_outputs(self.job_output_dir, outputs, cutoff_ns)
+            self.store.mark_stage(
+                self.job_id, stage, f"{cutoff_ns}:{fingerprint}",
+                outputs=outputs, result=result, inputs_hash=inputs_hash
+            )
+        except Exception as e:
+            self.logger.warning(f"[WARN] Could not record checkpoint for '{stage}': {e}")
+
+    @property
+    def resumed_stages(self) -> List[str]:
+        return list(self._resumed_stages)
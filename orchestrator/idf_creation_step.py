@@ -11,6 +11,7 @@ from typing import Dict, Any, Optional
 
 from database_handler import load_buildings_from_db
 from idf_creation import create_idfs_for_all_buildings
+from .output_demand import output_demand_config, demanded_output_definitions, readvars_enabled
 
 
 def run_idf_creation(
@@ -50,6 +51,12 @@ def run_idf_creation(
     post_process = idf_cfg.get("post_process", True)
     post_process_config = idf_cfg.get("post_process_config", {})
     output_definitions = idf_cfg.get("output_definitions", {})
+    deduplicate_archetypes = idf_cfg.get("deduplicate_archetypes", False)
+    collapse_floors = idf_cfg.get("collapse_floors", False)
+    idf_backend = idf_cfg.get("idf_backend", "eppy")
+    batch_assignment = idf_cfg.get("batch_assignment", False)
+    if output_demand_config(idf_cfg)["enabled"]:
+        output_definitions = demanded_output_definitions(main_config, output_definitions, job_output_dir, logger)
     
     # Database settings
     use_database = main_config.get("use_database", False)
@@ -98,7 +105,12 @@ def run_idf_creation(
         simulate_config=simulate_config,
         post_process=post_process,
         post_process_config=post_process_config,
-        logs_base_dir=job_output_dir
+        logs_base_dir=job_output_dir,
+        deduplicate_archetypes=deduplicate_archetypes,
+        collapse_floors=collapse_floors,
+        readvars=readvars_enabled(idf_cfg),
+        idf_backend=idf_backend,
+        batch_assignment=batch_assignment
     )
 
     # Store the mapping (ogc_fid -> idf_name)
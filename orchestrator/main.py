@@ -24,12 +24,14 @@ from .idf_creation_step import run_idf_creation
 from .simulation_step import run_simulations_on_modified_idfs
 from .parsing_step import run_parsing, run_parsing_modified_results
 from .modification_step import run_modification
+from .active_learning_step import run_active_learning
 from .sensitivity_step import run_sensitivity_analysis
 from .surrogate_step import run_surrogate_modeling
 from .calibration_step import run_calibration
 from .post_processing import run_post_processing, cleanup_old_results_safe
 from .timeseries_aggregation_step import run_timeseries_aggregation  # ADD THIS
 from .utils import WorkflowCanceled, check_canceled, step_timer
+from .checkpoints import StageCheckpoints
 from .validation_step import run_validation, run_validation_stages  # Update this line
 
 def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None):
@@ -59,6 +61,9 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     if not job_output_dir:
         return
 
+    # Stage checkpoints; up-to-date stages of a resumed or re-run job are skipped
+    checkpoints = StageCheckpoints(job_id, job_output_dir, logger)
+
     # -------------------------------------------------------------------------
     # 2) Load and merge configuration
     # -------------------------------------------------------------------------
@@ -166,13 +171,65 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     geom_data = json_overrides["geometry"]
     shading_data = json_overrides["shading"]
 
+    # -------------------------------------------------------------------------
+    # 6a) Declare stage inputs and report what is up to date
+    # -------------------------------------------------------------------------
+    iteration_config = main_config.get("iteration_control", {})
+    post_mod_cfg = modification_cfg.get("post_modification", {})
+    checkpoints.declare_inputs({
+        "idf_creation": {
+            "idf_creation": idf_cfg, "paths": paths_dict, "excel_overrides": excel_flags,
+            "user_config_overrides": user_flags, "default_dicts": def_dicts,
+            "user_configs": json_overrides
+        },
+        "parsing": parsing_cfg,
+        "timeseries_aggregation": aggregation_cfg,
+        "validation_parsing": validation_cfg,
+        "iterations": {
+            "iteration_control": iteration_config, "validation": validation_cfg,
+            "modification": modification_cfg, "parsing": parsing_cfg, "idf_creation": idf_cfg
+        },
+        "modification": modification_cfg,
+        "modified_simulation": {"post_modification": post_mod_cfg, "idf_creation": idf_cfg, "epw": user_config_epw},
+        "modified_parsing": post_mod_cfg.get("parse_results", {}),
+        "modified_aggregation": aggregation_cfg,
+        "validation_modification": validation_cfg,
+        "validation": validation_cfg,
+        "sensitivity": sens_cfg,
+        "surrogate": sur_cfg,
+        "calibration": cal_cfg,
+    })
+
+    modified_parsing_enabled = (
+        modification_cfg.get("perform_modification", False)
+        and post_mod_cfg.get("run_simulations", False)
+        and bool(post_mod_cfg.get("parse_results"))
+    )
+    enabled_stages = {
+        "idf_creation": idf_cfg.get("perform_idf_creation", False),
+        "parsing": parsing_cfg.get("perform_parsing", False),
+        "timeseries_aggregation": aggregation_cfg.get("perform_aggregation", False) and parsing_cfg.get("perform_parsing", False),
+        "validation_parsing": validation_cfg.get("perform_validation", False),
+        "iterations": iteration_config.get("enable_iterations", False) and validation_cfg.get("perform_validation", False),
+        "modification": modification_cfg.get("perform_modification", False),
+        "modified_simulation": modification_cfg.get("perform_modification", False) and post_mod_cfg.get("run_simulations", False),
+        "modified_parsing": modified_parsing_enabled,
+        "modified_aggregation": modified_parsing_enabled and aggregation_cfg.get("perform_aggregation", False),
+        "validation_modification": modified_parsing_enabled,
+        "validation": validation_cfg.get("perform_validation", False),
+        "sensitivity": sens_cfg.get("perform_sensitivity", False),
+        "surrogate": sur_cfg.get("perform_surrogate", False),
+        "calibration": cal_cfg.get("perform_calibration", False),
+    }
+    checkpoints.log_report([stage for stage, enabled in enabled_stages.items() if enabled])
+
     # -------------------------------------------------------------------------
     # 7) IDF Creation
     # -------------------------------------------------------------------------
     check_canceled_func()
     df_buildings = None
     
-    if idf_cfg.get("perform_idf_creation", False):
+    if idf_cfg.get("perform_idf_creation", False) and not checkpoints.is_done("idf_creation"):
         with step_timer(logger, "IDF creation and simulations"):
             df_buildings = run_idf_creation(
                 main_config=main_config,
@@ -189,12 +246,15 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                 user_config_epw=user_config_epw,
                 logger=logger
             )
+        checkpoints.mark_done("idf_creation", outputs=[
+            idf_cfg.get("output_idf_dir", "output_IDFs"), "Sim_Results", "extracted_idf_buildings.csv"
+        ])
 
     # -------------------------------------------------------------------------
     # 8) Parsing
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if parsing_cfg.get("perform_parsing", False):
+    if parsing_cfg.get("perform_parsing", False) and not checkpoints.is_done("parsing"):
         parse_after_simulation = parsing_cfg.get("parse_after_simulation", True)
         
         if parse_after_simulation and not idf_cfg.get("perform_idf_creation", False):
@@ -208,13 +268,15 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                 job_id=job_id,
                 logger=logger
             )
+        checkpoints.mark_done("parsing", outputs=["parsed_data"])
 
 
     # -------------------------------------------------------------------------
     # 8a) Time Series Aggregation (after base parsing)
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if aggregation_cfg.get("perform_aggregation", False) and parsing_cfg.get("perform_parsing", False):
+    if (aggregation_cfg.get("perform_aggregation", False) and parsing_cfg.get("perform_parsing", False)
+            and not checkpoints.is_done("timeseries_aggregation")):
         parsed_data_dir = os.path.join(job_output_dir, "parsed_data")
         
         if not os.path.exists(parsed_data_dir):
@@ -234,13 +296,14 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                     logger.info(f"  - Frequencies created: {aggregation_results.get('frequencies_created', [])}")
                     logger.info(f"  - Output directory: {aggregation_results.get('output_dir', 'N/A')}")
                     logger.info(f"  - Base data: {'✓' if aggregation_results.get('base_data_processed') else '✗'}")
+                    checkpoints.mark_done("timeseries_aggregation", outputs=["parsed_data"])
 
 
     # -------------------------------------------------------------------------
     # 8b) Validation after initial parsing (if configured)
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if validation_cfg.get("perform_validation", False):
+    if validation_cfg.get("perform_validation", False) and not checkpoints.is_done("validation_parsing"):
         # Check if we should run baseline validation after parsing
         validation_results_baseline = run_validation_stages(
             validation_cfg=validation_cfg,
@@ -251,13 +314,22 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
         
         if validation_results_baseline:
             logger.info(f"[INFO] Completed {len(validation_results_baseline)} validation stage(s) after parsing")
+        checkpoints.mark_done("validation_parsing", outputs=["validation_results"])
 
 
     # -------------------------------------------------------------------------
     # 8c) Iteration Loop (if configured)
     # -------------------------------------------------------------------------
-    iteration_config = main_config.get("iteration_control", {})
-    if iteration_config.get("enable_iterations", False) and validation_cfg.get("perform_validation", False):
+    # Local copy: the iteration loop may replace the modification step, the caller's config is left as is
+    perform_modification = modification_cfg.get("perform_modification", False)
+    iterations_enabled = iteration_config.get("enable_iterations", False) and validation_cfg.get("perform_validation", False)
+    if iterations_enabled and checkpoints.is_done("iterations"):
+        iterations_enabled = False
+        if (checkpoints.get_result("iterations") or 0) > 0:
+            logger.info("[INFO] Skipping standard modification workflow (iterations were performed)")
+            perform_modification = False
+
+    if iterations_enabled:
         logger.info("[INFO] Starting iteration loop for building improvements")
         
         from .iteration.iteration_manager import IterationManager
@@ -385,7 +457,9 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
             # Skip standard modification if iterations were performed
             if iteration_manager.current_iteration > 0:
                 logger.info("[INFO] Skipping standard modification workflow (iterations were performed)")
-                modification_cfg["perform_modification"] = False
+                perform_modification = False
+            checkpoints.mark_done("iterations", outputs=["iterations", "tracking"],
+                                  result=iteration_manager.current_iteration)
         else:
             logger.error("[ERROR] Baseline validation failed, skipping iterations")
 
@@ -394,14 +468,47 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     # 9) Modification
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if modification_cfg.get("perform_modification", False):
+    use_active_learning = perform_modification and modification_cfg.get("active_learning", {}).get("enabled", False)
+    if use_active_learning:
+        # Active learning modifies, simulates and parses variants batch by batch
+        with step_timer(logger, "active-learning modification"):
+            if checkpoints.is_done("modification"):
+                modified_results = checkpoints.get_result("modification")
+            else:
+                modified_results = run_active_learning(
+                    modification_cfg=modification_cfg,
+                    sur_cfg=sur_cfg,
+                    job_output_dir=job_output_dir,
+                    job_idf_dir=os.path.join(job_output_dir, "output_IDFs"),
+                    idf_cfg=idf_cfg,
+                    user_config_epw=user_config_epw,
+                    logger=logger
+                )
+                if modified_results and modified_results["modified_building_data"]:
+                    checkpoints.mark_done("modification", outputs=["modified_idfs", "active_learning"], result={
+                        "modified_building_data": modified_results["modified_building_data"],
+                        "modified_idfs_dir": modified_results["modified_idfs_dir"]
+                    })
+                    checkpoints.mark_done("modified_simulation", outputs=["Modified_Sim_Results"])
+                    checkpoints.mark_done("modified_parsing", outputs=["parsed_modified_results"])
+
+    if perform_modification and not use_active_learning:
         with step_timer(logger, "IDF modification"):
-            modified_results = run_modification(
-                modification_cfg=modification_cfg,
-                job_output_dir=job_output_dir,
-                job_idf_dir=os.path.join(job_output_dir, "output_IDFs"),
-                logger=logger
-            )
+            if checkpoints.is_done("modification"):
+                modified_results = checkpoints.get_result("modification")
+            else:
+                modified_results = run_modification(
+                    modification_cfg=modification_cfg,
+                    job_output_dir=job_output_dir,
+                    job_idf_dir=os.path.join(job_output_dir, "output_IDFs"),
+                    logger=logger
+                )
+                if modified_results:
+                    # Only what later stages need; the full results are not JSON-friendly
+                    checkpoints.mark_done("modification", outputs=["modified_idfs"], result={
+                        "modified_building_data": modified_results.get("modified_building_data", []),
+                        "modified_idfs_dir": modified_results.get("modified_idfs_dir")
+                    })
             
             # Handle post-modification simulations and parsing
             if modified_results and modified_results.get("modified_building_data"):
@@ -409,18 +516,24 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                 
                 # Run simulations on modified IDFs
                 if post_mod_cfg.get("run_simulations", False):
-                    with step_timer(logger, "post-modification simulations"):
-                        sim_success = run_simulations_on_modified_idfs(
-                            modified_results=modified_results,
-                            post_mod_cfg=post_mod_cfg,
-                            job_output_dir=job_output_dir,
-                            idf_cfg=idf_cfg,
-                            user_config_epw=user_config_epw,
-                            logger=logger
-                        )
-                        
-                        # Parse modified results if simulations were successful
-                        if sim_success and post_mod_cfg.get("parse_results"):
+                    if checkpoints.is_done("modified_simulation"):
+                        sim_success = True
+                    else:
+                        with step_timer(logger, "post-modification simulations"):
+                            sim_success = run_simulations_on_modified_idfs(
+                                modified_results=modified_results,
+                                post_mod_cfg=post_mod_cfg,
+                                job_output_dir=job_output_dir,
+                                idf_cfg=idf_cfg,
+                                user_config_epw=user_config_epw,
+                                logger=logger
+                            )
+                        if sim_success:
+                            checkpoints.mark_done("modified_simulation", outputs=["Modified_Sim_Results"])
+                    
+                    # Parse modified results if simulations were successful
+                    if sim_success and post_mod_cfg.get("parse_results"):
+                        if not checkpoints.is_done("modified_parsing"):
                             with step_timer(logger, "parsing modified results"):
                                 run_parsing_modified_results(
                                     parse_cfg=post_mod_cfg.get("parse_results", {}),
@@ -430,26 +543,29 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                                     idf_map_csv=os.path.join(job_output_dir, "extracted_idf_buildings.csv"),
                                     logger=logger
                                 )
-                            
+                            checkpoints.mark_done("modified_parsing", outputs=["parsed_modified_results"])
+                        
 
 
-                            # Add time series aggregation for modified results
-                            if aggregation_cfg.get("perform_aggregation", False):
-                                with step_timer(logger, "time series aggregation (modified)"):
-                                    # Run aggregation on the modified results directory
-                                    aggregation_results_modified = run_timeseries_aggregation(
-                                        aggregation_cfg=aggregation_cfg,
-                                        job_output_dir=job_output_dir,
-                                        parsed_data_dir=os.path.join(job_output_dir, "parsed_modified_results"),
-                                        logger=logger
-                                    )
-                                    
-                                    if aggregation_results_modified and aggregation_results_modified.get('success', False):
-                                        logger.info(f"[INFO] Modified data aggregation completed:")
-                                        logger.info(f"  - Files created: {aggregation_results_modified.get('files_created', 0)}")
-                            
-                            # Validation after modification parsing
-                            check_canceled_func()
+                        # Add time series aggregation for modified results
+                        if aggregation_cfg.get("perform_aggregation", False) and not checkpoints.is_done("modified_aggregation"):
+                            with step_timer(logger, "time series aggregation (modified)"):
+                                # Run aggregation on the modified results directory
+                                aggregation_results_modified = run_timeseries_aggregation(
+                                    aggregation_cfg=aggregation_cfg,
+                                    job_output_dir=job_output_dir,
+                                    parsed_data_dir=os.path.join(job_output_dir, "parsed_modified_results"),
+                                    logger=logger
+                                )
+                                
+                                if aggregation_results_modified and aggregation_results_modified.get('success', False):
+                                    logger.info(f"[INFO] Modified data aggregation completed:")
+                                    logger.info(f"  - Files created: {aggregation_results_modified.get('files_created', 0)}")
+                                    checkpoints.mark_done("modified_aggregation", outputs=["parsed_modified_results"])
+                        
+                        # Validation after modification parsing
+                        check_canceled_func()
+                        if not checkpoints.is_done("validation_modification"):
                             validation_results_modified = run_validation_stages(
                                 validation_cfg=validation_cfg,
                                 job_output_dir=job_output_dir,
@@ -459,8 +575,9 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                             
                             if validation_results_modified:
                                 logger.info(f"[INFO] Completed validation for modified results")
-                        elif not sim_success:
-                            logger.warning("[WARN] Skipping modified results parsing due to simulation failures")
+                            checkpoints.mark_done("validation_modification", outputs=["validation_results"])
+                    elif not sim_success:
+                        logger.warning("[WARN] Skipping modified results parsing due to simulation failures")
 
 
 
@@ -471,7 +588,7 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     # 10) Validation
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if validation_cfg.get("perform_validation", False):
+    if validation_cfg.get("perform_validation", False) and not checkpoints.is_done("validation"):
         with step_timer(logger, "validation"):
             # Check for old-style configuration (backward compatibility)
             if "config" in validation_cfg and "stages" not in validation_cfg:
@@ -512,6 +629,7 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                 logger.debug("Validation aggregator not available")
             except Exception as e:
                 logger.error(f"[ERROR] Failed to aggregate validation results: {e}")
+        checkpoints.mark_done("validation", outputs=["validation_results"])
 
 
 
@@ -522,7 +640,7 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     # 11) Sensitivity Analysis (Updated for multi-level modification-based analysis)
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if sens_cfg.get("perform_sensitivity", False):
+    if sens_cfg.get("perform_sensitivity", False) and not checkpoints.is_done("sensitivity"):
         with step_timer(logger, "enhanced sensitivity analysis"):
             # Check if time slicing is enabled
             time_slicing_cfg = sens_cfg.get("time_slicing", {})
@@ -562,7 +680,7 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
             # Check if this is modification-based sensitivity
             if sens_cfg.get("analysis_type") == "modification_based":
                 # Ensure we have modification results
-                if not modification_cfg.get("perform_modification", False):
+                if not perform_modification:
                     logger.warning("[WARN] Modification-based sensitivity requested but no modifications performed")
                     logger.info("[INFO] Switching to traditional sensitivity analysis")
                     sens_cfg["analysis_type"] = "traditional"
@@ -679,12 +797,14 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                         logger.info("[INFO] Time slice summary report has been created")
             else:
                 logger.warning("[WARN] Sensitivity analysis did not produce a report")
+        if sensitivity_report:
+            checkpoints.mark_done("sensitivity", outputs=["sensitivity_results"])
 
 # -------------------------------------------------------------------------
     # 12) Surrogate Modeling
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if sur_cfg.get("perform_surrogate", False):
+    if sur_cfg.get("perform_surrogate", False) and not checkpoints.is_done("surrogate"):
         with step_timer(logger, "surrogate modeling"):
             # Check prerequisites
             from .surrogate_step import check_surrogate_prerequisites
@@ -740,6 +860,7 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
                     # Note about optimization export
                     if sur_cfg.get("export_for_optimization", False):
                         logger.info("[INFO] Model exported for optimization frameworks")
+                    checkpoints.mark_done("surrogate", outputs=["surrogate_models"])
                 else:
                     logger.warning("[WARN] Surrogate modeling did not produce a model")
 
@@ -747,13 +868,16 @@ def orchestrate_workflow(job_config: dict, cancel_event: threading.Event = None)
     # 13) Calibration
     # -------------------------------------------------------------------------
     check_canceled_func()
-    if cal_cfg.get("perform_calibration", False):
+    if cal_cfg.get("perform_calibration", False) and not checkpoints.is_done("calibration"):
         with step_timer(logger, "calibration"):
             run_calibration(
                 cal_cfg=cal_cfg,
                 job_output_dir=job_output_dir,
                 logger=logger
             )
+        checkpoints.mark_done("calibration", outputs=[
+            p for p in (cal_cfg.get("best_params_folder"), cal_cfg.get("output_history_csv")) if p
+        ])
 
     # -------------------------------------------------------------------------
     # 14) Post-processing (Zip & Email)
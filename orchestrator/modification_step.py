@@ -16,6 +16,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from idf_modification.utils.reporting import export_modifications_to_parquet  # ADD THIS LINE
 from idf_modification.modification_engine import ModificationEngine
 from idf_modification.modification_config import ModificationConfig
+from c_surrogate.training_store import TrainingStore
 
 
 def run_modification(
@@ -112,6 +113,14 @@ def run_modification(
             import traceback
             logger.debug(traceback.format_exc())
     
+    # Typed parameter store for surrogate training (replaces the previous run's parameters)
+    try:
+        store = TrainingStore(job_output_dir)
+        store.reset('parameters')
+        store.append_parameters(all_modifications)
+    except Exception as e:
+        logger.warning(f"[WARN] Could not write training store parameters: {e}")
+    
     # Generate modification reports
     if output_options.get("save_report", True):
         generate_modification_reports(
@@ -0,0 +1,192 @@
+"""
+orchestrator/output_demand.py
+
+Output-demand-driven IDF outputs.
+
+Enabled with idf_creation.output_demand.enabled. Instead of the fixed
+output_definitions, the IDFs only report the variables and meters that the
+enabled downstream steps read:
+
+  - parsing:      SQL_CATEGORY_MAPPINGS of parsing.categories (if listed)
+  - validation:   variables_to_validate of the enabled stages
+  - sensitivity:  target_variable and modification_analysis.output_variables
+  - surrogate:    target_variable(s)
+  - calibration:  target_variables and objectives[].target_variable
+
+Each output is requested at the coarsest frequency that still serves every
+consumer (i.e. the finest frequency any of them asks for). Names may carry
+units and frequency as used across the configs, e.g.
+"Heating:EnergyTransfer [J](Hourly)". With skip_readvars (default), ReadVarsESO
+is not run after the simulations; parsing reads the SQL output only.
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from parserr.sql_analyzer import SQL_CATEGORY_MAPPINGS
+
+
+DEFAULT_OUTPUT_DEMAND_CONFIG = {
+    'enabled': False,
+    'default_frequency': 'Hourly',  # for consumers that do not state a frequency
+    'extra_outputs': [],            # always reported, e.g. "Zone Mean Air Temperature (Daily)"
+    'skip_readvars': True,          # no ESO -> CSV conversion after the simulations
+}
+
+# EnergyPlus reporting frequencies from fine to coarse
+FREQUENCY_ORDER = ['Timestep', 'Hourly', 'Daily', 'Monthly', 'RunPeriod']
+
+FREQUENCY_ALIASES = {
+    'timestep': 'Timestep',
+    'hourly': 'Hourly',
+    'daily': 'Daily',
+    'monthly': 'Monthly',
+    # the parser aggregates upward only to monthly, yearly values are built from it
+    'yearly': 'Monthly',
+    'annual': 'Monthly',
+    'runperiod': 'RunPeriod',
+}
+
+# Simulation outputs the validation matches to each measured-data keyword
+VALIDATION_VARIABLE_OUTPUTS = {
+    'electricity': ['Electricity:Facility'],
+    'heating': ['Heating:EnergyTransfer', 'Zone Air System Sensible Heating Energy'],
+    'cooling': ['Cooling:EnergyTransfer', 'Zone Air System Sensible Cooling Energy'],
+    'temperature': ['Zone Mean Air Temperature', 'Zone Air Temperature'],
+}
+
+_OUTPUT_NAME_PATTERN = re.compile(r'^\s*(.*?)\s*(?:\[[^\]]*\])?\s*(?:\(([A-Za-z]+)\))?\s*$')
+
+
+def output_demand_config(idf_cfg: dict) -> Dict[str, Any]:
+    return {**DEFAULT_OUTPUT_DEMAND_CONFIG, **idf_cfg.get('output_demand', {})}
+
+
+def readvars_enabled(idf_cfg: dict) -> bool:
+    """Whether ReadVarsESO should run after the simulations"""
+    demand_cfg = output_demand_config(idf_cfg)
+    return not (demand_cfg['enabled'] and demand_cfg['skip_readvars'])
+
+
+def split_output_name(name: str, default_frequency: str) -> Tuple[str, str]:
+    """'Heating:EnergyTransfer [J](Hourly)' -> ('Heating:EnergyTransfer', 'Hourly')"""
+    match = _OUTPUT_NAME_PATTERN.match(str(name))
+    base, freq = match.group(1), match.group(2)
+    frequency = FREQUENCY_ALIASES.get(freq.lower(), default_frequency) if freq else default_frequency
+    return base, frequency
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def compute_output_demand(main_config: dict, logger: Optional[logging.Logger] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Union of the outputs read by the enabled downstream steps.
+
+    Returns:
+        {output name: {"frequency": ..., "consumers": [...]}}
+    """
+    logger = logger or logging.getLogger(__name__)
+    demand_cfg = output_demand_config(main_config.get('idf_creation', {}))
+    default_freq = FREQUENCY_ALIASES.get(str(demand_cfg['default_frequency']).lower(), 'Hourly')
+    demand: Dict[str, Dict[str, Any]] = {}
+
+    def add(name: str, consumer: str, frequency: Optional[str] = None):
+        base, freq = split_output_name(name, frequency or default_freq)
+        if not base:
+            return
+        entry = demand.setdefault(base, {'frequency': freq, 'consumers': []})
+        if FREQUENCY_ORDER.index(freq) < FREQUENCY_ORDER.index(entry['frequency']):
+            entry['frequency'] = freq
+        if consumer not in entry['consumers']:
+            entry['consumers'].append(consumer)
+
+    # Parsing: only an explicit category list narrows what the parser reads
+    parsing_cfg = main_config.get('parsing', {})
+    if parsing_cfg.get('perform_parsing', False) and parsing_cfg.get('categories'):
+        for category in parsing_cfg['categories']:
+            for name in SQL_CATEGORY_MAPPINGS.get(category, []):
+                add(name, 'parsing')
+
+    # Validation stages
+    validation_cfg = main_config.get('validation', {})
+    if validation_cfg.get('perform_validation', False):
+        stages = validation_cfg.get('stages') or {'default': {'enabled': True, 'config': validation_cfg.get('config', {})}}
+        for stage_name, stage in stages.items():
+            if not stage.get('enabled', False):
+                continue
+            stage_cfg = stage.get('config', {})
+            target = stage_cfg.get('target_frequency', stage_cfg.get('aggregation', {}).get('target_frequency', 'daily'))
+            frequency = FREQUENCY_ALIASES.get(str(target).lower(), default_freq)
+            keywords = _as_list(stage_cfg.get('variables_to_validate')) or list(VALIDATION_VARIABLE_OUTPUTS)
+            for keyword in keywords:
+                groups = [g for g in VALIDATION_VARIABLE_OUTPUTS if g in keyword.lower()]
+                if not groups:
+                    logger.warning(f"[WARN] Output demand: no simulation outputs known for validation variable '{keyword}'")
+                for group in groups:
+                    for name in VALIDATION_VARIABLE_OUTPUTS[group]:
+                        add(name, f'validation:{stage_name}', frequency)
+
+    # Sensitivity
+    sens_cfg = main_config.get('sensitivity', {})
+    if sens_cfg.get('perform_sensitivity', False):
+        for name in _as_list(sens_cfg.get('target_variable')):
+            add(name, 'sensitivity')
+        for name in _as_list(sens_cfg.get('modification_analysis', {}).get('output_variables')):
+            add(name, 'sensitivity')
+
+    # Surrogate
+    sur_cfg = main_config.get('surrogate', {})
+    if sur_cfg.get('perform_surrogate', False):
+        for name in (_as_list(sur_cfg.get('target_variable')) + _as_list(sur_cfg.get('target_variables'))
+                     + _as_list(sur_cfg.get('preprocessing', {}).get('target_variables'))):
+            add(name, 'surrogate')
+
+    # Calibration
+    cal_cfg = main_config.get('calibration', {})
+    if cal_cfg.get('perform_calibration', False):
+        for name in _as_list(cal_cfg.get('target_variables')):
+            add(name, 'calibration')
+        for objective in cal_cfg.get('objectives', []):
+            if objective.get('target_variable'):
+                add(objective['target_variable'], 'calibration')
+
+    for name in _as_list(demand_cfg.get('extra_outputs')):
+        add(name, 'extra_outputs')
+
+    return demand
+
+
+def demanded_output_definitions(
+    main_config: dict,
+    output_definitions: dict,
+    job_output_dir: Optional[str] = None,
+    logger: Optional[logging.Logger] = None
+) -> dict:
+    """
+    output_definitions restricted to the demanded outputs (tables and summary
+    reports as configured). The demand is saved to <job>/output_demand.json.
+    """
+    logger = logger or logging.getLogger(__name__)
+    demand = compute_output_demand(main_config, logger)
+    if not demand:
+        logger.warning("[WARN] Output demand is empty; keeping the configured output_definitions")
+        return output_definitions
+
+    n_meters = sum(1 for name in demand if ':' in name)
+    logger.info(f"[INFO] Output demand: {len(demand) - n_meters} variables, {n_meters} meters "
+                f"for {sorted({c.split(':')[0] for d in demand.values() for c in d['consumers']})}")
+    if job_output_dir:
+        with open(os.path.join(job_output_dir, "output_demand.json"), "w") as f:
+            json.dump(demand, f, indent=2)
+
+    return {
+        **output_definitions,
+        "demanded_outputs": {name: entry['frequency'] for name, entry in demand.items()},
+    }
@@ -8,7 +8,7 @@ import os
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 from pathlib import Path
 import pandas as pd
 import re
@@ -17,8 +17,9 @@ import re
 from parserr.idf_analyzer_main import IDFAnalyzer
 from parserr.sql_analyzer_main import SQLAnalyzerMain
 from parserr.idf_helpers import prepare_idf_files, get_idf_data_info
-from parserr.sql_helpers import find_sql_files, get_sql_data_info, prepare_sql_file_pairs
+from parserr.sql_helpers import find_sql_files, get_sql_data_info, prepare_sql_file_pairs, restore_compressed_sql
 from parserr.helpers import prepare_idf_sql_pairs_with_mapping
+from c_surrogate.training_store import TrainingStore, comparison_targets
 
 
 class CombinedAnalyzer:
@@ -50,7 +51,8 @@ class CombinedAnalyzer:
                        categories: List[str] = None,
                        validate_outputs: bool = True,
                        building_id_map: Optional[Dict[str, str]] = None,
-                       is_modified_results: bool = False):
+                       is_modified_results: bool = False,
+                       merge_existing_comparisons: bool = False):
         """Analyze project with both IDF and SQL files"""
         
         # Initialize analyzers if not already done
@@ -100,7 +102,8 @@ class CombinedAnalyzer:
                 categories=categories,
                 validate_outputs=validate_outputs,
                 is_modified_results=is_modified_results,
-                extract_static_data=extract_static
+                extract_static_data=extract_static,
+                merge_existing_comparisons=merge_existing_comparisons
             )
     
     def close(self):
@@ -195,6 +198,11 @@ def run_parsing(
         logger.error("[ERROR] Please run IDF creation first or provide mapping file")
         return
     
+    # SQL stored compressed by the simulation staging has to be plain for sqlite
+    restored = restore_compressed_sql(os.path.join(job_output_dir, "Sim_Results"))
+    if restored:
+        logger.info(f"[INFO] Decompressed {len(restored)} SQL files")
+
     # Use the proven method
     idf_sql_pairs, building_id_map = prepare_idf_sql_pairs_with_mapping(job_output_dir)
     
@@ -287,10 +295,15 @@ def run_parsing_modified_results(
     modified_sim_output: str,
     modified_idfs_dir: str,
     idf_map_csv: str,
-    logger: logging.Logger
+    logger: logging.Logger,
+    variant_ids: Optional[Iterable[str]] = None
 ) -> None:
     """
     Parse modified simulation results with proper variant tracking.
+    
+    With variant_ids, only those variants are parsed: they are added to the
+    existing comparison files and their targets appended to the training
+    store (used by the active-learning loop, one batch at a time).
     """
     logger.info("[INFO] Parsing modified simulation results...")
     
@@ -308,6 +321,9 @@ def run_parsing_modified_results(
     # Find all modified IDF files
     modified_idfs_path = Path(modified_idfs_dir)
     idf_files = list(modified_idfs_path.glob("building_*_variant_*.idf"))
+    if variant_ids is not None:
+        wanted = set(variant_ids)
+        idf_files = [f for f in idf_files if re.sub(r'^building_\d+_', '', f.stem) in wanted]
     
     logger.info(f"[INFO] Found {len(idf_files)} modified IDF files")
     
@@ -329,6 +345,7 @@ def run_parsing_modified_results(
             variant_mapping[building_id][variant_num] = idf_file
     
     # Now find SQL files and match them
+    restore_compressed_sql(str(sim_output_path))
     sql_files = list(sim_output_path.glob("**/*.sql"))
     logger.info(f"[INFO] Found {len(sql_files)} SQL files in modified results")
     
@@ -373,7 +390,8 @@ def run_parsing_modified_results(
             categories=parse_categories,
             validate_outputs=True,
             building_id_map=building_id_map,
-            is_modified_results=True  # This is MODIFIED data with variants
+            is_modified_results=True,  # This is MODIFIED data with variants
+            merge_existing_comparisons=variant_ids is not None
         )
         
         logger.info("[INFO] Modified results parsing complete")
@@ -410,5 +428,17 @@ def run_parsing_modified_results(
     
     logger.info(f"[INFO] Parsed modified results saved to: {parser_output_dir}")
     
+    # Per-variant target aggregates for the training store
+    try:
+        comparisons_dir = os.path.join(parser_output_dir, "comparisons")
+        store = TrainingStore(job_output_dir)
+        if variant_ids is not None:
+            n_targets = store.append_targets(comparison_targets(comparisons_dir, variant_ids))
+        else:
+            n_targets = store.replace_targets(comparison_targets(comparisons_dir))
+        logger.info(f"[INFO] Training store targets written: {n_targets} values")
+    except Exception as e:
+        logger.warning(f"[WARN] Could not write training store targets: {e}")
+    
     # Close analyzer
     analyzer.close()
\ No newline at end of file
@@ -37,10 +37,13 @@ def run_simulations_on_modified_idfs(
     
     # Import simulation module
     from epw.run_epw_sims import simulate_all
+    from .output_demand import readvars_enabled
     
     # Get simulation configuration
     sim_config = post_mod_cfg.get("simulation_config", {})
     num_workers = sim_config.get("num_workers", idf_cfg.get("simulate_config", {}).get("num_workers", 4))
+    executor = sim_config.get("executor", idf_cfg.get("simulate_config", {}).get("executor", "direct"))
+    staging = sim_config.get("staging", idf_cfg.get("simulate_config", {}).get("staging"))
     
     # Create output directory for modified simulations
     modified_sim_output = os.path.join(job_output_dir, "Modified_Sim_Results")
@@ -85,6 +88,13 @@ def run_simulations_on_modified_idfs(
         return False
         
     df_modified = pd.DataFrame(modified_rows)
+    # Index by the variant number: the SQL name simulation_bldg<idx>_<id> is how parsing
+    # finds the variant, and it must not repeat across active-learning batches
+    variant_numbers = pd.to_numeric(
+        df_modified['variant_id'].astype(str).str.rsplit('_', n=1).str[-1], errors='coerce'
+    )
+    if variant_numbers.notna().all():
+        df_modified.index = variant_numbers.astype(int)
     
     # Run simulations
     try:
@@ -95,7 +105,10 @@ def run_simulations_on_modified_idfs(
             base_output_dir=modified_sim_output,
             user_config_epw=user_config_epw,
             assigned_epw_log={},  # Empty log for modified runs
-            num_workers=num_workers
+            num_workers=num_workers,
+            readvars=readvars_enabled(idf_cfg),
+            executor=executor,
+            staging=staging
         )
         
         logger.info(f"[INFO] Completed simulations for {len(df_modified)} modified IDFs")
@@ -303,6 +303,8 @@ def run_legacy_surrogate(
             scale_features=scale_features,
             scaler_type=sur_cfg.get("scaler_type", "standard"),
             cv_strategy=cv_strategy,
+            search_mode=sur_cfg.get("search_mode", "randomized"),
+            search_config=sur_cfg.get("search_config", {}),
             sensitivity_results_path=sensitivity_path,
             feature_selection=feature_selection,
             save_metadata=sur_cfg.get("save_metadata", True),
@@ -0,0 +1,413 @@
+"""
+Comparison Index Module
+Maintains a manifest of the variant comparison files written by SQLDataManager,
+so loaders can select files by variable/unit/frequency/building without parsing
+file names or opening every parquet file.
+
+Writers update the manifest under a file lock. Loaders check it against the
+directory (file names, mtimes and sizes, see is_stale) and rebuild it when a
+transform crashed before saving or files were written by another process.
+"""
+
+import os
+import re
+import pandas as pd
+import pyarrow.parquet as pq
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Union, Any
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+INDEX_FILENAME = 'comparison_index.parquet'
+LOCK_FILENAME = 'comparison_index.lock'
+
+# Rows per parquet row group for comparison files. Files are sorted by
+# timestamp, so row-group statistics allow date-range reads to skip groups.
+COMPARISON_ROW_GROUP_SIZE = 8760
+
+INDEX_COLUMNS = [
+    'file_name', 'variable', 'variable_slug', 'variable_key', 'unit', 'frequency',
+    'building_id', 'variants', 'n_variants', 'num_rows', 'num_row_groups',
+    'min_time', 'max_time', 'file_size', 'file_mtime', 'indexed_at'
+]
+
+_FILENAME_RE = re.compile(r'^var_(?P<variable>.+)_(?P<unit>[^_]+)_(?P<frequency>[^_]+)_b(?P<building_id>[^_]+)$')
+
+
+def variable_slug(variable: str) -> str:
+    """Filename form of a variable name, e.g. 'Heating:EnergyTransfer [J]' -> 'heating_energytransfer_j'"""
+    return (variable.lower()
+            .replace(':', '_')
+            .replace(' ', '_')
+            .replace('[', '')
+            .replace(']', '')
+            .replace('(', '')
+            .replace(')', ''))
+
+
+def normalize_variable_key(variable: str) -> str:
+    """
+    Reduce a variable name to the key used for matching requested variables.
+
+    'Heating:EnergyTransfer [J]', 'heating_energytransfer' and
+    'Heating EnergyTransfer' all map to 'heatingenergytransfer'.
+    """
+    if variable is None:
+        return ''
+    key = str(variable).split('[')[0].strip().lower()
+    return re.sub(r'[\s:_\-()]', '', key)
+
+
+def parse_comparison_filename(file_path: Union[str, Path]) -> Optional[Dict[str, str]]:
+    """
+    Parse var_{variable}_{unit}_{frequency}_b{building_id}.parquet.
+
+    Only used to index legacy directories that were written without a manifest.
+    """
+    match = _FILENAME_RE.match(Path(file_path).stem)
+    if not match:
+        return None
+    return match.groupdict()
+
+
+class ComparisonIndex:
+    """Manifest of comparison files stored next to them as comparison_index.parquet"""
+
+    def __init__(self, comparison_dir: Union[str, Path]):
+        """Initialize index for a comparisons directory"""
+        self.comparison_dir = Path(comparison_dir)
+        self.index_path = self.comparison_dir / INDEX_FILENAME
+        self.lock_path = self.comparison_dir / LOCK_FILENAME
+        self._pending: List[Dict[str, Any]] = []
+        self._entries: Optional[pd.DataFrame] = None
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the manifest across processes"""
+        self.comparison_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a+') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def record_file(self, file_path: Union[str, Path], comparison_df: pd.DataFrame,
+                    variable: str, unit: str, frequency: str, building_id: str):
+        """
+        Record a comparison file that was just written.
+
+        Args:
+            file_path: Path of the written parquet file
+            comparison_df: The DataFrame that was written (used for stats)
+            variable: Original variable name (e.g. 'Heating:EnergyTransfer [J]')
+            unit: Unit token used in the filename
+            frequency: Reporting frequency
+            building_id: Building identifier
+        """
+        file_path = Path(file_path)
+        variants = sorted(c[:-len('_value')] for c in comparison_df.columns
+                          if c.startswith('variant_') and c.endswith('_value'))
+
+        min_time = max_time = pd.NaT
+        if 'timestamp' in comparison_df.columns and not comparison_df.empty:
+            timestamps = pd.to_datetime(comparison_df['timestamp'])
+            min_time, max_time = timestamps.min(), timestamps.max()
+
+        stat = file_path.stat()
+        num_rows = len(comparison_df)
+        self._pending.append({
+            'file_name': file_path.name,
+            'variable': variable,
+            'variable_slug': variable_slug(variable),
+            'variable_key': normalize_variable_key(variable),
+            'unit': unit,
+            'frequency': frequency,
+            'building_id': str(building_id),
+            'variants': ','.join(variants),
+            'n_variants': len(variants),
+            'num_rows': num_rows,
+            'num_row_groups': max(1, -(-num_rows // COMPARISON_ROW_GROUP_SIZE)),
+            'min_time': min_time,
+            'max_time': max_time,
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'indexed_at': datetime.now()
+        })
+
+    def _index_existing_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Build an index entry from the parquet footer of an unindexed file"""
+        parsed = parse_comparison_filename(file_path)
+        if not parsed:
+            return None
+
+        parquet_file = pq.ParquetFile(file_path)
+        metadata = parquet_file.metadata
+        schema_names = parquet_file.schema_arrow.names
+
+        variants = sorted(c[:-len('_value')] for c in schema_names
+                          if c.startswith('variant_') and c.endswith('_value'))
+
+        # Min/max time from row group statistics, no data pages are read
+        min_time = max_time = pd.NaT
+        if 'timestamp' in schema_names:
+            col_idx = schema_names.index('timestamp')
+            for rg in range(metadata.num_row_groups):
+                stats = metadata.row_group(rg).column(col_idx).statistics
+                if stats is None or not stats.has_min_max:
+                    continue
+                rg_min, rg_max = pd.Timestamp(stats.min), pd.Timestamp(stats.max)
+                min_time = rg_min if pd.isna(min_time) else min(min_time, rg_min)
+                max_time = rg_max if pd.isna(max_time) else max(max_time, rg_max)
+
+        # Original variable name is stored in the data; the filename form is lossy
+        variable = parsed['variable']
+        if 'variable_name' in schema_names and metadata.num_rows > 0:
+            first = parquet_file.read_row_group(0, columns=['variable_name']).column(0)
+            if len(first) > 0 and first[0].as_py():
+                variable = first[0].as_py()
+
+        stat = file_path.stat()
+        return {
+            'file_name': file_path.name,
+            'variable': variable,
+            'variable_slug': parsed['variable'],
+            'variable_key': normalize_variable_key(variable),
+            'unit': parsed['unit'],
+            'frequency': parsed['frequency'],
+            'building_id': parsed['building_id'],
+            'variants': ','.join(variants),
+            'n_variants': len(variants),
+            'num_rows': metadata.num_rows,
+            'num_row_groups': metadata.num_row_groups,
+            'min_time': min_time,
+            'max_time': max_time,
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'indexed_at': datetime.now()
+        }
+
+    def save(self, force: bool = False) -> int:
+        """
+        Merge pending entries into the manifest on disk.
+
+        Entries for the same file name are replaced. The manifest is re-read and
+        written under the lock, to a temporary file that is renamed so readers
+        never see a partial index.
+
+        Args:
+            force: Write the manifest even if there are no pending entries
+
+        Returns:
+            Number of entries in the saved manifest
+        """
+        if not self._pending and not force:
+            return len(self.load())
+        with self._locked():
+            return self._save_locked()
+
+    def _save_locked(self, drop: Optional[set] = None) -> int:
+        """save() with the lock held; entries named in drop are removed first"""
+        new_entries = pd.DataFrame(self._pending, columns=INDEX_COLUMNS)
+        self._entries = None
+        existing = self.load()
+        if drop and not existing.empty:
+            existing = existing[~existing['file_name'].isin(drop)]
+        if new_entries.empty:
+            entries = existing
+        elif not existing.empty:
+            existing = existing[~existing['file_name'].isin(new_entries['file_name'])]
+            entries = pd.concat([existing, new_entries], ignore_index=True)
+        else:
+            entries = new_entries
+
+        entries = entries.sort_values(['frequency', 'variable_key', 'building_id']).reset_index(drop=True)
+
+        self.comparison_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(f'.parquet.tmp{os.getpid()}')
+        entries.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.index_path)
+
+        self._pending = []
+        self._entries = entries
+        return len(entries)
+
+    def load(self) -> pd.DataFrame:
+        """Load the manifest (empty DataFrame if none exists)"""
+        if self._entries is not None:
+            return self._entries
+        if self.index_path.exists():
+            self._entries = pd.read_parquet(self.index_path)
+            return self._entries
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+
+    def _stale_files(self, entries: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Comparison files whose manifest entry is missing or has another
+        mtime/size (name -> path), and manifest entries without a file
+        (name -> None).
+        """
+        on_disk = {p.name: p for p in self.comparison_dir.glob('var_*.parquet')}
+        known = {}
+        if not entries.empty:
+            known = dict(zip(entries['file_name'], zip(entries['file_mtime'], entries['file_size'])))
+
+        stale: Dict[str, Any] = {name: None for name in known if name not in on_disk}
+        for name, path in on_disk.items():
+            stat = path.stat()
+            if known.get(name) != (stat.st_mtime, stat.st_size):
+                stale[name] = path
+        return stale
+
+    def is_stale(self) -> bool:
+        """True if the manifest on disk is missing or does not match the comparison files"""
+        if not self.comparison_dir.exists():
+            return False
+        if not self.index_path.exists():
+            return True
+        self._entries = None
+        return bool(self._stale_files(self.load()))
+
+    def rebuild(self) -> pd.DataFrame:
+        """
+        Index any comparison files that are missing from the manifest.
+
+        Files already indexed with an unchanged mtime/size are not reopened, and
+        entries for deleted files are dropped.
+        """
+        with self._locked():
+            self._entries = None
+            stale = self._stale_files(self.load())
+            for name, path in stale.items():
+                if path is None:
+                    continue
+                try:
+                    entry = self._index_existing_file(path)
+                except Exception as e:
+                    print(f"    Could not index {name}: {e}")
+                    continue
+                if entry:
+                    self._pending.append(entry)
+
+            if stale:
+                self._save_locked(drop=set(stale))
+        return self.load()
+
+    def query(self, frequency: Optional[str] = None,
+              variables: Optional[List[str]] = None,
+              building_ids: Optional[List[str]] = None,
+              start: Optional[Any] = None,
+              end: Optional[Any] = None,
+              exact: bool = False) -> pd.DataFrame:
+        """
+        Select manifest entries.
+
+        Args:
+            frequency: Reporting frequency to match
+            variables: Requested variable names; matched on normalized keys
+                (substring match in either direction unless exact=True)
+            building_ids: Buildings to include
+            start, end: Only files whose [min_time, max_time] overlaps this range
+            exact: Require equal normalized keys instead of substring matching
+
+        Returns:
+            Manifest rows with an added 'path' column
+        """
+        entries = self.load()
+        if entries.empty:
+            return entries.assign(path=pd.Series(dtype=object))
+
+        mask = pd.Series(True, index=entries.index)
+        if frequency:
+            mask &= entries['frequency'] == frequency
+        if building_ids:
+            mask &= entries['building_id'].isin([str(b) for b in building_ids])
+
+        if variables:
+            requested = {normalize_variable_key(v) for v in variables}
+            requested.discard('')
+            # Requests may use either the original name or the filename slug
+            pairs = entries[['variable_key', 'variable_slug']].drop_duplicates()
+            matched = set()
+            for key, slug in pairs.itertuples(index=False):
+                slug_key = normalize_variable_key(slug)
+                if exact:
+                    hit = key in requested or slug_key in requested
+                else:
+                    hit = any(r in key or key in r or r == slug_key for r in requested)
+                if hit:
+                    matched.add((key, slug))
+            mask &= pd.Series(
+                [pair in matched for pair in zip(entries['variable_key'], entries['variable_slug'])],
+                index=entries.index
+            )
+
+        if start is not None:
+            mask &= ~(entries['max_time'] < pd.to_datetime(start))
+        if end is not None:
+            mask &= ~(entries['min_time'] > pd.to_datetime(end))
+
+        selected = entries[mask].copy()
+        selected['path'] = [self.comparison_dir / name for name in selected['file_name']]
+        return selected
+
+
+def write_comparison_file(comparison_df: pd.DataFrame, output_file: Union[str, Path]):
+    """Write a comparison DataFrame sorted into timestamp-ordered row groups"""
+    comparison_df.to_parquet(output_file, index=False, row_group_size=COMPARISON_ROW_GROUP_SIZE)
+
+
+def read_comparison_file(file_path: Union[str, Path],
+                         columns: Optional[List[str]] = None,
+                         start: Optional[Any] = None,
+                         end: Optional[Any] = None) -> pd.DataFrame:
+    """
+    Read a comparison file, skipping row groups outside [start, end].
+
+    Args:
+        file_path: Comparison parquet file
+        columns: Columns to read (None for all)
+        start, end: Optional timestamp bounds, pushed down to row-group statistics
+    """
+    filters = []
+    if start is not None:
+        filters.append(('timestamp', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('timestamp', '<=', pd.Timestamp(end)))
+
+    if columns is not None:
+        schema_names = pq.ParquetFile(file_path).schema_arrow.names
+        columns = [c for c in columns if c in schema_names]
+
+    if not filters:
+        return pd.read_parquet(file_path, columns=columns)
+
+    try:
+        return pd.read_parquet(file_path, columns=columns, filters=filters)
+    except Exception:
+        # Older files may store timestamps as strings; filter after reading
+        df = pd.read_parquet(file_path, columns=columns)
+        if 'timestamp' in df.columns:
+            ts = pd.to_datetime(df['timestamp'])
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= ts >= pd.Timestamp(start)
+            if end is not None:
+                mask &= ts <= pd.Timestamp(end)
+            df = df[mask]
+        return df
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple, Any, Set
 import re
 from datetime import datetime
 from .sql_data_manager import SQLDataManager
+from .sql_helpers import expand_collapsed_zones
 
 # Helper function for aggregation
 def aggregate_timeseries(df, freq, method):
@@ -323,9 +324,23 @@ class EnhancedSQLAnalyzer:
             # Add building and variant IDs
             df['building_id'] = self.building_id
             df['variant_id'] = self.variant_id
+            
+            # Collapsed floors: copy zone outputs to the floors they represent
+            df = expand_collapsed_zones(df, self._get_zone_multipliers())
         
         return df
     
+    def _get_zone_multipliers(self) -> Dict[str, int]:
+        """Zone name -> zone multiplier from the SQL Zones table"""
+        if 'zone_multipliers' not in self._sql_cache:
+            try:
+                zones = pd.read_sql_query("SELECT ZoneName, Multiplier FROM Zones", self.sql_conn)
+                self._sql_cache['zone_multipliers'] = dict(zip(zones['ZoneName'], zones['Multiplier']))
+            except Exception as e:
+                print(f"  Could not read zone multipliers: {e}")
+                self._sql_cache['zone_multipliers'] = {}
+        return self._sql_cache['zone_multipliers']
+    
     def extract_and_save_all(self, zone_mapping: Dict[str, str], 
                             variables_by_category: Dict[str, List[str]],
                             start_date: Optional[str] = None,
@@ -15,6 +15,7 @@ from .sql_analyzer import EnhancedSQLAnalyzer
 from .sql_data_manager import SQLDataManager
 from .sql_helpers import find_sql_files, validate_sql_outputs
 from .sql_static_extractor import SQLStaticExtractor
+from .comparison_index import ComparisonIndex, read_comparison_file
 
 class SQLAnalyzerMain:
     """Main coordinator for SQL analysis with base/variant tracking"""
@@ -55,7 +56,8 @@ class SQLAnalyzerMain:
                          end_date: Optional[str] = None,
                          validate_outputs: bool = True,
                          is_modified_results: bool = False,
-                         extract_static_data: bool = True):
+                         extract_static_data: bool = True,
+                         merge_existing_comparisons: bool = False):
         """
         Analyze multiple SQL files
         
@@ -69,6 +71,8 @@ class SQLAnalyzerMain:
             validate_outputs: Whether to validate outputs
             is_modified_results: Whether these are from Modified_Sim_Results
             extract_static_data: Whether to extract static/summary data (default True)
+            merge_existing_comparisons: Add to existing comparison files instead of
+                replacing them (when only some variants are parsed)
         """
         
         print(f"\nAnalyzing {len(sql_files)} SQL files")
@@ -76,6 +80,7 @@ class SQLAnalyzerMain:
         
         zone_mappings = zone_mappings or {}
         output_configs = output_configs or {}
+        self.sql_data_manager.merge_existing_comparisons = merge_existing_comparisons
         
         output_validation_results = []
         
@@ -308,28 +313,16 @@ class SQLAnalyzerMain:
             return pd.DataFrame() if variable_name else {}
         
         if variable_name and building_id:
-            # Load specific variable for specific building
-            clean_var_name = (variable_name.lower()
-                            .replace(':', '_')
-                            .replace(' ', '_')
-                            .replace('[', '')
-                            .replace(']', '')
-                            .replace('(', '')
-                            .replace(')', ''))
-            
-            # Need to search for files matching pattern since unit is now in filename
-            import glob
-            pattern = f"var_{clean_var_name}_*_{frequency}_b{building_id}.parquet"
-            matching_files = list(variants_dir.glob(pattern))
-            if matching_files:
-                file_path = matching_files[0]
-            else:
+            # Load specific variable for specific building via the manifest
+            index = ComparisonIndex(variants_dir)
+            if index.is_stale():
+                index.rebuild()
+            matching = index.query(frequency=frequency, variables=[variable_name],
+                                   building_ids=[building_id], exact=True)
+            if matching.empty:
                 return pd.DataFrame()
             
-            if file_path.exists():
-                return pd.read_parquet(file_path)
-            else:
-                return pd.DataFrame()
+            return read_comparison_file(matching['path'].iloc[0])
         
         elif building_id:
             # Load all variables for a specific building
@@ -343,7 +336,7 @@ class SQLAnalyzerMain:
         else:
             # Load all comparison files
             result = {}
-            for file_path in variants_dir.glob("*.parquet"):
+            for file_path in variants_dir.glob("var_*.parquet"):
                 key = file_path.stem
                 result[key] = pd.read_parquet(file_path)
             return result
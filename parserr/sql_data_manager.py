@@ -14,6 +14,8 @@ import numpy as np
 
 import re
 
+from .comparison_index import ComparisonIndex, variable_slug, write_comparison_file
+
 class SQLDataManager:
     """Manages SQL-specific data storage with base/variant separation and proper frequency handling"""
     
@@ -22,6 +24,9 @@ class SQLDataManager:
         self.base_path = Path(base_path)
         self._initialize_sql_structure()
         self.base_buildings = set()  # Will be populated during analysis
+        self.comparison_index = ComparisonIndex(self.base_path / 'comparisons')
+        # Keep the variant columns of existing comparison files (incremental parsing)
+        self.merge_existing_comparisons = False
         
     def _initialize_sql_structure(self):
         """Create SQL-specific directory structure"""
@@ -229,6 +234,13 @@ class SQLDataManager:
                 
                 building_time = (datetime.now() - building_start).total_seconds()
                 print(f"    Building {building_id} at {freq} processed in {building_time:.1f} seconds")
+            
+            # Publish this frequency's files; an interrupted run loses at most one frequency
+            self.comparison_index.save()
+        
+        # Update the comparison manifest used by loaders
+        indexed = self.comparison_index.save()
+        print(f"\nComparison index updated: {indexed} files indexed")
         
         # Clean up temp files
         print("\nCleaning up temporary files...")
@@ -358,22 +370,46 @@ class SQLDataManager:
                         unit = unit_match.group(1).lower() if unit_match else 'na'
                         unit = unit.replace('/', 'per')  # Handle units like J/kg
 
-                        clean_var_name = (variable.lower()
-                                        .replace(':', '_')
-                                        .replace(' ', '_')
-                                        .replace('[', '')
-                                        .replace(']', '')
-                                        .replace('(', '')
-                                        .replace(')', ''))
+                        clean_var_name = variable_slug(variable)
 
                         output_file = output_dir / f"var_{clean_var_name}_{unit}_{frequency}_b{building_id}.parquet"
-                        comparison_df.to_parquet(output_file, index=False)
+                        if self.merge_existing_comparisons and output_file.exists():
+                            comparison_df = self._merge_with_existing_comparison(
+                                pd.read_parquet(output_file), comparison_df
+                            )
+                        write_comparison_file(comparison_df, output_file)
+                        self.comparison_index.record_file(
+                            output_file, comparison_df, variable, unit, frequency, building_id
+                        )
                         files_created += 1
                 except Exception as e:
                     print(f"      Error processing {variable}: {e}")
         
         print(f"    Created {files_created} {frequency} comparison files for building {building_id}")
     
+    def _merge_with_existing_comparison(self, existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """Add the variant columns of an existing comparison file that the new one does not have"""
+        old_variant_cols = [c for c in existing.columns
+                            if c.endswith('_value') and c != 'base_value' and c not in new.columns]
+        if not old_variant_cols:
+            return new
+        
+        keys = [c for c in ['timestamp', 'Zone'] if c in existing.columns and c in new.columns]
+        shared = [c for c in ['building_id', 'variable_name', 'category', 'Units', 'base_value']
+                  if c in existing.columns and c in new.columns]
+        merged = new.merge(existing[keys + shared + old_variant_cols], on=keys, how='outer',
+                           suffixes=('', '_existing'))
+        for col in shared:
+            merged[col] = merged[col].combine_first(merged.pop(f'{col}_existing'))
+        
+        # Same column order as _create_single_variable_comparison
+        first_cols = [c for c in ['timestamp', 'building_id', 'Zone', 'variable_name', 'category', 'Units']
+                      if c in merged.columns]
+        value_cols = ['base_value'] + sorted(c for c in merged.columns if c.endswith('_value') and c != 'base_value')
+        other_cols = [c for c in merged.columns if c not in first_cols + value_cols]
+        merged = merged[[c for c in first_cols + value_cols + other_cols if c in merged.columns]]
+        return merged.sort_values(keys).reset_index(drop=True) if keys else merged
+    
     def _convert_to_semi_wide(self, df: pd.DataFrame, frequency: str) -> pd.DataFrame:
         """Convert long format to semi-wide format with dates as columns"""
         if df.empty:
@@ -42,6 +42,41 @@ def find_sql_files(job_output_dir: str, year_folders: List[str] = None) -> List[
     
     return sql_files
 
+def restore_compressed_sql(sim_results_dir: str) -> List[str]:
+    """
+    Decompress <name>.sql.zst files (written when simulations run with
+    staging compress_sql) to <name>.sql next to them, unless an up-to-date
+    .sql exists (one at least as new as the .sql.zst).
+
+    Returns:
+        Paths of the restored SQL files
+    """
+    restored = []
+    if not os.path.isdir(sim_results_dir):
+        return restored
+    compressed = [
+        p for p in Path(sim_results_dir).rglob("*.sql.zst")
+        if not p.with_suffix("").exists() or p.stat().st_mtime_ns > p.with_suffix("").stat().st_mtime_ns
+    ]
+    if not compressed:
+        return restored
+    try:
+        import zstandard
+    except ImportError:
+        print(f"[WARN] {len(compressed)} compressed SQL files in {sim_results_dir} "
+              f"but zstandard is not installed; they will be skipped")
+        return restored
+    decompressor = zstandard.ZstdDecompressor()
+    for path in compressed:
+        target = path.with_suffix("")
+        tmp = target.with_name(f".{target.name}.part{os.getpid()}")
+        with open(path, "rb") as fin, open(tmp, "wb") as fout:
+            decompressor.copy_stream(fin, fout)
+        os.replace(tmp, target)
+        restored.append(str(target))
+    return restored
+
+
 def find_sql_for_building(job_output_dir: str, building_id: str, idx: int = None) -> Optional[str]:
     """Find SQL file for a specific building"""
     sim_results_dir = os.path.join(job_output_dir, "Sim_Results")
@@ -300,4 +335,57 @@ def validate_sql_outputs(sql_file: str, expected_outputs: List[Dict[str, str]])
     except Exception as e:
         validation_result['error'] = str(e)
     
-    return validation_result
\ No newline at end of file
+    return validation_result
+
+
+# ZONE{floor} prefix of zone names and of the keys of zone objects
+# (surfaces, windows, ideal loads systems) created by idf_objects/geomz
+ZONE_FLOOR_PATTERN = re.compile(r'^(ZONE)(\d+)(?!\d)', re.IGNORECASE)
+
+
+def expand_collapsed_zones(df: pd.DataFrame, zone_multipliers: Dict[str, int],
+                           zone_col: str = 'Zone') -> pd.DataFrame:
+    """
+    Map outputs of collapsed floors back to all floors.
+
+    A zone with multiplier m > 1 on floor k (see idf_objects/geomz/floor_collapsing.py)
+    stands for the floors k - (m-1)//2 ... k - (m-1)//2 + m - 1. Its rows are
+    copied to each of those floors, with the floor index in the key replaced.
+
+    Args:
+        df: Time series with one key (zone/object name) per row
+        zone_multipliers: Zone name -> multiplier (SQL Zones table)
+        zone_col: Column holding the key
+
+    Returns:
+        DataFrame with the copied rows appended
+    """
+    floor_multipliers = {}
+    for zone_name, multiplier in zone_multipliers.items():
+        match = ZONE_FLOOR_PATTERN.match(str(zone_name))
+        if match and multiplier and int(multiplier) > 1:
+            floor_multipliers[int(match.group(2))] = int(multiplier)
+
+    if df.empty or zone_col not in df.columns or not floor_multipliers:
+        return df
+
+    keys = df[zone_col].astype(str)
+    key_floors = keys.str.extract(ZONE_FLOOR_PATTERN)[1]
+    copies = []
+    for floor_i, multiplier in floor_multipliers.items():
+        mask = key_floors == str(floor_i)
+        if not mask.any():
+            continue
+        start = floor_i - (multiplier - 1) // 2
+        for other_floor in range(start, start + multiplier):
+            if other_floor == floor_i:
+                continue
+            copy = df[mask].copy()
+            copy[zone_col] = keys[mask].str.replace(
+                ZONE_FLOOR_PATTERN, lambda m, f=other_floor: f"{m.group(1)}{f}", regex=True
+            )
+            copies.append(copy)
+
+    if not copies:
+        return df
+    return pd.concat([df] + copies, ignore_index=True)
@@ -0,0 +1,222 @@
+"""
+resource_slots.py
+
+Global CPU-slot and memory accounting shared between the job scheduler
+(job_manager.py, in the Flask process) and the job subprocesses it starts.
+
+The scheduler owns a single SlotPool. Each admitted job reserves as many slots
+as it declared `num_workers`, plus a memory estimate. While no queued job is
+waiting, idle slots are marked lendable and a running job's simulation pool
+can borrow them for the lifetime of one Pool (see `lease_workers`).
+
+Loans are recorded per job in a ledger entry inside the pool, so when a job
+process dies without returning what it borrowed (OOM kill, crash), the
+scheduler reclaims the outstanding loans when the process exits.
+
+Outside the job service (CLI runs, tests), no pool is attached and
+`lease_workers` simply returns the requested worker count.
+"""
+
+import os
+import logging
+import multiprocessing
+from contextlib import contextmanager
+from typing import Optional
+
+
+###############################################################################
+# Defaults (override via environment)
+###############################################################################
+
+def _default_total_slots() -> int:
+    return int(os.environ.get("EP_TOTAL_CPU_SLOTS", os.cpu_count() or 1))
+
+
+def _default_memory_budget_mb() -> int:
+    env_value = os.environ.get("EP_MEMORY_BUDGET_MB")
+    if env_value:
+        return int(env_value)
+    try:
+        total_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+        return int(total_mb * 0.8)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+# Memory assumed per simulation worker when a job does not declare memory_mb.
+DEFAULT_MEMORY_PER_WORKER_MB = int(os.environ.get("EP_MEMORY_PER_WORKER_MB", 1024))
+
+
+###############################################################################
+# SlotPool
+###############################################################################
+class SlotPool:
+    """
+    Process-shared counters for free CPU slots and free memory.
+
+    All counters live in shared memory created from the given multiprocessing
+    context, so the pool can be handed to spawned job processes.
+
+    Loans are tracked per ledger entry (one per running job, at most
+    total_slots since every job reserves at least one slot).
+    """
+
+    def __init__(self,
+                 total_slots: Optional[int] = None,
+                 memory_budget_mb: Optional[int] = None,
+                 ctx=None):
+        ctx = ctx or multiprocessing.get_context("spawn")
+        self.total_slots = max(1, total_slots or _default_total_slots())
+        self.memory_budget_mb = max(1, memory_budget_mb or _default_memory_budget_mb())
+
+        self._lock = ctx.Lock()
+        self._free_slots = ctx.Value("i", self.total_slots, lock=False)
+        self._free_memory_mb = ctx.Value("i", self.memory_budget_mb, lock=False)
+        self._lending_enabled = ctx.Value("b", 1, lock=False)
+        self._loaned_slots = ctx.Array("i", self.total_slots, lock=False)
+        self._loaned_memory_mb = ctx.Array("i", self.total_slots, lock=False)
+
+    # -------------------------------------------------------------------------
+    # Scheduler side
+    # -------------------------------------------------------------------------
+    def try_acquire(self, slots: int, memory_mb: int) -> bool:
+        """Reserve slots and memory for a job. Returns False if they do not fit."""
+        with self._lock:
+            if slots > self._free_slots.value or memory_mb > self._free_memory_mb.value:
+                return False
+            self._free_slots.value -= slots
+            self._free_memory_mb.value -= memory_mb
+            return True
+
+    def release(self, slots: int, memory_mb: int, ledger: Optional[int] = None) -> None:
+        """
+        Return slots and memory previously acquired or borrowed. For a loan
+        recorded under ledger, at most what is still outstanding there is
+        returned (it may already have been reclaimed).
+        """
+        with self._lock:
+            if ledger is not None:
+                slots = min(slots, self._loaned_slots[ledger])
+                memory_mb = min(memory_mb, self._loaned_memory_mb[ledger])
+                self._loaned_slots[ledger] -= slots
+                self._loaned_memory_mb[ledger] -= memory_mb
+            self._release_locked(slots, memory_mb)
+
+    def _release_locked(self, slots: int, memory_mb: int) -> None:
+        self._free_slots.value = min(self.total_slots, self._free_slots.value + slots)
+        self._free_memory_mb.value = min(self.memory_budget_mb, self._free_memory_mb.value + memory_mb)
+
+    def reclaim_loans(self, ledger: int) -> int:
+        """
+        Return whatever is still borrowed under a ledger entry (after its job
+        process exited) and clear the entry.
+
+        Returns:
+            Number of slots reclaimed
+        """
+        with self._lock:
+            slots = self._loaned_slots[ledger]
+            memory_mb = self._loaned_memory_mb[ledger]
+            self._loaned_slots[ledger] = 0
+            self._loaned_memory_mb[ledger] = 0
+            self._release_locked(slots, memory_mb)
+            return slots
+
+    def set_lending(self, enabled: bool) -> None:
+        """Allow or forbid running jobs to borrow idle slots."""
+        with self._lock:
+            self._lending_enabled.value = 1 if enabled else 0
+
+    def snapshot(self) -> dict:
+        """Current free/total counters (for status endpoints and logs)."""
+        with self._lock:
+            return {
+                "total_slots": self.total_slots,
+                "free_slots": self._free_slots.value,
+                "memory_budget_mb": self.memory_budget_mb,
+                "free_memory_mb": self._free_memory_mb.value,
+                "lending_enabled": bool(self._lending_enabled.value),
+            }
+
+    # -------------------------------------------------------------------------
+    # Job side
+    # -------------------------------------------------------------------------
+    def borrow(self, max_slots: int, memory_per_slot_mb: int, ledger: Optional[int] = None) -> int:
+        """
+        Borrow up to max_slots idle slots, if lending is enabled. With a
+        ledger entry, the loan is recorded there until it is released.
+
+        Returns:
+            Number of slots borrowed (0 if none are idle or lending is off)
+        """
+        if max_slots <= 0:
+            return 0
+        with self._lock:
+            if not self._lending_enabled.value:
+                return 0
+            by_memory = self._free_memory_mb.value // max(1, memory_per_slot_mb)
+            granted = max(0, min(max_slots, self._free_slots.value, by_memory))
+            self._free_slots.value -= granted
+            self._free_memory_mb.value -= granted * memory_per_slot_mb
+            if ledger is not None:
+                self._loaned_slots[ledger] += granted
+                self._loaned_memory_mb[ledger] += granted * memory_per_slot_mb
+            return granted
+
+
+###############################################################################
+# Per-process attachment (set in each job subprocess)
+###############################################################################
+_attached_pool: Optional[SlotPool] = None
+_reserved_slots: Optional[int] = None
+_loan_ledger: Optional[int] = None
+
+
+def attach_pool(pool: Optional[SlotPool], reserved_slots: Optional[int] = None,
+                ledger: Optional[int] = None) -> None:
+    """
+    Attach the scheduler's SlotPool in a job subprocess, with the slots the job
+    reserved and the ledger entry its loans are recorded under.
+    """
+    global _attached_pool, _reserved_slots, _loan_ledger
+    _attached_pool = pool
+    _reserved_slots = reserved_slots
+    _loan_ledger = ledger
+
+
+def get_attached_pool() -> Optional[SlotPool]:
+    return _attached_pool
+
+
+def reserved_slots() -> Optional[int]:
+    """CPU slots reserved by the current job (None outside the job service)."""
+    return _reserved_slots
+
+
+@contextmanager
+def lease_workers(requested_workers: int, max_useful_workers: Optional[int] = None):
+    """
+    Context manager yielding the number of pool workers to start.
+
+    The job already holds `requested_workers` slots. If idle slots are lendable,
+    extra workers are borrowed (never more than `max_useful_workers`, e.g. the
+    number of tasks) and returned to the pool on exit.
+
+    Usage:
+        with lease_workers(num_workers, len(tasks)) as workers:
+            with Pool(workers) as pool:
+                ...
+    """
+    requested_workers = max(1, int(requested_workers))
+    pool = _attached_pool
+    extra = 0
+    if pool is not None:
+        ceiling = max_useful_workers if max_useful_workers is not None else pool.total_slots
+        extra = pool.borrow(max(0, ceiling - requested_workers), DEFAULT_MEMORY_PER_WORKER_MB, _loan_ledger)
+        if extra:
+            logging.info(f"[lease_workers] Borrowed {extra} idle slot(s) => {requested_workers + extra} workers")
+    try:
+        yield requested_workers + extra
+    finally:
+        if extra:
+            pool.release(extra, extra * DEFAULT_MEMORY_PER_WORKER_MB, _loan_ledger)
@@ -0,0 +1,145 @@
+"""
+rule_index.py
+
+Indexed matching of user_config override rules.
+
+The find_*_overrides helpers return the rules of a rule list that apply to
+one building: a rule constrains a field only if it sets it, and all set
+fields must equal the building's value. Scanning the whole list for every
+building is O(rules x buildings). A RuleIndex groups the rules once by the
+set of fields they constrain and, within each group, hashes them on those
+fields' values. Matching a building is one dict lookup per group (at most
+2**len(fields) groups, in practice a handful), and the matches are returned
+in rule-list order, so "last match wins" logic keeps working.
+
+Wildcard conventions differ between the helpers and are kept (one for all
+fields, or a dict per field):
+    "missing": the field is absent from the rule
+    "none":    absent or None
+    "falsy":   absent or falsy ("" / None / 0)
+    None:      never a wildcard (absent counts as missing_value)
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+_MISSING = object()
+
+WildcardSpec = Union[Optional[str], Dict[str, Optional[str]]]
+
+
+def _is_wildcard(value: Any, wildcard: Optional[str]) -> bool:
+    if wildcard is None:
+        return False
+    if value is _MISSING:
+        return True
+    if wildcard == "none":
+        return value is None
+    if wildcard == "falsy":
+        return not value
+    return False
+
+
+def casefold(value: Any) -> Any:
+    """Normalizer for case-insensitive string fields"""
+    return value.lower() if isinstance(value, str) else value
+
+
+class RuleIndex:
+    """
+    Args:
+        rules: Rule dicts (non-dict entries are ignored)
+        fields: Fields that may constrain a rule
+        wildcard: Which rule values mean "any", for all fields or per field (see module docstring)
+        normalize: Per-field function applied to rule and building values
+        missing_value: Value of an absent field when wildcard is None
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Any],
+        fields: Sequence[str],
+        wildcard: WildcardSpec = "missing",
+        normalize: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        missing_value: Any = None
+    ):
+        self.fields = tuple(fields)
+        self.normalize = normalize or {}
+        self.rules = list(rules)
+        # constrained fields -> {values: [rule positions]}
+        self._groups: Dict[Tuple[str, ...], Dict[Tuple, List[int]]] = {}
+        # rules whose values cannot be hashed are checked one by one
+        self._unhashable: List[Tuple[int, Dict[str, Any]]] = []
+
+        for pos, rule in enumerate(self.rules):
+            if not isinstance(rule, dict):
+                continue
+            constraints = {}
+            for field in self.fields:
+                value = rule.get(field, _MISSING)
+                policy = wildcard.get(field, "missing") if isinstance(wildcard, dict) else wildcard
+                if _is_wildcard(value, policy):
+                    continue
+                if value is _MISSING:
+                    value = missing_value
+                constraints[field] = self._norm(field, value)
+            group = tuple(constraints)
+            key = tuple(constraints.values())
+            try:
+                self._groups.setdefault(group, {}).setdefault(key, []).append(pos)
+            except TypeError:
+                self._unhashable.append((pos, constraints))
+
+    def _norm(self, field: str, value: Any) -> Any:
+        fn = self.normalize.get(field)
+        return fn(value) if fn is not None else value
+
+    def match(self, **values: Any) -> List[Any]:
+        """Rules applying to the given field values, in rule-list order"""
+        query = {field: self._norm(field, values.get(field)) for field in self.fields}
+        positions = []
+        for group, buckets in self._groups.items():
+            try:
+                hit = buckets.get(tuple(query[field] for field in group))
+            except TypeError:
+                continue
+            if hit:
+                positions.extend(hit)
+        for pos, constraints in self._unhashable:
+            if all(query[field] == value for field, value in constraints.items()):
+                positions.append(pos)
+        positions.sort()
+        return [self.rules[pos] for pos in positions]
+
+
+_INDEX_CACHE: Dict[Tuple, Tuple[Sequence[Any], int, RuleIndex]] = {}
+_INDEX_CACHE_SIZE = 64
+
+
+def rule_index_for(
+    rules: Sequence[Any],
+    fields: Iterable[str],
+    wildcard: WildcardSpec = "missing",
+    normalize: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    missing_value: Any = None
+) -> RuleIndex:
+    """
+    RuleIndex of a rule list, built on first use and reused while the same
+    list object (with the same length) is passed in.
+    """
+    fields = tuple(fields)
+    cache_key = (
+        id(rules),
+        fields,
+        tuple(sorted(wildcard.items())) if isinstance(wildcard, dict) else wildcard,
+        tuple(sorted((normalize or {}).items(), key=lambda kv: kv[0])),
+        repr(missing_value),
+    )
+    cached = _INDEX_CACHE.get(cache_key)
+    if cached is not None and cached[0] is rules and cached[1] == len(rules):
+        return cached[2]
+    index = RuleIndex(rules, fields, wildcard, normalize, missing_value)
+    if len(_INDEX_CACHE) >= _INDEX_CACHE_SIZE:
+        _INDEX_CACHE.clear()
+    # the list itself is kept so its id cannot be reused by another list
+    _INDEX_CACHE[cache_key] = (rules, len(rules), index)
+    return index
@@ -0,0 +1,127 @@
+# test/benchmark_floor_collapsing.py - Accuracy and runtime of collapsed floors vs the full model
+#
+# For each selected building, the IDF is created twice (every floor modeled,
+# and ground/middle/top floor with zone multipliers, see
+# idf_objects/geomz/floor_collapsing.py), both are simulated with the same
+# EPW, and the annual meter totals and EnergyPlus runtimes are compared.
+#
+# Usage:
+#   python test/benchmark_floor_collapsing.py buildings.csv weather.epw [--rows 0 3 7] [--out DIR]
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import idf_creation
+from idf_creation import create_idf_for_building
+from epw.run_epw_sims import run_simulation
+
+
+def annual_meters(sql_path):
+    """Annual total of every meter in the run period, and the number of zones"""
+    conn = sqlite3.connect(str(sql_path))
+    try:
+        meters = pd.read_sql_query("""
+            SELECT rdd.Name AS meter, SUM(rd.Value) AS value
+            FROM ReportData rd
+            JOIN ReportDataDictionary rdd ON rd.ReportDataDictionaryIndex = rdd.ReportDataDictionaryIndex
+            JOIN Time t ON rd.TimeIndex = t.TimeIndex
+            WHERE rdd.IsMeter = 1
+            AND t.EnvironmentPeriodIndex IN (
+                SELECT EnvironmentPeriodIndex FROM EnvironmentPeriods WHERE EnvironmentType = 3
+            )
+            GROUP BY rdd.Name, rdd.ReportingFrequency
+        """, conn).drop_duplicates("meter").set_index("meter")["value"]
+        n_zones = pd.read_sql_query("SELECT COUNT(*) AS n FROM Zones", conn)["n"].iloc[0]
+    finally:
+        conn.close()
+    return meters, int(n_zones)
+
+
+def benchmark_building(row, idx, epw_path, out_dir):
+    """Simulate one building in both modes; returns (summary dict, meter comparison DataFrame)"""
+    building_id = row.get("ogc_fid", idx)
+    results = {}
+    for mode, collapse in (("full", False), ("collapsed", True)):
+        mode_dir = os.path.join(out_dir, mode)
+        idf_creation.idf_config["output_dir"] = mode_dir
+        idf_path = create_idf_for_building(row, idx, collapse_floors=collapse)
+        if not idf_path:
+            raise RuntimeError(f"IDF creation failed for building {building_id} ({mode})")
+
+        start = time.perf_counter()
+        ok, msg = run_simulation((idf_path, epw_path, idf_creation.idf_config["iddfile"],
+                                  mode_dir, idx, building_id))
+        runtime = time.perf_counter() - start
+        if not ok:
+            raise RuntimeError(msg)
+
+        sql_path = os.path.join(mode_dir, f"simulation_bldg{idx}_{building_id}.sql")
+        meters, n_zones = annual_meters(sql_path)
+        results[mode] = {"runtime_s": runtime, "n_zones": n_zones, "meters": meters}
+
+    comparison = pd.DataFrame({
+        "full": results["full"]["meters"],
+        "collapsed": results["collapsed"]["meters"],
+    })
+    comparison["rel_error"] = (comparison["collapsed"] - comparison["full"]) / comparison["full"].where(comparison["full"] != 0)
+    comparison.insert(0, "building_id", building_id)
+
+    summary = {
+        "building_id": building_id,
+        "num_floors": row.get("gem_bouwlagen"),
+        "zones_full": results["full"]["n_zones"],
+        "zones_collapsed": results["collapsed"]["n_zones"],
+        "runtime_full_s": results["full"]["runtime_s"],
+        "runtime_collapsed_s": results["collapsed"]["runtime_s"],
+        "speedup": results["full"]["runtime_s"] / results["collapsed"]["runtime_s"],
+        "max_abs_rel_error": comparison["rel_error"].abs().max(),
+    }
+    return summary, comparison.rename_axis("meter").reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark collapsed floors against the full model")
+    parser.add_argument("buildings_csv")
+    parser.add_argument("epw")
+    parser.add_argument("--rows", type=int, nargs="*", help="Row indices to benchmark (default: all 4+ floor buildings)")
+    parser.add_argument("--out", default="output/floor_collapsing_benchmark")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.buildings_csv)
+    if args.rows:
+        df = df.loc[args.rows]
+    else:
+        df = df[pd.to_numeric(df.get("gem_bouwlagen"), errors="coerce") >= 4]
+
+    summaries, comparisons = [], []
+    for idx, row in df.iterrows():
+        print(f"Benchmarking building {row.get('ogc_fid', idx)} ({row.get('gem_bouwlagen')} floors)")
+        try:
+            summary, comparison = benchmark_building(row, idx, args.epw, args.out)
+        except Exception as e:
+            print(f"  Failed: {e}")
+            continue
+        summaries.append(summary)
+        comparisons.append(comparison)
+        print(f"  zones {summary['zones_full']} -> {summary['zones_collapsed']}, "
+              f"speedup {summary['speedup']:.1f}x, max |rel. error| {summary['max_abs_rel_error']:.2%}")
+
+    if not summaries:
+        print("No buildings benchmarked")
+        return
+    os.makedirs(args.out, exist_ok=True)
+    pd.DataFrame(summaries).to_csv(os.path.join(args.out, "summary.csv"), index=False)
+    pd.concat(comparisons, ignore_index=True).to_csv(os.path.join(args.out, "meter_comparison.csv"), index=False)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
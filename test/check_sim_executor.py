@@ -0,0 +1,147 @@
+# test/check_sim_executor.py - Exercise epw/sim_executor.py with a stub EnergyPlus
+#
+# Writes a small Python script that accepts the EnergyPlus command line and
+# produces <prefix>.sql/.err/.end/.eso (and <prefix>.csv with --readvars),
+# failing when the IDF contains "FAIL". Runs tasks serially and through a
+# Pool with init_worker, and checks that only the kept outputs reach the
+# result directory, that no partial (.part) files are left behind, that the
+# scratch directory is emptied after each run, that each worker reuses one
+# scratch directory, that a pool under run_scratch_root leaves no worker
+# scratch directories behind and that a stale .sql.zst of an earlier run is
+# removed when the plain .sql is published. Finally, runs building variants
+# with HVACTemplate objects and checks that ExpandObjects runs once per
+# distinct template set and that the other variants get the cached objects
+# spliced in (the stub leaves the expansion as <prefix>.expidf like the
+# EnergyPlus CLI), and that changing the IDD invalidates the cached fragments.
+#
+# Usage:
+#   python test/check_sim_executor.py
+
+import os
+import sys
+import stat
+import tempfile
+from pathlib import Path
+from functools import partial
+from multiprocessing import Pool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epw.expand_cache import split_idf_objects
+from epw.sim_executor import init_worker, run_energyplus_task, choose_scratch_root, run_scratch_root, _WORKER_STATE
+
+STUB = '''#!{python}
+import os, sys, argparse
+p = argparse.ArgumentParser()
+p.add_argument("--weather"); p.add_argument("--output-directory"); p.add_argument("--idd")
+p.add_argument("--output-prefix"); p.add_argument("--output-suffix")
+p.add_argument("--expandobjects", action="store_true"); p.add_argument("--readvars", action="store_true")
+p.add_argument("idf")
+a = p.parse_args()
+out = os.path.join(a.output_directory, a.output_prefix)
+exts = [".sql", ".err", ".end", ".eso", "Table.htm"] + ([".csv"] if a.readvars else [])
+for ext in exts:
+    with open(out + ext, "w") as f:
+        f.write(os.getcwd())
+text = open(a.idf).read()
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs.log"), "a") as log:
+    log.write(f"{{os.path.basename(a.idf)}} expand={{a.expandobjects}} generated={{'ZONEHVAC:' in text.upper()}}\\n")
+if a.expandobjects:
+    # stand-in for ExpandObjects: templates replaced by one generated object each
+    objs = [o.strip() for o in text.split(";") if o.strip()]
+    out_objs = [o for o in objs if not o.upper().startswith("HVACTEMPLATE:")]
+    out_objs += ["ZoneHVAC:IdealLoadsAirSystem," + o.split(",")[1] + " IdealLoads"
+                 for o in objs if o.upper().startswith("HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM")]
+    with open(os.path.join(os.getcwd(), "expanded.idf"), "w") as f:
+        f.write(";\\n".join(out_objs) + ";\\n")
+    # like the CLI: expanded.idf ends up as <prefix>.expidf in the output directory
+    os.replace(os.path.join(os.getcwd(), "expanded.idf"), out + ".expidf")
+sys.exit(1 if "FAIL" in open(a.idf).read() else 0)
+'''
+
+
+def scratch_of(_):
+    return _WORKER_STATE["scratch"]
+
+
+def main():
+    work = Path(tempfile.mkdtemp(prefix="check_sim_executor_"))
+    exe = work / "energyplus"
+    exe.write_text(STUB.format(python=sys.executable))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    (work / "Energy+.idd").write_text("")
+    (work / "weather.epw").write_text("")
+    tasks = []
+    for i in range(6):
+        idf = work / f"b{i}.idf"
+        idf.write_text("FAIL" if i == 5 else "Version,22.2;")
+        tasks.append((str(idf), str(work / "weather.epw"), str(work / "Energy+.idd"), str(work / "out"), i, 100 + i))
+
+    init_worker(str(exe), str(work / "Energy+.idd"), str(work / "scratch"))
+    (work / "out").mkdir()
+    (work / "out" / "simulation_bldg0_100.sql.zst").write_text("stale")
+    ok, msg = run_energyplus_task(tasks[0], readvars=False)
+    kept = sorted(p.name for p in (work / "out").iterdir())
+    assert ok, msg
+    assert kept == ["simulation_bldg0_100.end", "simulation_bldg0_100.err", "simulation_bldg0_100.sql"], kept
+    assert not os.listdir(_WORKER_STATE["scratch"]), "scratch not emptied"
+    print(f"serial run OK, kept {kept}")
+
+    init_worker(str(exe), str(work / "Energy+.idd"), staging={"scratch_root": str(work / "scratch2"),
+                                                             "keep_suffixes": [".sql", ".eso"]})
+    ok, msg = run_energyplus_task(tasks[0][:3] + (str(work / "out2"),) + tasks[0][4:], readvars=False)
+    kept = sorted(p.name for p in (work / "out2").iterdir())
+    assert ok, msg
+    assert kept == ["simulation_bldg0_100.eso", "simulation_bldg0_100.sql"], kept
+    print(f"staging keep_suffixes OK, kept {kept}; auto scratch root here: {choose_scratch_root()}")
+
+    with Pool(2, initializer=init_worker, initargs=(str(exe), str(work / "Energy+.idd"), str(work / "scratch"))) as pool:
+        results = pool.map(partial(run_energyplus_task, readvars=True), tasks[1:], chunksize=1)
+        scratches = set(pool.map(scratch_of, range(8), chunksize=1))
+    assert [r[0] for r in results] == [True, True, True, True, False], results
+    assert (work / "out" / "simulation_bldg5_105.err").exists(), "err of failed run not kept"
+    assert not list((work / "out").glob("*.eso")), "eso should stay in scratch"
+    assert not list((work / "out").glob(".*.part*")), "partial outputs left behind"
+    assert len(scratches) <= 2, scratches
+    print(f"pool runs OK: {sum(r[0] for r in results)}/4 succeeded, 1 failure reported, "
+          f"{len(scratches)} worker scratch dirs")
+
+    staging = {"scratch_root": str(work / "scratch4")}
+    with run_scratch_root(staging) as run_root, \
+            Pool(2, initializer=init_worker, initargs=(str(exe), str(work / "Energy+.idd"), run_root, staging)) as pool:
+        pool.map(partial(run_energyplus_task, readvars=False), tasks[1:3], chunksize=1)
+        assert os.listdir(run_root), "no worker scratch dirs under the run root"
+    assert not os.listdir(work / "scratch4"), os.listdir(work / "scratch4")
+    print("run scratch root OK: worker scratch dirs removed after the pool")
+
+    (work / "runs.log").write_text("")
+    variants = []
+    for i, (setpoint, load) in enumerate([("T1", 5), ("T1", 8), ("T2", 5), ("T1", 12)]):
+        idf = work / f"v{i}.idf"
+        idf.write_text(f"Version,22.2;\nZone,Z1;\nLights,L1,Z1,{load};\n"
+                       f"HVACTemplate:Thermostat,{setpoint},,20;\n"
+                       f"HVACTemplate:Zone:IdealLoadsAirSystem,Z1,{setpoint};\n")
+        variants.append((str(idf), str(work / "weather.epw"), str(work / "Energy+.idd"), str(work / "out3"), i, 200 + i))
+    init_worker(str(exe), str(work / "Energy+.idd"), staging={"scratch_root": str(work / "scratch3"),
+                                                             "expand_cache_dir": str(work / "ep_expand_cache")})
+    results = [run_energyplus_task(task, readvars=False) for task in variants]
+    runs = (work / "runs.log").read_text().split()
+    assert all(ok for ok, _ in results), results
+    assert runs[1::3] == ["expand=True", "expand=False", "expand=True", "expand=False"], runs
+    assert runs[2::3] == ["generated=False", "generated=True", "generated=False", "generated=True"], runs
+    assert len(list((work / "ep_expand_cache").glob("*.idf"))) == 2
+    ok, _ = run_energyplus_task(tasks[0][:3] + (str(work / "out3"),) + tasks[0][4:], readvars=False)
+    assert ok and (work / "runs.log").read_text().splitlines()[-1].endswith("expand=False generated=False")
+    fragment = split_idf_objects(next((work / "ep_expand_cache").glob("*.idf")).read_text())
+    (work / "Energy+.idd").write_text("!IDD_Version 23.1.0\n")
+    ok, _ = run_energyplus_task(variants[1][:3] + (str(work / "out3"),) + variants[1][4:], readvars=False)
+    assert ok and (work / "runs.log").read_text().splitlines()[-1].endswith("expand=True generated=False"), \
+        "cached fragment reused after the IDD changed"
+    assert len(list((work / "ep_expand_cache").glob("*.idf"))) == 3
+    print(f"expand cache OK: {runs.count('expand=True')} expansions for 4 variants, "
+          f"cached fragment {fragment}; no expansion without templates")
+    print(f"work dir: {work}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# test/check_validation_alignment.py - Alignment of measured and simulated data
+#
+# Builds 30 days of matching measured/simulated electricity for two
+# buildings and checks that SmartValidationWrapper.align_all_mappings
+# aligns every row in single-configuration mode (no config column) and per
+# configuration when sim data carries a config_name column, and that
+# _evaluate_aligned produces one result per building.
+#
+# Usage:
+#   python test/check_validation_alignment.py
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from validation.smart_validation_wrapper import SmartValidationWrapper, ValidationMapping, SINGLE_CONFIG
+
+
+def long_frame(buildings, days, variable, scale):
+    rows = []
+    for building_id in buildings:
+        for i, day in enumerate(days):
+            rows.append({'building_id': building_id, 'DateTime': day, 'Variable': variable,
+                         'Value': scale * (100.0 + 5 * np.sin(i)), 'Units': 'J'})
+    return pd.DataFrame(rows)
+
+
+def main():
+    work = Path(tempfile.mkdtemp(prefix="check_validation_alignment_"))
+    wrapper = SmartValidationWrapper(str(work), str(work / "real.csv"), {})
+    days = pd.date_range("2020-01-01", periods=15, freq="D")
+    real = long_frame(["1", "2"], days, "Electricity", 1.0)
+    sim = long_frame(["1", "2"], days, "Electricity:Facility", 1.05)
+    mapping = ValidationMapping(real_var="Electricity", sim_var="Electricity:Facility",
+                                confidence=1.0, match_type="exact")
+
+    aligned, infos = wrapper.align_all_mappings(real, sim, [mapping])
+    assert len(aligned) == 30, f"single config aligned {len(aligned)} of 30 rows: {infos}"
+    assert infos[(SINGLE_CONFIG, 0)]['aligned_count'] == 30, infos
+    assert not infos[(SINGLE_CONFIG, 0)]['issues'], infos
+    results = wrapper._evaluate_aligned(aligned, [mapping], infos)[SINGLE_CONFIG]
+    assert sorted(r['building_id'] for r in results) == ["1", "2"], results
+    print(f"single config OK: {len(aligned)} rows aligned, {len(results)} building results")
+
+    single, info = wrapper.align_and_validate_mapping(real, sim, mapping)
+    assert len(single) == 30 and info['aligned_count'] == 30, info
+    print("align_and_validate_mapping OK")
+
+    sim_multi = pd.concat([sim.assign(config_name="base"), sim.assign(config_name="variant_0")],
+                          ignore_index=True)
+    aligned, infos = wrapper.align_all_mappings(real, sim_multi, [mapping], config_col='config_name')
+    counts = aligned.groupby('config_name').size().to_dict()
+    assert counts == {"base": 30, "variant_0": 30}, counts
+    print(f"per configuration OK: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# test/compare_idf_backends.py - Check the text IDF backend against the geomeppy path
+#
+# For each selected building, the IDF is created with idf_backend="eppy" and
+# idf_backend="text" (see idf_text.py) using the same seed, and the two files
+# are compared object by object with idf_text.compare_idf_files. Build times
+# of both backends are reported.
+#
+# Usage:
+#   python test/compare_idf_backends.py buildings.csv [--rows 0 3 7] [--out DIR]
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import idf_creation
+from idf_creation import create_idf_for_building
+from idf_text import compare_idf_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare IDFs built with the eppy and text backends")
+    parser.add_argument("buildings_csv")
+    parser.add_argument("--rows", type=int, nargs="*", help="Row indices to compare (default: all)")
+    parser.add_argument("--out", default="output/idf_backend_comparison")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.buildings_csv)
+    if args.rows:
+        df = df.loc[args.rows]
+
+    n_equal = 0
+    times = {"eppy": 0.0, "text": 0.0}
+    for idx, row in df.iterrows():
+        paths = {}
+        for backend in ("eppy", "text"):
+            idf_creation.idf_config["output_dir"] = os.path.join(args.out, backend)
+            start = time.perf_counter()
+            paths[backend] = create_idf_for_building(row, idx, idf_backend=backend)
+            times[backend] += time.perf_counter() - start
+        if not all(paths.values()):
+            print(f"Building {row.get('ogc_fid', idx)}: IDF creation failed ({paths})")
+            continue
+
+        differences = compare_idf_files(paths["eppy"], paths["text"], iddfile=idf_creation.idf_config["iddfile"])
+        if differences:
+            print(f"Building {row.get('ogc_fid', idx)}: {len(differences)} differences")
+            for line in differences[:20]:
+                print(f"  {line}")
+        else:
+            n_equal += 1
+
+    print(f"{n_equal}/{len(df)} buildings equivalent; "
+          f"build time eppy {times['eppy']:.1f}s, text {times['text']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
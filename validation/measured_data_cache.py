@@ -0,0 +1,345 @@
+# validation/measured_data_cache.py
+"""
+Measured Data Cache - one-time conversion of measured-data CSVs into a typed,
+building-partitioned parquet dataset shared by validation and calibration.
+
+The cache lives next to the source file (or under EP_MEASURED_CACHE_DIR) in
+  .measured_cache/<file stem>-v<version>-<sha256 prefix>/building_id=<id>/*.parquet
+and is keyed on the content hash of the source, so an edited file simply
+produces a new cache entry (older entries of the same file are removed).
+
+Long-format files (building_id, DateTime, Variable, Value[, Units]) are
+normalized once: column names are matched case-insensitively, units are
+inferred per unique variable, the datetime format is detected on a sample and
+applied to the whole column, and the data frequency is detected. The detected
+format and frequency are stored in the parquet schema metadata.
+
+Any other layout (e.g. the wide BuildingID/VariableName calibration format)
+is cached as-is, partitioned by BuildingID when that column exists.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    pa = None
+    pq = None
+    HAVE_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalization below changes, so existing caches are rebuilt
+CACHE_VERSION = 1
+METADATA_KEY = b"measured_data"
+ROW_ORDER_COL = "__row"
+
+LONG_FORMAT_COLUMNS = ['building_id', 'DateTime', 'Variable', 'Value']
+
+DATETIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+]
+
+# Number of distinct datetime strings used to detect the format
+DATETIME_SAMPLE_SIZE = 500
+
+# In-process memo: (path, size, mtime_ns) -> sha256, so repeated loads of an
+# unchanged file in the same process do not re-hash it.
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+###############################################################################
+# Source hashing and cache location
+###############################################################################
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content (memoized per process on size and mtime)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        _hash_memo[key] = digest.hexdigest()
+    return _hash_memo[key]
+
+
+def default_cache_root(source_path: str) -> str:
+    """EP_MEASURED_CACHE_DIR, or a .measured_cache folder next to the source."""
+    env_dir = os.environ.get("EP_MEASURED_CACHE_DIR")
+    if env_dir:
+        return env_dir
+    return os.path.join(os.path.dirname(os.path.abspath(source_path)), ".measured_cache")
+
+
+def _cache_dir_for(source_path: str, source_hash: str, cache_root: str) -> Tuple[str, str]:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_root, f"{stem}-v{CACHE_VERSION}-{source_hash[:16]}"), stem
+
+
+###############################################################################
+# Normalization (long format)
+###############################################################################
+def _match_columns(df: pd.DataFrame, required: List[str]) -> pd.DataFrame:
+    """Rename case variations of the required columns (e.g. 'datetime')."""
+    col_mapping = {}
+    for req_col in required:
+        if req_col in df.columns:
+            continue
+        for actual_col in df.columns:
+            if req_col.lower() == str(actual_col).lower():
+                col_mapping[actual_col] = req_col
+                break
+    if col_mapping:
+        logger.info(f"  - Renamed columns: {col_mapping}")
+        df = df.rename(columns=col_mapping)
+    return df
+
+
+def is_long_format(df: pd.DataFrame) -> bool:
+    lower = {str(c).lower() for c in df.columns}
+    return all(c.lower() in lower for c in LONG_FORMAT_COLUMNS)
+
+
+def detect_datetime_format(values: pd.Series) -> Optional[str]:
+    """
+    Find the first known format that parses a sample of the distinct values.
+
+    Returns:
+        The strftime format, or None if none of DATETIME_FORMATS fits
+    """
+    sample = pd.Series(values.dropna().astype(str).unique()[:DATETIME_SAMPLE_SIZE])
+    if sample.empty:
+        return None
+    for fmt in DATETIME_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt)
+            return fmt
+        except (ValueError, TypeError):
+            logger.debug(f"    Failed to parse with format: {fmt}")
+    return None
+
+
+def parse_datetime_column(values: pd.Series) -> Tuple[pd.Series, Optional[str]]:
+    """
+    Parse a datetime column with the format detected on a sample.
+
+    Falls back to trying every format on the full column (the sample may not
+    contain the ambiguous values), then to pandas auto-detection.
+
+    Returns:
+        (parsed series, format used or None for auto-detection)
+    """
+    fmt = detect_datetime_format(values)
+    candidates = ([fmt] if fmt else []) + [f for f in DATETIME_FORMATS if f != fmt]
+    for candidate in candidates:
+        try:
+            return pd.to_datetime(values, format=candidate), candidate
+        except (ValueError, TypeError):
+            continue
+    return pd.to_datetime(values), None
+
+
+def detect_frequency(df: pd.DataFrame) -> Optional[str]:
+    """'hourly', 'daily' or 'other' from the modal step per building/variable."""
+    if len(df) < 2:
+        return None
+    time_diffs = df.groupby(['building_id', 'Variable'])['DateTime'].diff().dropna()
+    if time_diffs.empty:
+        return None
+    mode_diff = time_diffs.mode()
+    if mode_diff.empty:
+        return None
+    hours = mode_diff.iloc[0].total_seconds() / 3600
+    if hours < 1.5:
+        return 'hourly'
+    elif hours < 25:
+        return 'daily'
+    return 'other'
+
+
+def normalize_long_format(df: pd.DataFrame,
+                          infer_units: Optional[Callable[[str], str]] = None
+                          ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Normalize a long-format measured-data frame.
+
+    Args:
+        df: Raw frame as read from CSV
+        infer_units: Variable name -> unit, used when there is no Units column
+
+    Returns:
+        (normalized frame, metadata with datetime_format, frequency, units_inferred)
+    """
+    df = _match_columns(df, LONG_FORMAT_COLUMNS + ['Units'])
+    meta: Dict[str, Any] = {"layout": "long", "units_inferred": False}
+
+    if 'Units' not in df.columns and infer_units is not None:
+        variables = df['Variable'].unique()
+        units = {var: infer_units(var) for var in variables}
+        df['Units'] = df['Variable'].map(units)
+        meta["units_inferred"] = True
+        logger.info(f"  - Inferred units for {len(units)} variables")
+
+    df['DateTime'], meta["datetime_format"] = parse_datetime_column(df['DateTime'])
+    df['building_id'] = df['building_id'].astype(str)
+    meta["frequency"] = detect_frequency(df)
+    return df, meta
+
+
+###############################################################################
+# Parquet round trip
+###############################################################################
+def _write_dataset(df: pd.DataFrame, meta: Dict[str, Any], cache_dir: str,
+                   partition_col: Optional[str]) -> None:
+    """Write the frame to a temporary directory and move it into place."""
+    df = df.copy()
+    df[ROW_ORDER_COL] = range(len(df))
+    if partition_col:
+        meta["partition_col"] = partition_col
+        meta["partition_dtype"] = str(df[partition_col].dtype)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(meta, default=str).encode(),
+    })
+
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if partition_col:
+        pq.write_to_dataset(table, tmp_dir, partition_cols=[partition_col])
+    else:
+        os.makedirs(tmp_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(tmp_dir, "data.parquet"))
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # Another process finished the same cache first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def read_cache_metadata(cache_dir: str) -> Dict[str, Any]:
+    """Metadata stored with a cached dataset."""
+    schema = pq.ParquetDataset(cache_dir).schema
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def _read_dataset(cache_dir: str, meta: Dict[str, Any],
+                  buildings: Optional[List[Any]] = None) -> pd.DataFrame:
+    partition_col = meta.get("partition_col")
+    filters = None
+    if buildings is not None and partition_col:
+        filters = [(partition_col, 'in', [str(b) for b in buildings])]
+
+    table = pq.read_table(cache_dir, filters=filters)
+    df = table.to_pandas()
+    if partition_col and partition_col in df.columns:
+        # Partition keys come back as categoricals of strings
+        df[partition_col] = df[partition_col].astype(str).astype(meta.get("partition_dtype", "object"))
+
+    # Restore the source row order and column order
+    df = df.sort_values(ROW_ORDER_COL).drop(columns=ROW_ORDER_COL).reset_index(drop=True)
+    columns = meta.get("columns")
+    if columns and set(columns) == set(df.columns):
+        df = df[columns]
+    return df
+
+
+def _prune_old_entries(cache_root: str, stem: str, keep: str) -> None:
+    """Remove cache entries of earlier versions of the same source file."""
+    pattern = re.compile(rf"^{re.escape(stem)}-v\d+-[0-9a-f]{{16}}$")
+    try:
+        for name in os.listdir(cache_root):
+            path = os.path.join(cache_root, name)
+            if pattern.match(name) and path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+    except OSError:
+        pass
+
+
+###############################################################################
+# Public entry point
+###############################################################################
+def load_measured_data(source_path: str,
+                       infer_units: Optional[Callable[[str], str]] = None,
+                       buildings: Optional[List[Any]] = None,
+                       cache_root: Optional[str] = None,
+                       use_cache: bool = True) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Load measured data through the parquet cache, building it on first use.
+
+    Args:
+        source_path: Measured-data CSV
+        infer_units: Variable name -> unit for long-format files without Units
+        buildings: Only load these building IDs (read from their partitions)
+        cache_root: Cache directory (default: see default_cache_root)
+        use_cache: False to always parse the CSV (nothing is written)
+
+    Returns:
+        (DataFrame, metadata dict with layout, datetime_format, frequency,
+         source_sha256 and cache_dir)
+    """
+    if not HAVE_PYARROW:
+        use_cache = False
+
+    source_hash = file_sha256(source_path)
+    cache_root = cache_root or default_cache_root(source_path)
+    cache_dir, stem = _cache_dir_for(source_path, source_hash, cache_root)
+
+    if use_cache and os.path.isdir(cache_dir):
+        try:
+            meta = read_cache_metadata(cache_dir)
+            df = _read_dataset(cache_dir, meta, buildings)
+            meta["cache_dir"] = cache_dir
+            logger.info(f"  - Loaded measured data from cache: {cache_dir}")
+            return df, meta
+        except Exception as e:
+            logger.warning(f"  - Measured data cache unreadable, rebuilding: {e}")
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    df = pd.read_csv(source_path)
+    if is_long_format(df):
+        df, meta = normalize_long_format(df, infer_units)
+        partition_col = 'building_id'
+    else:
+        meta = {"layout": "wide" if 'BuildingID' in df.columns else "raw",
+                "datetime_format": None, "frequency": None}
+        partition_col = 'BuildingID' if 'BuildingID' in df.columns else None
+    meta["source_sha256"] = source_hash
+    meta["columns"] = [str(c) for c in df.columns]
+
+    if use_cache:
+        try:
+            os.makedirs(cache_root, exist_ok=True)
+            _write_dataset(df, dict(meta), cache_dir, partition_col)
+            _prune_old_entries(cache_root, stem, keep=cache_dir)
+            meta["cache_dir"] = cache_dir
+            logger.info(f"  - Cached measured data as parquet: {cache_dir}")
+        except Exception as e:
+            # Mixed-type columns or a read-only location: work from the CSV
+            logger.warning(f"  - Could not cache measured data: {e}")
+            shutil.rmtree(f"{cache_dir}.tmp-{os.getpid()}", ignore_errors=True)
+
+    if buildings is not None and partition_col:
+        wanted = {str(b) for b in buildings}
+        df = df[df[partition_col].astype(str).isin(wanted)].reset_index(drop=True)
+    return df, meta
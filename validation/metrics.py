@@ -110,4 +110,67 @@ def analyze_ramp_rates(obs_values, sim_values):
         "ramp_rate_sim_mean_abs": np.mean(np.abs(sim_ramps)),
         "ramp_rate_obs_max_abs": np.max(np.abs(obs_ramps)),
         "ramp_rate_sim_max_abs": np.max(np.abs(sim_ramps)),
-    }
\ No newline at end of file
+    }
+
+
+def grouped_validation_metrics(df, group_cols, obs_col='Real_Value', sim_col='Sim_Value', n_peaks=5):
+    """
+    Computes CV(RMSE), NMBE, MBE, R² and the peak metrics for every group of an
+    aligned dataframe in one groupby pass (same definitions as the functions
+    above, built from per-group sums instead of one call per group).
+
+    :param df: Aligned data with one row per (group..., period).
+    :param group_cols: Columns identifying a series, e.g. ['building_id', 'mapping_idx'].
+    :param obs_col: Column with observed values.
+    :param sim_col: Column with simulated values.
+    :param n_peaks: The number of top observed peaks to compare.
+    :return: DataFrame indexed by group_cols with columns data_points, cvrmse, nmbe,
+             mbe, r2, peak_avg_obs_val, peak_avg_sim_val, peak_avg_magnitude_diff_pct.
+    """
+    obs = df[obs_col].to_numpy(dtype=float)
+    sim = df[sim_col].to_numpy(dtype=float)
+    err = sim - obs
+
+    work = df[group_cols].copy()
+    work['_obs'] = obs
+    work['_sim'] = sim
+    work['_err'] = err
+    work['_err2'] = err ** 2
+    work['_obs2'] = obs ** 2
+
+    grouped = work.groupby(group_cols, sort=False)
+    sums = grouped[['_obs', '_sim', '_err', '_err2', '_obs2']].sum()
+    n = grouped.size().astype(float)
+    obs_sum = sums['_obs']
+    obs_mean = obs_sum / n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid_mean = obs_mean.where(obs_mean != 0)
+        cvrmse = np.sqrt(sums['_err2'] / n) / valid_mean * 100.0
+        nmbe_values = sums['_err'] / (n * valid_mean) * 100.0
+        mbe = sums['_err'] / obs_sum.where(obs_sum != 0) * 100.0
+        ss_tot = sums['_obs2'] - n * obs_mean ** 2
+        r2 = 1.0 - sums['_err2'] / ss_tot.where(ss_tot > 0)
+
+    result = sums[[]].copy()
+    result['data_points'] = n.astype(int)
+    result['cvrmse'] = cvrmse
+    result['nmbe'] = nmbe_values
+    result['mbe'] = mbe
+    result['r2'] = r2
+
+    # Peaks: the n_peaks largest observed values of each group (groups shorter than n_peaks get NaN)
+    work['_rank'] = grouped['_obs'].rank(method='first', ascending=False)
+    peaks = work[work['_rank'] <= n_peaks].copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peaks['_diff_pct'] = np.abs(peaks['_obs'] - peaks['_sim']) / peaks['_obs'].where(peaks['_obs'] != 0) * 100.0
+    peak_stats = peaks.groupby(group_cols, sort=False).agg(
+        peak_avg_obs_val=('_obs', 'mean'),
+        peak_avg_sim_val=('_sim', 'mean'),
+        peak_avg_magnitude_diff_pct=('_diff_pct', 'mean'),
+    )
+    result = result.join(peak_stats)
+    short = result['data_points'] < n_peaks
+    result.loc[short, ['peak_avg_obs_val', 'peak_avg_sim_val', 'peak_avg_magnitude_diff_pct']] = np.nan
+
+    return result
@@ -16,10 +16,14 @@ from collections import defaultdict
 import json
 
 # Import metrics
-from validation.metrics import cv_rmse, nmbe, mean_bias_error
+from validation.metrics import cv_rmse, nmbe, mean_bias_error, grouped_validation_metrics
+from validation.measured_data_cache import load_measured_data
 
 logger = logging.getLogger(__name__)
 
+# Configuration key of sim data without a config column (groupby drops None keys)
+SINGLE_CONFIG = '__single__'
+
 
 @dataclass
 class ValidationMapping:
@@ -49,6 +53,8 @@ class ValidationConfig:
             'power': 'mean'
         })
         self.year_agnostic_matching = config.get('year_agnostic_matching', False)
+        # Serve measured data from the parquet cache (validation/measured_data_cache.py)
+        self.use_measured_data_cache = config.get('use_measured_data_cache', True)
         
         # Thresholds
         self.thresholds = config.get('thresholds', {})
@@ -388,95 +394,35 @@ class SmartValidationWrapper:
         """Load real data with flexible parsing"""
         self._log_step("Loading real/measured data...")
         
-        # Load the data
+        # Load the data (parsed once, then served from the parquet cache)
         logger.info(f"  - Reading from: {self.real_data_path}")
-        real_df = pd.read_csv(self.real_data_path)
+        real_df, meta = load_measured_data(
+            str(self.real_data_path),
+            infer_units=self._infer_units_from_variable,
+            use_cache=self.config.use_measured_data_cache
+        )
         logger.info(f"  - Loaded {len(real_df):,} rows")
         
-        # Check required columns
-        required = ['building_id', 'DateTime', 'Variable', 'Value']
-        missing = [col for col in required if col not in real_df.columns]
-        
-        # Handle case variations
-        if missing:
-            # Try case-insensitive matching
-            col_mapping = {}
-            for req_col in missing:
-                for actual_col in real_df.columns:
-                    if req_col.lower() == actual_col.lower():
-                        col_mapping[actual_col] = req_col
-                        break
-            
-            if col_mapping:
-                real_df = real_df.rename(columns=col_mapping)
-                logger.info(f"  - Renamed columns: {col_mapping}")
+        if meta.get('layout') != 'long':
+            missing = [col for col in ['building_id', 'DateTime', 'Variable', 'Value']
+                       if col not in real_df.columns]
+            raise ValueError(f"Measured data is missing required columns: {missing}")
         
-        # Add Units column if missing - infer from variable names
+        # Cache written by a loader that did not infer units
         if 'Units' not in real_df.columns:
             logger.info("  - Units column missing, inferring from variable names...")
-            real_df['Units'] = real_df['Variable'].apply(self._infer_units_from_variable)
-            logger.info(f"  - Added Units column with inferred values")
-            
-            # Log unique units inferred
-            unique_units = real_df.groupby('Variable')['Units'].first()
+            units = {var: self._infer_units_from_variable(var) for var in real_df['Variable'].unique()}
+            real_df['Units'] = real_df['Variable'].map(units)
+        
+        if meta.get('units_inferred'):
             logger.debug("  - Inferred units:")
-            for var, unit in unique_units.items():
+            for var, unit in real_df.groupby('Variable')['Units'].first().items():
                 logger.debug(f"    {var}: {unit}")
         
-        # Parse DateTime with multiple format attempts
-        if 'DateTime' in real_df.columns:
-            logger.info("  - Parsing datetime values...")
-            
-            # Try multiple formats
-            datetime_formats = [
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%d',
-                '%m/%d/%Y',
-                '%m/%d/%Y %H:%M:%S',
-                '%d/%m/%Y',
-                '%d/%m/%Y %H:%M:%S',
-                '%Y/%m/%d',
-                '%Y/%m/%d %H:%M:%S',
-            ]
-            
-            parsed = False
-            for fmt in datetime_formats:
-                try:
-                    real_df['DateTime'] = pd.to_datetime(real_df['DateTime'], format=fmt)
-                    parsed = True
-                    logger.info(f"    Successfully parsed with format: {fmt}")
-                    break
-                except:
-                    logger.debug(f"    Failed to parse with format: {fmt}")
-                    continue
-            
-            if not parsed:
-                # Try pandas auto-detection
-                try:
-                    real_df['DateTime'] = pd.to_datetime(real_df['DateTime'], infer_datetime_format=True)
-                    logger.info("    Successfully parsed with pandas auto-detection")
-                except Exception as e:
-                    logger.error(f"    Failed to parse DateTime: {e}")
-                    raise
-        
-        # Ensure building_id is string for consistency
-        if 'building_id' in real_df.columns:
-            real_df['building_id'] = real_df['building_id'].astype(str)
-        
-        # Detect data frequency
-        if 'DateTime' in real_df.columns and len(real_df) > 1:
-            time_diffs = real_df.groupby(['building_id', 'Variable'])['DateTime'].diff().dropna()
-            if not time_diffs.empty:
-                mode_diff = time_diffs.mode()
-                if not mode_diff.empty:
-                    hours = mode_diff.iloc[0].total_seconds() / 3600
-                    if hours < 1.5:
-                        freq = 'hourly'
-                    elif hours < 25:
-                        freq = 'daily'
-                    else:
-                        freq = 'other'
-                    logger.info(f"  - Detected frequency: {freq}")
+        if meta.get('datetime_format'):
+            logger.info(f"  - Datetime format: {meta['datetime_format']}")
+        if meta.get('frequency'):
+            logger.info(f"  - Detected frequency: {meta['frequency']}")
         
         # Log data summary
         buildings = real_df['building_id'].unique() if 'building_id' in real_df.columns else []
@@ -576,7 +522,8 @@ class SmartValidationWrapper:
         
         return df_long
     
-    def _load_from_comparison_files(self, discovery: Dict[str, Any], target_freq: str, variant_id: Optional[str] = None) -> pd.DataFrame:
+    def _load_from_comparison_files(self, discovery: Dict[str, Any], target_freq: str, variant_id: Optional[str] = None,
+                                    config_names: Optional[List[str]] = None) -> pd.DataFrame:
         """Load simulation data from comparison files (for modified results)
         
         Args:
@@ -584,11 +531,17 @@ class SmartValidationWrapper:
             target_freq: Target frequency (daily, monthly, etc.)
             variant_id: Optional variant ID to load (e.g., 'variant_0', 'variant_1', etc.)
                        If None, loads base values
+            config_names: Load several configurations ('base', 'variant_0', ...) from a
+                       single read of each file; rows are tagged with a config_name column
         """
         comparison_data = []
         
-        # Determine which column to use for values
-        value_column = f'{variant_id}_value' if variant_id else 'base_value'
+        # Determine which column(s) to use for values
+        if config_names:
+            value_columns = {name: ('base_value' if name == 'base' else f'{name}_value') for name in config_names}
+            value_column = value_columns[config_names[0]]
+        else:
+            value_column = f'{variant_id}_value' if variant_id else 'base_value'
         
         # Priority order for loading comparison files based on target frequency
         if target_freq == 'daily':
@@ -627,7 +580,12 @@ class SmartValidationWrapper:
                             df = pd.read_parquet(file_info['file'])
                             
                             # Check if the requested value column exists
-                            if value_column not in df.columns:
+                            if config_names:
+                                present = {name: col for name, col in value_columns.items() if col in df.columns}
+                                if not present:
+                                    logger.debug(f"    No requested value columns in {file_info['file']}")
+                                    continue
+                            elif value_column not in df.columns:
                                 logger.debug(f"    Column {value_column} not found in {file_info['file']}")
                                 continue
                             
@@ -660,20 +618,30 @@ class SmartValidationWrapper:
                                 'building_id': df['building_id'],
                                 'DateTime': df['timestamp'] if 'timestamp' in df.columns else df['DateTime'],
                                 'Variable': variable_col,
-                                'Value': df[value_column],
+                                'Value': df[value_column] if not config_names else np.nan,
                                 'Units': df['Units'] if 'Units' in df.columns else 'unknown',
                                 'Zone': df['Zone'] if 'Zone' in df.columns else 'Building',
                                 '_source_frequency': actual_freq  # Store actual frequency for aggregation
                             })
                             
-                            # Add variant info if loading variant data
-                            if variant_id:
+                            if config_names:
+                                # One block of rows per configuration, all from this single read
+                                blocks = []
+                                for name, col in present.items():
+                                    block = sim_df.copy()
+                                    block['Value'] = df[col].to_numpy()
+                                    block['config_name'] = name
+                                    blocks.append(block)
+                                sim_df = pd.concat(blocks, ignore_index=True)
+                            elif variant_id:
+                                # Add variant info if loading variant data
                                 sim_df['variant_id'] = variant_id
                             
                             comparison_data.append(sim_df)
                             loaded_frequencies[var_name] = actual_freq
                             var_loaded = True
-                            logger.info(f"    Loaded {file_info['variable']} from comparison file ({value_column}, {actual_freq} data)")
+                            loaded_columns = f"{len(present)} configurations" if config_names else value_column
+                            logger.info(f"    Loaded {file_info['variable']} from comparison file ({loaded_columns}, {actual_freq} data)")
                             break  # Stop after loading this variable
                         except Exception as e:
                             logger.debug(f"    Error loading {file_info['file']}: {str(e)}")
@@ -951,6 +919,8 @@ class SmartValidationWrapper:
         group_cols = ['building_id', 'Date']
         if 'Variable' in df.columns:
             group_cols.insert(1, 'Variable')
+        if 'config_name' in df.columns:
+            group_cols.insert(0, 'config_name')
         if 'Zone' in df.columns and df['Zone'].nunique() > 1:
             group_cols.append('Zone')
         
@@ -1015,6 +985,8 @@ class SmartValidationWrapper:
         group_cols = ['building_id', 'YearMonth']
         if 'Variable' in df.columns:
             group_cols.insert(1, 'Variable')
+        if 'config_name' in df.columns:
+            group_cols.insert(0, 'config_name')
         if 'Zone' in df.columns and df['Zone'].nunique() > 1:
             group_cols.append('Zone')
         
@@ -1337,155 +1309,236 @@ class SmartValidationWrapper:
         
         return agg_df
         
-    def align_and_validate_mapping(self, real_df: pd.DataFrame, sim_df: pd.DataFrame, 
-                                  mapping: ValidationMapping) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-        """Align real and simulated data for a specific variable mapping"""
-        alignment_info = {
-            'mapping': mapping,
-            'real_count': 0,
-            'sim_count': 0,
-            'aligned_count': 0,
-            'unit_conversion': None,
-            'zone_aggregation': None,
-            'issues': []
-        }
-        
-        # Filter data for the mapped variables
-        real_data = real_df[real_df['Variable'] == mapping.real_var].copy()
-        sim_data = sim_df[sim_df['Variable'] == mapping.sim_var].copy()
-        
-        alignment_info['real_count'] = len(real_data)
-        alignment_info['sim_count'] = len(sim_data)
-        
-        if real_data.empty:
-            alignment_info['issues'].append(f"No real data found for {mapping.real_var}")
-            return pd.DataFrame(), alignment_info
-        
-        if sim_data.empty:
-            alignment_info['issues'].append(f"No simulation data found for {mapping.sim_var}")
-            return pd.DataFrame(), alignment_info
+    def _period_key(self, datetimes: pd.Series) -> np.ndarray:
+        """Integer join key per timestamp: day number, or month*100 + day when matching ignores the year"""
+        if not pd.api.types.is_datetime64_any_dtype(datetimes):
+            datetimes = pd.to_datetime(datetimes)
+        if self.config.year_agnostic_matching:
+            return (datetimes.dt.month * 100 + datetimes.dt.day).to_numpy(dtype=np.int64)
+        return datetimes.to_numpy().astype('datetime64[D]').astype(np.int64)
+    
+    def _collapse_to_periods(self, df: pd.DataFrame, keys: List[str]) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Reduce long data to one row per (keys..., Variable, period).
         
-        # Get unique buildings
-        real_buildings = set(real_data['building_id'].unique())
-        sim_buildings = set(sim_data['building_id'].unique())
-        common_buildings = real_buildings & sim_buildings
+        Zones are aggregated to building level with each variable's aggregation
+        method ('Environment' rows are dropped where a building has several zones).
         
-        if not common_buildings:
-            alignment_info['issues'].append(f"No common buildings between datasets")
-            alignment_info['issues'].append(f"Real buildings: {real_buildings}")
-            alignment_info['issues'].append(f"Sim buildings: {sim_buildings}")
-            return pd.DataFrame(), alignment_info
+        Returns:
+            (collapsed frame with keys + Variable, _period, Value, Units;
+             number of zones aggregated per (keys..., Variable))
+        """
+        group_cols = keys + ['Variable']
+        work = df[[c for c in group_cols + ['DateTime', 'Value', 'Units', 'Zone'] if c in df.columns]].copy()
+        if 'Units' not in work.columns:
+            work['Units'] = None
+        work['_period'] = self._period_key(work['DateTime'])
+        
+        zone_counts = pd.Series(dtype=int)
+        if 'Zone' in work.columns:
+            real_zone = work['Zone'] != 'Environment'
+            zone_counts = work[real_zone].groupby(group_cols)['Zone'].nunique()
+            multi_zone = zone_counts[zone_counts > 1]
+            if not multi_zone.empty:
+                in_multi = pd.MultiIndex.from_frame(work[group_cols]).isin(multi_zone.index)
+                work = work[~in_multi | real_zone.to_numpy()]
+        
+        # Sum or mean per variable, as configured
+        methods = {var: self._get_aggregation_method(var) for var in work['Variable'].unique()}
+        collapsed = []
+        for method in set(methods.values()):
+            subset = work[work['Variable'].map(methods) == method]
+            collapsed.append(
+                subset.groupby(group_cols + ['_period'], sort=False)
+                      .agg(Value=('Value', method), Units=('Units', 'first'))
+                      .reset_index()
+            )
+        collapsed_df = pd.concat(collapsed, ignore_index=True) if collapsed else pd.DataFrame(
+            columns=group_cols + ['_period', 'Value', 'Units'])
+        return collapsed_df, zone_counts[zone_counts > 1]
+    
+    def align_all_mappings(self, real_df: pd.DataFrame, sim_df: pd.DataFrame,
+                           mappings: List[ValidationMapping],
+                           config_col: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[Tuple[Any, int], Dict[str, Any]]]:
+        """
+        Align real and simulated data for all mappings (and configurations) in one join.
         
-        aligned_results = []
+        Both sides are reduced to one row per (building, variable, period) with an
+        integer period key, then joined once through the mapping table.
         
-        for building_id in common_buildings:
-            building_real = real_data[real_data['building_id'] == building_id]
-            building_sim = sim_data[sim_data['building_id'] == building_id]
-            
-            # Check if zone aggregation is needed
-            if 'Zone' in building_sim.columns:
-                zones = building_sim[building_sim['Zone'] != 'Environment']['Zone'].unique()
-                if len(zones) > 1:
-                    building_sim = self.aggregate_zones_to_building(
-                        building_sim, mapping.sim_var, building_id
-                    )
-                    alignment_info['zone_aggregation'] = f"Aggregated {len(zones)} zones"
-            
-            # Similarly for real data if it has zones
-            if 'Zone' in building_real.columns:
-                zones = building_real[building_real['Zone'] != 'Environment']['Zone'].unique()
-                if len(zones) > 1:
-                    building_real = self.aggregate_zones_to_building(
-                        building_real, mapping.real_var, building_id
-                    )
-            
-            # Merge on date
-            building_real['Date'] = pd.to_datetime(building_real['DateTime']).dt.date
-            building_sim['Date'] = pd.to_datetime(building_sim['DateTime']).dt.date
-            
-            # Check if year-agnostic matching is enabled
-            year_agnostic = self.config.year_agnostic_matching
-            
-            if year_agnostic:
-                # Create month-day keys for matching, ignoring year
-                building_real['MatchKey'] = pd.to_datetime(building_real['DateTime']).dt.strftime('%m-%d')
-                building_sim['MatchKey'] = pd.to_datetime(building_sim['DateTime']).dt.strftime('%m-%d')
-                merge_on = ['building_id', 'MatchKey']
-            else:
-                merge_on = ['building_id', 'Date']
-            
-            # Check if Units column exists in each dataframe
-            real_cols = ['building_id', 'Date', 'Value']
-            sim_cols = ['building_id', 'Date', 'Value']
-            
-            if year_agnostic:
-                real_cols.append('MatchKey')
-                sim_cols.append('MatchKey')
+        Args:
+            real_df: Measured data (long format)
+            sim_df: Simulated data (long format)
+            mappings: Variable mappings
+            config_col: Optional column in sim_df separating configurations (base/variants)
             
-            real_rename = {'Value': 'Real_Value'}
-            sim_rename = {'Value': 'Sim_Value'}
-
-            if 'Units' in building_real.columns:
-                real_cols.append('Units')
-                real_rename['Units'] = 'Real_Units'
-
-            if 'Units' in building_sim.columns:
-                sim_cols.append('Units')
-                sim_rename['Units'] = 'Sim_Units'
-
-            merged = pd.merge(
-                building_real[real_cols].rename(columns=real_rename),
-                building_sim[sim_cols].rename(columns=sim_rename),
-                on=merge_on,
+        Returns:
+            (aligned frame with config, mapping_idx, building_id, _period, Real_Value, Sim_Value;
+             alignment info per (config, mapping_idx))
+        """
+        sim_df = sim_df.copy() if config_col else sim_df.assign(_config=SINGLE_CONFIG)
+        config_col = config_col or '_config'
+        configs = list(pd.unique(sim_df[config_col]))
+        
+        mapping_table = pd.DataFrame({
+            'mapping_idx': range(len(mappings)),
+            'real_var': [m.real_var for m in mappings],
+            'sim_var': [m.sim_var for m in mappings],
+        })
+        real_counts = real_df['Variable'].value_counts()
+        sim_counts = sim_df.groupby([config_col, 'Variable']).size()
+        
+        real_sel = real_df[real_df['Variable'].isin(mapping_table['real_var'])]
+        sim_sel = sim_df[sim_df['Variable'].isin(mapping_table['sim_var'])]
+        real_periods, _ = self._collapse_to_periods(real_sel, ['building_id'])
+        sim_periods, zone_counts = self._collapse_to_periods(sim_sel, [config_col, 'building_id'])
+        
+        aligned = (
+            real_periods.rename(columns={'Variable': 'real_var', 'Value': 'Real_Value', 'Units': 'Real_Units'})
+            .merge(mapping_table, on='real_var')
+            .merge(
+                sim_periods.rename(columns={'Variable': 'sim_var', 'Value': 'Sim_Value', 'Units': 'Sim_Units'}),
+                on=['building_id', 'sim_var', '_period'],
                 how='inner'
             )
-            
-            # Check for unit conversion
-            if not merged.empty:
-                real_unit = None
-                sim_unit = None
+        )
+        
+        real_buildings = real_periods.groupby('Variable')['building_id'].unique()
+        sim_buildings = sim_periods.groupby([config_col, 'Variable'])['building_id'].unique()
+        max_zones = zone_counts.groupby(level=[config_col, 'Variable']).max() if not zone_counts.empty else {}
+        aligned_counts = aligned.groupby([config_col, 'mapping_idx']).size()
+        aligned_buildings = aligned.groupby([config_col, 'mapping_idx'])['building_id'].unique()
+        
+        infos = {}
+        for config in configs:
+            for idx, mapping in enumerate(mappings):
+                info = {
+                    'mapping': mapping,
+                    'real_count': int(real_counts.get(mapping.real_var, 0)),
+                    'sim_count': int(sim_counts.get((config, mapping.sim_var), 0)),
+                    'aligned_count': int(aligned_counts.get((config, idx), 0)),
+                    'unit_conversion': None,
+                    'zone_aggregation': None,
+                    'issues': []
+                }
+                infos[(config, idx)] = info
                 
-                # Get units if they exist
-                if 'Real_Units' in merged.columns:
-                    real_unit = merged['Real_Units'].iloc[0]
-                if 'Sim_Units' in merged.columns:
-                    sim_unit = merged['Sim_Units'].iloc[0]
+                if not info['real_count']:
+                    info['issues'].append(f"No real data found for {mapping.real_var}")
+                    continue
+                if not info['sim_count']:
+                    info['issues'].append(f"No simulation data found for {mapping.sim_var}")
+                    continue
                 
-                # If we don't have sim units, try to infer from variable name
-                if not sim_unit and mapping.sim_var:
-                    # Extract unit from variable name if it's in brackets
-                    unit_match = re.search(r'\[([^\]]+)\]', mapping.sim_var)
-                    if unit_match:
-                        unit_str = unit_match.group(1)
-                        # Extract just the unit part if it includes frequency
-                        unit_parts = unit_str.split('(')
-                        sim_unit = unit_parts[0].strip()
+                zones = max_zones.get((config, mapping.sim_var))
+                if zones:
+                    info['zone_aggregation'] = f"Aggregated {int(zones)} zones"
                 
-                if real_unit and sim_unit and real_unit != sim_unit:
-                    # Apply conversion
-                    conversion_applied = self._apply_unit_conversion(
-                        merged, 'Sim_Value', sim_unit, real_unit, mapping.sim_var
-                    )
-                    if conversion_applied:
-                        alignment_info['unit_conversion'] = f"{sim_unit} → {real_unit}"
-                    else:    
-                        alignment_info['issues'].append(
+                real_b = set(real_buildings.get(mapping.real_var, []))
+                sim_b = set(sim_buildings.get((config, mapping.sim_var), []))
+                common = real_b & sim_b
+                if not common:
+                    info['issues'].append("No common buildings between datasets")
+                    info['issues'].append(f"Real buildings: {real_b}")
+                    info['issues'].append(f"Sim buildings: {sim_b}")
+                    continue
+                for building_id in sorted(common - set(aligned_buildings.get((config, idx), []))):
+                    info['issues'].append(f"No overlapping dates for building {building_id}")
+                if not info['aligned_count']:
+                    info['issues'].append("No data could be aligned")
+        
+        # Unit conversion, once per mapping (units do not differ between configurations)
+        for idx, mapping in enumerate(mappings):
+            rows = aligned['mapping_idx'].to_numpy() == idx
+            if not rows.any():
+                continue
+            real_unit = aligned.loc[rows, 'Real_Units'].iloc[0]
+            sim_unit = aligned.loc[rows, 'Sim_Units'].iloc[0]
+            
+            # If we don't have sim units, try to infer from variable name
+            if not sim_unit or sim_unit == 'unknown':
+                unit_match = re.search(r'\[([^\]]+)\]', mapping.sim_var or '')
+                if unit_match:
+                    sim_unit = unit_match.group(1).split('(')[0].strip()
+            
+            if real_unit and sim_unit and real_unit != sim_unit:
+                values = aligned.loc[rows, ['Sim_Value']]
+                if self._apply_unit_conversion(values, 'Sim_Value', sim_unit, real_unit, mapping.sim_var):
+                    aligned.loc[rows, 'Sim_Value'] = values['Sim_Value'].to_numpy()
+                    conversion = f"{sim_unit} → {real_unit}"
+                    for config in configs:
+                        infos[(config, idx)]['unit_conversion'] = conversion
+                else:
+                    for config in configs:
+                        infos[(config, idx)]['issues'].append(
                             f"Could not convert units: {sim_unit} to {real_unit} for {mapping.sim_var}"
                         )
-
-            if not merged.empty:
-                aligned_results.append(merged)
-            else:
-                alignment_info['issues'].append(f"No overlapping dates for building {building_id}")
         
-        if aligned_results:
-            final_df = pd.concat(aligned_results, ignore_index=True)
-            alignment_info['aligned_count'] = len(final_df)
-        else:
-            final_df = pd.DataFrame()
-            alignment_info['issues'].append("No data could be aligned")
+        if config_col != 'config_name':
+            aligned = aligned.rename(columns={config_col: 'config_name'})
+        return aligned, infos
+    
+    def _evaluate_aligned(self, aligned: pd.DataFrame, mappings: List[ValidationMapping],
+                          infos: Dict[Tuple[Any, int], Dict[str, Any]]) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Metrics for every configuration x mapping x building in a single reduction.
+        
+        Returns:
+            config -> list of result dicts (series with fewer than 10 points are skipped)
+        """
+        results = defaultdict(list)
+        if aligned.empty:
+            return results
+        
+        metrics = grouped_validation_metrics(aligned, ['config_name', 'mapping_idx', 'building_id'])
         
-        return final_df, alignment_info
+        for (config, idx, building_id), row in metrics.iterrows():
+            mapping = mappings[idx]
+            info = infos[(config, idx)]
+            if row['data_points'] < 10:  # Need sufficient data points
+                logger.warning(f"    - Building {building_id} ({mapping.real_var}): "
+                               f"Insufficient data ({int(row['data_points'])} points)")
+                continue
+            
+            cvrmse_threshold = self.config.get_threshold('cvrmse', mapping.real_var)
+            nmbe_threshold = self.config.get_threshold('nmbe', mapping.real_var)
+            pass_cvrmse = bool(row['cvrmse'] <= cvrmse_threshold)
+            pass_nmbe = bool(abs(row['nmbe']) <= nmbe_threshold)
+            
+            results[config].append({
+                'building_id': building_id,
+                'real_variable': mapping.real_var,
+                'sim_variable': mapping.sim_var,
+                'mapping_confidence': mapping.confidence,
+                'mapping_type': mapping.match_type,
+                'data_points': int(row['data_points']),
+                'cvrmse': row['cvrmse'],
+                'nmbe': row['nmbe'],
+                'mbe': row['mbe'],
+                'r2': row['r2'],
+                'peak_avg_obs_val': row['peak_avg_obs_val'],
+                'peak_avg_sim_val': row['peak_avg_sim_val'],
+                'peak_avg_magnitude_diff_pct': row['peak_avg_magnitude_diff_pct'],
+                'cvrmse_threshold': cvrmse_threshold,
+                'nmbe_threshold': nmbe_threshold,
+                'pass_cvrmse': pass_cvrmse,
+                'pass_nmbe': pass_nmbe,
+                'pass_overall': pass_cvrmse and pass_nmbe,
+                'unit_conversion': info.get('unit_conversion'),
+                'zone_aggregation': info.get('zone_aggregation'),
+                'issues': info.get('issues', [])
+            })
+        
+        return results
+    
+    def align_and_validate_mapping(self, real_df: pd.DataFrame, sim_df: pd.DataFrame, 
+                                  mapping: ValidationMapping) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Align real and simulated data for a specific variable mapping"""
+        aligned, infos = self.align_all_mappings(real_df, sim_df, [mapping])
+        info = infos[(SINGLE_CONFIG, 0)]
+        if aligned.empty:
+            return pd.DataFrame(), info
+        return aligned.drop(columns=['config_name', 'mapping_idx']), info
     
     def _apply_unit_conversion(self, df: pd.DataFrame, value_col: str, 
                               from_unit: str, to_unit: str, variable_name: str) -> bool:
@@ -1505,7 +1558,7 @@ class SmartValidationWrapper:
                 logger.info(f"  Converting {variable_name}: {from_unit} → {to_unit}")
             
             if callable(converter):
-                df[value_col] = df[value_col].apply(converter)
+                df[value_col] = converter(df[value_col])
             else:
                 df[value_col] = df[value_col] * converter
             
@@ -1573,73 +1626,32 @@ class SmartValidationWrapper:
             # Step 6: Validate each mapping
             self._log_step("Validating data...")
             
-            for mapping in results['mappings']:
+            mappings = results['mappings']
+            aligned_df, infos = self.align_all_mappings(real_df, sim_df, mappings)
+            results['alignment_details'] = [infos[(SINGLE_CONFIG, idx)] for idx in range(len(mappings))]
+            by_config = self._evaluate_aligned(aligned_df, mappings, infos)
+            
+            results['validation_results'].extend(by_config.get(SINGLE_CONFIG, []))
+            
+            # Log results per mapping
+            for idx, mapping in enumerate(mappings):
                 logger.info(f"\n  Validating: {mapping.real_var} ↔ {mapping.sim_var}")
-                
-                try:
-                    aligned_df, alignment_info = self.align_and_validate_mapping(real_df, sim_df, mapping)
-                    results['alignment_details'].append(alignment_info)
+                alignment_info = infos[(SINGLE_CONFIG, idx)]
+                if not alignment_info['aligned_count']:
+                    logger.warning(f"    - Failed to align data: {alignment_info.get('issues', [])}")
+                    continue
+                for result in results['validation_results']:
+                    if result['real_variable'] != mapping.real_var or result['sim_variable'] != mapping.sim_var:
+                        continue
+                    pass_fail = "PASS" if (result['pass_cvrmse'] and result['pass_nmbe']) else "FAIL"
+                    logger.info(f"    - Building {result['building_id']}: {pass_fail}")
+                    logger.info(f"      CVRMSE: {result['cvrmse']:.1f}% (threshold: {result['cvrmse_threshold']}%)")
+                    logger.info(f"      NMBE: {result['nmbe']:.1f}% (threshold: ±{result['nmbe_threshold']}%)")
                     
-                    if not aligned_df.empty:
-                        # Calculate metrics for each building
-                        for building_id in aligned_df['building_id'].unique():
-                            building_data = aligned_df[aligned_df['building_id'] == building_id]
-                            
-                            if len(building_data) >= 10:  # Need sufficient data points
-                                # Calculate metrics
-                                real_values = building_data['Real_Value'].values
-                                sim_values = building_data['Sim_Value'].values
-                                
-                                cvrmse_val = cv_rmse(sim_values, real_values)
-                                nmbe_val = nmbe(sim_values, real_values)
-                                mbe_val = mean_bias_error(sim_values, real_values)
-                                
-                                # Get thresholds
-                                cvrmse_threshold = self.config.get_threshold('cvrmse', mapping.real_var)
-                                nmbe_threshold = self.config.get_threshold('nmbe', mapping.real_var)
-                                
-                                # Store results
-                                result = {
-                                    'building_id': building_id,
-                                    'real_variable': mapping.real_var,
-                                    'sim_variable': mapping.sim_var,
-                                    'mapping_confidence': mapping.confidence,
-                                    'mapping_type': mapping.match_type,
-                                    'data_points': len(building_data),
-                                    'cvrmse': cvrmse_val,
-                                    'nmbe': nmbe_val,
-                                    'mbe': mbe_val,
-                                    'cvrmse_threshold': cvrmse_threshold,
-                                    'nmbe_threshold': nmbe_threshold,
-                                    'pass_cvrmse': cvrmse_val <= cvrmse_threshold,
-                                    'pass_nmbe': abs(nmbe_val) <= nmbe_threshold,
-                                    'unit_conversion': alignment_info.get('unit_conversion'),
-                                    'zone_aggregation': alignment_info.get('zone_aggregation'),
-                                    'issues': alignment_info.get('issues', [])
-                                }
-                                
-                                results['validation_results'].append(result)
-                                
-                                # Log result
-                                pass_fail = "PASS" if (result['pass_cvrmse'] and result['pass_nmbe']) else "FAIL"
-                                logger.info(f"    - Building {building_id}: {pass_fail}")
-                                logger.info(f"      CVRMSE: {cvrmse_val:.1f}% (threshold: {cvrmse_threshold}%)")
-                                logger.info(f"      NMBE: {nmbe_val:.1f}% (threshold: ±{nmbe_threshold}%)")
-                                
-                                if alignment_info.get('unit_conversion'):
-                                    logger.info(f"      Unit conversion: {alignment_info['unit_conversion']}")
-                                if alignment_info.get('zone_aggregation'):
-                                    logger.info(f"      Zone aggregation: {alignment_info['zone_aggregation']}")
-                            else:
-                                logger.warning(f"    - Building {building_id}: Insufficient data ({len(building_data)} points)")
-                    else:
-                        # Log alignment failure
-                        logger.warning(f"    - Failed to align data: {alignment_info.get('issues', [])}")
-                        
-                except Exception as e:
-                    logger.error(f"    - Error validating {mapping.real_var}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    if alignment_info.get('unit_conversion'):
+                        logger.info(f"      Unit conversion: {alignment_info['unit_conversion']}")
+                    if alignment_info.get('zone_aggregation'):
+                        logger.info(f"      Zone aggregation: {alignment_info['zone_aggregation']}")
             
             # Generate summary
             results['summary'] = self._generate_summary(results)
@@ -1686,23 +1698,19 @@ class SmartValidationWrapper:
             
             logger.info(f"\nFound {len(variant_ids)} variants to validate")
             
-            # Step 4: Validate base simulation
-            logger.info("\n--- Validating Base Simulation ---")
-            base_sim_df = self._load_from_comparison_files(discovery, self.config.target_frequency, variant_id=None)
-            
-            if not base_sim_df.empty:
-                # Run validation for base
-                base_results = self._validate_single_configuration(real_df, base_sim_df, real_vars, "base")
-                all_results['base_results'] = base_results
+            # Step 4: Load base and all variants from one read of each comparison file
+            config_names = ['base'] + sorted(variant_ids)
+            sim_all = self._load_from_comparison_files(
+                discovery, self.config.target_frequency, config_names=config_names
+            )
             
-            # Step 5: Validate each variant
-            for variant_id in sorted(variant_ids):
-                logger.info(f"\n--- Validating {variant_id} ---")
-                variant_sim_df = self._load_from_comparison_files(discovery, self.config.target_frequency, variant_id=variant_id)
-                
-                if not variant_sim_df.empty:
-                    variant_results = self._validate_single_configuration(real_df, variant_sim_df, real_vars, variant_id)
-                    all_results['variant_results'][variant_id] = variant_results
+            # Step 5: Validate every configuration in a single join/reduction
+            if not sim_all.empty:
+                config_results = self._validate_configurations(real_df, sim_all, real_vars)
+                all_results['base_results'] = config_results.pop('base', None)
+                all_results['variant_results'] = {
+                    name: config_results[name] for name in sorted(config_results)
+                }
             
             # Step 6: Compare all results and find best variant
             all_results['variant_comparison'] = self._compare_variant_results(all_results)
@@ -1715,77 +1723,59 @@ class SmartValidationWrapper:
         
         return all_results
     
-    def _validate_single_configuration(self, real_df: pd.DataFrame, sim_df: pd.DataFrame, 
-                                     real_vars: List[str], config_name: str) -> Dict[str, Any]:
-        """Validate a single configuration (base or variant) against real data"""
-        results = {
-            'config_name': config_name,
-            'mappings': [],
-            'validation_results': [],
-            'alignment_details': [],
-            'summary': {}
-        }
-        
-        if sim_df.empty:
-            results['summary'] = {'status': 'No simulation data'}
-            return results
-        
+    def _validate_configurations(self, real_df: pd.DataFrame, sim_df: pd.DataFrame,
+                                 real_vars: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Validate several configurations (rows tagged by config_name) against real data at once"""
         sim_vars = sim_df['Variable'].unique().tolist() if 'Variable' in sim_df.columns else []
+        config_names = list(pd.unique(sim_df['config_name']))
         
-        # Align frequencies
+        # Align frequencies (the real data is aggregated once for all configurations)
         real_df_aligned, sim_df_aligned = self.align_frequencies(real_df, sim_df)
         
         # Create variable mappings
-        results['mappings'] = self.create_variable_mappings(real_vars, sim_vars)
-        
-        # Validate each mapping
-        for mapping in results['mappings']:
-            try:
-                aligned_df, alignment_info = self.align_and_validate_mapping(real_df_aligned, sim_df_aligned, mapping)
-                results['alignment_details'].append(alignment_info)
-                
-                if not aligned_df.empty:
-                    # Calculate metrics for each building
-                    for building_id in aligned_df['building_id'].unique():
-                        building_data = aligned_df[aligned_df['building_id'] == building_id]
-                        
-                        if len(building_data) >= 10:
-                            # Calculate metrics
-                            real_values = building_data['Real_Value'].values
-                            sim_values = building_data['Sim_Value'].values
-                            
-                            cvrmse_val = cv_rmse(sim_values, real_values)
-                            nmbe_val = nmbe(sim_values, real_values)
-                            
-                            # Get thresholds
-                            cvrmse_threshold = self.config.get_threshold('cvrmse', mapping.real_var)
-                            nmbe_threshold = self.config.get_threshold('nmbe', mapping.real_var)
-                            
-                            # Store results
-                            result = {
-                                'config_name': config_name,
-                                'building_id': building_id,
-                                'real_variable': mapping.real_var,
-                                'sim_variable': mapping.sim_var,
-                                'data_points': len(building_data),
-                                'cvrmse': cvrmse_val,
-                                'nmbe': nmbe_val,
-                                'cvrmse_threshold': cvrmse_threshold,
-                                'nmbe_threshold': nmbe_threshold,
-                                'pass_cvrmse': cvrmse_val <= cvrmse_threshold,
-                                'pass_nmbe': abs(nmbe_val) <= nmbe_threshold,
-                                'pass_overall': cvrmse_val <= cvrmse_threshold and abs(nmbe_val) <= nmbe_threshold
-                            }
-                            
-                            results['validation_results'].append(result)
-                            
-            except Exception as e:
-                logger.error(f"Error validating {mapping.real_var} for {config_name}: {str(e)}")
+        mappings = self.create_variable_mappings(real_vars, sim_vars)
+        
+        aligned_df, infos = self.align_all_mappings(real_df_aligned, sim_df_aligned, mappings,
+                                                    config_col='config_name')
+        by_config = self._evaluate_aligned(aligned_df, mappings, infos)
+        
+        all_results = {}
+        for config_name in config_names:
+            validation_results = []
+            for result in by_config.get(config_name, []):
+                validation_results.append({
+                    'config_name': config_name,
+                    **{k: v for k, v in result.items()
+                       if k not in ('mapping_confidence', 'mapping_type', 'unit_conversion',
+                                    'zone_aggregation', 'issues')}
+                })
+            results = {
+                'config_name': config_name,
+                'mappings': mappings,
+                'validation_results': validation_results,
+                'alignment_details': [infos[(config_name, idx)] for idx in range(len(mappings))],
+                'summary': {}
+            }
+            results['summary'] = self._generate_config_summary(results)
+            all_results[config_name] = results
         
-        # Generate summary
-        results['summary'] = self._generate_config_summary(results)
+        return all_results
+    
+    def _validate_single_configuration(self, real_df: pd.DataFrame, sim_df: pd.DataFrame, 
+                                     real_vars: List[str], config_name: str) -> Dict[str, Any]:
+        """Validate a single configuration (base or variant) against real data"""
+        if sim_df.empty:
+            return {
+                'config_name': config_name,
+                'mappings': [],
+                'validation_results': [],
+                'alignment_details': [],
+                'summary': {'status': 'No simulation data'}
+            }
         
-        return results
+        return self._validate_configurations(
+            real_df, sim_df.assign(config_name=config_name), real_vars
+        )[config_name]
     
     def _generate_config_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate summary for a single configuration"""